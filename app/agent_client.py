@@ -0,0 +1,363 @@
+"""
+Caching client for the SIO_IRRIGATION_AGENT :run endpoint
+Used by the dashboard and tests/test_agent.py so repeated questions skip orchestration, Analyst SQL generation
+and warehouse time:
+- question text is normalized (case, Unicode form, punctuation, whitespace) before it becomes a cache key
+- entries expire by the tools the answer used: policy answers live for a day, data answers until the next
+  refresh, and answers that sent email or scraped the web are never cached
+- an optional freshness() token (e.g. the latest load time) is part of the key, so new data misses immediately
+- concurrent identical requests share one upstream call
+stream() consumes the server-sent events of a streaming :run call (text deltas, tool calls) for the Ask SIO tab
+and shares the same cache; trim_history() keeps a conversation inside a token budget.
+"""
+
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+
+import requests
+
+# Seconds an answer stays valid, by the tools the agent used (the shortest applies)
+TOOL_TTL_SECONDS = {
+    'knowledge_base': 24 * 3600,     # Policy documents change rarely
+    'irrigation_data': 15 * 60,      # Billing and aggregate tables refresh hourly or faster
+    'data_analyst': 15 * 60,         # Same semantic model and tables as irrigation_data
+    'predict_demand': 3600,          # FORECAST_CACHE is recomputed nightly after the feature store refresh
+    'efficiency_analysis': 3600,     # Scores refresh nightly; bounds staleness after the refresh
+}
+DEFAULT_TTL_SECONDS = 3600           # Tools not listed above (custom agents); override with tool_ttl=
+# Side effects or live external data: always go to the agent
+UNCACHEABLE_TOOLS = {'send_email', 'web_scrape'}
+
+LATENCY_WINDOW = 1000
+CHARS_PER_TOKEN = 4              # Rough English/Arabic average; only used to bound history size
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class AgentError(RuntimeError):
+    """Non-200 response from the agent endpoint"""
+
+    def __init__(self, status_code, text):
+        super().__init__(f'Agent returned {status_code}: {text[:200]}')
+        self.status_code = status_code
+        self.text = text
+
+
+def normalize_question(text):
+    """Case-, punctuation- and whitespace-insensitive form of a question ('Unpaid bills?' == 'unpaid  BILLS')"""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = re.sub(r'[^\w\s%.\-]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip(' .-')
+
+
+def message_text(message):
+    """Concatenated text items of one agent message"""
+    return ' '.join(item.get('text', '') for item in message.get('content', []) if item.get('type') == 'text')
+
+
+def tools_used(response):
+    """Names of the tools the agent called while producing response"""
+    return {
+        item['tool_use'].get('name')
+        for item in response.get('message', {}).get('content', [])
+        if item.get('type') == 'tool_use' and item.get('tool_use')
+    }
+
+
+def ttl_for(tools, tool_ttl=TOOL_TTL_SECONDS, default_ttl=DEFAULT_TTL_SECONDS):
+    """Seconds to cache an answer that used tools; 0 = do not cache"""
+    if tools & UNCACHEABLE_TOOLS:
+        return 0
+    return min((tool_ttl.get(tool, default_ttl) for tool in tools), default=default_ttl)
+
+
+def estimate_tokens(message):
+    """Approximate prompt tokens of one message"""
+    return MESSAGE_OVERHEAD_TOKENS + len(message_text(message)) // CHARS_PER_TOKEN
+
+
+def trim_history(messages, max_tokens):
+    """Newest messages that fit in max_tokens, starting at a user turn; the last message is always kept"""
+    kept, total = [], 0
+    for message in reversed(messages):
+        total += estimate_tokens(message)
+        if kept and total > max_tokens:
+            break
+        kept.append(message)
+    kept.reverse()
+    while len(kept) > 1 and kept[0].get('role') != 'user':
+        kept.pop(0)
+    return kept
+
+
+def parse_sse(lines):
+    """(event, data) pairs from server-sent event lines; JSON data is decoded"""
+    event, data = 'message', []
+    for line in lines:
+        if not line:
+            if data:
+                raw = '\n'.join(data)
+                try:
+                    yield event, json.loads(raw)
+                except json.JSONDecodeError:
+                    yield event, raw
+            event, data = 'message', []
+            continue
+        if line.startswith(':'):
+            continue
+        field, _, value = line.partition(':')
+        value = value[1:] if value.startswith(' ') else value
+        if field == 'event':
+            event = value
+        elif field == 'data':
+            data.append(value)
+    if data:
+        yield event, '\n'.join(data)
+
+
+def replay_events(message):
+    """Stream events equivalent to a complete (cached) agent message"""
+    for item in message.get('content', []):
+        if item.get('type') == 'tool_use':
+            yield {'type': 'tool_use', 'name': item['tool_use'].get('name'), 'input': item['tool_use'].get('input', {})}
+        elif item.get('type') == 'tool_results':
+            yield {'type': 'tool_result', 'name': item['tool_results'].get('name'),
+                   'content': item['tool_results'].get('content', [])}
+        elif item.get('type') == 'text':
+            yield {'type': 'text', 'text': item.get('text', '')}
+
+
+def percentile(values, q):
+    """q-th percentile of a small list (nearest rank), or None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class _Flight:
+    """One upstream call that concurrent identical requests wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class AgentClient:
+    """Thread-safe caching client for one agent :run URL"""
+
+    def __init__(self, url, token=None, timeout=120, max_entries=512, tool_ttl=None,
+                 default_ttl=DEFAULT_TTL_SECONDS, freshness=None, freshness_interval=60, clock=time.monotonic):
+        self.url = url
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.tool_ttl = {**TOOL_TTL_SECONDS, **(tool_ttl or {})}
+        self.default_ttl = default_ttl
+        self.freshness = freshness
+        self.freshness_interval = freshness_interval
+        self.clock = clock
+
+        self.headers = {'Content-Type': 'application/json'}
+        if token:
+            self.headers['Authorization'] = f'Bearer {token}'
+            self.headers['X-Snowflake-Authorization-Token-Type'] = 'PROGRAMMATIC_ACCESS_TOKEN'
+        self.http = requests.Session()
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()      # key -> (expires_at, response)
+        self._inflight = {}                # key -> _Flight
+        self._freshness_token = None
+        self._freshness_checked = None
+        self._counts = dict.fromkeys(
+            ('requests', 'hits', 'misses', 'coalesced', 'uncacheable', 'errors', 'evictions'), 0
+        )
+        self._latency = {'hit': deque(maxlen=LATENCY_WINDOW), 'miss': deque(maxlen=LATENCY_WINDOW)}
+
+    def cache_key(self, messages):
+        """Stable key for a conversation: normalized turns, the endpoint and the data freshness token"""
+        turns = [(message.get('role'), normalize_question(message_text(message))) for message in messages]
+        raw = json.dumps([self.url, self._current_freshness(), turns], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _current_freshness(self):
+        """freshness() result, re-evaluated at most every freshness_interval seconds"""
+        if self.freshness is None:
+            return None
+        now = self.clock()
+        if self._freshness_checked is None or now - self._freshness_checked >= self.freshness_interval:
+            self._freshness_token = str(self.freshness())
+            self._freshness_checked = now
+        return self._freshness_token
+
+    def _post(self, messages):
+        response = self.http.post(self.url, headers=self.headers, json={'messages': messages}, timeout=self.timeout)
+        if response.status_code != 200:
+            raise AgentError(response.status_code, response.text)
+        return response.json()
+
+    def _post_counted(self, messages):
+        """_post(), counting failures"""
+        try:
+            return self._post(messages)
+        except Exception:
+            with self._lock:
+                self._counts['errors'] += 1
+            raise
+
+    def _record(self, kind, start):
+        self._latency[kind].append((time.perf_counter() - start) * 1000)
+
+    def _fresh(self, key):
+        """Cached response for key if it has not expired (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry and entry[0] > self.clock():
+            self._entries.move_to_end(key)
+            return entry[1]
+        if entry:
+            del self._entries[key]
+        return None
+
+    def _store(self, key, response, start):
+        """Count a miss and cache response for as long as the tools it used allow"""
+        ttl = ttl_for(tools_used(response), self.tool_ttl, self.default_ttl)
+        with self._lock:
+            self._counts['misses'] += 1
+            self._record('miss', start)
+            if ttl > 0:
+                self._entries[key] = (self.clock() + ttl, response)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._counts['evictions'] += 1
+            else:
+                self._counts['uncacheable'] += 1
+
+    def run(self, messages):
+        """:run response for a conversation (list of messages), from cache when fresh; returns (response, cached)"""
+        start = time.perf_counter()
+        key = self.cache_key(messages)
+
+        with self._lock:
+            self._counts['requests'] += 1
+            cached = self._fresh(key)
+            if cached is not None:
+                self._counts['hits'] += 1
+                self._record('hit', start)
+                return copy.deepcopy(cached), True
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            if not flight.done.wait(self.timeout):
+                # The leader outlived our own timeout: call upstream ourselves rather than return nothing
+                response = self._post_counted(messages)
+                self._store(key, response, start)
+                return copy.deepcopy(response), False
+            if flight.error is not None:
+                raise flight.error  # Counted once, by the leader
+            with self._lock:
+                self._counts['coalesced'] += 1
+                self._record('hit', start)
+            return copy.deepcopy(flight.response), True
+
+        try:
+            flight.response = self._post_counted(messages)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+        self._store(key, flight.response, start)
+        return copy.deepcopy(flight.response), False
+
+    def stream(self, messages):
+        """Yield events for a conversation as the agent produces them:
+        {'type': 'status' | 'tool_use' | 'tool_result' | 'text', ...} then {'type': 'done', 'message', 'cached'}
+        Cached answers are replayed instantly; streamed calls are cached but not coalesced."""
+        start = time.perf_counter()
+        key = self.cache_key(messages)
+
+        with self._lock:
+            self._counts['requests'] += 1
+            cached = self._fresh(key)
+            if cached is not None:
+                self._counts['hits'] += 1
+                self._record('hit', start)
+        if cached is not None:
+            message = copy.deepcopy(cached.get('message', {}))
+            yield from replay_events(message)
+            yield {'type': 'done', 'message': message, 'cached': True}
+            return
+
+        content, text, final = [], [], None
+        try:
+            with self.http.post(self.url, headers={**self.headers, 'Accept': 'text/event-stream'},
+                                json={'messages': messages, 'stream': True}, timeout=self.timeout,
+                                stream=True) as response:
+                if response.status_code != 200:
+                    raise AgentError(response.status_code, response.text)
+                response.encoding = 'utf-8'
+                for event, data in parse_sse(response.iter_lines(chunk_size=None, decode_unicode=True)):
+                    data = data if isinstance(data, dict) else {}
+                    if event == 'response.text.delta':
+                        text.append(data.get('text', ''))
+                        yield {'type': 'text', 'text': data.get('text', '')}
+                    elif event == 'response.tool_use':
+                        content.append({'type': 'tool_use', 'tool_use': {'name': data.get('name'),
+                                                                         'input': data.get('input', {})}})
+                        yield {'type': 'tool_use', 'name': data.get('name'), 'input': data.get('input', {})}
+                    elif event == 'response.tool_result':
+                        content.append({'type': 'tool_results', 'tool_results': {'name': data.get('name'),
+                                                                                 'content': data.get('content', [])}})
+                        yield {'type': 'tool_result', 'name': data.get('name'), 'content': data.get('content', [])}
+                    elif event == 'response.status':
+                        yield {'type': 'status', 'status': data.get('status'), 'message': data.get('message', '')}
+                    elif event == 'response':
+                        final = data
+                    elif event == 'error':
+                        raise AgentError(data.get('code', 500), data.get('message', 'Agent stream error'))
+        except Exception:
+            with self._lock:
+                self._counts['errors'] += 1
+            raise
+
+        if not final:
+            final = {'role': 'assistant', 'content': content + [{'type': 'text', 'text': ''.join(text)}]}
+        self._store(key, {'message': final}, start)
+        yield {'type': 'done', 'message': copy.deepcopy(final), 'cached': False}
+
+    def ask(self, question, history=None):
+        """Ask one question after optional prior messages; returns (assistant message, cached)"""
+        messages = list(history or []) + [{'role': 'user', 'content': [{'type': 'text', 'text': question}]}]
+        response, cached = self.run(messages)
+        return response.get('message', {}), cached
+
+    def clear(self):
+        """Drop every cached answer (e.g. after a manual data refresh)"""
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        """Counters, hit rate (hits + coalesced over requests) and p50/p95 latency in ms for hits and misses"""
+        with self._lock:
+            counts = dict(self._counts)
+            latency = {kind: list(values) for kind, values in self._latency.items()}
+            counts['entries'] = len(self._entries)
+        served = counts['hits'] + counts['coalesced']
+        counts['hit_rate'] = served / counts['requests'] if counts['requests'] else 0.0
+        for kind, values in latency.items():
+            counts[f'{kind}_p50_ms'] = percentile(values, 50)
+            counts[f'{kind}_p95_ms'] = percentile(values, 95)
+        return counts
@@ -0,0 +1,156 @@
+"""
+Opt-in profiling for dashboard reruns
+Switch on with SIO_PROFILE_RERUN=spans|cprofile|sample or the ?profile=spans|cprofile|sample query parameter.
+Spans nest and carry a kind (section, sql, pandas, plotly, render). Every profiled rerun writes its spans as
+collapsed stacks ('rerun;Overview;sql: SELECT ... <microseconds>' per line - speedscope, flamegraph.pl,
+inferno). cprofile adds a .prof for the whole rerun (snakeviz, python -m pstats); sample adds the rerun
+thread's Python stacks sampled every few milliseconds, in the same collapsed format.
+"""
+
+import contextlib
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+MODES = ('spans', 'cprofile', 'sample')
+KINDS = ('section', 'sql', 'pandas', 'plotly', 'render')
+SAMPLE_INTERVAL_S = 0.005
+
+
+def requested_mode(env_value=None, query_value=None):
+    """Profiling mode from the query parameter, else the environment (1/true/on mean spans); None when off"""
+    value = (query_value or env_value or '').strip().lower()
+    if value in ('1', 'true', 'on'):
+        return 'spans'
+    return value if value in MODES else None
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a background thread into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL_S):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sio-rerun-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if names:
+                self.counts[';'.join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class RerunProfile:
+    """Timing spans for one script run, plus an optional cProfile or sampling profiler around it"""
+
+    def __init__(self, mode=None, start=None):
+        self.mode = mode
+        self.enabled = mode is not None
+        self.start = start if start is not None else time.perf_counter()
+        self.spans = []
+        self.total_ms = None
+        self._open = []  # indexes of the spans enclosing the current line
+        self._profiler = None
+        self._sampler = None
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def span(self, name, kind='section'):
+        """Context manager timing a block; a no-op when profiling is off"""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._span(name, kind)
+
+    @contextlib.contextmanager
+    def _span(self, name, kind):
+        name = name.replace(';', ',')  # ';' separates frames in collapsed stacks
+        parent = self._open[-1] if self._open else None
+        record = {'name': name, 'kind': kind, 'depth': len(self._open), 'parent': parent,
+                  'path': f"{self.spans[parent]['path'] if parent is not None else 'rerun'};{name}",
+                  'start_ms': self.elapsed_ms(), 'end_ms': None}
+        self._open.append(len(self.spans))
+        self.spans.append(record)
+        try:
+            yield
+        finally:
+            self._open.pop()
+            record['end_ms'] = self.elapsed_ms()
+
+    def start_profiler(self):
+        """Start cProfile or the stack sampler on the calling (script) thread, per mode"""
+        if self.mode == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:  # another rerun in this process is already under cProfile (Python 3.12+)
+                self._profiler = None
+        elif self.mode == 'sample':
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+
+    def stop(self):
+        """End the rerun: stop any profiler and close spans left open"""
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        self.total_ms = self.elapsed_ms()
+        for record in self.spans:
+            if record['end_ms'] is None:
+                record['end_ms'] = self.total_ms
+
+    def self_times(self):
+        """(path, kind, self ms) per span - its duration minus its direct children's - plus the unspanned rest"""
+        child_ms = Counter()
+        for record in self.spans:
+            child_ms[record['parent']] += record['end_ms'] - record['start_ms']
+        times = [('rerun', 'script', max((self.total_ms or self.elapsed_ms()) - child_ms[None], 0.0))]
+        for index, record in enumerate(self.spans):
+            duration = record['end_ms'] - record['start_ms']
+            times.append((record['path'], record['kind'], max(duration - child_ms[index], 0.0)))
+        return times
+
+    def by_kind(self):
+        """Self time per kind in ms - where the rerun went: SQL, pandas, plotly, rendering or script"""
+        totals = Counter()
+        for _, kind, ms in self.self_times():
+            totals[kind] += ms
+        return dict(totals)
+
+    def write(self, directory):
+        """Write this rerun's flame-graph files into directory; returns their paths"""
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f"rerun-{datetime.now():%Y%m%d-%H%M%S-%f}")
+        paths = [f'{stem}.spans.folded']
+        with open(paths[0], 'w', encoding='utf-8') as f:
+            for path, _, ms in self.self_times():
+                if ms > 0:
+                    f.write(f'{path} {round(ms * 1000)}\n')
+        if self._profiler is not None:
+            paths.append(f'{stem}.prof')
+            self._profiler.dump_stats(paths[-1])
+        if self._sampler is not None:
+            paths.append(f'{stem}.samples.folded')
+            with open(paths[-1], 'w', encoding='utf-8') as f:
+                for stack, count in self._sampler.counts.items():
+                    f.write(f'{stack} {count}\n')
+        return paths
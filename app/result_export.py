@@ -0,0 +1,128 @@
+"""
+Bounded-memory exports and keyset pagination for large dashboard results
+export_query() streams a query's result as Arrow record batches into a CSV or Parquet file, one batch at a time, so
+an export of millions of rows never holds more than one batch in memory. Snowpark sessions and Streamlit's Snowflake
+connection stream the connector's Arrow result chunks; the local DuckDB stand-in streams BATCH_ROWS at a time.
+keyset_query() pages through a query by the values of its sort key instead of OFFSET, so a deep page does not read
+and discard every row before it.
+"""
+
+import math
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+BATCH_ROWS = 100_000
+FORMATS = {
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'CSV': ('csv', 'text/csv'),
+}
+
+
+def arrow_batches(session, query, batch_rows=BATCH_ROWS):
+    """pyarrow RecordBatches of query's result, fetched lazily"""
+    # Snowpark Session (hosted) or st.connection("snowflake") (local development): the connector's Arrow chunks
+    connection = getattr(session, 'connection', None) or getattr(session, 'raw_connection', None)
+    if connection is not None:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query)
+            for table in cursor.fetch_arrow_batches():
+                yield from table.to_batches()
+        finally:
+            cursor.close()
+        return
+    # Local DuckDB stand-in (data_engineering/local_backend.py)
+    yield from session.sql(query).to_arrow_batches(batch_rows)
+
+
+def write_batches(batches, path, fmt):
+    """Write record batches to a 'csv' or 'parquet' file as they arrive; returns the row count"""
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    writer, schema, rows = None, None, 0
+    try:
+        for batch in batches:
+            if writer is None:
+                schema = batch.schema
+                writer = (pq.ParquetWriter(path, schema, compression='zstd') if fmt == 'parquet'
+                          else pa_csv.CSVWriter(path, schema))
+            elif batch.schema != schema:
+                # Result chunks can narrow integer or decimal types; the file keeps the first chunk's schema
+                batch = pa.Table.from_batches([batch]).cast(schema).combine_chunks().to_batches()[0]
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        open(path, 'wb').close()
+    return rows
+
+
+def export_query(session, query, directory, name, format_label='Parquet', batch_rows=BATCH_ROWS):
+    """Stream query's full result into directory/name.<ext>; returns the file's path, size and row count"""
+    extension, mime = FORMATS[format_label]
+    path = os.path.join(directory, f"{name}_{datetime.now():%Y%m%d_%H%M%S}.{extension}")
+    start = time.perf_counter()
+    rows = write_batches(arrow_batches(session, query, batch_rows), path, extension)
+    return {
+        'path': path,
+        'file_name': os.path.basename(path),
+        'mime': mime,
+        'format': format_label,
+        'rows': rows,
+        'bytes': os.path.getsize(path),
+        'seconds': round(time.perf_counter() - start, 3),
+        'query': query
+    }
+
+
+def sql_literal(value):
+    """A sort-key value from a result row as a SQL literal"""
+    if isinstance(value, (bool, np.bool_)):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return f"'{pd.Timestamp(value).isoformat(sep=' ')}'::TIMESTAMP"
+    if isinstance(value, date):
+        return f"'{value.isoformat()}'::DATE"
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (float, np.floating)):
+        if not math.isfinite(value):
+            raise ValueError(f'Sort key value {value} has no SQL literal')
+        return repr(float(value))
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def keyset_predicate(order_by, after):
+    """Rows strictly after the key `after` in order_by order: (a < x) OR (a = x AND b > y) ..."""
+    terms = []
+    for position, (column, direction) in enumerate(order_by):
+        equal = [f'{previous} = {sql_literal(after[previous])}' for previous, _ in order_by[:position]]
+        operator = '<' if direction.upper() == 'DESC' else '>'
+        terms.append('(' + ' AND '.join(equal + [f'{column} {operator} {sql_literal(after[column])}']) + ')')
+    return ' OR '.join(terms)
+
+
+def keyset_query(query, order_by, after=None, limit=50):
+    """The limit rows of query that follow the key `after` in order_by order
+    order_by is [(output column, 'ASC' | 'DESC')] over non-NULL columns, the last of them unique; after maps those
+    columns to the values of the previous page's last row (None for the first page)."""
+    where = f'WHERE {keyset_predicate(order_by, after)}' if after else ''
+    order = ', '.join(f'{column} {direction}' for column, direction in order_by)
+    return f'SELECT * FROM ({query}) result_page {where} ORDER BY {order} LIMIT {int(limit)}'
+
+
+def page_key(page, order_by):
+    """The sort key of a page's last row, to pass as `after` for the next page"""
+    last = page.iloc[-1]
+    return {column: last[column] for column, _ in order_by}
@@ -3,10 +3,19 @@ SIO (Saudi Irrigation Organization) - AI Dashboard
 Water resource optimization and smart agriculture management
 """
 
+import time
+SCRIPT_START = time.perf_counter()
+
+import importlib.util
+import json
+import os
+import tempfile
 import streamlit as st
 import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+import result_export
+from rerun_profile import RerunProfile, requested_mode
+
+STARTUP_PROFILE = {'imports_ms': (time.perf_counter() - SCRIPT_START) * 1000}
 
 # Page config - MUST be first Streamlit command
 st.set_page_config(
@@ -16,39 +25,61 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Load custom CSS
-def load_css():
-    """Load custom CSS for beautiful styling"""
+def query_param(name):
+    """Value of a URL query parameter, or None (older Streamlit in Snowflake has only the experimental API)"""
     try:
-        with open('app/styles.css') as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-    except FileNotFoundError:
-        # Fallback for local development
+        return st.query_params.get(name)
+    except AttributeError:
+        return st.experimental_get_query_params().get(name, [None])[0]
+
+# Rerun profile - opt in with SIO_PROFILE_RERUN or ?profile=spans|cprofile|sample (waterfall at the bottom)
+PROFILE = RerunProfile(requested_mode(os.getenv('SIO_PROFILE_RERUN'), query_param('profile')), SCRIPT_START)
+PROFILE.start_profiler()
+
+# Load custom CSS (read once per process)
+@st.cache_data(show_spinner=False)
+def read_css():
+    """Return custom CSS for beautiful styling, or '' if no stylesheet is found"""
+    for path in ('app/styles.css', 'styles.css'):  # Repo root, then local development from app/
         try:
-            with open('styles.css') as f:
-                st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+            with open(path) as f:
+                return f.read()
         except FileNotFoundError:
-            pass  # No custom CSS available
+            continue
+    return ''
+
+def load_css():
+    """Load custom CSS for beautiful styling"""
+    css = read_css()
+    if css:
+        st.markdown(f'<style>{css}</style>', unsafe_allow_html=True)
 
 load_css()
 
-# Try to import plotly, fallback to streamlit built-in charts
-try:
-    import plotly.express as px
-    import plotly.graph_objects as go
-    
-    # Check if running in SIS (has get_active_session)
+def module_available(name):
+    """True if name can be imported - checked without importing it"""
     try:
-        from snowflake.snowpark.context import get_active_session
-        # In SIS - use native Streamlit charts (Plotly has rendering issues)
-        PLOTLY_AVAILABLE = False
-    except:
-        # Local - use Plotly for enhanced visualizations
-        PLOTLY_AVAILABLE = True
-except ImportError:
-    PLOTLY_AVAILABLE = False
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+# Plotly is imported on first chart (load_plotly); fall back to streamlit built-in charts
+# In SIS (has snowflake.snowpark) use native Streamlit charts (Plotly has rendering issues)
+PLOTLY_AVAILABLE = module_available('plotly') and not module_available('snowflake.snowpark')
+if not module_available('plotly'):
     st.sidebar.warning("⚠️ Plotly not available. Using Streamlit built-in charts.")
 
+def load_plotly():
+    """Import plotly express and graph_objects (a no-op after the first chart in this process)"""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    return px, go
+
+# Agent client for the Ask SIO tab (needs requests) - imported when the tab is configured
+AGENT_CLIENT_AVAILABLE = module_available('requests')
+
+AGENT_HISTORY_TOKENS = 4000  # Prior turns sent with each question
+
 # Initialize Snowflake connection
 @st.cache_resource
 def init_connection():
@@ -61,24 +92,157 @@ def init_connection():
         # Fall back to local development with st.connection
         return st.connection("snowflake")
 
-def get_data(query):
-    """Execute query and return results - works consistently in both local and SIS"""
-    try:
-        session = init_connection()
+def query_label(query):
+    """Short one-line name for a query in the rerun profile"""
+    text = " ".join(query.split())
+    return f"sql: {text[:70]}…" if len(text) > 70 else f"sql: {text}"
+
+def run_query(query):
+    """Execute query and return results - works consistently in both local and SIS (raises on error)"""
+    session = init_connection()
+    with PROFILE.span(query_label(query), 'sql'):
         # Check if it's Snowpark session (hosted) or connection object (local)
         if hasattr(session, 'sql'):
             # Snowflake Streamlit in Snowsight (SIS) - Snowpark session
             df = session.sql(query).to_pandas()
-            # Force reset index to avoid index being used in charts
-            return df.reset_index(drop=True)
         else:
             # Local development - connection object
             df = session.query(query)
-            return df.reset_index(drop=True)
+    # Force reset index to avoid index being used in charts
+    return df.reset_index(drop=True)
+
+def get_data(query):
+    """Execute query and return results, or an empty DataFrame after showing the error"""
+    try:
+        return run_query(query)
     except Exception as e:
         st.error(f"Error executing query: {str(e)}")
         return pd.DataFrame()
 
+PAGE_ROWS = 50  # Rows per page of a keyset-paginated table
+
+def show_keyset_page(key, query, order_by, render):
+    """One page of query in order_by order, drawn by render(page), with Previous/Next (page-start keys in session state)"""
+    pages = st.session_state.setdefault(f"{key}_pages", {'query': query, 'starts': [None]})
+    if pages['query'] != query:  # Filters changed: back to the first page
+        pages.update(query=query, starts=[None])
+    starts = pages['starts']
+    page = get_data(result_export.keyset_query(query, order_by, starts[-1], PAGE_ROWS + 1))
+    if page.empty and len(starts) > 1:  # Rows behind the current page went away since it was opened
+        del starts[1:]
+        page = get_data(result_export.keyset_query(query, order_by, None, PAGE_ROWS + 1))
+    if page.empty:
+        return page
+    has_next = len(page) > PAGE_ROWS
+    page = page.head(PAGE_ROWS)
+    render(page)
+    
+    first_row = (len(starts) - 1) * PAGE_ROWS + 1
+    col1, col2, col3 = st.columns([1, 1, 4])
+    with col1:
+        st.button("◀ Previous", key=f"{key}_previous", disabled=len(starts) == 1, on_click=starts.pop)
+    with col2:
+        st.button("Next ▶", key=f"{key}_next", disabled=not has_next, on_click=starts.append,
+                  args=(result_export.page_key(page, order_by),))
+    with col3:
+        st.caption(f"Page {len(starts)} · rows {first_row:,}-{first_row + len(page) - 1:,}")
+    return page
+
+def export_dir():
+    """This session's export directory under SIO_EXPORT_DIR (default: the system temp directory)"""
+    if 'export_dir' not in st.session_state:
+        root = os.getenv('SIO_EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'sio_exports'))
+        os.makedirs(root, exist_ok=True)
+        st.session_state['export_dir'] = tempfile.mkdtemp(prefix='session_', dir=root)
+    return st.session_state['export_dir']
+
+def show_export(key, query, label):
+    """Export button that streams query's full result to a CSV or Parquet file in Arrow batches, then a download"""
+    exports = st.session_state.setdefault('exports', {})
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        format_label = st.selectbox("Export format", list(result_export.FORMATS), key=f"{key}_format",
+                                    label_visibility="collapsed")
+    with col2:
+        if st.button(f"📦 Export {label}", key=f"{key}_export"):
+            previous = exports.pop(key, None)
+            if previous and os.path.exists(previous['path']):
+                os.remove(previous['path'])
+            with st.spinner(f"Exporting {label}..."), PROFILE.span(f"Export {label}", 'sql'):
+                try:
+                    exports[key] = result_export.export_query(init_connection(), query, export_dir(), key, format_label)
+                except Exception as e:
+                    st.error(f"Export failed: {str(e)}")
+    export = exports.get(key)
+    if export and export['query'] == query and export['format'] == format_label:
+        with col3, open(export['path'], 'rb') as f:
+            st.download_button(f"⬇️ {export['file_name']} ({export['rows']:,} rows, {export['bytes'] / 1e6:,.1f} MB)",
+                               f, file_name=export['file_name'], mime=export['mime'], key=f"{key}_download")
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_regions():
+    """Region dimension - shared by all sessions, cleared by Refresh Data (errors are not cached)"""
+    return run_query("SELECT REGION_ID, REGION_NAME FROM SIO_DB.DATA.REGIONS ORDER BY REGION_NAME")
+
+def get_agent_settings():
+    """Agent :run URL and token from secrets.toml [agent] or SIO_AGENT_URL / SNOWFLAKE_PAT"""
+    try:
+        agent = st.secrets.get("agent", {})
+    except Exception:
+        agent = {}
+    return agent.get("url") or os.getenv("SIO_AGENT_URL"), agent.get("token") or os.getenv("SNOWFLAKE_PAT")
+
+def data_version():
+    """Latest reading date - cached agent answers are keyed on it so new data is never answered from the cache"""
+    df = get_data("SELECT MAX(READING_DATE) AS LATEST FROM SIO_DB.DATA.WATER_USAGE")
+    return None if df.empty else str(df.iloc[0, 0])
+
+@st.cache_resource
+def get_agent_client(url, token):
+    """One caching agent client shared by all dashboard sessions"""
+    from agent_client import AgentClient
+    return AgentClient(url, token=token, freshness=data_version, freshness_interval=300)
+
+def render_agent_turn(turn, tool_area=None):
+    """Show one Ask SIO turn: tool calls, answer and latency"""
+    tool_area = tool_area or st.container()
+    for tool in turn['tools']:
+        tool_area.caption(f"🔧 {tool['name']} · {tool['detail']}")
+    st.markdown(turn['answer'])
+    if turn['total_ms'] is not None:
+        first = f"first token {turn['first_ms']:.0f} ms · " if turn['first_ms'] is not None else ""
+        st.caption(f"⏱️ {first}total {turn['total_ms']:.0f} ms" + (" · ⚡ cached" if turn['cached'] else ""))
+
+PROFILE_COLORS = {'section': '#9e9e9e', 'sql': '#1f77b4', 'pandas': '#2ca02c', 'plotly': '#ff7f0e', 'render': '#d62728'}
+
+def render_rerun_profile(profile):
+    """Per-section waterfall of this rerun, time by kind, and the flame-graph files written for it"""
+    profile_dir = os.getenv('SIO_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'sio_profiles'))
+    paths = profile.write(profile_dir)
+    print(f"⏱️ Rerun profile ({profile.mode}, {profile.total_ms:.0f} ms): {', '.join(paths)}", flush=True)
+    spans = pd.DataFrame(profile.spans, columns=['name', 'kind', 'depth', 'start_ms', 'end_ms'])
+    spans['duration_ms'] = spans['end_ms'] - spans['start_ms']
+    spans['label'] = [f"{index + 1}. {'· ' * depth}{name}" for index, (depth, name) in enumerate(zip(spans['depth'], spans['name']))]
+    
+    with st.expander(f"⏱️ Rerun profile: {profile.total_ms:.0f} ms ({profile.mode})"):
+        st.caption(" · ".join(f"{kind} {ms:.0f} ms" for kind, ms in sorted(profile.by_kind().items(), key=lambda item: -item[1])))
+        if PLOTLY_AVAILABLE and not spans.empty:
+            px, go = load_plotly()
+            fig = go.Figure(go.Bar(
+                x=spans['duration_ms'], base=spans['start_ms'], y=spans['label'], orientation='h',
+                marker_color=[PROFILE_COLORS.get(kind, '#9e9e9e') for kind in spans['kind']],
+                customdata=spans['kind'], hovertemplate='%{y}<br>%{customdata}: %{x:.1f} ms<extra></extra>'
+            ))
+            fig.update_layout(height=max(300, 18 * len(spans)), xaxis_title='ms since script start',
+                              yaxis=dict(autorange='reversed'), margin=dict(l=10, r=10, t=10, b=10))
+            st.plotly_chart(fig)
+        else:
+            st.dataframe(spans[['label', 'kind', 'start_ms', 'duration_ms']].round(1))
+        st.caption(f"Written to {profile_dir}: *.folded opens in speedscope or flamegraph.pl, *.prof in snakeviz")
+        for path in paths:
+            with open(path, 'rb') as f:
+                st.download_button(f"⬇️ {os.path.basename(path)}", f.read(), file_name=os.path.basename(path), key=path)
+
 # App title with styled header
 st.markdown("""
 <div class="main-header">
@@ -86,9 +250,14 @@ st.markdown("""
     <p>Saudi Irrigation Organization - Smart Water Resource Optimization</p>
 </div>
 """, unsafe_allow_html=True)
+STARTUP_PROFILE['first_paint_ms'] = (time.perf_counter() - SCRIPT_START) * 1000
+
+# Skeleton shown until every tab has loaded (first warehouse call happens below)
+loading_placeholder = st.empty()
+loading_placeholder.caption("⏳ Loading dashboard data from Snowflake...")
 
 # Sidebar
-with st.sidebar:
+with st.sidebar, PROFILE.span("Sidebar"):
     st.header("⚙️ Dashboard Controls")
     
     # Refresh button
@@ -103,7 +272,13 @@ with st.sidebar:
     
     # Region selector
     st.subheader("🗺️ Region Selection")
-    regions_df = get_data("SELECT REGION_ID, REGION_NAME FROM SIO_DB.DATA.REGIONS ORDER BY REGION_NAME")
+    regions_start = time.perf_counter()
+    try:
+        regions_df = get_regions()
+    except Exception as e:
+        st.error(f"Error executing query: {str(e)}")
+        regions_df = pd.DataFrame()
+    STARTUP_PROFILE['regions_ms'] = (time.perf_counter() - regions_start) * 1000
     
     if not regions_df.empty:
         # Add "Show All" option
@@ -144,17 +319,18 @@ with st.sidebar:
     """)
 
 # Main dashboard tabs
-tab1, tab2, tab3, tab4 = st.tabs([
+tab1, tab2, tab3, tab4, tab5 = st.tabs([
     "📊 Overview",
     "🗺️ Regional Analysis",
     "🔮 ML Predictions",
-    "💰 Billing & Payments"
+    "💰 Billing & Payments",
+    "💬 Ask SIO"
 ])
 
 # ============================================================================
 # TAB 1: OVERVIEW
 # ============================================================================
-with tab1:
+with tab1, PROFILE.span("Overview"):
     st.markdown("### 📊 System Overview")
     
     # KPIs
@@ -189,9 +365,8 @@ with tab1:
     
     # Outstanding Balance
     outstanding = get_data("""
-        SELECT SUM(TOTAL_AMOUNT_SAR) AS OUTSTANDING
-        FROM SIO_DB.DATA.BILLING
-        WHERE BILL_STATUS IN ('PENDING', 'OVERDUE')
+        SELECT SUM(BALANCE_SAR) AS OUTSTANDING
+        FROM SIO_DB.DATA.AR_AGING
     """)
     with col3:
         if not outstanding.empty and outstanding['OUTSTANDING'].values[0] is not None:
@@ -228,32 +403,57 @@ with tab1:
     """)
     
     if not usage_trends.empty:
-        # Ensure column names are uppercase (Snowflake returns uppercase)
-        usage_trends.columns = [col.upper() for col in usage_trends.columns]
-        
-        # Convert to numeric to ensure proper chart rendering
-        usage_trends['DAILY_USAGE'] = pd.to_numeric(usage_trends['DAILY_USAGE'], errors='coerce').fillna(0)
-        usage_trends['DATE'] = pd.to_datetime(usage_trends['DATE'])
-        
-        # Convert to millions for better readability - ALWAYS, not just for Plotly
-        usage_trends['DAILY_USAGE_M'] = usage_trends['DAILY_USAGE'] / 1_000_000
+        with PROFILE.span("Usage trends: coerce", 'pandas'):
+            # Ensure column names are uppercase (Snowflake returns uppercase)
+            usage_trends.columns = [col.upper() for col in usage_trends.columns]
+            
+            # Convert to numeric to ensure proper chart rendering
+            usage_trends['DAILY_USAGE'] = pd.to_numeric(usage_trends['DAILY_USAGE'], errors='coerce').fillna(0)
+            usage_trends['DATE'] = pd.to_datetime(usage_trends['DATE'])
+            
+            # Convert to millions for better readability - ALWAYS, not just for Plotly
+            usage_trends['DAILY_USAGE_M'] = usage_trends['DAILY_USAGE'] / 1_000_000
         
         if PLOTLY_AVAILABLE:
-            fig = px.line(usage_trends, x='DATE', y='DAILY_USAGE_M',
-                         title=f'Daily Water Usage - Last {days_back} Days',
-                         labels={'DAILY_USAGE_M': 'Usage (Million m³)', 'DATE': 'Date'})
-            fig.update_traces(line_color='#1f77b4', line_width=2)
-            fig.update_layout(
-                yaxis_title='Usage (Million m³)',
-                hovermode='x unified'
-            )
-            st.plotly_chart(fig)
+            with PROFILE.span("Usage trends: figure", 'plotly'):
+                px, go = load_plotly()
+                fig = px.line(usage_trends, x='DATE', y='DAILY_USAGE_M',
+                             title=f'Daily Water Usage - Last {days_back} Days',
+                             labels={'DAILY_USAGE_M': 'Usage (Million m³)', 'DATE': 'Date'})
+                fig.update_traces(line_color='#1f77b4', line_width=2)
+                fig.update_layout(
+                    yaxis_title='Usage (Million m³)',
+                    hovermode='x unified'
+                )
+            with PROFILE.span("Usage trends: st.plotly_chart", 'render'):
+                st.plotly_chart(fig)
         else:
             # Fallback also uses millions
-            st.line_chart(usage_trends.set_index('DATE')['DAILY_USAGE_M'])
+            with PROFILE.span("Usage trends: st.line_chart", 'render'):
+                st.line_chart(usage_trends.set_index('DATE')['DAILY_USAGE_M'])
     else:
         st.info("No usage data available")
     
+    # Every reading behind the trend, streamed to a file rather than into the browser
+    show_export('usage_readings', f"""
+        SELECT 
+            wu.READING_DATE,
+            r.REGION_NAME,
+            c.CUSTOMER_ID,
+            c.CUSTOMER_NAME,
+            wu.METER_ID,
+            wu.VOLUME_M3,
+            wu.PRESSURE_BAR,
+            wu.FLOW_RATE_M3_H
+        FROM SIO_DB.DATA.WATER_USAGE wu
+        JOIN SIO_DB.DATA.WATER_METERS wm ON wu.METER_ID = wm.METER_ID
+        JOIN SIO_DB.DATA.CUSTOMERS c ON wm.CUSTOMER_ID = c.CUSTOMER_ID
+        JOIN SIO_DB.DATA.REGIONS r ON c.REGION_ID = r.REGION_ID
+        WHERE wu.READING_DATE >= DATEADD(day, -{days_back}, CURRENT_DATE())
+        {region_filter}
+        ORDER BY wu.READING_DATE, wu.METER_ID
+    """, "meter readings")
+    
     # Regional Summary
     st.subheader("🌍 Regional Summary")
     
@@ -287,68 +487,112 @@ with tab1:
             "UTILIZATION_PCT": "Utilization %"
         })
         # Format numeric columns - convert to numeric type first
-        display_df["Customers"] = pd.to_numeric(display_df["Customers"], errors='coerce').fillna(0).astype(int)
-        display_df["Current Level (m³)"] = pd.to_numeric(display_df["Current Level (m³)"], errors='coerce').fillna(0).round(0).astype(int)
-        display_df["Capacity (m³)"] = pd.to_numeric(display_df["Capacity (m³)"], errors='coerce').fillna(0).round(0).astype(int)
-        display_df["Utilization %"] = pd.to_numeric(display_df["Utilization %"], errors='coerce').fillna(0).round(1)
+        with PROFILE.span("Regional summary: coerce", 'pandas'):
+            display_df["Customers"] = pd.to_numeric(display_df["Customers"], errors='coerce').fillna(0).astype(int)
+            display_df["Current Level (m³)"] = pd.to_numeric(display_df["Current Level (m³)"], errors='coerce').fillna(0).round(0).astype(int)
+            display_df["Capacity (m³)"] = pd.to_numeric(display_df["Capacity (m³)"], errors='coerce').fillna(0).round(0).astype(int)
+            display_df["Utilization %"] = pd.to_numeric(display_df["Utilization %"], errors='coerce').fillna(0).round(1)
         
-        st.dataframe(display_df)
+        with PROFILE.span("Regional summary: st.dataframe", 'render'):
+            st.dataframe(display_df)
     else:
         st.info("No regional data available")
 
 # ============================================================================
 # TAB 2: REGIONAL ANALYSIS
 # ============================================================================
-with tab2:
+with tab2, PROFILE.span("Regional Analysis"):
     st.markdown("### 🗺️ Regional Water Resource Analysis")
     
-    # Efficiency Analysis
+    # Efficiency Analysis (precomputed daily - see cortex/create_regional_efficiency.sql)
     st.subheader("⚡ Regional Efficiency Score")
     
-    with st.spinner("Analyzing regional efficiency..."):
-        efficiency_data = get_data("""
-            SELECT * FROM TABLE(SIO_DB.ML_ANALYTICS.ANALYZE_REGIONAL_EFFICIENCY())
+    efficiency_grains = {"Region": "REGION", "Water Source": "WATER_SOURCE", "Crop Type": "CROP_TYPE"}
+    efficiency_grain_label = st.radio("Score by", list(efficiency_grains), horizontal=True)
+    efficiency_grain = efficiency_grains[efficiency_grain_label]
+    
+    with st.spinner("Loading efficiency scores..."):
+        efficiency_data = get_data(f"""
+            SELECT * FROM TABLE(SIO_DB.ML_ANALYTICS.ANALYZE_REGIONAL_EFFICIENCY(NULL, '{efficiency_grain}'))
             ORDER BY EFFICIENCY_SCORE DESC
         """)
     
     if not efficiency_data.empty:
+        if selected_region != "Show All":
+            efficiency_data = efficiency_data[efficiency_data['REGION_NAME'] == selected_region].copy()
+        # Sources and crop types repeat across regions - label bars with both
+        if efficiency_grain != "REGION":
+            efficiency_data['REGION_NAME'] = efficiency_data['REGION_NAME'] + " · " + efficiency_data['SEGMENT']
+        
         if PLOTLY_AVAILABLE:
-            # Horizontal bar chart
-            fig = px.bar(
-                efficiency_data,
-                x='EFFICIENCY_SCORE',
-                y='REGION_NAME',
-                orientation='h',
-                title='Regional Efficiency Scores',
-                labels={'EFFICIENCY_SCORE': 'Efficiency Score', 'REGION_NAME': 'Region'},
-                color='EFFICIENCY_SCORE',
-                color_continuous_scale='RdYlGn'
-            )
-            fig.update_layout(height=400)
-            st.plotly_chart(fig)
+            with PROFILE.span("Efficiency scores: figure", 'plotly'):
+                px, go = load_plotly()
+                # Horizontal bar chart
+                fig = px.bar(
+                    efficiency_data,
+                    x='EFFICIENCY_SCORE',
+                    y='REGION_NAME',
+                    orientation='h',
+                    title=f'Efficiency Scores by {efficiency_grain_label} ({efficiency_data["SCORE_DATE"].max()})',
+                    labels={'EFFICIENCY_SCORE': 'Efficiency Score', 'REGION_NAME': efficiency_grain_label},
+                    color='EFFICIENCY_SCORE',
+                    color_continuous_scale='RdYlGn'
+                )
+                fig.update_layout(height=max(400, 22 * len(efficiency_data)))
+            with PROFILE.span("Efficiency scores: st.plotly_chart", 'render'):
+                st.plotly_chart(fig)
         else:
-            st.bar_chart(efficiency_data.set_index('REGION_NAME')['EFFICIENCY_SCORE'])
+            with PROFILE.span("Efficiency scores: st.bar_chart", 'render'):
+                st.bar_chart(efficiency_data.set_index('REGION_NAME')['EFFICIENCY_SCORE'])
+        
+        # Score history
+        efficiency_trend = get_data(f"""
+            SELECT e.SCORE_DATE, e.REGION_NAME, e.EFFICIENCY_SCORE
+            FROM SIO_DB.ML_ANALYTICS.REGIONAL_EFFICIENCY_DAILY e
+            JOIN SIO_DB.DATA.REGIONS r ON e.REGION_ID = r.REGION_ID
+            WHERE e.GRAIN = 'REGION'
+              AND e.SCORE_DATE >= DATEADD(day, -{days_back}, (SELECT MAX(SCORE_DATE) FROM SIO_DB.ML_ANALYTICS.REGIONAL_EFFICIENCY_DAILY))
+              {region_filter}
+            ORDER BY e.SCORE_DATE
+        """)
+        if not efficiency_trend.empty:
+            with PROFILE.span("Efficiency trend: coerce", 'pandas'):
+                efficiency_trend['EFFICIENCY_SCORE'] = pd.to_numeric(efficiency_trend['EFFICIENCY_SCORE'], errors='coerce')
+            if PLOTLY_AVAILABLE:
+                with PROFILE.span("Efficiency trend: figure", 'plotly'):
+                    fig = px.line(
+                        efficiency_trend, x='SCORE_DATE', y='EFFICIENCY_SCORE', color='REGION_NAME',
+                        title=f'Regional Efficiency Trend - Last {days_back} Days',
+                        labels={'EFFICIENCY_SCORE': 'Efficiency Score', 'SCORE_DATE': 'Date', 'REGION_NAME': 'Region'}
+                    )
+                with PROFILE.span("Efficiency trend: st.plotly_chart", 'render'):
+                    st.plotly_chart(fig)
+            else:
+                with PROFILE.span("Efficiency trend: st.line_chart", 'render'):
+                    st.line_chart(efficiency_trend.pivot(index='SCORE_DATE', columns='REGION_NAME', values='EFFICIENCY_SCORE'))
         
         st.divider()
         
         # Detailed efficiency table
         st.subheader("📊 Efficiency Details")
         # Format data for display (compatible with older Streamlit versions)
-        display_df = efficiency_data.copy()
+        display_df = efficiency_data.drop(columns=['GRAIN', 'SEGMENT', 'SCORE_DATE'], errors='ignore')
         display_df = display_df.rename(columns={
-            "REGION_NAME": "Region",
+            "REGION_NAME": "Region" if efficiency_grain == "REGION" else f"Region · {efficiency_grain_label}",
             "EFFICIENCY_SCORE": "Score",
             "EFFICIENCY_RATING": "Rating",
             "WATER_UTILIZATION_PERCENT": "Utilization %",
             "OPPORTUNITIES": "Opportunities"
         })
         # Format numeric columns - convert to numeric type first
-        display_df["Score"] = pd.to_numeric(display_df["Score"], errors='coerce').fillna(0).round(1)
-        display_df["Utilization %"] = pd.to_numeric(display_df["Utilization %"], errors='coerce').fillna(0).round(1)
+        with PROFILE.span("Efficiency details: coerce", 'pandas'):
+            display_df["Score"] = pd.to_numeric(display_df["Score"], errors='coerce').fillna(0).round(1)
+            display_df["Utilization %"] = pd.to_numeric(display_df["Utilization %"], errors='coerce').fillna(0).round(1)
         
-        st.dataframe(display_df)
+        with PROFILE.span("Efficiency details: st.dataframe", 'render'):
+            st.dataframe(display_df)
     else:
-        st.warning("⚠️ ML Analytics functions not available. Run `snow sql -f cortex/create_ml_functions.sql` to enable advanced analytics.")
+        st.warning("⚠️ ML Analytics functions not available. Run `snow sql -f cortex/create_regional_efficiency.sql` then `cortex/create_ml_functions.sql` to enable advanced analytics.")
     
     st.divider()
     
@@ -393,11 +637,12 @@ with tab2:
         heatmap_data['lon'] = heatmap_data['REGION_NAME'].map(lambda x: region_coords.get(x, {}).get('lon', 45.0))
         
         # Convert to numeric and calculate metrics
-        heatmap_data['TOTAL_USAGE_M3'] = pd.to_numeric(heatmap_data['TOTAL_USAGE_M3'], errors='coerce').fillna(0)
-        heatmap_data['CURRENT_LEVEL_M3'] = pd.to_numeric(heatmap_data['CURRENT_LEVEL_M3'], errors='coerce').fillna(0)
-        heatmap_data['CAPACITY_M3'] = pd.to_numeric(heatmap_data['CAPACITY_M3'], errors='coerce').fillna(1)
-        
-        heatmap_data['UTILIZATION_PCT'] = (heatmap_data['CURRENT_LEVEL_M3'] / heatmap_data['CAPACITY_M3']) * 100
+        with PROFILE.span("Heatmap: coerce", 'pandas'):
+            heatmap_data['TOTAL_USAGE_M3'] = pd.to_numeric(heatmap_data['TOTAL_USAGE_M3'], errors='coerce').fillna(0)
+            heatmap_data['CURRENT_LEVEL_M3'] = pd.to_numeric(heatmap_data['CURRENT_LEVEL_M3'], errors='coerce').fillna(0)
+            heatmap_data['CAPACITY_M3'] = pd.to_numeric(heatmap_data['CAPACITY_M3'], errors='coerce').fillna(1)
+            
+            heatmap_data['UTILIZATION_PCT'] = (heatmap_data['CURRENT_LEVEL_M3'] / heatmap_data['CAPACITY_M3']) * 100
         
         # Color based on utilization
         def get_color(util):
@@ -412,7 +657,8 @@ with tab2:
         heatmap_data['color'] = heatmap_data['UTILIZATION_PCT'].apply(get_color)
         
         # st.map automatically detects 'lat' and 'lon' columns
-        st.map(heatmap_data)
+        with PROFILE.span("Heatmap: st.map", 'render'):
+            st.map(heatmap_data)
         
         # Add utilization legend table since old st.map doesn't support colors
         st.markdown("#### 📊 Regional Utilization Details")
@@ -439,14 +685,97 @@ with tab2:
         legend_df['Status'] = legend_df['Utilization %'].apply(get_status)
         legend_df = legend_df[['Region', 'Status', 'Usage (m³)', 'Customers', 'Utilization %']]
         
-        st.dataframe(legend_df)
+        with PROFILE.span("Heatmap legend: st.dataframe", 'render'):
+            st.dataframe(legend_df)
     else:
         st.info("Map requires regional data")
 
+    st.divider()
+
+    # Reservoir depletion outlook (Monte Carlo - see cortex/create_reservoir_simulation.sql)
+    st.subheader("💧 Reservoir Depletion Outlook")
+
+    col1, col2 = st.columns([2, 1])
+
+    with col2:
+        st.markdown("**Simulation Settings**")
+        simulation_paths = st.select_slider("Paths", [1000, 5000, 10000], value=10000)
+        simulation_horizon = st.slider("Days ahead", 30, 365, 365, step=15)
+        depletion_threshold = st.slider("Depleted below (% of capacity)", 5, 50, 20)
+        inflow_pct = st.slider("Supply (% of summer demand)", 50, 150, 100, step=5)
+
+        if st.button("🎲 Run Simulation", type="primary"):
+            with st.spinner(f"Simulating {simulation_paths:,} paths x {simulation_horizon} days..."):
+                depletion = get_data(f"""
+                    SELECT * FROM TABLE(SIO_DB.ML_ANALYTICS.SIMULATE_RESERVOIR_DEPLETION(
+                        {simulation_paths}, {simulation_horizon}, {depletion_threshold}, {inflow_pct}))
+                    ORDER BY PROBABILITY_DEPLETED DESC, DAYS_P10
+                """)
+            if not depletion.empty:
+                st.session_state['depletion'] = depletion
+            else:
+                st.warning("⚠️ Simulator not available. Run `snow sql -f cortex/create_reservoir_simulation.sql` to enable it.")
+
+    with col1:
+        if 'depletion' in st.session_state:
+            depletion = st.session_state['depletion'].copy()
+            if selected_region != "Show All":
+                depletion = depletion[depletion['REGION_NAME'] == selected_region]
+            with PROFILE.span("Depletion: coerce", 'pandas'):
+                for column in ['DAYS_P10', 'DAYS_P50', 'DAYS_P90', 'PROBABILITY_DEPLETED', 'CURRENT_LEVEL_PCT']:
+                    depletion[column] = pd.to_numeric(depletion[column], errors='coerce')
+        else:
+            depletion = None
+            st.info("Run a simulation to project source levels under seasonal demand, weather scenarios and plant outages.")
+
+        if depletion is not None and depletion.empty:
+            st.info("No simulated sources in this region.")
+        elif depletion is not None:
+            horizon = int(depletion['HORIZON_DAYS'].max())
+            st.caption(f"Days until storage falls below {depletion['THRESHOLD_PCT'].max():g}% of capacity across "
+                       f"{int(depletion['PATHS'].max()):,} paths. Blank percentiles stay above it for all {horizon} days.")
+
+            if PLOTLY_AVAILABLE:
+                with PROFILE.span("Depletion: figure", 'plotly'):
+                    px, go = load_plotly()
+                    # P10-P90 range per region (open-ended at the horizon), median marked
+                    p10 = depletion['DAYS_P10'].fillna(horizon)
+                    fig = go.Figure(go.Bar(
+                        y=depletion['REGION_NAME'],
+                        x=depletion['DAYS_P90'].fillna(horizon) - p10,
+                        base=p10,
+                        orientation='h',
+                        marker=dict(color=depletion['PROBABILITY_DEPLETED'], colorscale='RdYlGn_r', cmin=0, cmax=1),
+                        name='P10-P90'
+                    ))
+                    fig.add_trace(go.Scatter(
+                        y=depletion['REGION_NAME'], x=depletion['DAYS_P50'], mode='markers', name='Median',
+                        marker=dict(color='black', size=14, symbol='line-ns-open')
+                    ))
+                    fig.update_layout(
+                        title='Days to Threshold (P10 - P90, median marked)', xaxis_title='Days from latest data',
+                        xaxis_range=[0, horizon], height=max(300, 40 * len(depletion)), showlegend=False
+                    )
+                with PROFILE.span("Depletion: st.plotly_chart", 'render'):
+                    st.plotly_chart(fig)
+
+            depletion_df = depletion[['REGION_NAME', 'CURRENT_LEVEL_PCT', 'DAYS_P10', 'DAYS_P50', 'DAYS_P90',
+                                      'PROBABILITY_DEPLETED']].rename(columns={
+                'REGION_NAME': 'Region',
+                'CURRENT_LEVEL_PCT': 'Level %',
+                'DAYS_P10': 'Days P10',
+                'DAYS_P50': 'Days P50',
+                'DAYS_P90': 'Days P90',
+                'PROBABILITY_DEPLETED': 'Depletion Risk %'
+            })
+            depletion_df['Depletion Risk %'] = (100 * depletion_df['Depletion Risk %']).round(1)
+            with PROFILE.span("Depletion: st.dataframe", 'render'):
+                st.dataframe(depletion_df)
+
 # ============================================================================
 # TAB 3: ML PREDICTIONS
 # ============================================================================
-with tab3:
+with tab3, PROFILE.span("ML Predictions"):
     st.markdown("### 🔮 ML-Powered Water Demand Forecasting")
     
     col1, col2 = st.columns([2, 1])
@@ -508,35 +837,39 @@ with tab3:
             st.subheader(f"📊 Forecast for {forecast_region}")
             
             if PLOTLY_AVAILABLE:
-                # Create forecast chart
-                fig = go.Figure()
-                
-                # Add prediction line
-                fig.add_trace(go.Scatter(
-                    x=predictions['PREDICTION_DATE'],
-                    y=predictions['PREDICTED_DEMAND_M3'],
-                    mode='lines+markers',
-                    name='Predicted Demand',
-                    line=dict(color='#1f77b4', width=3),
-                    marker=dict(size=8)
-                ))
-                
-                # Add confidence shading
-                high_conf = predictions[predictions['CONFIDENCE_LEVEL'] == 'HIGH']
-                medium_conf = predictions[predictions['CONFIDENCE_LEVEL'] == 'MEDIUM']
-                low_conf = predictions[predictions['CONFIDENCE_LEVEL'] == 'LOW']
-                
-                fig.update_layout(
-                    title=f'{forecast_days}-Day Water Demand Forecast',
-                    xaxis_title='Date',
-                    yaxis_title='Predicted Demand (m³)',
-                    hovermode='x unified',
-                    height=400
-                )
+                with PROFILE.span("Forecast: figure", 'plotly'):
+                    px, go = load_plotly()
+                    # Create forecast chart
+                    fig = go.Figure()
+                    
+                    # Add prediction line
+                    fig.add_trace(go.Scatter(
+                        x=predictions['PREDICTION_DATE'],
+                        y=predictions['PREDICTED_DEMAND_M3'],
+                        mode='lines+markers',
+                        name='Predicted Demand',
+                        line=dict(color='#1f77b4', width=3),
+                        marker=dict(size=8)
+                    ))
+                    
+                    # Add confidence shading
+                    high_conf = predictions[predictions['CONFIDENCE_LEVEL'] == 'HIGH']
+                    medium_conf = predictions[predictions['CONFIDENCE_LEVEL'] == 'MEDIUM']
+                    low_conf = predictions[predictions['CONFIDENCE_LEVEL'] == 'LOW']
+                    
+                    fig.update_layout(
+                        title=f'{forecast_days}-Day Water Demand Forecast',
+                        xaxis_title='Date',
+                        yaxis_title='Predicted Demand (m³)',
+                        hovermode='x unified',
+                        height=400
+                    )
                 
-                st.plotly_chart(fig)
+                with PROFILE.span("Forecast: st.plotly_chart", 'render'):
+                    st.plotly_chart(fig)
             else:
-                st.line_chart(predictions.set_index('PREDICTION_DATE')['PREDICTED_DEMAND_M3'])
+                with PROFILE.span("Forecast: st.line_chart", 'render'):
+                    st.line_chart(predictions.set_index('PREDICTION_DATE')['PREDICTED_DEMAND_M3'])
             
             st.divider()
             
@@ -553,11 +886,13 @@ with tab3:
                 "RECOMMENDATION": "Recommendation"
             })
             # Format numeric columns - convert to numeric type first
-            display_df["Predicted Demand (m³)"] = pd.to_numeric(display_df["Predicted Demand (m³)"], errors='coerce').fillna(0).round(2)
-            display_df["Seasonal Factor"] = pd.to_numeric(display_df["Seasonal Factor"], errors='coerce').fillna(0).round(2)
-            display_df["Weather Factor"] = pd.to_numeric(display_df["Weather Factor"], errors='coerce').fillna(0).round(2)
+            with PROFILE.span("Forecast details: coerce", 'pandas'):
+                display_df["Predicted Demand (m³)"] = pd.to_numeric(display_df["Predicted Demand (m³)"], errors='coerce').fillna(0).round(2)
+                display_df["Seasonal Factor"] = pd.to_numeric(display_df["Seasonal Factor"], errors='coerce').fillna(0).round(2)
+                display_df["Weather Factor"] = pd.to_numeric(display_df["Weather Factor"], errors='coerce').fillna(0).round(2)
             
-            st.dataframe(display_df)
+            with PROFILE.span("Forecast details: st.dataframe", 'render'):
+                st.dataframe(display_df)
             
             # Key insights
             st.divider()
@@ -711,99 +1046,212 @@ with tab3:
                 st.code(report, language=None)
         else:
             st.info("👆 Select a customer and click 'Detect Anomalies' to run ML analysis")
+    
+    st.divider()
+    
+    # Meter-days flagged by the online detectors (cortex/create_anomaly_scoring.sql), riskiest first
+    st.subheader("🚨 Scored Anomalies")
+    st.caption(f"Meter-days flagged in the last {days_back} days by the per-segment detectors")
+    
+    scored_anomalies_query = f"""
+        SELECT 
+            s.READING_DATE,
+            r.REGION_NAME,
+            c.CUSTOMER_NAME,
+            s.CUSTOMER_ID,
+            s.METER_ID,
+            s.SEGMENT,
+            s.VOLUME_M3,
+            s.RISK_SCORE
+        FROM SIO_DB.ML_ANALYTICS.USAGE_ANOMALY_SCORES s
+        JOIN SIO_DB.DATA.CUSTOMERS c ON s.CUSTOMER_ID = c.CUSTOMER_ID
+        JOIN SIO_DB.DATA.REGIONS r ON c.REGION_ID = r.REGION_ID
+        WHERE s.IS_ANOMALY AND s.READING_DATE >= DATEADD(day, -{days_back}, CURRENT_DATE())
+        {region_filter}
+    """
+    
+    def render_scored_anomalies(page):
+        display_df = page.rename(columns={
+            "READING_DATE": "Date",
+            "REGION_NAME": "Region",
+            "CUSTOMER_NAME": "Customer",
+            "CUSTOMER_ID": "Customer ID",
+            "METER_ID": "Meter",
+            "SEGMENT": "Segment",
+            "VOLUME_M3": "Volume (m³)",
+            "RISK_SCORE": "Risk Score"
+        })
+        with PROFILE.span("Scored anomalies: coerce", 'pandas'):
+            display_df["Volume (m³)"] = pd.to_numeric(display_df["Volume (m³)"], errors='coerce').round(1)
+            display_df["Risk Score"] = pd.to_numeric(display_df["Risk Score"], errors='coerce').round(1)
+        with PROFILE.span("Scored anomalies: st.dataframe", 'render'):
+            st.dataframe(display_df)
+    
+    anomaly_page = show_keyset_page(
+        'scored_anomalies', scored_anomalies_query,
+        [('RISK_SCORE', 'DESC'), ('READING_DATE', 'DESC'), ('METER_ID', 'ASC')], render_scored_anomalies
+    )
+    if anomaly_page.empty:
+        st.info("No scored anomalies in this period")
+    else:
+        show_export('scored_anomalies', scored_anomalies_query + " ORDER BY s.RISK_SCORE DESC", "anomalies")
 
 # ============================================================================
 # TAB 4: BILLING & PAYMENTS
 # ============================================================================
-with tab4:
+with tab4, PROFILE.span("Billing & Payments"):
     st.markdown("### 💰 Billing & Payment Status")
     
-    # Payment status overview
-    st.subheader("📊 Payment Status Overview")
+    # Every panel reads AR_AGING (data_engineering/ar_aging.sql): open balances net of payments, per customer
+    ar_region_filter = f" AND REGION_ID = {selected_region_id}" if selected_region_id else ""
+    
+    # Receivables aging overview
+    st.subheader("📊 Receivables Aging")
     
-    payment_status = get_data("""
+    ar_summary = get_data(f"""
         SELECT 
-            BILL_STATUS,
-            COUNT(*) AS BILL_COUNT,
-            SUM(TOTAL_AMOUNT_SAR) AS TOTAL_AMOUNT
-        FROM SIO_DB.DATA.BILLING
-        GROUP BY BILL_STATUS
+            COUNT(*) AS CUSTOMERS,
+            SUM(BALANCE_SAR) AS BALANCE_SAR,
+            SUM(PAST_DUE_SAR) AS PAST_DUE_SAR,
+            SUM(CASE WHEN PAST_DUE_SAR > 0 THEN 1 ELSE 0 END) AS PAST_DUE_CUSTOMERS,
+            SUM(DAYS_0_30_SAR) AS DAYS_0_30_SAR,
+            SUM(DAYS_31_60_SAR) AS DAYS_31_60_SAR,
+            SUM(DAYS_61_90_SAR) AS DAYS_61_90_SAR,
+            SUM(DAYS_90_PLUS_SAR) AS DAYS_90_PLUS_SAR,
+            SUM(CASE WHEN DAYS_31_60_SAR + DAYS_61_90_SAR + DAYS_90_PLUS_SAR = 0 THEN 1 ELSE 0 END) AS DAYS_0_30_CUSTOMERS,
+            SUM(CASE WHEN DAYS_61_90_SAR + DAYS_90_PLUS_SAR = 0 AND DAYS_31_60_SAR > 0 THEN 1 ELSE 0 END) AS DAYS_31_60_CUSTOMERS,
+            SUM(CASE WHEN DAYS_90_PLUS_SAR = 0 AND DAYS_61_90_SAR > 0 THEN 1 ELSE 0 END) AS DAYS_61_90_CUSTOMERS,
+            SUM(CASE WHEN DAYS_90_PLUS_SAR > 0 THEN 1 ELSE 0 END) AS DAYS_90_PLUS_CUSTOMERS,
+            (SELECT MAX(AS_OF_DATE) FROM SIO_DB.DATA.AR_AGING_STATE) AS AS_OF_DATE
+        FROM SIO_DB.DATA.AR_AGING
+        WHERE 1=1 {ar_region_filter}
     """)
     
-    if not payment_status.empty and PLOTLY_AVAILABLE:
-        col1, col2 = st.columns(2)
+    if not ar_summary.empty and ar_summary['CUSTOMERS'].values[0]:
+        summary = ar_summary.iloc[0]
+        with PROFILE.span("Aging buckets: reshape", 'pandas'):
+            bucket_columns = {'0-30 DAYS': 'DAYS_0_30', '31-60 DAYS': 'DAYS_31_60', '61-90 DAYS': 'DAYS_61_90',
+                              '90+ DAYS': 'DAYS_90_PLUS'}
+            buckets = pd.DataFrame({
+                'AGING_BUCKET': list(bucket_columns),
+                'BALANCE_SAR': [float(summary[f'{column}_SAR'] or 0) for column in bucket_columns.values()],
+                'CUSTOMERS': [int(summary[f'{column}_CUSTOMERS'] or 0) for column in bucket_columns.values()]
+            })
+        bucket_colors = {'0-30 DAYS': 'green', '31-60 DAYS': 'orange', '61-90 DAYS': 'red', '90+ DAYS': 'darkred'}
         
+        col1, col2, col3 = st.columns(3)
         with col1:
-            fig = px.pie(
-                payment_status,
-                values='BILL_COUNT',
-                names='BILL_STATUS',
-                title='Bills by Status (Count)',
-                color='BILL_STATUS',
-                color_discrete_map={'PAID': 'green', 'PENDING': 'orange', 'OVERDUE': 'red'}
-            )
-            st.plotly_chart(fig)
-        
+            st.metric("Open Balance", f"{float(summary['BALANCE_SAR'] or 0):,.0f} SAR")
         with col2:
-            fig = px.pie(
-                payment_status,
-                values='TOTAL_AMOUNT',
-                names='BILL_STATUS',
-                title='Bills by Status (Amount SAR)',
-                color='BILL_STATUS',
-                color_discrete_map={'PAID': 'green', 'PENDING': 'orange', 'OVERDUE': 'red'}
-            )
-            st.plotly_chart(fig)
+            st.metric("Past Due", f"{float(summary['PAST_DUE_SAR'] or 0):,.0f} SAR")
+        with col3:
+            past_due_customers = int(summary['PAST_DUE_CUSTOMERS'] or 0)
+            st.metric("Customers Past Due", f"{past_due_customers:,} of {int(summary['CUSTOMERS']):,}")
+        st.caption(f"Open bills less completed payments, aged by days past due as of {pd.Timestamp(summary['AS_OF_DATE']):%Y-%m-%d}")
+        
+        if PLOTLY_AVAILABLE:
+            px, go = load_plotly()
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                with PROFILE.span("Aging by amount: figure", 'plotly'):
+                    fig = px.pie(
+                        buckets,
+                        values='BALANCE_SAR',
+                        names='AGING_BUCKET',
+                        title='Open Balance by Age (SAR)',
+                        color='AGING_BUCKET',
+                        color_discrete_map=bucket_colors
+                    )
+                with PROFILE.span("Aging by amount: st.plotly_chart", 'render'):
+                    st.plotly_chart(fig)
+            
+            with col2:
+                with PROFILE.span("Aging by customers: figure", 'plotly'):
+                    fig = px.pie(
+                        buckets,
+                        values='CUSTOMERS',
+                        names='AGING_BUCKET',
+                        title='Customers by Oldest Open Balance',
+                        color='AGING_BUCKET',
+                        color_discrete_map=bucket_colors
+                    )
+                with PROFILE.span("Aging by customers: st.plotly_chart", 'render'):
+                    st.plotly_chart(fig)
+        else:
+            with PROFILE.span("Aging buckets: st.bar_chart", 'render'):
+                st.bar_chart(buckets.set_index('AGING_BUCKET')['BALANCE_SAR'])
     
     st.divider()
     
-    # Overdue bills
+    # Customers with past-due balances
     st.subheader("⚠️ Customers with Overdue Payments")
     
-    overdue_bills = get_data(f"""
+    overdue_customers_query = f"""
         SELECT 
-            c.CUSTOMER_NAME,
-            r.REGION_NAME,
-            c.CUSTOMER_TYPE,
-            b.BILLING_MONTH,
-            b.TOTAL_AMOUNT_SAR,
-            b.DUE_DATE,
-            DATEDIFF(day, b.DUE_DATE, CURRENT_DATE()) AS DAYS_OVERDUE
-        FROM SIO_DB.DATA.BILLING b
-        JOIN SIO_DB.DATA.CUSTOMERS c ON b.CUSTOMER_ID = c.CUSTOMER_ID
-        JOIN SIO_DB.DATA.REGIONS r ON c.REGION_ID = r.REGION_ID
-        WHERE b.BILL_STATUS = 'OVERDUE' {region_filter}
-        ORDER BY DAYS_OVERDUE DESC
-        LIMIT 50
-    """)
+            CUSTOMER_ID,
+            CUSTOMER_NAME,
+            REGION_NAME,
+            CUSTOMER_TYPE,
+            OPEN_BILLS,
+            PAST_DUE_SAR,
+            DAYS_31_60_SAR,
+            DAYS_61_90_SAR,
+            DAYS_90_PLUS_SAR,
+            OLDEST_DUE_DATE,
+            DATEDIFF(day, OLDEST_DUE_DATE, CURRENT_DATE()) AS DAYS_OVERDUE
+        FROM SIO_DB.DATA.AR_AGING
+        WHERE PAST_DUE_SAR > 0 {ar_region_filter}
+    """
     
-    if not overdue_bills.empty:
+    def render_overdue_customers(page):
         # Format data for display (compatible with older Streamlit versions)
-        display_df = overdue_bills.copy()
-        display_df = display_df.rename(columns={
+        display_df = page.drop(columns=["CUSTOMER_ID"]).rename(columns={
             "CUSTOMER_NAME": "Customer",
             "REGION_NAME": "Region",
             "CUSTOMER_TYPE": "Type",
-            "BILLING_MONTH": "Billing Month",
-            "TOTAL_AMOUNT_SAR": "Amount (SAR)",
-            "DUE_DATE": "Due Date",
+            "OPEN_BILLS": "Open Bills",
+            "PAST_DUE_SAR": "Past Due (SAR)",
+            "DAYS_31_60_SAR": "31-60 Days (SAR)",
+            "DAYS_61_90_SAR": "61-90 Days (SAR)",
+            "DAYS_90_PLUS_SAR": "90+ Days (SAR)",
+            "OLDEST_DUE_DATE": "Oldest Due Date",
             "DAYS_OVERDUE": "Days Overdue"
         })
         # Format numeric columns - convert to numeric type first
-        display_df["Amount (SAR)"] = pd.to_numeric(display_df["Amount (SAR)"], errors='coerce').fillna(0).round(2)
-        display_df["Days Overdue"] = pd.to_numeric(display_df["Days Overdue"], errors='coerce').fillna(0).astype(int)
+        with PROFILE.span("Overdue customers: coerce", 'pandas'):
+            for column in ("Past Due (SAR)", "31-60 Days (SAR)", "61-90 Days (SAR)", "90+ Days (SAR)"):
+                display_df[column] = pd.to_numeric(display_df[column], errors='coerce').fillna(0).round(2)
+            display_df["Days Overdue"] = pd.to_numeric(display_df["Days Overdue"], errors='coerce').fillna(0).astype(int)
         
-        st.dataframe(display_df)
-        
-        # Summary metrics
-        total_overdue = overdue_bills['TOTAL_AMOUNT_SAR'].sum()
-        avg_days_overdue = overdue_bills['DAYS_OVERDUE'].mean()
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("Total Overdue Amount", f"{total_overdue:,.2f} SAR")
-        with col2:
-            st.metric("Average Days Overdue", f"{avg_days_overdue:.0f} days")
+        with PROFILE.span("Overdue customers: st.dataframe", 'render'):
+            st.dataframe(display_df)
+    
+    overdue_customers = show_keyset_page(
+        'overdue_customers', overdue_customers_query,
+        [('DAYS_90_PLUS_SAR', 'DESC'), ('PAST_DUE_SAR', 'DESC'), ('CUSTOMER_ID', 'ASC')], render_overdue_customers
+    )
+    
+    if not overdue_customers.empty:
+        # Every past-due bill behind the list, for collections follow-up
+        show_export('overdue_bills', f"""
+            SELECT 
+                b.BILL_ID,
+                b.CUSTOMER_ID,
+                c.CUSTOMER_NAME,
+                r.REGION_NAME,
+                c.CUSTOMER_TYPE,
+                b.DUE_DATE,
+                DATEDIFF(day, b.DUE_DATE, CURRENT_DATE()) AS DAYS_OVERDUE,
+                b.TOTAL_AMOUNT_SAR,
+                b.PAID_SAR,
+                b.BALANCE_SAR
+            FROM SIO_DB.DATA.AR_BILL_BALANCES b
+            JOIN SIO_DB.DATA.CUSTOMERS c ON b.CUSTOMER_ID = c.CUSTOMER_ID
+            JOIN SIO_DB.DATA.REGIONS r ON c.REGION_ID = r.REGION_ID
+            WHERE b.BALANCE_SAR > 0 AND b.DUE_DATE < CURRENT_DATE() {region_filter}
+            ORDER BY b.DUE_DATE, b.BILL_ID
+        """, "overdue bills")
     else:
         st.success("✅ No overdue bills! All customers are up to date.")
     
@@ -814,33 +1262,152 @@ with tab4:
     
     regional_payments = get_data(f"""
         SELECT 
-            r.REGION_NAME,
-            COUNT(DISTINCT CASE WHEN b.BILL_STATUS = 'OVERDUE' THEN b.CUSTOMER_ID END) AS OVERDUE_CUSTOMERS,
-            SUM(CASE WHEN b.BILL_STATUS = 'OVERDUE' THEN b.TOTAL_AMOUNT_SAR ELSE 0 END) AS OVERDUE_AMOUNT,
-            COUNT(DISTINCT b.CUSTOMER_ID) AS TOTAL_CUSTOMERS
-        FROM SIO_DB.DATA.BILLING b
-        JOIN SIO_DB.DATA.CUSTOMERS c ON b.CUSTOMER_ID = c.CUSTOMER_ID
-        JOIN SIO_DB.DATA.REGIONS r ON c.REGION_ID = r.REGION_ID
-        WHERE 1=1 {region_filter}
-        GROUP BY r.REGION_NAME
+            REGION_NAME,
+            SUM(CASE WHEN PAST_DUE_SAR > 0 THEN 1 ELSE 0 END) AS OVERDUE_CUSTOMERS,
+            SUM(PAST_DUE_SAR) AS OVERDUE_AMOUNT,
+            COUNT(*) AS TOTAL_CUSTOMERS
+        FROM SIO_DB.DATA.AR_AGING
+        WHERE 1=1 {ar_region_filter}
+        GROUP BY REGION_NAME
         ORDER BY OVERDUE_AMOUNT DESC
     """)
     
     if not regional_payments.empty:
         if PLOTLY_AVAILABLE:
-            fig = px.bar(
-                regional_payments,
-                x='REGION_NAME',
-                y='OVERDUE_AMOUNT',
-                title='Overdue Amounts by Region',
-                labels={'OVERDUE_AMOUNT': 'Overdue Amount (SAR)', 'REGION_NAME': 'Region'},
-                color='OVERDUE_AMOUNT',
-                color_continuous_scale='Reds'
-            )
-            fig.update_layout(xaxis_tickangle=-45)
-            st.plotly_chart(fig)
+            with PROFILE.span("Regional payments: figure", 'plotly'):
+                px, go = load_plotly()
+                fig = px.bar(
+                    regional_payments,
+                    x='REGION_NAME',
+                    y='OVERDUE_AMOUNT',
+                    title='Overdue Amounts by Region',
+                    labels={'OVERDUE_AMOUNT': 'Overdue Amount (SAR)', 'REGION_NAME': 'Region'},
+                    color='OVERDUE_AMOUNT',
+                    color_continuous_scale='Reds'
+                )
+                fig.update_layout(xaxis_tickangle=-45)
+            with PROFILE.span("Regional payments: st.plotly_chart", 'render'):
+                st.plotly_chart(fig)
         else:
-            st.bar_chart(regional_payments.set_index('REGION_NAME')['OVERDUE_AMOUNT'])
+            with PROFILE.span("Regional payments: st.bar_chart", 'render'):
+                st.bar_chart(regional_payments.set_index('REGION_NAME')['OVERDUE_AMOUNT'])
+
+# ============================================================================
+# TAB 5: ASK SIO (AGENT CHAT)
+# ============================================================================
+with tab5, PROFILE.span("Ask SIO"):
+    st.markdown("### 💬 Ask SIO")
+
+    agent_url, agent_token = get_agent_settings()
+    if not AGENT_CLIENT_AVAILABLE:
+        st.warning("⚠️ The `requests` package is not available, so the agent cannot be called from this dashboard.")
+    elif not agent_url:
+        st.info(
+            "Set `SIO_AGENT_URL` (or `url` under `[agent]` in secrets.toml) to the SIO_IRRIGATION_AGENT `:run` endpoint. "
+            "Offline: `python tests/mock_agent_server.py --port 8765 --delay-ms 800 --delta-ms 30`"
+        )
+    else:
+        from agent_client import AgentError, estimate_tokens, trim_history
+        client = get_agent_client(agent_url, agent_token)
+
+        if 'agent_history' not in st.session_state:
+            st.session_state['agent_history'] = []  # Messages sent to the agent as context
+            st.session_state['agent_turns'] = []    # Rendered questions and answers
+
+        for turn in st.session_state['agent_turns']:
+            with st.chat_message("user"):
+                st.markdown(turn['question'])
+            with st.chat_message("assistant"):
+                render_agent_turn(turn)
+
+        live_turn = st.container()
+
+        with st.form("ask_sio_form", clear_on_submit=True):
+            question = st.text_input(
+                "Ask about usage, billing, forecasts or SIO policies",
+                placeholder="Which customers have unpaid bills?"
+            )
+            asked = st.form_submit_button("Ask", type="primary")
+
+        if asked and question.strip():
+            user_message = {"role": "user", "content": [{"type": "text", "text": question.strip()}]}
+            messages = trim_history(st.session_state['agent_history'] + [user_message], AGENT_HISTORY_TOKENS)
+            turn = {'question': question.strip(), 'tools': [], 'answer': '', 'first_ms': None, 'total_ms': None, 'cached': False}
+
+            with live_turn:
+                with st.chat_message("user"):
+                    st.markdown(turn['question'])
+                with st.chat_message("assistant"):
+                    tool_area = st.container()
+                    answer_slot = st.empty()
+                    start = time.perf_counter()
+                    try:
+                        for event in client.stream(messages):
+                            elapsed_ms = (time.perf_counter() - start) * 1000
+                            if event['type'] == 'status' and not turn['answer']:
+                                answer_slot.caption(f"⏳ {event['message'] or event['status']}")
+                            elif event['type'] == 'tool_use':
+                                detail = f"`{json.dumps(event['input'], ensure_ascii=False)[:120]}` at {elapsed_ms:.0f} ms"
+                                turn['tools'].append({'name': event['name'], 'detail': detail})
+                                tool_area.caption(f"🔧 {event['name']} · {detail}")
+                            elif event['type'] == 'tool_result':
+                                turn['tools'].append({'name': event['name'], 'detail': f"returned at {elapsed_ms:.0f} ms"})
+                                tool_area.caption(f"✅ {event['name']} returned at {elapsed_ms:.0f} ms")
+                            elif event['type'] == 'text':
+                                if turn['first_ms'] is None:
+                                    turn['first_ms'] = elapsed_ms
+                                turn['answer'] += event['text']
+                                answer_slot.markdown(turn['answer'] + "▌")
+                            elif event['type'] == 'done':
+                                turn['cached'] = event['cached']
+
+                        turn['total_ms'] = (time.perf_counter() - start) * 1000
+                        answer_slot.empty()
+                        with answer_slot.container():
+                            render_agent_turn({**turn, 'tools': []})
+
+                        # Only answer text goes back as context; tool results would crowd the token budget
+                        assistant_message = {"role": "assistant", "content": [{"type": "text", "text": turn['answer']}]}
+                        st.session_state['agent_history'] = trim_history(
+                            st.session_state['agent_history'] + [user_message, assistant_message], AGENT_HISTORY_TOKENS
+                        )
+                        st.session_state['agent_turns'].append(turn)
+                    except AgentError as e:
+                        answer_slot.error(f"❌ Agent error {e.status_code}: {e.text[:500]}")
+                    except Exception as e:
+                        answer_slot.error(f"❌ Error calling agent: {str(e)}")
+
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            history = st.session_state['agent_history']
+            metrics = client.metrics()
+            st.caption(
+                f"Context: {len(history)} messages (~{sum(map(estimate_tokens, history)):,} of {AGENT_HISTORY_TOKENS:,} tokens) · "
+                f"Cache hit rate {metrics['hit_rate']:.0%} over {metrics['requests']} questions"
+            )
+        with col2:
+            if st.button("🗑️ Clear conversation", use_container_width=True):
+                st.session_state['agent_history'] = []
+                st.session_state['agent_turns'] = []
+                try:
+                    st.rerun()
+                except AttributeError:
+                    st.experimental_rerun()
+
+loading_placeholder.empty()
+
+# Startup profile (set SIO_PROFILE_STARTUP=1 to show it in the sidebar and log it)
+STARTUP_PROFILE['script_ms'] = (time.perf_counter() - SCRIPT_START) * 1000
+st.session_state['startup_profile'] = STARTUP_PROFILE
+if os.getenv('SIO_PROFILE_STARTUP'):
+    profile_line = " · ".join(f"{name.replace('_ms', '')} {ms:.0f} ms" for name, ms in STARTUP_PROFILE.items())
+    print(f"⏱️ Startup profile: {profile_line}", flush=True)
+    st.sidebar.caption(f"⏱️ {profile_line}")
+
+# Rerun profile (SIO_PROFILE_RERUN=spans|cprofile|sample or ?profile=...): waterfall + flame-graph files
+if PROFILE.enabled:
+    PROFILE.stop()
+    render_rerun_profile(PROFILE)
 
 # Footer
 st.divider()
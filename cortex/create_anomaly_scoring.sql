@@ -0,0 +1,125 @@
+-- ============================================================================
+-- SIO - Online Usage Anomaly Scoring
+-- ============================================================================
+-- Persisted IsolationForest detectors per customer segment (retrained weekly)
+-- and a nightly scorer that appends a risk score for every new meter-day.
+-- Run after: cortex/create_feature_store.sql
+-- Execute with: snow sql -f cortex/create_anomaly_scoring.sql -c myconnection
+-- Scoring logic: data_engineering/anomaly_scoring.py (same code runs locally)
+-- ============================================================================
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SIO_DB;
+USE SCHEMA ML_ANALYTICS;
+USE WAREHOUSE SIO_MED_WH;
+
+-- ============================================================================
+-- 1. DETECTOR & SCORE TABLES
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS ANOMALY_DETECTORS (
+    SEGMENT VARCHAR(50) NOT NULL,            -- CUSTOMER_TYPE
+    MODEL_VERSION NUMBER NOT NULL,           -- One version per retrain, shared by all segments
+    TRAINED_AT TIMESTAMP_NTZ,
+    TRAINED_THROUGH DATE,
+    TRAINING_ROWS NUMBER,
+    CONTAMINATION FLOAT,
+    SCORE_MIN FLOAT,                         -- Training score range, maps scores to RISK_SCORE 0-100
+    SCORE_MAX FLOAT,
+    THRESHOLD FLOAT,                         -- Scores below this are IS_ANOMALY
+    FEATURES VARCHAR,
+    SKLEARN_VERSION VARCHAR(20),
+    MODEL VARCHAR                            -- Base64 pickled IsolationForest
+)
+COMMENT = 'Usage anomaly detectors per customer segment (last 4 versions)';
+
+CREATE TABLE IF NOT EXISTS USAGE_ANOMALY_SCORES (
+    READING_DATE DATE NOT NULL,
+    METER_ID NUMBER NOT NULL,
+    CUSTOMER_ID NUMBER NOT NULL,
+    SEGMENT VARCHAR(50),
+    VOLUME_M3 FLOAT,
+    ANOMALY_SCORE FLOAT,                     -- IsolationForest score_samples (lower = more anomalous)
+    RISK_SCORE FLOAT,                        -- 0-100 (100 = most anomalous)
+    IS_ANOMALY BOOLEAN,
+    MODEL_VERSION NUMBER,
+    SCORED_AT TIMESTAMP_NTZ
+)
+CLUSTER BY (READING_DATE)
+COMMENT = 'Anomaly score per meter-day, appended as new readings are featurized';
+
+-- ============================================================================
+-- 2. PROCEDURES
+-- ============================================================================
+
+CREATE STAGE IF NOT EXISTS SIO_DB.DATA.CODE_STAGE
+    COMMENT = 'Python modules imported by SIO procedures';
+
+!snow sql -q "PUT file://data_engineering/feature_store.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+!snow sql -q "PUT file://data_engineering/anomaly_scoring.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+
+CREATE OR REPLACE PROCEDURE RETRAIN_ANOMALY_DETECTORS(THROUGH DATE)
+RETURNS VARIANT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas', 'numpy', 'scikit-learn', 'snowflake-snowpark-python')
+IMPORTS = ('@SIO_DB.DATA.CODE_STAGE/feature_store.py', '@SIO_DB.DATA.CODE_STAGE/anomaly_scoring.py')
+HANDLER = 'anomaly_scoring.run_retrain_procedure'
+COMMENT = 'Train a new detector version per customer segment on the last 180 featurized days'
+EXECUTE AS OWNER;
+
+CREATE OR REPLACE PROCEDURE SCORE_NEW_READINGS(THROUGH DATE)
+RETURNS VARIANT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas', 'numpy', 'scikit-learn', 'snowflake-snowpark-python')
+IMPORTS = ('@SIO_DB.DATA.CODE_STAGE/feature_store.py', '@SIO_DB.DATA.CODE_STAGE/anomaly_scoring.py')
+HANDLER = 'anomaly_scoring.run_procedure'
+COMMENT = 'Append anomaly scores for meter-days after the last scored day'
+EXECUTE AS OWNER;
+
+-- ============================================================================
+-- 3. SCHEDULE
+-- ============================================================================
+
+-- Nightly: after the feature store refresh (child tasks need the root suspended while added)
+ALTER TASK IF EXISTS FEATURE_STORE_REFRESH_TASK SUSPEND;
+
+CREATE OR REPLACE TASK ANOMALY_SCORING_TASK
+    WAREHOUSE = SIO_MED_WH
+    COMMENT = 'Score the previous day once its features are in'
+    AFTER SIO_DB.ML_ANALYTICS.FEATURE_STORE_REFRESH_TASK
+AS
+    CALL SIO_DB.ML_ANALYTICS.SCORE_NEW_READINGS(DATEADD(day, -1, CURRENT_DATE()));
+
+ALTER TASK ANOMALY_SCORING_TASK RESUME;
+ALTER TASK FEATURE_STORE_REFRESH_TASK RESUME;
+
+-- Weekly: Sunday 04:00 Riyadh time, after the nightly refresh chain
+CREATE OR REPLACE TASK ANOMALY_RETRAIN_TASK
+    WAREHOUSE = SIO_MED_WH
+    SCHEDULE = 'USING CRON 0 4 * * 0 Asia/Riyadh'
+    COMMENT = 'Retrain the segment detectors on recent usage'
+AS
+    CALL SIO_DB.ML_ANALYTICS.RETRAIN_ANOMALY_DETECTORS(DATEADD(day, -1, CURRENT_DATE()));
+
+ALTER TASK ANOMALY_RETRAIN_TASK RESUME;
+
+-- ============================================================================
+-- 4. INITIAL BUILD & TEST
+-- ============================================================================
+
+-- NULL = through the latest featurized day (first run trains detectors and scores the last 180 days)
+CALL SIO_DB.ML_ANALYTICS.SCORE_NEW_READINGS(NULL);
+
+SELECT SEGMENT, MODEL_VERSION, TRAINED_THROUGH, TRAINING_ROWS, THRESHOLD
+FROM ANOMALY_DETECTORS
+ORDER BY SEGMENT, MODEL_VERSION;
+
+SELECT READING_DATE, COUNT(*) AS READINGS, SUM(IFF(IS_ANOMALY, 1, 0)) AS FLAGGED, ROUND(AVG(RISK_SCORE), 1) AS AVG_RISK
+FROM USAGE_ANOMALY_SCORES
+GROUP BY READING_DATE
+ORDER BY READING_DATE DESC
+LIMIT 7;
+
+SELECT '✅ Anomaly detectors trained, readings scored and scheduled!' AS STATUS;
@@ -0,0 +1,122 @@
+-- ============================================================================
+-- SIO - Rolling Feature Store for the ML Functions
+-- ============================================================================
+-- Region-day and meter-day features maintained incrementally (new days only).
+-- PREDICT_WATER_DEMAND and ANALYZE_WATER_USAGE_ANOMALIES read these tables.
+-- Run before: cortex/create_ml_functions.sql, cortex/create_ml_anomaly_procedure.sql
+-- Execute with: snow sql -f cortex/create_feature_store.sql -c myconnection
+-- Feature logic: data_engineering/feature_store.py (same code runs locally)
+-- ============================================================================
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SIO_DB;
+USE SCHEMA ML_ANALYTICS;
+USE WAREHOUSE SIO_MED_WH;
+
+-- ============================================================================
+-- 1. FEATURE TABLES
+-- ============================================================================
+
+-- Regional daily demand (PREDICT_WATER_DEMAND)
+CREATE TABLE IF NOT EXISTS REGION_DAY_FEATURES (
+    REGION_ID NUMBER NOT NULL,
+    FEATURE_DATE DATE NOT NULL,
+    TOTAL_USAGE_M3 FLOAT,
+    ACTIVE_METERS NUMBER,
+    AVG_TEMP_C FLOAT,
+    USAGE_MEAN_7D FLOAT,
+    USAGE_STD_7D FLOAT,
+    USAGE_MEAN_30D FLOAT,
+    USAGE_STD_30D FLOAT,
+    USAGE_MEAN_90D FLOAT,
+    USAGE_STD_90D FLOAT,
+    USAGE_LAG_1D FLOAT,
+    USAGE_LAG_7D FLOAT,
+    TEMPERATURE_AVG_C FLOAT,
+    RAINFALL_MM FLOAT,
+    HUMIDITY_PERCENT FLOAT,
+    DAY_OF_YEAR NUMBER,
+    MONTH NUMBER,
+    DAY_OF_WEEK NUMBER,
+    SEASONAL_FACTOR FLOAT,
+    UPDATED_AT TIMESTAMP_NTZ
+)
+CLUSTER BY (REGION_ID, FEATURE_DATE)
+COMMENT = 'Region-day usage with rolling stats, lags, forward-filled weather and seasonal indices';
+
+-- Per-meter daily readings (ANALYZE_WATER_USAGE_ANOMALIES)
+CREATE TABLE IF NOT EXISTS METER_DAY_FEATURES (
+    METER_ID NUMBER NOT NULL,
+    CUSTOMER_ID NUMBER NOT NULL,
+    REGION_ID NUMBER NOT NULL,
+    FEATURE_DATE DATE NOT NULL,
+    VOLUME_M3 FLOAT,
+    TEMPERATURE_C FLOAT,
+    FLOW_RATE_M3_H FLOAT,
+    PRESSURE_BAR FLOAT,
+    VOLUME_MEAN_7D FLOAT,
+    VOLUME_STD_7D FLOAT,
+    VOLUME_MEAN_30D FLOAT,
+    VOLUME_STD_30D FLOAT,
+    VOLUME_MEAN_90D FLOAT,
+    VOLUME_STD_90D FLOAT,
+    VOLUME_LAG_1D FLOAT,
+    VOLUME_LAG_7D FLOAT,
+    TEMPERATURE_AVG_C FLOAT,
+    RAINFALL_MM FLOAT,
+    HUMIDITY_PERCENT FLOAT,
+    DAY_OF_YEAR NUMBER,
+    MONTH NUMBER,
+    DAY_OF_WEEK NUMBER,
+    SEASONAL_FACTOR FLOAT,
+    UPDATED_AT TIMESTAMP_NTZ
+)
+CLUSTER BY (CUSTOMER_ID, FEATURE_DATE)
+COMMENT = 'Meter-day readings with rolling stats, lags, regional weather and seasonal indices';
+
+-- ============================================================================
+-- 2. REFRESH PROCEDURE
+-- ============================================================================
+
+CREATE STAGE IF NOT EXISTS SIO_DB.DATA.CODE_STAGE
+    COMMENT = 'Python modules imported by SIO procedures';
+
+!snow sql -q "PUT file://data_engineering/feature_store.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+
+CREATE OR REPLACE PROCEDURE REFRESH_FEATURE_STORE(THROUGH DATE)
+RETURNS VARIANT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas', 'snowflake-snowpark-python')
+IMPORTS = ('@SIO_DB.DATA.CODE_STAGE/feature_store.py')
+HANDLER = 'feature_store.run_procedure'
+COMMENT = 'Append region-day and meter-day features for days after the last featurized day'
+EXECUTE AS OWNER;
+
+-- ============================================================================
+-- 3. SCHEDULE
+-- ============================================================================
+
+CREATE OR REPLACE TASK FEATURE_STORE_REFRESH_TASK
+    WAREHOUSE = SIO_MED_WH
+    SCHEDULE = 'USING CRON 30 0 * * * Asia/Riyadh'
+    COMMENT = 'Nightly feature store refresh for the previous day'
+AS
+    CALL SIO_DB.ML_ANALYTICS.REFRESH_FEATURE_STORE(DATEADD(day, -1, CURRENT_DATE()));
+
+ALTER TASK FEATURE_STORE_REFRESH_TASK RESUME;
+
+-- ============================================================================
+-- 4. INITIAL BUILD & TEST
+-- ============================================================================
+
+-- NULL = through the latest reading
+CALL SIO_DB.ML_ANALYTICS.REFRESH_FEATURE_STORE(NULL);
+
+SELECT 'REGION_DAY_FEATURES' AS FEATURE_TABLE, COUNT(*) AS ROWS_, MIN(FEATURE_DATE) AS FIRST_DAY, MAX(FEATURE_DATE) AS LAST_DAY
+FROM REGION_DAY_FEATURES
+UNION ALL
+SELECT 'METER_DAY_FEATURES', COUNT(*), MIN(FEATURE_DATE), MAX(FEATURE_DATE)
+FROM METER_DAY_FEATURES;
+
+SELECT '✅ Feature store created and refreshed!' AS STATUS;
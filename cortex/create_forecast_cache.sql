@@ -0,0 +1,100 @@
+-- ============================================================================
+-- SIO - Forecast Cache Population
+-- ============================================================================
+-- Fills ML_ANALYTICS.FORECAST_CACHE nightly for every region and horizon (1-30 days).
+-- COMPUTE_WATER_DEMAND reads only METER_DAY_FEATURES and its seasonal weather factor, so its
+-- output changes only when the nightly feature store refresh does; no intra-day invalidation.
+-- PREDICT_WATER_DEMAND serves these rows (TAB 3 "Generate Forecast", agent tool).
+-- Run after: cortex/create_feature_store.sql, cortex/create_ml_functions_simple.sql
+-- Execute with: snow sql -f cortex/create_forecast_cache.sql -c myconnection
+-- ============================================================================
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SIO_DB;
+USE SCHEMA ML_ANALYTICS;
+USE WAREHOUSE SIO_MED_WH;
+
+-- ============================================================================
+-- 1. CACHE REFRESH PROCEDURE
+-- ============================================================================
+
+-- Recompute today's forecasts for one region (NULL = all regions) and horizons 1..MAX_HORIZON
+CREATE OR REPLACE PROCEDURE REFRESH_FORECAST_CACHE(REGION_ID_INPUT NUMBER, MAX_HORIZON NUMBER)
+RETURNS VARCHAR
+LANGUAGE SQL
+COMMENT = 'Recompute FORECAST_CACHE rows for today from COMPUTE_WATER_DEMAND'
+EXECUTE AS OWNER
+AS
+$$
+DECLARE
+    model_version VARCHAR;
+    forecasts NUMBER DEFAULT 0;
+BEGIN
+    SELECT SIO_DB.ML_ANALYTICS.FORECAST_MODEL_VERSION() INTO :model_version;
+    LET region_rows RESULTSET := (
+        SELECT REGION_ID FROM SIO_DB.DATA.REGIONS WHERE REGION_ID = COALESCE(:REGION_ID_INPUT, REGION_ID)
+    );
+    LET regions CURSOR FOR region_rows;
+
+    FOR region IN regions DO
+        LET region_id NUMBER := region.REGION_ID;
+
+        -- Earlier runs and other model versions are never served again
+        DELETE FROM SIO_DB.ML_ANALYTICS.FORECAST_CACHE WHERE REGION_ID = :region_id;
+
+        FOR horizon IN 1 TO MAX_HORIZON DO
+            INSERT INTO SIO_DB.ML_ANALYTICS.FORECAST_CACHE (
+                REGION_ID, RUN_DATE, HORIZON_DAYS, MODEL_VERSION, PREDICTION_DATE, PREDICTED_DEMAND_M3,
+                CONFIDENCE_LEVEL, SEASONAL_FACTOR, WEATHER_FACTOR, RECOMMENDATION
+            )
+            SELECT :region_id, CURRENT_DATE(), :horizon, :model_version, f.PREDICTION_DATE, f.PREDICTED_DEMAND_M3,
+                   f.CONFIDENCE_LEVEL, f.SEASONAL_FACTOR, f.WEATHER_FACTOR, f.RECOMMENDATION
+            FROM TABLE(SIO_DB.ML_ANALYTICS.COMPUTE_WATER_DEMAND(:region_id, :horizon)) f;
+            forecasts := forecasts + 1;
+        END FOR;
+    END FOR;
+    RETURN 'Cached ' || forecasts || ' forecasts (model ' || model_version || ')';
+END;
+$$;
+
+-- ============================================================================
+-- 2. SCHEDULE
+-- ============================================================================
+
+-- Nightly: after the feature store refresh (child tasks need the root suspended while added)
+ALTER TASK IF EXISTS FEATURE_STORE_REFRESH_TASK SUSPEND;
+
+CREATE OR REPLACE TASK FORECAST_CACHE_NIGHTLY_TASK
+    WAREHOUSE = SIO_MED_WH
+    COMMENT = 'Recompute all regions and horizons up to 30 days for the new day'
+    AFTER SIO_DB.ML_ANALYTICS.FEATURE_STORE_REFRESH_TASK
+AS
+    CALL SIO_DB.ML_ANALYTICS.REFRESH_FORECAST_CACHE(NULL, 30);
+
+ALTER TASK FORECAST_CACHE_NIGHTLY_TASK RESUME;
+ALTER TASK FEATURE_STORE_REFRESH_TASK RESUME;
+
+-- Earlier versions also recomputed regions from streams on WATER_USAGE/WEATHER_DATA every 15 minutes;
+-- the forecast does not read either table, so those runs only rewrote identical rows
+DROP TASK IF EXISTS FORECAST_CACHE_INVALIDATION_TASK;
+DROP PROCEDURE IF EXISTS INVALIDATE_FORECAST_CACHE();
+DROP TABLE IF EXISTS FORECAST_CACHE_STALE_REGIONS;
+DROP STREAM IF EXISTS WATER_USAGE_FORECAST_STREAM;
+DROP STREAM IF EXISTS WEATHER_DATA_FORECAST_STREAM;
+
+-- ============================================================================
+-- 3. INITIAL FILL & TEST
+-- ============================================================================
+
+CALL SIO_DB.ML_ANALYTICS.REFRESH_FORECAST_CACHE(NULL, 30);
+
+SELECT REGION_ID, COUNT(DISTINCT HORIZON_DAYS) AS HORIZONS, COUNT(*) AS CACHED_ROWS, MAX(MODEL_VERSION) AS MODEL_VERSION
+FROM FORECAST_CACHE
+WHERE RUN_DATE = CURRENT_DATE()
+GROUP BY REGION_ID
+ORDER BY REGION_ID;
+
+-- Served from the cache
+SELECT * FROM TABLE(SIO_DB.ML_ANALYTICS.PREDICT_WATER_DEMAND(1, 14)) ORDER BY PREDICTION_DATE;
+
+SELECT '✅ Forecast cache created, filled and scheduled!' AS STATUS;
@@ -0,0 +1,104 @@
+-- ============================================================================
+-- SIO - Per-Meter Demand Forecasts
+-- ============================================================================
+-- Forecasts the next 14 days for every active meter with a vectorized table
+-- function partitioned by METER_ID, so the warehouse spreads the meters across
+-- its nodes, and keeps the last 7 nightly runs in METER_FORECAST
+-- (capacity planning, farmer-facing alerts).
+-- Run after: cortex/create_feature_store.sql
+-- Execute with: snow sql -f cortex/create_meter_forecast.sql -c myconnection
+-- Forecasting logic: data_engineering/meter_forecast.py (same code runs locally)
+-- ============================================================================
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SIO_DB;
+USE SCHEMA ML_ANALYTICS;
+USE WAREHOUSE SIO_MED_WH;
+
+-- ============================================================================
+-- 1. FORECAST TABLE
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS METER_FORECAST (
+    RUN_DATE DATE NOT NULL,                  -- Last day of history the forecast saw
+    METER_ID NUMBER NOT NULL,
+    FORECAST_DATE DATE NOT NULL,
+    HORIZON_DAYS NUMBER NOT NULL,            -- 1 = the day after RUN_DATE
+    PREDICTED_VOLUME_M3 FLOAT,
+    LOWER_VOLUME_M3 FLOAT,                   -- 90% interval
+    UPPER_VOLUME_M3 FLOAT,
+    MODEL_VERSION VARCHAR(30),
+    CREATED_AT TIMESTAMP_NTZ
+)
+CLUSTER BY (RUN_DATE)
+COMMENT = 'Daily demand forecast per active meter (last 7 run dates)';
+
+-- ============================================================================
+-- 2. TABLE FUNCTION & PROCEDURE
+-- ============================================================================
+
+CREATE STAGE IF NOT EXISTS SIO_DB.DATA.CODE_STAGE
+    COMMENT = 'Python modules imported by SIO procedures';
+
+!snow sql -q "PUT file://data_engineering/feature_store.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+!snow sql -q "PUT file://data_engineering/meter_forecast.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+
+-- Call with OVER (PARTITION BY METER_ID): one end_partition per meter, 8 weeks of history in
+CREATE OR REPLACE FUNCTION FORECAST_METER_DEMAND(
+    METER_ID NUMBER, READING_DATE DATE, VOLUME_M3 FLOAT, THROUGH DATE, HORIZON NUMBER
+)
+RETURNS TABLE (
+    METER_ID NUMBER,
+    FORECAST_DATE DATE,
+    HORIZON_DAYS NUMBER,
+    PREDICTED_VOLUME_M3 FLOAT,
+    LOWER_VOLUME_M3 FLOAT,
+    UPPER_VOLUME_M3 FLOAT
+)
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas', 'numpy')
+IMPORTS = ('@SIO_DB.DATA.CODE_STAGE/feature_store.py', '@SIO_DB.DATA.CODE_STAGE/meter_forecast.py')
+HANDLER = 'meter_forecast.MeterForecastUDTF'
+COMMENT = 'Weekly-seasonal exponential smoothing forecast of one meter partition';
+
+CREATE OR REPLACE PROCEDURE REFRESH_METER_FORECAST(THROUGH DATE, HORIZON NUMBER)
+RETURNS VARIANT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas', 'numpy', 'snowflake-snowpark-python')
+IMPORTS = ('@SIO_DB.DATA.CODE_STAGE/feature_store.py', '@SIO_DB.DATA.CODE_STAGE/meter_forecast.py')
+HANDLER = 'meter_forecast.run_procedure'
+COMMENT = 'Replace the per-meter forecasts for run date THROUGH (NULL = latest featurized day)'
+EXECUTE AS OWNER;
+
+-- ============================================================================
+-- 3. SCHEDULE
+-- ============================================================================
+
+-- Nightly: after the feature store refresh (child tasks need the root suspended while added)
+ALTER TASK IF EXISTS FEATURE_STORE_REFRESH_TASK SUSPEND;
+
+CREATE OR REPLACE TASK METER_FORECAST_TASK
+    WAREHOUSE = SIO_MED_WH
+    COMMENT = 'Forecast every active meter once the previous day is featurized'
+    AFTER SIO_DB.ML_ANALYTICS.FEATURE_STORE_REFRESH_TASK
+AS
+    CALL SIO_DB.ML_ANALYTICS.REFRESH_METER_FORECAST(DATEADD(day, -1, CURRENT_DATE()), 14);
+
+ALTER TASK METER_FORECAST_TASK RESUME;
+ALTER TASK FEATURE_STORE_REFRESH_TASK RESUME;
+
+-- ============================================================================
+-- 4. INITIAL BUILD & TEST
+-- ============================================================================
+
+CALL SIO_DB.ML_ANALYTICS.REFRESH_METER_FORECAST(NULL, 14);
+
+SELECT RUN_DATE, COUNT(DISTINCT METER_ID) AS METERS, COUNT(*) AS FORECASTS,
+       ROUND(SUM(PREDICTED_VOLUME_M3), 1) AS PREDICTED_M3
+FROM METER_FORECAST
+GROUP BY RUN_DATE
+ORDER BY RUN_DATE DESC;
+
+SELECT '✅ Per-meter forecasts built and scheduled!' AS STATUS;
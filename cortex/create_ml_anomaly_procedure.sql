@@ -3,6 +3,7 @@
 -- ============================================================================
 -- Based on proven payroll anomaly detection pattern
 -- Returns TEXT summary (for agent use) instead of table
+-- Reads ML_ANALYTICS.METER_DAY_FEATURES (run cortex/create_feature_store.sql first)
 -- ============================================================================
 
 USE ROLE ACCOUNTADMIN;
@@ -31,40 +32,19 @@ import pandas as pd
 import numpy as np
 from sklearn.ensemble import IsolationForest
 
-def analyze_anomalies(session, customer_id_input, months_back):
-    """
-    Detect water usage anomalies using Isolation Forest ML
-    Returns: Text summary of findings
+FEATURE_COLUMNS = ['VOLUME_M3', 'TEMPERATURE_C', 'FLOW_RATE_M3_H', 'PRESSURE_BAR']
+
+def detect_anomalies(df, contamination=0.15, n_estimators=50):
     """
-    
-    # Query water usage data
-    query = f"""
-        SELECT 
-            wu.READING_DATE,
-            wu.VOLUME_M3,
-            wu.TEMPERATURE_C,
-            wu.FLOW_RATE_M3_H,
-            wu.PRESSURE_BAR
-        FROM SIO_DB.DATA.WATER_USAGE wu
-        JOIN SIO_DB.DATA.WATER_METERS wm ON wu.METER_ID = wm.METER_ID
-        WHERE wm.CUSTOMER_ID = {customer_id_input}
-        AND wu.READING_DATE >= DATEADD(month, -{months_back}, CURRENT_DATE())
-        ORDER BY wu.READING_DATE
+    Score daily readings with Isolation Forest
+    Returns: (features, predictions with -1 = anomaly, scores normalized to 0-100)
     """
+    features = df[FEATURE_COLUMNS].fillna(0)
     
-    df = session.sql(query).to_pandas()
-    
-    if len(df) < 7:
-        return f'Insufficient data - need at least 7 days of usage history. Found {len(df)} records.'
-    
-    # Prepare features for ML
-    features = df[['VOLUME_M3', 'TEMPERATURE_C', 'FLOW_RATE_M3_H', 'PRESSURE_BAR']].fillna(0)
-    
-    # Train Isolation Forest model
     model = IsolationForest(
-        contamination=0.15,  # Expect 15% anomalies
+        contamination=contamination,  # Expected share of anomalous days
         random_state=42,
-        n_estimators=50
+        n_estimators=n_estimators
     )
     
     # Detect anomalies (-1 = anomaly, 1 = normal)
@@ -76,6 +56,36 @@ def analyze_anomalies(session, customer_id_input, months_back):
     # Normalize scores to 0-100 (100 = most anomalous)
     norm_scores = 100 * (scores.max() - scores) / (scores.max() - scores.min() + 0.0001)
     
+    return features, predictions, norm_scores
+
+def analyze_anomalies(session, customer_id_input, months_back):
+    """
+    Detect water usage anomalies using Isolation Forest ML
+    Returns: Text summary of findings
+    """
+    
+    # Query meter-day features (cortex/create_feature_store.sql, clustered by customer)
+    query = f"""
+        SELECT 
+            FEATURE_DATE AS READING_DATE,
+            VOLUME_M3,
+            TEMPERATURE_C,
+            FLOW_RATE_M3_H,
+            PRESSURE_BAR
+        FROM SIO_DB.ML_ANALYTICS.METER_DAY_FEATURES
+        WHERE CUSTOMER_ID = {customer_id_input}
+        AND FEATURE_DATE >= DATEADD(month, -{months_back}, CURRENT_DATE())
+        ORDER BY FEATURE_DATE
+    """
+    
+    df = session.sql(query).to_pandas()
+    
+    if len(df) < 7:
+        return f'Insufficient data - need at least 7 days of usage history. Found {len(df)} records.'
+    
+    # Train Isolation Forest model (scored against injected labels by tests/score_anomaly_detector.py)
+    features, predictions, norm_scores = detect_anomalies(df)
+    
     # Calculate summary statistics
     anomalies = int((predictions == -1).sum())
     high_risk = int((norm_scores >= 70).sum())
@@ -14,6 +14,7 @@ USE WAREHOUSE SIO_MED_WH;
 -- ============================================================================
 -- This function predicts water demand using historical usage and weather patterns
 -- Works for BOTH Cortex Agent and Streamlit dashboard
+-- Reads ML_ANALYTICS.REGION_DAY_FEATURES (run cortex/create_feature_store.sql first)
 -- ============================================================================
 
 CREATE OR REPLACE FUNCTION PREDICT_WATER_DEMAND(
@@ -54,24 +55,29 @@ def predict_demand(session, region_id_input, days_ahead):
     """
     
     try:
-        # Fetch historical water usage data (last 6 months)
+        # Fetch region-day features (last 6 months) from the feature store
+        # (cortex/create_feature_store.sql: daily totals, forward-filled weather, calendar and seasonal factor)
         usage_query = f"""
             SELECT 
-                wu.READING_DATE,
-                SUM(wu.VOLUME_M3) AS TOTAL_USAGE_M3,
-                AVG(wu.TEMPERATURE_C) AS AVG_TEMP_C
-            FROM SIO_DB.DATA.WATER_USAGE wu
-            JOIN SIO_DB.DATA.WATER_METERS wm ON wu.METER_ID = wm.METER_ID
-            JOIN SIO_DB.DATA.CUSTOMERS c ON wm.CUSTOMER_ID = c.CUSTOMER_ID
-            WHERE c.REGION_ID = {region_id_input}
-              AND wu.READING_DATE >= DATEADD(month, -6, CURRENT_DATE())
-            GROUP BY wu.READING_DATE
-            ORDER BY wu.READING_DATE
+                FEATURE_DATE AS READING_DATE,
+                TOTAL_USAGE_M3,
+                AVG_TEMP_C,
+                TEMPERATURE_AVG_C,
+                RAINFALL_MM,
+                HUMIDITY_PERCENT,
+                DAY_OF_YEAR,
+                MONTH,
+                DAY_OF_WEEK,
+                SEASONAL_FACTOR
+            FROM SIO_DB.ML_ANALYTICS.REGION_DAY_FEATURES
+            WHERE REGION_ID = {region_id_input}
+              AND FEATURE_DATE >= DATEADD(month, -6, CURRENT_DATE())
+            ORDER BY FEATURE_DATE
         """
         
-        usage_df = session.sql(usage_query).to_pandas()
+        merged_df = session.sql(usage_query).to_pandas()
         
-        if len(usage_df) < 30:
+        if len(merged_df) < 30:
             # Not enough data for prediction
             return pd.DataFrame({
                 'PREDICTION_DATE': [datetime.now().date() + timedelta(days=i) for i in range(1, days_ahead+1)],
@@ -82,45 +88,8 @@ def predict_demand(session, region_id_input, days_ahead):
                 'RECOMMENDATION': ['More historical data needed for accurate predictions'] * days_ahead
             })
         
-        # Fetch weather data
-        weather_query = f"""
-            SELECT 
-                WEATHER_DATE,
-                TEMPERATURE_AVG_C,
-                RAINFALL_MM,
-                HUMIDITY_PERCENT
-            FROM SIO_DB.DATA.WEATHER_DATA
-            WHERE REGION_ID = {region_id_input}
-              AND WEATHER_DATE >= DATEADD(month, -6, CURRENT_DATE())
-            ORDER BY WEATHER_DATE
-        """
-        
-        weather_df = session.sql(weather_query).to_pandas()
-        
-        # Merge usage and weather data
-        usage_df['READING_DATE'] = pd.to_datetime(usage_df['READING_DATE'])
-        weather_df['WEATHER_DATE'] = pd.to_datetime(weather_df['WEATHER_DATE'])
-        
-        merged_df = pd.merge(
-            usage_df,
-            weather_df,
-            left_on='READING_DATE',
-            right_on='WEATHER_DATE',
-            how='left'
-        )
-        
-        # Fill missing weather data
-        merged_df = merged_df.ffill().bfill()
-        
-        # Feature engineering
-        merged_df['DAY_OF_YEAR'] = merged_df['READING_DATE'].dt.dayofyear
-        merged_df['MONTH'] = merged_df['READING_DATE'].dt.month
-        merged_df['DAY_OF_WEEK'] = merged_df['READING_DATE'].dt.dayofweek
-        
-        # Calculate seasonal factor (summer = higher usage)
-        merged_df['SEASONAL_FACTOR'] = merged_df['MONTH'].apply(
-            lambda m: 1.5 if m in [6, 7, 8, 9] else 1.0 if m in [3, 4, 5, 10] else 0.7
-        )
+        # Weather is forward-filled in the store; backfill days before the first weather row
+        merged_df = merged_df.bfill()
         
         # Prepare features for ML model
         feature_cols = ['DAY_OF_YEAR', 'MONTH', 'DAY_OF_WEEK', 'TEMPERATURE_AVG_C', 
@@ -225,122 +194,38 @@ $$;
 -- 2. REGIONAL EFFICIENCY ANALYSIS FUNCTION
 -- ============================================================================
 -- Identifies regions with efficiency improvement opportunities
+-- Reads ML_ANALYTICS.REGIONAL_EFFICIENCY_DAILY (run cortex/create_regional_efficiency.sql first)
 -- ============================================================================
 
-CREATE OR REPLACE FUNCTION ANALYZE_REGIONAL_EFFICIENCY()
+CREATE OR REPLACE FUNCTION ANALYZE_REGIONAL_EFFICIENCY(AS_OF DATE DEFAULT NULL, GRAIN_INPUT VARCHAR DEFAULT 'REGION')
 RETURNS TABLE (
     REGION_NAME VARCHAR,
     EFFICIENCY_SCORE FLOAT,
     EFFICIENCY_RATING VARCHAR,
     WATER_UTILIZATION_PERCENT FLOAT,
-    OPPORTUNITIES VARCHAR
+    OPPORTUNITIES VARCHAR,
+    GRAIN VARCHAR,
+    SEGMENT VARCHAR,
+    SCORE_DATE DATE
 )
-LANGUAGE PYTHON
-RUNTIME_VERSION = '3.11'
-PACKAGES = ('pandas', 'numpy')
-HANDLER = 'analyze_efficiency'
-COMMENT = 'Analyze water usage efficiency across regions'
+LANGUAGE SQL
+COMMENT = 'Efficiency scores on the latest scored day on or before AS_OF (default today); GRAIN_INPUT = REGION, WATER_SOURCE or CROP_TYPE'
 AS
 $$
-import pandas as pd
-import numpy as np
-
-def analyze_efficiency(session):
-    """
-    Analyze regional water efficiency and identify opportunities
-    
-    Returns:
-        DataFrame with efficiency analysis
-    """
-    
-    try:
-        query = """
-            SELECT 
-                r.REGION_NAME,
-                r.WATER_CAPACITY_M3,
-                SUM(wu.VOLUME_M3) AS TOTAL_USAGE_M3,
-                COUNT(DISTINCT c.CUSTOMER_ID) AS TOTAL_CUSTOMERS,
-                AVG(ws.EFFICIENCY_PERCENT) AS AVG_SOURCE_EFFICIENCY
-            FROM SIO_DB.DATA.REGIONS r
-            LEFT JOIN SIO_DB.DATA.CUSTOMERS c ON r.REGION_ID = c.REGION_ID
-            LEFT JOIN SIO_DB.DATA.WATER_METERS wm ON c.CUSTOMER_ID = wm.CUSTOMER_ID
-            LEFT JOIN SIO_DB.DATA.WATER_USAGE wu ON wm.METER_ID = wu.METER_ID
-            LEFT JOIN SIO_DB.DATA.WATER_SOURCES ws ON r.REGION_ID = ws.REGION_ID
-            WHERE wu.READING_DATE >= DATEADD(month, -1, CURRENT_DATE())
-              AND ws.STATUS = 'ACTIVE'
-            GROUP BY r.REGION_NAME, r.WATER_CAPACITY_M3
-        """
-        
-        df = session.sql(query).to_pandas()
-        
-        if len(df) == 0:
-            return pd.DataFrame(columns=['REGION_NAME', 'EFFICIENCY_SCORE', 'EFFICIENCY_RATING', 
-                                        'WATER_UTILIZATION_PERCENT', 'OPPORTUNITIES'])
-        
-        # Calculate efficiency metrics
-        df['USAGE_PER_CUSTOMER'] = df['TOTAL_USAGE_M3'] / df['TOTAL_CUSTOMERS']
-        df['CAPACITY_UTILIZATION'] = (df['TOTAL_USAGE_M3'] / df['WATER_CAPACITY_M3']) * 100
-        
-        # Normalize metrics for scoring
-        usage_norm = (df['USAGE_PER_CUSTOMER'] - df['USAGE_PER_CUSTOMER'].min()) / (df['USAGE_PER_CUSTOMER'].max() - df['USAGE_PER_CUSTOMER'].min())
-        efficiency_norm = df['AVG_SOURCE_EFFICIENCY'] / 100
-        
-        # Calculate efficiency score (0-100)
-        df['EFFICIENCY_SCORE'] = (efficiency_norm * 50) + ((1 - usage_norm) * 30) + (df['CAPACITY_UTILIZATION'].clip(0, 100) / 100 * 20)
-        df['EFFICIENCY_SCORE'] = df['EFFICIENCY_SCORE'] * 100
-        
-        # Assign ratings
-        df['EFFICIENCY_RATING'] = df['EFFICIENCY_SCORE'].apply(
-            lambda x: 'EXCELLENT' if x >= 80 else 'GOOD' if x >= 65 else 'FAIR' if x >= 50 else 'NEEDS_IMPROVEMENT'
-        )
-        
-        # Generate opportunities
-        def generate_opportunities(row):
-            opportunities = []
-            
-            if row['AVG_SOURCE_EFFICIENCY'] < 85:
-                opportunities.append('Improve source efficiency')
-            
-            if row['CAPACITY_UTILIZATION'] > 85:
-                opportunities.append('High utilization - consider capacity expansion')
-            elif row['CAPACITY_UTILIZATION'] < 40:
-                opportunities.append('Low utilization - surplus capacity available')
-            
-            if row['USAGE_PER_CUSTOMER'] > df['USAGE_PER_CUSTOMER'].median() * 1.3:
-                opportunities.append('Above-average usage - education opportunity')
-            
-            if not opportunities:
-                opportunities.append('Operating at optimal levels')
-            
-            return '; '.join(opportunities)
-        
-        df['OPPORTUNITIES'] = df.apply(generate_opportunities, axis=1)
-        
-        # Return results
-        result_df = df[[
-            'REGION_NAME',
-            'EFFICIENCY_SCORE',
-            'EFFICIENCY_RATING',
-            'CAPACITY_UTILIZATION',
-            'OPPORTUNITIES'
-        ]].copy()
-        
-        result_df.columns = ['REGION_NAME', 'EFFICIENCY_SCORE', 'EFFICIENCY_RATING', 
-                            'WATER_UTILIZATION_PERCENT', 'OPPORTUNITIES']
-        
-        result_df['EFFICIENCY_SCORE'] = result_df['EFFICIENCY_SCORE'].round(2)
-        result_df['WATER_UTILIZATION_PERCENT'] = result_df['WATER_UTILIZATION_PERCENT'].round(2)
-        
-        return result_df.sort_values('EFFICIENCY_SCORE', ascending=False)
-        
-    except Exception as e:
-        return pd.DataFrame({
-            'REGION_NAME': ['ERROR'],
-            'EFFICIENCY_SCORE': [0.0],
-            'EFFICIENCY_RATING': ['ERROR'],
-            'WATER_UTILIZATION_PERCENT': [0.0],
-            'OPPORTUNITIES': [f'Analysis error: {str(e)}']
-        })
+    SELECT
+        REGION_NAME,
+        EFFICIENCY_SCORE,
+        EFFICIENCY_RATING,
+        CAPACITY_UTILIZATION_PERCENT AS WATER_UTILIZATION_PERCENT,
+        OPPORTUNITIES,
+        GRAIN,
+        SEGMENT,
+        SCORE_DATE
+    FROM SIO_DB.ML_ANALYTICS.REGIONAL_EFFICIENCY_DAILY
+    WHERE GRAIN = UPPER(COALESCE(GRAIN_INPUT, 'REGION'))
+      AND SCORE_DATE <= COALESCE(AS_OF, CURRENT_DATE())
+    QUALIFY SCORE_DATE = MAX(SCORE_DATE) OVER ()
+    ORDER BY EFFICIENCY_SCORE DESC
 $$;
 
 -- ============================================================================
@@ -358,6 +243,7 @@ SELECT * FROM TABLE(SIO_DB.ML_ANALYTICS.PREDICT_WATER_DEMAND(1, 7));
 -- Test regional efficiency analysis
 SELECT 'Regional Efficiency Analysis:' AS TEST;
 SELECT * FROM TABLE(SIO_DB.ML_ANALYTICS.ANALYZE_REGIONAL_EFFICIENCY());
+SELECT * FROM TABLE(SIO_DB.ML_ANALYTICS.ANALYZE_REGIONAL_EFFICIENCY(NULL, 'CROP_TYPE'));
 
 SELECT '✅ ML functions created and tested successfully!' AS STATUS;
 
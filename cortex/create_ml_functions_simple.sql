@@ -8,52 +8,58 @@ USE SCHEMA ML_ANALYTICS;
 USE WAREHOUSE SIO_MED_WH;
 
 -- ============================================================================
--- 1. REGIONAL EFFICIENCY ANALYSIS (Simplified)
+-- 1. REGIONAL EFFICIENCY ANALYSIS
+-- ============================================================================
+-- Reads ML_ANALYTICS.REGIONAL_EFFICIENCY_DAILY (run cortex/create_regional_efficiency.sql first)
 -- ============================================================================
 
-CREATE OR REPLACE FUNCTION ANALYZE_REGIONAL_EFFICIENCY()
+CREATE OR REPLACE FUNCTION ANALYZE_REGIONAL_EFFICIENCY(AS_OF DATE DEFAULT NULL, GRAIN_INPUT VARCHAR DEFAULT 'REGION')
 RETURNS TABLE (
     REGION_NAME VARCHAR,
-    EFFICIENCY_SCORE NUMBER(38,2),
+    EFFICIENCY_SCORE FLOAT,
     EFFICIENCY_RATING VARCHAR,
-    WATER_UTILIZATION_PERCENT NUMBER(38,2),
-    OPPORTUNITIES VARCHAR
+    WATER_UTILIZATION_PERCENT FLOAT,
+    OPPORTUNITIES VARCHAR,
+    GRAIN VARCHAR,
+    SEGMENT VARCHAR,
+    SCORE_DATE DATE
 )
 LANGUAGE SQL
+COMMENT = 'Efficiency scores on the latest scored day on or before AS_OF (default today); GRAIN_INPUT = REGION, WATER_SOURCE or CROP_TYPE'
 AS
 $$
-    SELECT 
-        r.REGION_NAME,
-        -- Simple efficiency score based on source efficiency and utilization (capped at 100)
-        LEAST(
-            ROUND((AVG(ws.EFFICIENCY_PERCENT) + 
-                  LEAST((SUM(ws.CURRENT_LEVEL_M3) / NULLIF(SUM(ws.CAPACITY_M3), 0)) * 50, 50)) * 0.8, 2),
-            100.0
-        ) AS EFFICIENCY_SCORE,
-        CASE 
-            WHEN AVG(ws.EFFICIENCY_PERCENT) >= 85 THEN 'EXCELLENT'
-            WHEN AVG(ws.EFFICIENCY_PERCENT) >= 70 THEN 'GOOD'
-            WHEN AVG(ws.EFFICIENCY_PERCENT) >= 50 THEN 'FAIR'
-            ELSE 'NEEDS_IMPROVEMENT'
-        END AS EFFICIENCY_RATING,
-        ROUND((SUM(ws.CURRENT_LEVEL_M3) / NULLIF(SUM(ws.CAPACITY_M3), 0)) * 100, 2) AS WATER_UTILIZATION_PERCENT,
-        CASE
-            WHEN AVG(ws.EFFICIENCY_PERCENT) < 85 THEN 'Improve source efficiency'
-            WHEN (SUM(ws.CURRENT_LEVEL_M3) / NULLIF(SUM(ws.CAPACITY_M3), 0)) * 100 > 85 THEN 'High utilization - consider capacity expansion'
-            WHEN (SUM(ws.CURRENT_LEVEL_M3) / NULLIF(SUM(ws.CAPACITY_M3), 0)) * 100 < 40 THEN 'Low utilization - surplus capacity available'
-            ELSE 'Operating at optimal levels'
-        END AS OPPORTUNITIES
-    FROM SIO_DB.DATA.REGIONS r
-    LEFT JOIN SIO_DB.DATA.WATER_SOURCES ws ON r.REGION_ID = ws.REGION_ID AND ws.STATUS = 'ACTIVE'
-    GROUP BY r.REGION_NAME
+    SELECT
+        REGION_NAME,
+        EFFICIENCY_SCORE,
+        EFFICIENCY_RATING,
+        CAPACITY_UTILIZATION_PERCENT AS WATER_UTILIZATION_PERCENT,
+        OPPORTUNITIES,
+        GRAIN,
+        SEGMENT,
+        SCORE_DATE
+    FROM SIO_DB.ML_ANALYTICS.REGIONAL_EFFICIENCY_DAILY
+    WHERE GRAIN = UPPER(COALESCE(GRAIN_INPUT, 'REGION'))
+      AND SCORE_DATE <= COALESCE(AS_OF, CURRENT_DATE())
+    QUALIFY SCORE_DATE = MAX(SCORE_DATE) OVER ()
     ORDER BY EFFICIENCY_SCORE DESC
 $$;
 
 -- ============================================================================
--- 2. WATER DEMAND PREDICTION (Simplified - Statistical)
+-- 2. WATER DEMAND MODEL (Simplified - Statistical)
+-- ============================================================================
+-- Reads ML_ANALYTICS.METER_DAY_FEATURES (run cortex/create_feature_store.sql first)
+-- Bump FORECAST_MODEL_VERSION() when this logic changes so cached forecasts are ignored
 -- ============================================================================
 
-CREATE OR REPLACE FUNCTION PREDICT_WATER_DEMAND(
+CREATE OR REPLACE FUNCTION FORECAST_MODEL_VERSION()
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+    'seasonal-sql-v1'
+$$;
+
+CREATE OR REPLACE FUNCTION COMPUTE_WATER_DEMAND(
     REGION_ID_INPUT NUMBER,
     DAYS_AHEAD NUMBER
 )
@@ -70,14 +76,12 @@ AS
 $$
     WITH recent_usage AS (
         SELECT 
-            AVG(wu.VOLUME_M3) AS avg_daily_usage,
-            STDDEV(wu.VOLUME_M3) AS stddev_usage,
+            AVG(f.VOLUME_M3) AS avg_daily_usage,
+            STDDEV(f.VOLUME_M3) AS stddev_usage,
             COUNT(*) AS data_points
-        FROM SIO_DB.DATA.WATER_USAGE wu
-        JOIN SIO_DB.DATA.WATER_METERS wm ON wu.METER_ID = wm.METER_ID
-        JOIN SIO_DB.DATA.CUSTOMERS c ON wm.CUSTOMER_ID = c.CUSTOMER_ID
-        WHERE c.REGION_ID = REGION_ID_INPUT
-          AND wu.READING_DATE >= DATEADD(day, -30, CURRENT_DATE())
+        FROM SIO_DB.ML_ANALYTICS.METER_DAY_FEATURES f
+        WHERE f.REGION_ID = REGION_ID_INPUT
+          AND f.FEATURE_DATE >= DATEADD(day, -30, CURRENT_DATE())
     ),
     date_range AS (
         SELECT 
@@ -138,7 +142,59 @@ $$
 $$;
 
 -- ============================================================================
--- 3. TEST THE FUNCTIONS
+-- 3. WATER DEMAND PREDICTION (Cached)
+-- ============================================================================
+-- Serves today's rows from FORECAST_CACHE (filled by cortex/create_forecast_cache.sql)
+-- and computes live when the region/horizon is missing (e.g. before the nightly fill)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS FORECAST_CACHE (
+    REGION_ID NUMBER NOT NULL,
+    RUN_DATE DATE NOT NULL,
+    HORIZON_DAYS NUMBER NOT NULL,
+    MODEL_VERSION VARCHAR NOT NULL,
+    PREDICTION_DATE DATE NOT NULL,
+    PREDICTED_DEMAND_M3 NUMBER(38,2),
+    CONFIDENCE_LEVEL VARCHAR,
+    SEASONAL_FACTOR NUMBER(38,2),
+    WEATHER_FACTOR NUMBER(38,2),
+    RECOMMENDATION VARCHAR,
+    CACHED_AT TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+)
+CLUSTER BY (REGION_ID, RUN_DATE, HORIZON_DAYS)
+COMMENT = 'Precomputed PREDICT_WATER_DEMAND results keyed by (region, run date, horizon, model version)';
+
+CREATE OR REPLACE FUNCTION PREDICT_WATER_DEMAND(
+    REGION_ID_INPUT NUMBER,
+    DAYS_AHEAD NUMBER
+)
+RETURNS TABLE (
+    PREDICTION_DATE DATE,
+    PREDICTED_DEMAND_M3 NUMBER(38,2),
+    CONFIDENCE_LEVEL VARCHAR,
+    SEASONAL_FACTOR NUMBER(38,2),
+    WEATHER_FACTOR NUMBER(38,2),
+    RECOMMENDATION VARCHAR
+)
+LANGUAGE SQL
+AS
+$$
+    WITH cached AS (
+        SELECT PREDICTION_DATE, PREDICTED_DEMAND_M3, CONFIDENCE_LEVEL, SEASONAL_FACTOR, WEATHER_FACTOR, RECOMMENDATION
+        FROM SIO_DB.ML_ANALYTICS.FORECAST_CACHE
+        WHERE REGION_ID = REGION_ID_INPUT
+          AND HORIZON_DAYS = DAYS_AHEAD
+          AND RUN_DATE = CURRENT_DATE()
+          AND MODEL_VERSION = SIO_DB.ML_ANALYTICS.FORECAST_MODEL_VERSION()
+    )
+    SELECT * FROM cached
+    UNION ALL
+    SELECT * FROM TABLE(SIO_DB.ML_ANALYTICS.COMPUTE_WATER_DEMAND(REGION_ID_INPUT, DAYS_AHEAD))
+    WHERE NOT EXISTS (SELECT 1 FROM cached)
+$$;
+
+-- ============================================================================
+-- 4. TEST THE FUNCTIONS
 -- ============================================================================
 
 SELECT '============================================' AS STATUS;
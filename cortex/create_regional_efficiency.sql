@@ -0,0 +1,91 @@
+-- ============================================================================
+-- SIO - Daily Regional Efficiency Scores
+-- ============================================================================
+-- Scores regions, water sources and crop types every day from trailing 30-day
+-- usage in METER_DAY_FEATURES and keeps the history for trend charts.
+-- ANALYZE_REGIONAL_EFFICIENCY(AS_OF, GRAIN_INPUT) reads these rows (TAB 2, agent).
+-- Run after: cortex/create_feature_store.sql
+-- Run before: cortex/create_ml_functions.sql (or create_ml_functions_simple.sql)
+-- Execute with: snow sql -f cortex/create_regional_efficiency.sql -c myconnection
+-- Scoring logic: data_engineering/regional_efficiency.py (same code runs locally)
+-- ============================================================================
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SIO_DB;
+USE SCHEMA ML_ANALYTICS;
+USE WAREHOUSE SIO_MED_WH;
+
+-- ============================================================================
+-- 1. SCORE TABLE
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS REGIONAL_EFFICIENCY_DAILY (
+    SCORE_DATE DATE NOT NULL,
+    GRAIN VARCHAR(20) NOT NULL,              -- REGION, WATER_SOURCE, CROP_TYPE
+    REGION_ID NUMBER NOT NULL,
+    REGION_NAME VARCHAR(100),
+    SEGMENT VARCHAR(200) NOT NULL,           -- 'ALL', source name or crop type
+    TOTAL_USAGE_M3 FLOAT,                    -- Trailing 30 days (sources: share by capacity)
+    TOTAL_CUSTOMERS NUMBER,
+    USAGE_PER_CUSTOMER_M3 FLOAT,
+    AVG_SOURCE_EFFICIENCY FLOAT,
+    CAPACITY_M3 FLOAT,                       -- Crop types: region capacity share by farm area
+    CAPACITY_UTILIZATION_PERCENT FLOAT,
+    EFFICIENCY_SCORE FLOAT,                  -- 0-100
+    EFFICIENCY_RATING VARCHAR(30),
+    OPPORTUNITIES VARCHAR,
+    UPDATED_AT TIMESTAMP_NTZ
+)
+CLUSTER BY (GRAIN, SCORE_DATE)
+COMMENT = 'Daily efficiency scores by region, water source and crop type';
+
+-- ============================================================================
+-- 2. REFRESH PROCEDURE
+-- ============================================================================
+
+CREATE STAGE IF NOT EXISTS SIO_DB.DATA.CODE_STAGE
+    COMMENT = 'Python modules imported by SIO procedures';
+
+!snow sql -q "PUT file://data_engineering/feature_store.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+!snow sql -q "PUT file://data_engineering/regional_efficiency.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+
+CREATE OR REPLACE PROCEDURE REFRESH_REGIONAL_EFFICIENCY(THROUGH DATE)
+RETURNS VARIANT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas', 'snowflake-snowpark-python')
+IMPORTS = ('@SIO_DB.DATA.CODE_STAGE/feature_store.py', '@SIO_DB.DATA.CODE_STAGE/regional_efficiency.py')
+HANDLER = 'regional_efficiency.run_procedure'
+COMMENT = 'Append efficiency scores for days after the last scored day'
+EXECUTE AS OWNER;
+
+-- ============================================================================
+-- 3. SCHEDULE
+-- ============================================================================
+
+-- Nightly: after the feature store refresh (child tasks need the root suspended while added)
+ALTER TASK IF EXISTS FEATURE_STORE_REFRESH_TASK SUSPEND;
+
+CREATE OR REPLACE TASK REGIONAL_EFFICIENCY_REFRESH_TASK
+    WAREHOUSE = SIO_MED_WH
+    COMMENT = 'Score the previous day once its features are in'
+    AFTER SIO_DB.ML_ANALYTICS.FEATURE_STORE_REFRESH_TASK
+AS
+    CALL SIO_DB.ML_ANALYTICS.REFRESH_REGIONAL_EFFICIENCY(DATEADD(day, -1, CURRENT_DATE()));
+
+ALTER TASK REGIONAL_EFFICIENCY_REFRESH_TASK RESUME;
+ALTER TASK FEATURE_STORE_REFRESH_TASK RESUME;
+
+-- ============================================================================
+-- 4. INITIAL BUILD & TEST
+-- ============================================================================
+
+-- NULL = through the latest featurized day (first run scores the full feature history)
+CALL SIO_DB.ML_ANALYTICS.REFRESH_REGIONAL_EFFICIENCY(NULL);
+
+SELECT GRAIN, COUNT(DISTINCT SCORE_DATE) AS DAYS, COUNT(*) AS ROWS_, MAX(SCORE_DATE) AS LAST_DAY
+FROM REGIONAL_EFFICIENCY_DAILY
+GROUP BY GRAIN
+ORDER BY GRAIN;
+
+SELECT '✅ Regional efficiency scores created, scored and scheduled!' AS STATUS;
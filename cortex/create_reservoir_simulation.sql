@@ -0,0 +1,140 @@
+-- ============================================================================
+-- SIO - Monte Carlo Reservoir Depletion
+-- ============================================================================
+-- Projects every water source's level forward over thousands of stochastic
+-- paths (seasonal demand, weather scenarios, plant outages, wet-season runoff)
+-- and returns days-to-threshold percentiles per region.
+-- SIMULATE_RESERVOIR_DEPLETION(PATHS, HORIZON, THRESHOLD_PCT, INFLOW_PCT)
+-- is read by TAB 2 (Reservoir Depletion Outlook).
+-- Run after: cortex/create_feature_store.sql
+-- Execute with: snow sql -f cortex/create_reservoir_simulation.sql -c myconnection
+-- Simulation logic: data_engineering/reservoir_simulation.py (same code runs locally)
+-- ============================================================================
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SIO_DB;
+USE SCHEMA ML_ANALYTICS;
+USE WAREHOUSE SIO_MED_WH;
+
+-- ============================================================================
+-- 1. PARTITION HANDLER
+-- ============================================================================
+
+CREATE STAGE IF NOT EXISTS SIO_DB.DATA.CODE_STAGE
+    COMMENT = 'Python modules imported by SIO procedures';
+
+!snow sql -q "PUT file://data_engineering/feature_store.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+!snow sql -q "PUT file://data_engineering/reservoir_simulation.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+
+-- Call with OVER (PARTITION BY REGION_ID): one end_partition per region, all its sources at once
+CREATE OR REPLACE FUNCTION SIMULATE_REGION_DEPLETION(
+    REGION_ID NUMBER, REGION_NAME VARCHAR, SOURCE_TYPE VARCHAR, STATUS VARCHAR, CAPACITY_M3 FLOAT,
+    CURRENT_LEVEL_M3 FLOAT, EFFICIENCY_PERCENT FLOAT, BASE_DEMAND_M3 FLOAT, RAIN_DAY_PROBABILITY FLOAT,
+    RAIN_MM FLOAT, AS_OF DATE, PATHS NUMBER, HORIZON NUMBER, THRESHOLD_PCT FLOAT, INFLOW_PCT FLOAT
+)
+RETURNS TABLE (
+    REGION_ID NUMBER,
+    REGION_NAME VARCHAR,
+    SOURCES NUMBER,
+    CAPACITY_M3 FLOAT,
+    CURRENT_LEVEL_PCT FLOAT,
+    THRESHOLD_PCT FLOAT,
+    DAYS_P10 NUMBER,                         -- NULL = not below threshold within the horizon
+    DAYS_P50 NUMBER,
+    DAYS_P90 NUMBER,
+    PROBABILITY_DEPLETED FLOAT,              -- Share of paths below threshold within the horizon
+    END_LEVEL_P50_PCT FLOAT,
+    PATHS NUMBER,
+    HORIZON_DAYS NUMBER
+)
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas', 'numpy')
+IMPORTS = ('@SIO_DB.DATA.CODE_STAGE/feature_store.py', '@SIO_DB.DATA.CODE_STAGE/reservoir_simulation.py')
+HANDLER = 'reservoir_simulation.ReservoirDepletionUDTF'
+COMMENT = 'Monte Carlo depletion of one region''s water sources';
+
+-- ============================================================================
+-- 2. SIMULATION FUNCTION
+-- ============================================================================
+
+-- Sources with their region's demand and rainfall: reservoir_simulation.SOURCES_SQL
+CREATE OR REPLACE FUNCTION SIMULATE_RESERVOIR_DEPLETION(
+    PATHS_INPUT NUMBER DEFAULT 10000,
+    HORIZON_INPUT NUMBER DEFAULT 365,
+    THRESHOLD_PCT_INPUT FLOAT DEFAULT 20,
+    INFLOW_PCT_INPUT FLOAT DEFAULT 100
+)
+RETURNS TABLE (
+    REGION_ID NUMBER,
+    REGION_NAME VARCHAR,
+    SOURCES NUMBER,
+    CAPACITY_M3 FLOAT,
+    CURRENT_LEVEL_PCT FLOAT,
+    THRESHOLD_PCT FLOAT,
+    DAYS_P10 NUMBER,
+    DAYS_P50 NUMBER,
+    DAYS_P90 NUMBER,
+    PROBABILITY_DEPLETED FLOAT,
+    END_LEVEL_P50_PCT FLOAT,
+    PATHS NUMBER,
+    HORIZON_DAYS NUMBER
+)
+LANGUAGE SQL
+COMMENT = 'Days until each region''s storage falls below THRESHOLD_PCT of capacity: P10/P50/P90 over PATHS paths'
+AS
+$$
+    WITH latest AS (
+        SELECT MAX(FEATURE_DATE) AS AS_OF FROM SIO_DB.ML_ANALYTICS.REGION_DAY_FEATURES
+    ),
+    demand AS (
+        SELECT f.REGION_ID, AVG(f.TOTAL_USAGE_M3 / f.SEASONAL_FACTOR) AS BASE_DEMAND_M3
+        FROM SIO_DB.ML_ANALYTICS.REGION_DAY_FEATURES f, latest
+        WHERE f.FEATURE_DATE > DATEADD(day, -90, latest.AS_OF)
+        GROUP BY f.REGION_ID
+    ),
+    rain AS (
+        SELECT REGION_ID,
+               AVG(IFF(RAINFALL_MM > 0, 1, 0)) AS RAIN_DAY_PROBABILITY,
+               COALESCE(AVG(IFF(RAINFALL_MM > 0, RAINFALL_MM, NULL)), 0) AS RAIN_MM
+        FROM SIO_DB.DATA.WEATHER_DATA
+        WHERE MONTH(WEATHER_DATE) IN (11, 12, 1, 2, 3, 4)
+        GROUP BY REGION_ID
+    ),
+    sources AS (
+        SELECT s.REGION_ID, r.REGION_NAME, s.SOURCE_TYPE, s.STATUS, s.CAPACITY_M3::FLOAT AS CAPACITY_M3,
+               COALESCE(s.CURRENT_LEVEL_M3, 0)::FLOAT AS CURRENT_LEVEL_M3,
+               COALESCE(s.EFFICIENCY_PERCENT, 100)::FLOAT AS EFFICIENCY_PERCENT,
+               COALESCE(d.BASE_DEMAND_M3, 0) AS BASE_DEMAND_M3,
+               COALESCE(w.RAIN_DAY_PROBABILITY, 0) AS RAIN_DAY_PROBABILITY, COALESCE(w.RAIN_MM, 0) AS RAIN_MM,
+               latest.AS_OF
+        FROM SIO_DB.DATA.WATER_SOURCES s
+        JOIN SIO_DB.DATA.REGIONS r ON r.REGION_ID = s.REGION_ID
+        CROSS JOIN latest
+        LEFT JOIN demand d ON d.REGION_ID = s.REGION_ID
+        LEFT JOIN rain w ON w.REGION_ID = s.REGION_ID
+        WHERE s.STATUS <> 'INACTIVE' AND s.CAPACITY_M3 > 0
+    )
+    SELECT f.*
+    FROM sources s,
+         TABLE(SIO_DB.ML_ANALYTICS.SIMULATE_REGION_DEPLETION(
+             s.REGION_ID, s.REGION_NAME, s.SOURCE_TYPE, s.STATUS, s.CAPACITY_M3, s.CURRENT_LEVEL_M3,
+             s.EFFICIENCY_PERCENT, s.BASE_DEMAND_M3, s.RAIN_DAY_PROBABILITY, s.RAIN_MM, s.AS_OF,
+             PATHS_INPUT, HORIZON_INPUT, THRESHOLD_PCT_INPUT, INFLOW_PCT_INPUT
+         ) OVER (PARTITION BY s.REGION_ID)) f
+$$;
+
+-- ============================================================================
+-- 3. TEST
+-- ============================================================================
+
+SELECT REGION_NAME, CURRENT_LEVEL_PCT, DAYS_P10, DAYS_P50, DAYS_P90, PROBABILITY_DEPLETED
+FROM TABLE(SIO_DB.ML_ANALYTICS.SIMULATE_RESERVOIR_DEPLETION(10000, 365, 20, 100))
+ORDER BY PROBABILITY_DEPLETED DESC, DAYS_P10;
+
+-- Production at 90% of summer demand
+SELECT REGION_NAME, DAYS_P10, DAYS_P50, DAYS_P90, PROBABILITY_DEPLETED
+FROM TABLE(SIO_DB.ML_ANALYTICS.SIMULATE_RESERVOIR_DEPLETION(10000, 365, 20, 90))
+ORDER BY PROBABILITY_DEPLETED DESC, DAYS_P10;
+
+SELECT '✅ Reservoir depletion simulator created!' AS STATUS;
@@ -0,0 +1,122 @@
+-- ============================================================================
+-- SIO - Pre-Aggregated Tables for Cortex Analyst
+-- ============================================================================
+-- Daily/monthly usage by region and customer type, and AR aging by region.
+-- Referenced as logical tables in cortex/semantic_model.yaml so usage-trend
+-- questions read a few thousand rows instead of joining all of WATER_USAGE.
+-- Run after: data_engineering/insert_data.sql (or bulk_load.py) and data_engineering/ar_aging.sql
+-- Execute with: snow sql -f cortex/create_semantic_aggregates.sql -c myconnection
+-- Latency check: python tests/benchmark_semantic_queries.py
+-- ============================================================================
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SIO_DB;
+USE WAREHOUSE SIO_MED_WH;
+USE SCHEMA DATA;
+
+-- ============================================================================
+-- 1. USAGE AGGREGATES
+-- ============================================================================
+
+CREATE OR REPLACE DYNAMIC TABLE USAGE_DAILY_BY_REGION
+    TARGET_LAG = '1 hour'
+    WAREHOUSE = SIO_MED_WH
+    COMMENT = 'Daily water usage by region and customer type'
+AS
+SELECT
+    r.REGION_ID,
+    r.REGION_NAME,
+    c.CUSTOMER_TYPE,
+    wu.READING_DATE AS USAGE_DATE,
+    COUNT(DISTINCT wm.CUSTOMER_ID) AS ACTIVE_CUSTOMERS,
+    COUNT(DISTINCT wu.METER_ID) AS ACTIVE_METERS,
+    COUNT(*) AS READINGS,
+    SUM(wu.VOLUME_M3) AS TOTAL_USAGE_M3,
+    AVG(wu.PRESSURE_BAR) AS AVG_PRESSURE_BAR,
+    AVG(wu.FLOW_RATE_M3_H) AS AVG_FLOW_RATE_M3_H,
+    AVG(wu.TEMPERATURE_C) AS AVG_TEMPERATURE_C
+FROM WATER_USAGE wu
+JOIN WATER_METERS wm ON wu.METER_ID = wm.METER_ID
+JOIN CUSTOMERS c ON wm.CUSTOMER_ID = c.CUSTOMER_ID
+JOIN REGIONS r ON c.REGION_ID = r.REGION_ID
+GROUP BY r.REGION_ID, r.REGION_NAME, c.CUSTOMER_TYPE, wu.READING_DATE;
+
+CREATE OR REPLACE DYNAMIC TABLE USAGE_MONTHLY_BY_REGION
+    TARGET_LAG = '1 hour'
+    WAREHOUSE = SIO_MED_WH
+    COMMENT = 'Monthly water usage by region and customer type'
+AS
+SELECT
+    r.REGION_ID,
+    r.REGION_NAME,
+    c.CUSTOMER_TYPE,
+    DATE_TRUNC('MONTH', wu.READING_DATE)::DATE AS USAGE_MONTH,
+    COUNT(DISTINCT wm.CUSTOMER_ID) AS ACTIVE_CUSTOMERS,
+    COUNT(DISTINCT wu.METER_ID) AS ACTIVE_METERS,
+    COUNT(*) AS READINGS,
+    SUM(wu.VOLUME_M3) AS TOTAL_USAGE_M3,
+    AVG(wu.VOLUME_M3) AS AVG_DAILY_USAGE_M3,
+    MAX(wu.VOLUME_M3) AS MAX_DAILY_USAGE_M3
+FROM WATER_USAGE wu
+JOIN WATER_METERS wm ON wu.METER_ID = wm.METER_ID
+JOIN CUSTOMERS c ON wm.CUSTOMER_ID = c.CUSTOMER_ID
+JOIN REGIONS r ON c.REGION_ID = r.REGION_ID
+GROUP BY r.REGION_ID, r.REGION_NAME, c.CUSTOMER_TYPE, DATE_TRUNC('MONTH', wu.READING_DATE)::DATE;
+
+-- ============================================================================
+-- 2. ACCOUNTS RECEIVABLE AGING
+-- ============================================================================
+
+-- Buckets depend on CURRENT_DATE(), so this one is fully recomputed on refresh.
+-- Open amounts are net of payments: AR_BILL_BALANCES is kept current by data_engineering/ar_aging.sql
+CREATE OR REPLACE DYNAMIC TABLE AR_AGING_BY_REGION
+    TARGET_LAG = '1 hour'
+    WAREHOUSE = SIO_MED_WH
+    REFRESH_MODE = FULL
+    COMMENT = 'Open bill balances by region and days past due'
+AS
+WITH open_bills AS (
+    SELECT
+        c.REGION_ID,
+        b.CUSTOMER_ID,
+        b.BALANCE_SAR,
+        GREATEST(DATEDIFF(day, b.DUE_DATE, CURRENT_DATE()), 0) AS DAYS_PAST_DUE
+    FROM AR_BILL_BALANCES b
+    JOIN CUSTOMERS c ON b.CUSTOMER_ID = c.CUSTOMER_ID
+    WHERE b.BALANCE_SAR > 0
+)
+SELECT
+    r.REGION_ID,
+    r.REGION_NAME,
+    CASE
+        WHEN o.DAYS_PAST_DUE = 0 THEN 'CURRENT'
+        WHEN o.DAYS_PAST_DUE <= 30 THEN '1-30 DAYS'
+        WHEN o.DAYS_PAST_DUE <= 60 THEN '31-60 DAYS'
+        WHEN o.DAYS_PAST_DUE <= 90 THEN '61-90 DAYS'
+        ELSE '90+ DAYS'
+    END AS AGING_BUCKET,
+    CASE
+        WHEN o.DAYS_PAST_DUE = 0 THEN 0
+        WHEN o.DAYS_PAST_DUE <= 30 THEN 1
+        WHEN o.DAYS_PAST_DUE <= 60 THEN 2
+        WHEN o.DAYS_PAST_DUE <= 90 THEN 3
+        ELSE 4
+    END AS AGING_BUCKET_ORDER,
+    COUNT(*) AS OPEN_BILLS,
+    COUNT(DISTINCT o.CUSTOMER_ID) AS CUSTOMERS,
+    SUM(o.BALANCE_SAR) AS OPEN_AMOUNT_SAR,
+    MAX(o.DAYS_PAST_DUE) AS MAX_DAYS_PAST_DUE,
+    CURRENT_DATE() AS AS_OF_DATE
+FROM open_bills o
+JOIN REGIONS r ON o.REGION_ID = r.REGION_ID
+GROUP BY r.REGION_ID, r.REGION_NAME, AGING_BUCKET, AGING_BUCKET_ORDER;
+
+-- ============================================================================
+-- 3. VERIFY
+-- ============================================================================
+
+SELECT 'USAGE_DAILY_BY_REGION' AS TABLE_NAME, COUNT(*) AS ROW_COUNT FROM USAGE_DAILY_BY_REGION
+UNION ALL SELECT 'USAGE_MONTHLY_BY_REGION', COUNT(*) FROM USAGE_MONTHLY_BY_REGION
+UNION ALL SELECT 'AR_AGING_BY_REGION', COUNT(*) FROM AR_AGING_BY_REGION;
+
+SELECT '✅ Semantic model aggregate tables created!' AS STATUS;
@@ -62,20 +62,64 @@ WHERE RELATIVE_PATH ILIKE '%.pdf';
 SELECT 'Parsed documents:' AS STATUS, COUNT(*) AS COUNT FROM PARSED_DOCUMENTS;
 
 -- ============================================================================
--- 5. CREATE CORTEX SEARCH SERVICE
+-- 5. CHUNK PARSED DOCUMENTS
+-- ============================================================================
+-- Whole documents make poor retrieval units: each hit returns the full PDF
+-- to the agent. Split on LAYOUT markdown headings, then into overlapping
+-- ~1500 character windows so every chunk stays inside one section.
+-- Local equivalent for offline testing: data_engineering/chunk_documents.py
+
+CREATE OR REPLACE TABLE DOCUMENT_CHUNKS AS
+SELECT
+    d.DOCUMENT_ID || '_' || LPAD(c.INDEX::STRING, 3, '0') AS CHUNK_ID,
+    d.DOCUMENT_ID,
+    d.TITLE,
+    COALESCE(
+        c.VALUE:headers:header_3::STRING,
+        c.VALUE:headers:header_2::STRING,
+        c.VALUE:headers:header_1::STRING,
+        d.TITLE
+    ) AS SECTION,
+    c.INDEX AS CHUNK_INDEX,
+    -- Prefix the heading so section context is searchable with the body
+    COALESCE(
+        c.VALUE:headers:header_3::STRING,
+        c.VALUE:headers:header_2::STRING,
+        c.VALUE:headers:header_1::STRING,
+        d.TITLE
+    ) || '\n\n' || c.VALUE:chunk::STRING AS CHUNK,
+    LENGTH(c.VALUE:chunk::STRING) AS CHAR_COUNT,
+    d.RELATIVE_PATH,
+    CURRENT_TIMESTAMP() AS CREATED_DATE
+FROM PARSED_DOCUMENTS d,
+LATERAL FLATTEN(
+    INPUT => SNOWFLAKE.CORTEX.SPLIT_TEXT_MARKDOWN_HEADER(
+        d.CONTENT,
+        OBJECT_CONSTRUCT('#', 'header_1', '##', 'header_2', '###', 'header_3'),
+        1500,
+        200
+    )
+) c;
+
+SELECT 'Document chunks:' AS STATUS, COUNT(*) AS COUNT, ROUND(AVG(CHAR_COUNT)) AS AVG_CHARS FROM DOCUMENT_CHUNKS;
+
+-- ============================================================================
+-- 6. CREATE CORTEX SEARCH SERVICE
 -- ============================================================================
 
 CREATE OR REPLACE CORTEX SEARCH SERVICE SIO_KNOWLEDGE_SERVICE
-ON CONTENT
-ATTRIBUTES TITLE
+ON CHUNK
+ATTRIBUTES TITLE, SECTION
 WAREHOUSE = SIO_MED_WH
 TARGET_LAG = '1 minute'
 AS (
     SELECT 
+        CHUNK_ID,
         DOCUMENT_ID,
         TITLE,
-        CONTENT
-    FROM PARSED_DOCUMENTS
+        SECTION,
+        CHUNK
+    FROM DOCUMENT_CHUNKS
 );
 
 -- Wait for service to initialize
@@ -87,7 +131,7 @@ SELECT SYSTEM$GET_CORTEX_SEARCH_SERVICE_STATUS('SIO_KNOWLEDGE_SERVICE') AS SEARC
 SELECT '✅ Cortex Search service created and ready!' AS STATUS;
 
 -- ============================================================================
--- 6. TEST CORTEX SEARCH
+-- 7. TEST CORTEX SEARCH
 -- ============================================================================
 
 -- Test search with sample query
@@ -96,7 +140,7 @@ SELECT PARSE_JSON(
         SIO_KNOWLEDGE_SERVICE,
         '{
             "query": "How do I apply for irrigation subsidy?",
-            "columns": ["CONTENT"],
+            "columns": ["CHUNK", "TITLE", "SECTION"],
             "limit": 3
         }'
     )
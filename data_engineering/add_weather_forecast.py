@@ -4,65 +4,45 @@ Add future weather forecast data to WEATHER_DATA table
 Generates 90 days (3 months) of forecast data for all regions
 """
 
+import argparse
+import os
+
 import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-import random
 
-# Set seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+from weather_engine import forecast_window, generate_weather
+
+
+def load_region_ids(regions_file='data/regions.csv'):
+    """Region IDs from the generated regions file (IDs are assigned in file order)"""
+    if os.path.exists(regions_file):
+        return range(1, len(pd.read_csv(regions_file)) + 1)
+    return range(1, 9)  # 8 default regions
+
 
-# Regions
-REGION_IDS = range(1, 9)  # 8 regions
+def generate_future_weather(days_ahead=90, region_ids=None, seed=42):
+    """Generate future weather forecast starting tomorrow for every region"""
+    start_date, days = forecast_window(days_ahead)
+    if region_ids is None:
+        region_ids = load_region_ids()
+    return generate_weather(region_ids, start_date, days, seed=seed)
 
-def generate_future_weather(days_ahead=90):
-    """Generate future weather forecast for next 90 days"""
-    weather = []
-    start_date = datetime.now() + timedelta(days=1)
-    
-    for region_id in REGION_IDS:
-        current_date = start_date
-        
-        for day in range(days_ahead):
-            month = current_date.month
-            
-            # Temperature patterns (Saudi Arabia climate)
-            if month in [6, 7, 8]:  # Summer
-                temp_avg = random.uniform(38, 45)
-            elif month in [12, 1, 2]:  # Winter
-                temp_avg = random.uniform(15, 22)
-            else:  # Spring/Fall
-                temp_avg = random.uniform(25, 35)
-            
-            weather.append({
-                'REGION_ID': region_id,
-                'WEATHER_DATE': current_date.date(),
-                'TEMPERATURE_MAX_C': round(temp_avg + random.uniform(2, 5), 2),
-                'TEMPERATURE_MIN_C': round(temp_avg - random.uniform(5, 10), 2),
-                'TEMPERATURE_AVG_C': round(temp_avg, 2),
-                'RAINFALL_MM': round(random.uniform(0, 2) if month in [11, 12, 1, 2, 3] else 0, 2),
-                'HUMIDITY_PERCENT': round(random.uniform(20, 60), 2),
-                'WIND_SPEED_KMH': round(random.uniform(5, 25), 2)
-            })
-            
-            current_date += timedelta(days=1)
-            current_date = start_date + timedelta(days=day+1)  # Reset for next iteration
-    
-    return pd.DataFrame(weather)
 
 def main():
+    parser = argparse.ArgumentParser(description='Generate SIO weather forecast data')
+    parser.add_argument('--days', type=int, default=90, help='Forecast horizon in days')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
     print("🌡️ Generating future weather forecast data...")
-    
-    # Generate 90 days forecast
-    forecast_df = generate_future_weather(90)
+
+    forecast_df = generate_future_weather(args.days, seed=args.seed)
     forecast_df.to_csv('data/weather_forecast.csv', index=False)
-    
-    print(f"✅ Generated {len(forecast_df)} forecast records (90 days × 8 regions)")
-    print(f"   Forecast period: {forecast_df['WEATHER_DATE'].min()} to {forecast_df['WEATHER_DATE'].max()}")
+
+    num_regions = forecast_df['REGION_ID'].nunique()
+    print(f"✅ Generated {len(forecast_df)} forecast records ({args.days} days × {num_regions} regions)")
+    print(f"   Forecast period: {forecast_df['WEATHER_DATE'].min().date()} to {forecast_df['WEATHER_DATE'].max().date()}")
     print(f"\nFile saved: data/weather_forecast.csv")
     print(f"\nNext step: Load into WEATHER_DATA table")
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Online usage anomaly scoring with persisted detectors
+Keeps one IsolationForest per customer segment (CUSTOMER_TYPE) in ML_ANALYTICS.ANOMALY_DETECTORS, retrained
+weekly on recent METER_DAY_FEATURES, and appends a score for every new meter-day to
+ML_ANALYTICS.USAGE_ANOMALY_SCORES. Each run only scores days after the last scored day, so new readings are
+scored as soon as the feature store has them instead of when someone runs ANALYZE_WATER_USAGE_ANOMALIES.
+
+Detectors see scale-free features (volume against the meter's own 30/90-day history, flow per m3, pressure,
+repeated readings), so one model per segment covers small farms and large industrial meters alike.
+
+Runs as the RETRAIN_ANOMALY_DETECTORS / SCORE_NEW_READINGS procedures (see cortex/create_anomaly_scoring.sql)
+or locally:
+  python data_engineering/anomaly_scoring.py --local data/sio_local.duckdb --retrain
+"""
+
+import argparse
+import base64
+import os
+import pickle
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import IsolationForest
+
+from feature_store import EMPTY_WATERMARK, METER_TABLE, scalar, watermark
+
+DETECTOR_TABLE = 'SIO_DB.ML_ANALYTICS.ANOMALY_DETECTORS'
+SCORE_TABLE = 'SIO_DB.ML_ANALYTICS.USAGE_ANOMALY_SCORES'
+DETECTOR_BATCH = 'ANOMALY_DETECTOR_BATCH'
+SCORE_BATCH = 'ANOMALY_SCORE_BATCH'
+SCORING_SQL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cortex', 'create_anomaly_scoring.sql')
+
+# Training: recent history per segment, sampled so retraining cost does not grow with the customer base
+TRAIN_DAYS = 180
+MAX_TRAIN_ROWS = 50000
+N_ESTIMATORS = 100
+CONTAMINATION = 0.03  # Expected share of anomalous meter-days; sets IS_ANOMALY
+KEEP_VERSIONS = 4
+
+# Scoring: new days are read and appended this many days at a time
+BATCH_DAYS = 31
+
+# Neutral value for features undefined on a row (first days of a meter, zero volume)
+FEATURE_DEFAULTS = {
+    'VOLUME_RATIO_30D': 1.0,
+    'VOLUME_CHANGE_1D': 1.0,
+    'VOLUME_TREND_7_90D': 1.0,
+    'FLOW_HOURS': 24.0,
+    'PRESSURE_BAR': 3.0,
+    'REPEATED_READING': 0.0,
+}
+FEATURE_COLUMNS = list(FEATURE_DEFAULTS)
+
+FEATURES_SQL = f"""
+    SELECT
+        f.METER_ID,
+        f.CUSTOMER_ID,
+        c.CUSTOMER_TYPE AS SEGMENT,
+        f.FEATURE_DATE AS READING_DATE,
+        f.VOLUME_M3,
+        f.VOLUME_M3 / NULLIF(f.VOLUME_MEAN_30D, 0) AS VOLUME_RATIO_30D,
+        f.VOLUME_M3 / NULLIF(f.VOLUME_LAG_1D, 0) AS VOLUME_CHANGE_1D,
+        f.VOLUME_MEAN_7D / NULLIF(f.VOLUME_MEAN_90D, 0) AS VOLUME_TREND_7_90D,
+        f.FLOW_RATE_M3_H * 24 / NULLIF(f.VOLUME_M3, 0) AS FLOW_HOURS,
+        f.PRESSURE_BAR,
+        CASE WHEN f.VOLUME_M3 = f.VOLUME_LAG_1D THEN 1 ELSE 0 END AS REPEATED_READING
+    FROM {METER_TABLE} f
+    JOIN SIO_DB.DATA.CUSTOMERS c ON f.CUSTOMER_ID = c.CUSTOMER_ID
+    WHERE f.FEATURE_DATE > '{{since}}'::DATE AND f.FEATURE_DATE <= '{{through}}'::DATE
+"""
+
+LATEST_DETECTORS_SQL = f"""
+    SELECT SEGMENT, MODEL_VERSION, SCORE_MIN, SCORE_MAX, THRESHOLD, MODEL
+    FROM {DETECTOR_TABLE}
+    QUALIFY MODEL_VERSION = MAX(MODEL_VERSION) OVER (PARTITION BY SEGMENT)
+"""
+
+INSERT_DETECTORS_SQL = f"""
+    INSERT INTO {DETECTOR_TABLE}
+        (SEGMENT, MODEL_VERSION, TRAINED_AT, TRAINED_THROUGH, TRAINING_ROWS, CONTAMINATION,
+         SCORE_MIN, SCORE_MAX, THRESHOLD, FEATURES, SKLEARN_VERSION, MODEL)
+    SELECT SEGMENT, MODEL_VERSION, CURRENT_TIMESTAMP(), TRAINED_THROUGH::DATE, TRAINING_ROWS, CONTAMINATION,
+           SCORE_MIN, SCORE_MAX, THRESHOLD, FEATURES, SKLEARN_VERSION, MODEL
+    FROM {DETECTOR_BATCH}
+"""
+
+INSERT_SCORES_SQL = f"""
+    INSERT INTO {SCORE_TABLE}
+        (READING_DATE, METER_ID, CUSTOMER_ID, SEGMENT, VOLUME_M3, ANOMALY_SCORE, RISK_SCORE, IS_ANOMALY,
+         MODEL_VERSION, SCORED_AT)
+    SELECT READING_DATE::DATE, METER_ID, CUSTOMER_ID, SEGMENT, VOLUME_M3, ANOMALY_SCORE, RISK_SCORE, IS_ANOMALY,
+           MODEL_VERSION, CURRENT_TIMESTAMP()
+    FROM {SCORE_BATCH}
+"""
+
+
+def feature_matrix(df):
+    """Detector inputs with undefined features set to their neutral value"""
+    return df[FEATURE_COLUMNS].astype('float64').fillna(FEATURE_DEFAULTS)
+
+
+def latest_feature_date(session):
+    """Last featurized day as YYYY-MM-DD, or None before the first feature store refresh"""
+    last = scalar(session.sql(f'SELECT MAX(FEATURE_DATE) FROM {METER_TABLE}').collect())
+    return pd.Timestamp(last).date().isoformat() if last is not None else None
+
+
+def train_detectors(session, through=None, seed=42):
+    """Fit one detector per segment on the TRAIN_DAYS before through and append them as a new version"""
+    start = time.perf_counter()
+    through = pd.Timestamp(through).date().isoformat() if through is not None else latest_feature_date(session)
+    if through is None:
+        return {'through': None, 'version': None, 'segments': {}}
+    since = (pd.Timestamp(through) - pd.Timedelta(days=TRAIN_DAYS)).date().isoformat()
+    history = session.sql(FEATURES_SQL.format(since=since, through=through)).to_pandas()
+
+    version = int(scalar(session.sql(f'SELECT MAX(MODEL_VERSION) FROM {DETECTOR_TABLE}').collect()) or 0) + 1
+    rows, segments = [], {}
+    for segment, group in history.groupby('SEGMENT', sort=True):
+        sample = group.sample(min(len(group), MAX_TRAIN_ROWS), random_state=seed)
+        features = feature_matrix(sample)
+        model = IsolationForest(n_estimators=N_ESTIMATORS, contamination=CONTAMINATION, random_state=seed)
+        model.fit(features.to_numpy())
+        scores = model.score_samples(features.to_numpy())
+        rows.append({
+            'SEGMENT': segment,
+            'MODEL_VERSION': version,
+            'TRAINED_THROUGH': through,
+            'TRAINING_ROWS': len(sample),
+            'CONTAMINATION': CONTAMINATION,
+            'SCORE_MIN': float(scores.min()),
+            'SCORE_MAX': float(scores.max()),
+            'THRESHOLD': float(model.offset_),
+            'FEATURES': ','.join(FEATURE_COLUMNS),
+            'SKLEARN_VERSION': sklearn.__version__,
+            'MODEL': base64.b64encode(pickle.dumps(model)).decode('ascii'),
+        })
+        segments[segment] = len(sample)
+
+    if rows:
+        session.write_pandas(pd.DataFrame(rows), DETECTOR_BATCH, auto_create_table=True, overwrite=True,
+                             table_type='temporary')
+        session.sql(INSERT_DETECTORS_SQL).collect()
+        session.sql(f'DELETE FROM {DETECTOR_TABLE} WHERE MODEL_VERSION <= {version - KEEP_VERSIONS}').collect()
+    return {'through': through, 'version': version if rows else None, 'segments': segments,
+            'seconds': round(time.perf_counter() - start, 3)}
+
+
+def load_detectors(session):
+    """Latest detector per segment: {segment: (version, model, score_min, score_max, threshold)}"""
+    detectors = {}
+    for segment, version, score_min, score_max, threshold, blob in session.sql(LATEST_DETECTORS_SQL).collect():
+        model = pickle.loads(base64.b64decode(blob))  # Written by train_detectors into our own table
+        detectors[segment] = (int(version), model, float(score_min), float(score_max), float(threshold))
+    return detectors
+
+
+def score_frame(df, detectors):
+    """Score feature rows with their segment's detector; rows of segments without one are dropped"""
+    scored = []
+    for segment, group in df.groupby('SEGMENT', sort=False):
+        if segment not in detectors:
+            continue
+        version, model, score_min, score_max, threshold = detectors[segment]
+        scores = model.score_samples(feature_matrix(group).to_numpy())
+        scored.append(pd.DataFrame({
+            'READING_DATE': group['READING_DATE'].to_numpy(),
+            'METER_ID': group['METER_ID'].to_numpy(),
+            'CUSTOMER_ID': group['CUSTOMER_ID'].to_numpy(),
+            'SEGMENT': segment,
+            'VOLUME_M3': group['VOLUME_M3'].to_numpy(),
+            'ANOMALY_SCORE': scores,
+            # 0-100 against the training score range (100 = more anomalous than any training day)
+            'RISK_SCORE': np.clip(100 * (score_max - scores) / (score_max - score_min + 0.0001), 0, 100).round(1),
+            'IS_ANOMALY': scores < threshold,
+            'MODEL_VERSION': version,
+        }))
+    return pd.concat(scored, ignore_index=True) if scored else pd.DataFrame()
+
+
+def score_new_readings(session, through=None, rebuild_from=None):
+    """Append scores for meter-days after the last scored day (or from rebuild_from) through the given day"""
+    start = time.perf_counter()
+    through = pd.Timestamp(through).date().isoformat() if through is not None else latest_feature_date(session)
+    if through is None:
+        return {'through': None, 'rows': 0}
+
+    detectors = load_detectors(session)
+    trained = None
+    if not detectors:
+        trained = train_detectors(session, through)
+        detectors = load_detectors(session)
+
+    since = watermark(session, SCORE_TABLE, 'READING_DATE')
+    if rebuild_from is not None:
+        since = min(since, (pd.Timestamp(rebuild_from) - pd.Timedelta(days=1)).date().isoformat())
+    if since == EMPTY_WATERMARK:
+        # First run: score the training window rather than the whole feature history
+        since = (pd.Timestamp(through) - pd.Timedelta(days=TRAIN_DAYS)).date().isoformat()
+    stats = {'through': through, 'since': since, 'rows': 0, 'flagged': 0, 'skipped': 0, 'retrained': trained,
+             'score_seconds': 0.0}
+    if since >= through:
+        stats['seconds'] = round(time.perf_counter() - start, 3)
+        return stats
+
+    session.sql(f"DELETE FROM {SCORE_TABLE} WHERE READING_DATE > '{since}'::DATE AND READING_DATE <= '{through}'::DATE").collect()
+    batch_start = pd.Timestamp(since)
+    while batch_start < pd.Timestamp(through):
+        batch_end = min(batch_start + pd.Timedelta(days=BATCH_DAYS), pd.Timestamp(through))
+        features = session.sql(FEATURES_SQL.format(since=batch_start.date().isoformat(),
+                                                   through=batch_end.date().isoformat())).to_pandas()
+        step = time.perf_counter()
+        scores = score_frame(features, detectors)
+        stats['score_seconds'] += time.perf_counter() - step
+        if len(scores):
+            session.write_pandas(scores, SCORE_BATCH, auto_create_table=True, overwrite=True, table_type='temporary')
+            session.sql(INSERT_SCORES_SQL).collect()
+        stats['rows'] += len(scores)
+        stats['flagged'] += int(scores['IS_ANOMALY'].sum()) if len(scores) else 0
+        stats['skipped'] += len(features) - len(scores)
+        batch_start = batch_end
+
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    stats['score_seconds'] = round(stats['score_seconds'], 3)
+    stats['readings_per_sec'] = round(stats['rows'] / max(stats['seconds'], 1e-9), 1)
+    return stats
+
+
+def run_procedure(session, through):
+    """Handler for SIO_DB.ML_ANALYTICS.SCORE_NEW_READINGS"""
+    return score_new_readings(session, through)
+
+
+def run_retrain_procedure(session, through):
+    """Handler for SIO_DB.ML_ANALYTICS.RETRAIN_ANOMALY_DETECTORS"""
+    return train_detectors(session, through)
+
+
+def setup_local(con):
+    """Create the detector and score tables in the local DuckDB stand-in"""
+    import local_backend
+
+    local_backend.run_script(con, SCORING_SQL_FILE)
+
+
+def main():
+    """Retrain detectors and/or score new readings in the local DuckDB stand-in"""
+    parser = argparse.ArgumentParser(description='Incremental usage anomaly scoring (local DuckDB stand-in)')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default='data/sio_local.duckdb')
+    parser.add_argument('--through', help='Last day to score YYYY-MM-DD (default: latest featurized day)')
+    parser.add_argument('--rebuild-from', help='Rescore days from YYYY-MM-DD (e.g. after retraining)')
+    parser.add_argument('--retrain', action='store_true', help='Train a new detector version before scoring')
+    args = parser.parse_args()
+
+    import local_backend
+
+    through = datetime.strptime(args.through, '%Y-%m-%d').date() if args.through else None
+    rebuild_from = datetime.strptime(args.rebuild_from, '%Y-%m-%d').date() if args.rebuild_from else None
+    con = local_backend.connect(args.local)
+    setup_local(con)
+    session = local_backend.LocalSession(con)
+
+    if args.retrain:
+        trained = train_detectors(session, through)
+        if trained['version'] is not None:
+            print(f"🌲 Detector version {trained['version']} trained through {trained['through']} "
+                  f"({trained['seconds']:.2f}s)")
+            for segment, rows in trained['segments'].items():
+                print(f"  - {segment}: {rows:,} training rows")
+
+    stats = score_new_readings(session, through, rebuild_from)
+    if stats['through'] is None:
+        print("⚠️  No featurized days to score - run data_engineering/feature_store.py first")
+        return
+    if stats['retrained']:
+        print(f"🌲 No detectors yet - trained version {stats['retrained']['version']}")
+    print(f"🚨 Scored {stats['rows']:,} meter-days after {stats['since']} through {stats['through']}: "
+          f"{stats['flagged']:,} flagged ({stats['seconds']:.2f}s)")
+    if stats['rows']:
+        print(f"  - {stats['readings_per_sec']:,.0f} readings/s end to end, "
+              f"{stats['rows'] / max(stats['score_seconds'], 1e-9):,.0f} readings/s in the detectors")
+    if stats['skipped']:
+        print(f"  - ⚠️  {stats['skipped']:,} meter-days skipped: segment has no detector (run with --retrain)")
+
+
+if __name__ == "__main__":
+    main()
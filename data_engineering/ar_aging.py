@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained accounts-receivable aging for SIO
+Keeps AR_BILL_BALANCES (every bill's billed, paid and open amount) and AR_AGING (one row per customer with an
+open balance, split into 0-30 / 31-60 / 61-90 / 90+ days past due) up to date. A run only re-derives the bills
+that changed in BILLING or PAYMENTS since the last run, plus the open bills whose age crossed a bucket boundary
+since the last as-of date, and re-aggregates only the customers those bills belong to. The first run (or
+--rebuild) derives every bill in one set-based pass instead.
+
+Runs as the REFRESH_AR_AGING procedure (see ar_aging.sql, fed by streams on BILLING and PAYMENTS)
+or locally against the DuckDB stand-in, where BILL_ID and PAYMENT_ID watermarks and a diff of the open bills
+against AR_BILL_BALANCES replace the streams:
+  python data_engineering/ar_aging.py --local data/sio_local.duckdb
+"""
+
+import argparse
+import os
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+from billing_engine import affected_rows
+
+BILLING_STREAM = 'SIO_DB.DATA.BILLING_AR_STREAM'
+PAYMENTS_STREAM = 'SIO_DB.DATA.PAYMENTS_AR_STREAM'
+CHANGES_TABLE = 'SIO_DB.DATA.AR_AGING_CHANGES'
+BALANCES_TABLE = 'SIO_DB.DATA.AR_BILL_BALANCES'
+AGING_TABLE = 'SIO_DB.DATA.AR_AGING'
+STATE_TABLE = 'SIO_DB.DATA.AR_AGING_STATE'
+TOUCHED_TABLE = 'AR_AGING_TOUCHED'
+AR_SQL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ar_aging.sql')
+
+# Days past due at which an open amount moves into the next bucket (past due, 31-60, 61-90, 90+)
+BUCKET_BOUNDARIES = (1, 31, 61, 91)
+
+# Bills queued for re-derivation; the queue is only cleared after AR_AGING is rewritten, and re-deriving
+# a bill from BILLING and PAYMENTS is idempotent, so a failed run is safe
+CAPTURE_FROM_STREAMS_SQL = f"""
+    INSERT INTO {CHANGES_TABLE} (BILL_ID)
+    SELECT BILL_ID FROM {BILLING_STREAM}
+    UNION
+    SELECT BILL_ID FROM {PAYMENTS_STREAM}
+"""
+
+# Local stand-in for the streams: bills and payments past the watermarks, plus bills open before or after that
+# billing re-priced, re-dated or closed in place. Billing never updates a PAID bill (see MERGE_BILLS_SQL), so the
+# diff only reads open bills; a PAID bill deleted or edited by hand needs --rebuild.
+CAPTURE_FROM_WATERMARKS_SQL = f"""
+    INSERT INTO {CHANGES_TABLE} (BILL_ID)
+    SELECT BILL_ID
+    FROM SIO_DB.DATA.BILLING
+    WHERE BILL_ID > (SELECT COALESCE(MAX(LAST_BILL_ID), 0) FROM {STATE_TABLE})
+      AND BILL_ID <= {{max_bill_id}}
+    UNION
+    SELECT COALESCE(b.BILL_ID, a.BILL_ID)
+    FROM (
+        SELECT BILL_ID, CUSTOMER_ID, DUE_DATE, TOTAL_AMOUNT_SAR, BILL_STATUS
+        FROM SIO_DB.DATA.BILLING
+        WHERE BILL_STATUS <> 'PAID' AND BILL_ID <= {{max_bill_id}}
+    ) b
+    FULL JOIN (
+        SELECT BILL_ID, CUSTOMER_ID, DUE_DATE, TOTAL_AMOUNT_SAR, BILL_STATUS
+        FROM {BALANCES_TABLE}
+        WHERE BILL_STATUS <> 'PAID'
+    ) a ON a.BILL_ID = b.BILL_ID
+    WHERE a.BILL_ID IS NULL
+       OR b.BILL_ID IS NULL
+       OR a.CUSTOMER_ID <> b.CUSTOMER_ID
+       OR a.DUE_DATE <> b.DUE_DATE
+       OR a.TOTAL_AMOUNT_SAR <> b.TOTAL_AMOUNT_SAR
+       OR a.BILL_STATUS <> b.BILL_STATUS
+    UNION
+    SELECT BILL_ID
+    FROM SIO_DB.DATA.PAYMENTS
+    WHERE PAYMENT_ID > (SELECT COALESCE(MAX(LAST_PAYMENT_ID), 0) FROM {STATE_TABLE})
+      AND PAYMENT_ID <= {{max_payment_id}}
+"""
+
+# Scopes for the statements below: only queued bills and touched customers, or everything on a rebuild
+CHANGED_BILLS = f'IN (SELECT BILL_ID FROM {CHANGES_TABLE})'
+TOUCHED_CUSTOMERS = f'IN (SELECT CUSTOMER_ID FROM {TOUCHED_TABLE})'
+EVERY_ROW = 'IS NOT NULL'
+
+# Customers to re-aggregate: owners of changed bills (before and after the change) and of open bills
+# that crossed a bucket boundary between the previous and the new as-of date
+TOUCHED_CUSTOMERS_SQL = f"""
+    CREATE OR REPLACE TEMPORARY TABLE {TOUCHED_TABLE} AS
+    SELECT a.CUSTOMER_ID
+    FROM {BALANCES_TABLE} a
+    JOIN {CHANGES_TABLE} c ON c.BILL_ID = a.BILL_ID
+    UNION
+    SELECT b.CUSTOMER_ID
+    FROM SIO_DB.DATA.BILLING b
+    JOIN {CHANGES_TABLE} c ON c.BILL_ID = b.BILL_ID
+    UNION
+    SELECT CUSTOMER_ID
+    FROM {BALANCES_TABLE}
+    WHERE BALANCE_SAR > 0 AND ({{crossed}})
+"""
+
+DELETE_BALANCES_SQL = f"""
+    DELETE FROM {BALANCES_TABLE}
+    WHERE BILL_ID {{bills}}
+"""
+
+# PAID bills are closed whatever was recorded against them; otherwise the balance is what COMPLETED
+# payments leave unpaid
+INSERT_BALANCES_SQL = f"""
+    INSERT INTO {BALANCES_TABLE} (BILL_ID, CUSTOMER_ID, DUE_DATE, BILL_STATUS, TOTAL_AMOUNT_SAR, PAID_SAR, BALANCE_SAR)
+    WITH paid AS (
+        SELECT BILL_ID, SUM(AMOUNT_PAID_SAR) AS PAID_SAR
+        FROM SIO_DB.DATA.PAYMENTS
+        WHERE PAYMENT_STATUS = 'COMPLETED' AND BILL_ID {{bills}}
+        GROUP BY BILL_ID
+    )
+    SELECT
+        b.BILL_ID,
+        b.CUSTOMER_ID,
+        b.DUE_DATE,
+        b.BILL_STATUS,
+        b.TOTAL_AMOUNT_SAR,
+        COALESCE(p.PAID_SAR, 0),
+        CASE WHEN b.BILL_STATUS = 'PAID' THEN 0
+             ELSE GREATEST(b.TOTAL_AMOUNT_SAR - COALESCE(p.PAID_SAR, 0), 0) END
+    FROM SIO_DB.DATA.BILLING b
+    LEFT JOIN paid p ON p.BILL_ID = b.BILL_ID
+    WHERE b.BILL_ID {{bills}}
+"""
+
+DELETE_AGING_SQL = f"""
+    DELETE FROM {AGING_TABLE}
+    WHERE CUSTOMER_ID {{customers}}
+"""
+
+INSERT_AGING_SQL = f"""
+    INSERT INTO {AGING_TABLE} (
+        CUSTOMER_ID, CUSTOMER_NAME, CUSTOMER_TYPE, REGION_ID, REGION_NAME, OPEN_BILLS, BILLED_SAR, PAID_SAR,
+        BALANCE_SAR, PAST_DUE_SAR, DAYS_0_30_SAR, DAYS_31_60_SAR, DAYS_61_90_SAR, DAYS_90_PLUS_SAR,
+        OLDEST_DUE_DATE, AS_OF_DATE, UPDATED_AT
+    )
+    WITH open_bills AS (
+        SELECT a.CUSTOMER_ID, a.DUE_DATE, a.TOTAL_AMOUNT_SAR, a.PAID_SAR, a.BALANCE_SAR,
+               DATEDIFF(day, a.DUE_DATE, '{{as_of}}'::DATE) AS DAYS_PAST_DUE
+        FROM {BALANCES_TABLE} a
+        WHERE a.BALANCE_SAR > 0 AND a.CUSTOMER_ID {{customers}}
+    )
+    SELECT
+        o.CUSTOMER_ID,
+        c.CUSTOMER_NAME,
+        c.CUSTOMER_TYPE,
+        c.REGION_ID,
+        r.REGION_NAME,
+        COUNT(*),
+        SUM(o.TOTAL_AMOUNT_SAR),
+        SUM(o.PAID_SAR),
+        SUM(o.BALANCE_SAR),
+        SUM(CASE WHEN o.DAYS_PAST_DUE > 0 THEN o.BALANCE_SAR ELSE 0 END),
+        SUM(CASE WHEN o.DAYS_PAST_DUE <= 30 THEN o.BALANCE_SAR ELSE 0 END),
+        SUM(CASE WHEN o.DAYS_PAST_DUE BETWEEN 31 AND 60 THEN o.BALANCE_SAR ELSE 0 END),
+        SUM(CASE WHEN o.DAYS_PAST_DUE BETWEEN 61 AND 90 THEN o.BALANCE_SAR ELSE 0 END),
+        SUM(CASE WHEN o.DAYS_PAST_DUE > 90 THEN o.BALANCE_SAR ELSE 0 END),
+        MIN(o.DUE_DATE),
+        '{{as_of}}'::DATE,
+        CURRENT_TIMESTAMP()
+    FROM open_bills o
+    JOIN SIO_DB.DATA.CUSTOMERS c ON c.CUSTOMER_ID = o.CUSTOMER_ID
+    LEFT JOIN SIO_DB.DATA.REGIONS r ON r.REGION_ID = c.REGION_ID
+    GROUP BY o.CUSTOMER_ID, c.CUSTOMER_NAME, c.CUSTOMER_TYPE, c.REGION_ID, r.REGION_NAME
+"""
+
+
+def crossed_predicate(previous, as_of):
+    """SQL condition for open bills whose days past due crossed a bucket boundary between the two dates"""
+    if previous is None:
+        return 'FALSE'
+    low, high = sorted((previous, as_of))
+    if low == high:
+        return 'FALSE'
+    # days past due on d = d - DUE_DATE, so it reaches k between low and high when DUE_DATE is in (low - k, high - k]
+    return ' OR '.join(
+        f"(DUE_DATE > '{(low - pd.Timedelta(days=k)).isoformat()}'::DATE "
+        f"AND DUE_DATE <= '{(high - pd.Timedelta(days=k)).isoformat()}'::DATE)"
+        for k in BUCKET_BOUNDARIES
+    )
+
+
+def previous_as_of(session):
+    """As-of date of the last successful run, or None before the first one"""
+    rows = session.sql(f'SELECT MAX(AS_OF_DATE) FROM {STATE_TABLE}').collect()
+    return pd.Timestamp(rows[0][0]).date() if rows and rows[0][0] is not None else None
+
+
+def refresh_ar_aging(session, as_of, capture_sqls, rebuild=False, watermarks=None):
+    """Capture changed bills, re-derive their balances and re-aggregate the customers they (or aging) touched
+    rebuild re-derives every bill and customer in one pass (first run); watermarks are the local stand-in's
+    (LAST_BILL_ID, LAST_PAYMENT_ID) to record."""
+    timings = {}
+    start = time.perf_counter()
+    as_of = pd.Timestamp(as_of).date()
+    previous = previous_as_of(session)
+
+    # Captures still run on a rebuild: reading the streams in DML is what advances them
+    for capture_sql in capture_sqls:
+        session.sql(capture_sql).collect()
+    if rebuild:
+        bills = affected_rows(session.sql('SELECT COUNT(*) FROM SIO_DB.DATA.BILLING').collect())
+    else:
+        bills = affected_rows(session.sql(f'SELECT COUNT(DISTINCT BILL_ID) FROM {CHANGES_TABLE}').collect())
+    timings['capture'] = time.perf_counter() - start
+
+    step = time.perf_counter()
+    if rebuild:
+        bill_scope, customer_scope, customers = EVERY_ROW, EVERY_ROW, None
+    else:
+        session.sql(TOUCHED_CUSTOMERS_SQL.format(crossed=crossed_predicate(previous, as_of))).collect()
+        bill_scope, customer_scope = CHANGED_BILLS, TOUCHED_CUSTOMERS
+        customers = affected_rows(session.sql(f'SELECT COUNT(*) FROM {TOUCHED_TABLE}').collect())
+    timings['touched'] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    session.sql(DELETE_BALANCES_SQL.format(bills=bill_scope)).collect()
+    session.sql(INSERT_BALANCES_SQL.format(bills=bill_scope)).collect()
+    timings['balances'] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    session.sql(DELETE_AGING_SQL.format(customers=customer_scope)).collect()
+    session.sql(INSERT_AGING_SQL.format(as_of=as_of.isoformat(), customers=customer_scope)).collect()
+    if customers is None:
+        customers = affected_rows(session.sql(f'SELECT COUNT(*) FROM {AGING_TABLE}').collect())
+    session.sql(f'DELETE FROM {CHANGES_TABLE}').collect()
+    bill_id, payment_id = ('NULL' if value is None else int(value) for value in (watermarks or (None, None)))
+    session.sql(f'DELETE FROM {STATE_TABLE}').collect()
+    session.sql(f"INSERT INTO {STATE_TABLE} (AS_OF_DATE, LAST_BILL_ID, LAST_PAYMENT_ID) "
+                f"VALUES ('{as_of.isoformat()}'::DATE, {bill_id}, {payment_id})").collect()
+    timings['aging'] = time.perf_counter() - step
+
+    return {
+        'as_of': as_of.isoformat(),
+        'previous_as_of': previous.isoformat() if previous else None,
+        'rebuild': rebuild,
+        'bills': bills,
+        'customers': customers,
+        'seconds': round(time.perf_counter() - start, 3),
+        'timings': {name: round(seconds, 3) for name, seconds in timings.items()}
+    }
+
+
+def run_procedure(session, as_of):
+    """Handler for SIO_DB.DATA.REFRESH_AR_AGING (stream-driven; the first run rebuilds every bill)"""
+    rebuild = previous_as_of(session) is None
+    return refresh_ar_aging(session, as_of or date.today(), [CAPTURE_FROM_STREAMS_SQL], rebuild)
+
+
+def run_local(session, as_of, rebuild=False):
+    """Local run: BILL_ID/PAYMENT_ID watermarks and a diff of the open bills stand in for the streams"""
+    max_bill_id = affected_rows(session.sql('SELECT MAX(BILL_ID) FROM SIO_DB.DATA.BILLING').collect())
+    max_payment_id = affected_rows(session.sql('SELECT MAX(PAYMENT_ID) FROM SIO_DB.DATA.PAYMENTS').collect())
+    rebuild = rebuild or previous_as_of(session) is None
+    capture_sqls = [] if rebuild else [
+        CAPTURE_FROM_WATERMARKS_SQL.format(max_bill_id=max_bill_id, max_payment_id=max_payment_id)
+    ]
+    return refresh_ar_aging(session, as_of, capture_sqls, rebuild, (max_bill_id, max_payment_id))
+
+
+def setup_local(con):
+    """Create the queue, balance, aging and state tables"""
+    import local_backend
+
+    local_backend.run_script(con, AR_SQL_FILE)
+
+
+def main():
+    """Run one incremental AR aging refresh against the local DuckDB stand-in"""
+    parser = argparse.ArgumentParser(description='Incremental SIO accounts-receivable aging (local DuckDB stand-in)')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default='data/sio_local.duckdb')
+    parser.add_argument('--as-of', help='Aging date YYYY-MM-DD (default: today)')
+    parser.add_argument('--rebuild', action='store_true', help='Re-derive every bill (e.g. after editing PAID bills)')
+    args = parser.parse_args()
+
+    import local_backend
+
+    as_of = datetime.strptime(args.as_of, '%Y-%m-%d').date() if args.as_of else date.today()
+    con = local_backend.connect(args.local)
+    setup_local(con)
+    session = local_backend.LocalSession(con)
+    stats = run_local(session, as_of, args.rebuild)
+    totals = session.sql(f"""
+        SELECT COUNT(*) AS CUSTOMERS, SUM(BALANCE_SAR) AS BALANCE_SAR, SUM(PAST_DUE_SAR) AS PAST_DUE_SAR
+        FROM {AGING_TABLE}
+    """).to_pandas().iloc[0]
+
+    print(f"📒 AR aging as of {stats['as_of']} (previous: {stats['previous_as_of'] or 'none'}, {stats['seconds']:.2f}s)")
+    print(f"  - {'Rebuilt' if stats['rebuild'] else 'Changed'} bills: {stats['bills']:,} → "
+          f"customers re-aggregated: {stats['customers']:,}")
+    print(f"  - Customers with an open balance: {int(totals['CUSTOMERS']):,}, "
+          f"open {float(totals['BALANCE_SAR'] or 0):,.2f} SAR, past due {float(totals['PAST_DUE_SAR'] or 0):,.2f} SAR")
+    print("  - Timings: " + ', '.join(f'{name} {seconds:.3f}s' for name, seconds in stats['timings'].items()))
+
+
+if __name__ == "__main__":
+    main()
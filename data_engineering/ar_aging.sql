@@ -0,0 +1,124 @@
+-- ============================================================================
+-- SIO - Accounts Receivable Aging
+-- ============================================================================
+-- Per-customer open balances (bills less COMPLETED payments) in 0-30 / 31-60 /
+-- 61-90 / 90+ days past due buckets, kept current from streams on BILLING and
+-- PAYMENTS. AR_AGING is read by TAB 4 (Billing & Payments) and the agent.
+-- Run after: data_engineering/billing_engine.sql
+-- Execute with: snow sql -f data_engineering/ar_aging.sql -c myconnection
+-- Balance and aging logic: data_engineering/ar_aging.py (same code runs locally)
+-- ============================================================================
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SIO_DB;
+USE WAREHOUSE SIO_MED_WH;
+USE SCHEMA DATA;
+
+-- ============================================================================
+-- 1. TABLES & CHANGE CAPTURE
+-- ============================================================================
+
+-- Every bill's billed, paid and open amount (closed bills keep a zero balance)
+CREATE TABLE IF NOT EXISTS AR_BILL_BALANCES (
+    BILL_ID NUMBER NOT NULL,
+    CUSTOMER_ID NUMBER NOT NULL,
+    DUE_DATE DATE NOT NULL,
+    BILL_STATUS VARCHAR(20),
+    TOTAL_AMOUNT_SAR NUMBER(10,2) NOT NULL,
+    PAID_SAR NUMBER(12,2) NOT NULL,          -- COMPLETED payments against the bill
+    BALANCE_SAR NUMBER(10,2) NOT NULL        -- 0 once PAID or fully covered by payments
+)
+CLUSTER BY (CUSTOMER_ID);
+
+-- One row per customer with an open balance
+CREATE TABLE IF NOT EXISTS AR_AGING (
+    CUSTOMER_ID NUMBER NOT NULL,
+    CUSTOMER_NAME VARCHAR(200),
+    CUSTOMER_TYPE VARCHAR(50),
+    REGION_ID NUMBER,
+    REGION_NAME VARCHAR(100),
+    OPEN_BILLS NUMBER NOT NULL,
+    BILLED_SAR NUMBER(14,2) NOT NULL,        -- Billed on the open bills
+    PAID_SAR NUMBER(14,2) NOT NULL,          -- Partial payments already made on them
+    BALANCE_SAR NUMBER(14,2) NOT NULL,
+    PAST_DUE_SAR NUMBER(14,2) NOT NULL,      -- Balance on bills past their DUE_DATE
+    DAYS_0_30_SAR NUMBER(14,2) NOT NULL,     -- Not yet due or up to 30 days past due
+    DAYS_31_60_SAR NUMBER(14,2) NOT NULL,
+    DAYS_61_90_SAR NUMBER(14,2) NOT NULL,
+    DAYS_90_PLUS_SAR NUMBER(14,2) NOT NULL,
+    OLDEST_DUE_DATE DATE,
+    AS_OF_DATE DATE NOT NULL,                -- Buckets hold until a bill crosses a boundary
+    UPDATED_AT TIMESTAMP_NTZ
+);
+
+-- Bills queued for re-derivation; cleared only after AR_AGING is rewritten
+CREATE TABLE IF NOT EXISTS AR_AGING_CHANGES (
+    BILL_ID NUMBER NOT NULL
+);
+
+-- As-of date of the last refresh (buckets are re-derived for bills that aged past a boundary since)
+CREATE TABLE IF NOT EXISTS AR_AGING_STATE (
+    AS_OF_DATE DATE,
+    LAST_BILL_ID NUMBER,                     -- Local stand-in only; NULL when streams feed the refresh
+    LAST_PAYMENT_ID NUMBER
+);
+
+-- Inserted, re-priced, re-statused and deleted bills (not APPEND_ONLY: billing updates status in place)
+CREATE STREAM IF NOT EXISTS BILLING_AR_STREAM
+    ON TABLE BILLING
+    COMMENT = 'Bill changes awaiting AR aging';
+
+CREATE STREAM IF NOT EXISTS PAYMENTS_AR_STREAM
+    ON TABLE PAYMENTS
+    COMMENT = 'Payment changes awaiting AR aging';
+
+-- ============================================================================
+-- 2. REFRESH PROCEDURE
+-- ============================================================================
+
+CREATE STAGE IF NOT EXISTS CODE_STAGE
+    COMMENT = 'Python modules imported by SIO procedures';
+
+!snow sql -q "PUT file://data_engineering/billing_engine.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+!snow sql -q "PUT file://data_engineering/ar_aging.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+
+CREATE OR REPLACE PROCEDURE REFRESH_AR_AGING(AS_OF DATE)
+RETURNS VARIANT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas', 'snowflake-snowpark-python')
+IMPORTS = ('@SIO_DB.DATA.CODE_STAGE/billing_engine.py', '@SIO_DB.DATA.CODE_STAGE/ar_aging.py')
+HANDLER = 'ar_aging.run_procedure'
+COMMENT = 'Re-derive balances of changed bills and re-age the customers they or the calendar touched'
+EXECUTE AS OWNER;
+
+-- ============================================================================
+-- 3. SCHEDULE
+-- ============================================================================
+
+-- Hourly: after incremental billing has applied payments and aged statuses (child tasks need the root suspended)
+ALTER TASK IF EXISTS BILLING_INCREMENTAL_TASK SUSPEND;
+
+CREATE OR REPLACE TASK AR_AGING_TASK
+    WAREHOUSE = SIO_MED_WH
+    COMMENT = 'Incremental AR aging refresh after each billing run'
+    AFTER SIO_DB.DATA.BILLING_INCREMENTAL_TASK
+AS
+    CALL SIO_DB.DATA.REFRESH_AR_AGING(CURRENT_DATE());
+
+ALTER TASK AR_AGING_TASK RESUME;
+ALTER TASK BILLING_INCREMENTAL_TASK RESUME;
+
+-- ============================================================================
+-- 4. INITIAL BUILD & TEST
+-- ============================================================================
+
+CALL SIO_DB.DATA.REFRESH_AR_AGING(CURRENT_DATE());
+
+SELECT REGION_NAME, COUNT(*) AS CUSTOMERS, SUM(BALANCE_SAR) AS BALANCE_SAR, SUM(PAST_DUE_SAR) AS PAST_DUE_SAR,
+       SUM(DAYS_90_PLUS_SAR) AS DAYS_90_PLUS_SAR
+FROM AR_AGING
+GROUP BY REGION_NAME
+ORDER BY PAST_DUE_SAR DESC;
+
+SELECT '✅ AR aging created and built!' AS STATUS;
@@ -0,0 +1,73 @@
+-- ============================================================================
+-- SIO - Incremental Billing Engine
+-- ============================================================================
+-- Re-bills only customer-months whose meters received new readings.
+-- Run after: data_engineering/insert_data.sql (or bulk_load.py)
+-- Execute with: snow sql -f data_engineering/billing_engine.sql -c myconnection
+-- Pricing and status logic: data_engineering/billing_engine.py (same code runs locally)
+-- ============================================================================
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SIO_DB;
+USE WAREHOUSE SIO_MED_WH;
+USE SCHEMA DATA;
+
+-- ============================================================================
+-- 1. CHANGE CAPTURE
+-- ============================================================================
+
+-- New readings since the last billing run (created after the initial load, so history is not re-billed)
+CREATE STREAM IF NOT EXISTS WATER_USAGE_BILLING_STREAM
+    ON TABLE WATER_USAGE
+    APPEND_ONLY = TRUE
+    COMMENT = 'New usage readings awaiting billing';
+
+-- Meter-months queued for billing; cleared only after a successful MERGE
+CREATE TABLE IF NOT EXISTS BILLING_CHANGES (
+    METER_ID NUMBER NOT NULL,
+    BILLING_MONTH DATE NOT NULL
+);
+
+-- ============================================================================
+-- 2. BILLING PROCEDURE
+-- ============================================================================
+
+CREATE STAGE IF NOT EXISTS CODE_STAGE
+    COMMENT = 'Python modules imported by SIO procedures';
+
+!snow sql -q "PUT file://data_engineering/billing_engine.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+
+CREATE OR REPLACE PROCEDURE RUN_INCREMENTAL_BILLING(AS_OF DATE)
+RETURNS VARIANT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas', 'snowflake-snowpark-python')
+IMPORTS = ('@SIO_DB.DATA.CODE_STAGE/billing_engine.py')
+HANDLER = 'billing_engine.run_procedure'
+COMMENT = 'Upsert BILLING for meter-months with new readings, apply payments, age PENDING bills to OVERDUE'
+EXECUTE AS OWNER;
+
+-- ============================================================================
+-- 3. SCHEDULE
+-- ============================================================================
+
+CREATE OR REPLACE TASK BILLING_INCREMENTAL_TASK
+    WAREHOUSE = SIO_MED_WH
+    SCHEDULE = 'USING CRON 0 * * * * Asia/Riyadh'
+    COMMENT = 'Hourly incremental billing; also ages overdue bills when no new readings arrive'
+AS
+    CALL SIO_DB.DATA.RUN_INCREMENTAL_BILLING(CURRENT_DATE());
+
+ALTER TASK BILLING_INCREMENTAL_TASK RESUME;
+
+-- ============================================================================
+-- 4. TEST
+-- ============================================================================
+
+CALL SIO_DB.DATA.RUN_INCREMENTAL_BILLING(CURRENT_DATE());
+
+SELECT BILL_STATUS, COUNT(*) AS BILLS, SUM(TOTAL_AMOUNT_SAR) AS TOTAL_SAR
+FROM BILLING
+GROUP BY BILL_STATUS;
+
+SELECT '✅ Incremental billing engine created and tested!' AS STATUS;
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Parallel bulk loader for the generated CSVs (replaces the per-file PUT sequence in insert_data.sql)
+Splits large files into gzip chunks, uploads them with parallel PUT over one pooled connection,
+then runs COPY INTO concurrently for independent tables in FK order. Idempotent via a load manifest.
+
+Usage:
+  python data_engineering/bulk_load.py --connection myconnection
+  python data_engineering/bulk_load.py --local data/sio_local.duckdb     # file stage + DuckDB stand-in
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import local_backend
+
+DEFAULT_CHUNK_MB = 150
+READ_BLOCK_BYTES = 8 * 1024 * 1024
+MANIFEST_FILE = 'load_manifest.json'
+STAGE = '@SIO_DB.DATA.DATA_STAGE'
+FILE_FORMAT = "(TYPE = CSV SKIP_HEADER = 1 FIELD_OPTIONALLY_ENCLOSED_BY = '\"' COMPRESSION = GZIP)"
+
+# Load order and COPY column lists (same as insert_data.sql). Tables whose AUTOINCREMENT ids are
+# referenced by another table (REGION_ID, CUSTOMER_ID, METER_ID, BILL_ID) are loaded from a single
+# file so ids follow CSV row order; only leaf tables are split into parallel chunks.
+TABLES = {
+    'REGIONS': {
+        'file': 'regions.csv', 'after': [], 'split': False,
+        'columns': ['REGION_NAME', 'REGION_NAME_AR', 'POPULATION', 'AGRICULTURAL_AREA_KM2', 'WATER_CAPACITY_M3']
+    },
+    'WATER_SOURCES': {
+        'file': 'water_sources.csv', 'after': ['REGIONS'], 'split': True,
+        'columns': ['SOURCE_NAME', 'SOURCE_TYPE', 'REGION_ID', 'CAPACITY_M3', 'CURRENT_LEVEL_M3',
+                    'EFFICIENCY_PERCENT', 'STATUS', 'LAST_MAINTENANCE_DATE', 'LATITUDE', 'LONGITUDE']
+    },
+    'CUSTOMERS': {
+        'file': 'customers.csv', 'after': ['REGIONS'], 'split': False,
+        'columns': ['CUSTOMER_NAME', 'CUSTOMER_TYPE', 'REGION_ID', 'FARM_SIZE_HECTARES', 'CROP_TYPE',
+                    'CONTACT_PHONE', 'CONTACT_EMAIL', 'REGISTRATION_DATE', 'ACCOUNT_STATUS']
+    },
+    'WEATHER_DATA': {
+        'file': 'weather_data.csv', 'after': ['REGIONS'], 'split': True,
+        'columns': ['REGION_ID', 'WEATHER_DATE', 'TEMPERATURE_MAX_C', 'TEMPERATURE_MIN_C',
+                    'TEMPERATURE_AVG_C', 'RAINFALL_MM', 'HUMIDITY_PERCENT', 'WIND_SPEED_KMH']
+    },
+    'WATER_METERS': {
+        'file': 'water_meters.csv', 'after': ['CUSTOMERS'], 'split': False,
+        'columns': ['CUSTOMER_ID', 'METER_NUMBER', 'INSTALLATION_DATE', 'LAST_CALIBRATION_DATE',
+                    'METER_STATUS', 'LOCATION_LATITUDE', 'LOCATION_LONGITUDE']
+    },
+    'BILLING': {
+        'file': 'billing.csv', 'after': ['CUSTOMERS'], 'split': False,
+        'columns': ['CUSTOMER_ID', 'BILLING_MONTH', 'USAGE_VOLUME_M3', 'BASE_RATE_SAR', 'USAGE_CHARGE_SAR',
+                    'SERVICE_FEE_SAR', 'TOTAL_AMOUNT_SAR', 'DUE_DATE', 'BILL_STATUS', 'GENERATED_DATE']
+    },
+    'WATER_USAGE': {
+        'file': 'water_usage.csv', 'after': ['WATER_METERS'], 'split': True,
+        'columns': ['METER_ID', 'READING_DATE', 'VOLUME_M3', 'PRESSURE_BAR', 'FLOW_RATE_M3_H', 'TEMPERATURE_C']
+    },
+    'USAGE_ANOMALY_LABELS': {
+        'file': 'usage_anomaly_labels.csv', 'after': ['WATER_METERS'], 'split': True,
+        'columns': ['EVENT_ID', 'METER_ID', 'ANOMALY_TYPE', 'START_DATE', 'END_DATE',
+                    'DURATION_DAYS', 'MAGNITUDE', 'DESCRIPTION']
+    },
+    'PAYMENTS': {
+        'file': 'payments.csv', 'after': ['BILLING'], 'split': True,
+        'columns': ['BILL_ID', 'PAYMENT_DATE', 'AMOUNT_PAID_SAR', 'PAYMENT_METHOD',
+                    'TRANSACTION_REFERENCE', 'PAYMENT_STATUS']
+    },
+}
+
+
+def fingerprint(path):
+    """Cheap identity for a source file: size, mtime and a hash of its first and last blocks"""
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        digest.update(f.read(65536))
+        f.seek(max(stat.st_size - 65536, 0))
+        digest.update(f.read(65536))
+    return f'{stat.st_size}-{stat.st_mtime_ns}-{digest.hexdigest()[:16]}'
+
+
+def split_csv(path, chunk_dir, table, chunk_mb=DEFAULT_CHUNK_MB, split=True, compresslevel=6):
+    """Gzip a CSV into chunks of about chunk_mb compressed MB, repeating the header in every chunk
+    Returns the chunk paths and the number of data rows, which COPY must load in full."""
+    os.makedirs(chunk_dir, exist_ok=True)
+    limit = chunk_mb * 1024 * 1024 if split else float('inf')
+    chunks = []
+    rows = 0
+
+    with open(path, 'rb') as source:
+        header = source.readline()
+        raw = gz = None
+        carry = b''
+        while True:
+            block = source.read(READ_BLOCK_BYTES)
+            data = carry + block
+            if block:
+                # Only write complete lines; the tail carries into the next block
+                cut = data.rfind(b'\n') + 1
+                data, carry = data[:cut], data[cut:]
+            if data:
+                if gz is None:
+                    chunk_path = os.path.join(chunk_dir, f'{table.lower()}_{len(chunks):04d}.csv.gz')
+                    raw = open(chunk_path, 'wb')
+                    gz = gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=compresslevel, mtime=0)
+                    gz.write(header)
+                    chunks.append(chunk_path)
+                gz.write(data)
+                rows += data.count(b'\n') if block else 1  # The last carry is one unterminated line
+                if raw.tell() >= limit:
+                    gz.close()
+                    raw.close()
+                    gz = None
+            if not block:
+                break
+        if gz is not None:
+            gz.close()
+            raw.close()
+
+    return chunks, rows
+
+
+class SnowflakeTarget:
+    """PUT to the internal DATA_STAGE and COPY INTO SIO_DB.DATA over one shared connection"""
+
+    def __init__(self, connection_name, put_threads=4):
+        import snowflake.connector
+
+        self.connection = snowflake.connector.connect(connection_name=connection_name)
+        self.put_threads = put_threads
+        self.name = f'snowflake://{connection_name}/SIO_DB.DATA'
+        self.execute('USE WAREHOUSE SIO_MED_WH')
+        self.execute(f"CREATE STAGE IF NOT EXISTS {STAGE[1:]} COMMENT = 'Temporary stage for loading CSV data files'")
+
+    def execute(self, sql):
+        # The connector is thread-safe per connection; each call gets its own cursor
+        with self.connection.cursor() as cursor:
+            return cursor.execute(sql).fetchall()
+
+    def put(self, chunk_path, table):
+        self.execute(f"PUT 'file://{os.path.abspath(chunk_path)}' {STAGE}/{table.lower()}/ "
+                     f"AUTO_COMPRESS = FALSE SOURCE_COMPRESSION = GZIP PARALLEL = {self.put_threads} OVERWRITE = TRUE")
+
+    def truncate(self, table):
+        self.execute(f'TRUNCATE TABLE IF EXISTS SIO_DB.DATA.{table}')
+
+    def row_count(self, table):
+        return int(self.execute(f'SELECT COUNT(*) FROM SIO_DB.DATA.{table}')[0][0])
+
+    def copy(self, table, columns, chunk_names):
+        select = ', '.join(f'${i}' for i in range(1, len(columns) + 1))
+        files = ', '.join(f"'{name}'" for name in chunk_names)
+        results = self.execute(f"""
+            COPY INTO SIO_DB.DATA.{table} ({', '.join(columns)})
+            FROM (SELECT {select} FROM {STAGE}/{table.lower()}/)
+            FILES = ({files})
+            FILE_FORMAT = {FILE_FORMAT}
+            FORCE = TRUE
+            ON_ERROR = CONTINUE
+        """)
+        # One result row per file: (file, status, rows_parsed, rows_loaded, error_limit, errors_seen, first_error, ...)
+        files = [row for row in results if len(row) > 6]
+        return {
+            'rows_loaded': sum(int(row[3] or 0) for row in files),
+            'errors_seen': sum(int(row[5] or 0) for row in files),
+            'first_error': next((row[6] for row in files if row[6]), None)
+        }
+
+    def close(self):
+        self.connection.close()
+
+
+class LocalTarget:
+    """Stand-in: a directory acts as the stage and COPY loads into a local DuckDB SIO_DB"""
+
+    def __init__(self, database_path, stage_dir):
+        self.con = local_backend.connect(database_path)
+        if not local_backend.table_exists(self.con, 'WATER_USAGE'):
+            local_backend.setup_database(self.con)
+        self.stage_dir = stage_dir
+        self.name = f'duckdb://{os.path.abspath(database_path)}'
+        self.lock = threading.Lock()
+
+    def cursor(self):
+        with self.lock:
+            cursor = self.con.cursor()
+        cursor.execute(f'USE {local_backend.DATABASE}.DATA')
+        return cursor
+
+    def put(self, chunk_path, table):
+        target_dir = os.path.join(self.stage_dir, table.lower())
+        os.makedirs(target_dir, exist_ok=True)
+        shutil.copyfile(chunk_path, os.path.join(target_dir, os.path.basename(chunk_path)))
+
+    def truncate(self, table):
+        self.cursor().execute(f'DELETE FROM {table}')
+
+    def row_count(self, table):
+        return self.cursor().execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+    def copy(self, table, columns, chunk_names):
+        files = [os.path.join(self.stage_dir, table.lower(), name) for name in chunk_names]
+        cursor = self.cursor()
+        # Read every field as text and let INSERT cast, like COPY does against the table types
+        cursor.execute(f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            SELECT * FROM read_csv(?, header = true, all_varchar = true, quote = '"', compression = 'gzip')
+        """, [files])
+        # INSERT is all-or-nothing: a bad row raises instead of being skipped
+        return {'rows_loaded': cursor.fetchone()[0], 'errors_seen': 0, 'first_error': None}
+
+    def close(self):
+        self.con.close()
+
+
+def load_manifest(path):
+    """Previously completed loads, keyed by target then table"""
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def bulk_load(target, data_dir, tables=None, chunk_mb=DEFAULT_CHUNK_MB, threads=8, force=False,
+              compresslevel=6, manifest_path=None, log=print):
+    """Load the CSVs in data_dir into target; returns per-table results"""
+    manifest_path = manifest_path or os.path.join(data_dir, MANIFEST_FILE)
+    manifest = load_manifest(manifest_path)
+    loaded = manifest.setdefault(target.name, {})
+    chunk_root = os.path.join(data_dir, '_chunks')
+    manifest_lock = threading.Lock()
+
+    def save_manifest():
+        with manifest_lock, open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    # Decide what needs loading; dependencies outside the selection are assumed present.
+    # A table is skipped only if the manifest matches both the source file and the target row count.
+    selected = [name for name in TABLES if (tables is None or name in tables)
+                and os.path.exists(os.path.join(data_dir, TABLES[name]['file']))]
+    results = {}
+    todo = []
+    for name in selected:
+        source = os.path.join(data_dir, TABLES[name]['file'])
+        entry = loaded.get(name, {})
+        rows = target.row_count(name)
+        if (not force and entry.get('status') == 'LOADED' and entry.get('source') == fingerprint(source)
+                and entry.get('rows_loaded') == rows):
+            results[name] = dict(entry, skipped=True)
+            log(f"  ⏭️  {name}: already loaded ({rows:,} rows)")
+            continue
+        if rows and not TABLES[name]['split']:
+            # TRUNCATE keeps the AUTOINCREMENT counter, so a reload would shift the ids child tables reference
+            status = f" ({entry['status']} in the manifest)" if entry.get('status') else ''
+            raise RuntimeError(f'{name} already has {rows:,} rows{status}; '
+                               f're-run setup_database.sql before reloading it')
+        todo.append(name)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        split_futures = {
+            pool.submit(split_csv, os.path.join(data_dir, TABLES[name]['file']), os.path.join(chunk_root, name.lower()),
+                        name, chunk_mb, TABLES[name]['split'], compresslevel): name
+            for name in todo
+        }
+        chunks = {}
+        put_futures = {}
+        copy_futures = {}
+        done_tables = set(results) | (set(TABLES) - set(selected))
+        timings = {name: {'start': time.perf_counter()} for name in todo}
+
+        pending = set(split_futures)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                future.result()  # Re-raise any worker error
+                if future in split_futures:
+                    name = split_futures[future]
+                    chunks[name], timings[name]['rows'] = future.result()
+                    timings[name]['split'] = time.perf_counter() - timings[name]['start']
+                    # An interrupted earlier attempt may have left partial rows behind
+                    target.truncate(name)
+                    with manifest_lock:
+                        loaded[name] = {'status': 'UPLOADING', 'source': fingerprint(os.path.join(data_dir, TABLES[name]['file']))}
+                    save_manifest()
+                    put_futures[name] = {pool.submit(target.put, chunk, name) for chunk in chunks[name]}
+                    pending |= put_futures[name]
+                elif future in copy_futures.values():
+                    name = next(table for table, f in copy_futures.items() if f is future)
+                    elapsed = time.perf_counter() - timings[name]['start']
+                    raw_bytes = os.path.getsize(os.path.join(data_dir, TABLES[name]['file']))
+                    gz_bytes = sum(os.path.getsize(chunk) for chunk in chunks[name])
+                    copied = future.result()
+                    # ON_ERROR = CONTINUE skips bad rows; only a complete load lets a re-run skip the table
+                    complete = copied['errors_seen'] == 0 and copied['rows_loaded'] == timings[name]['rows']
+                    with manifest_lock:
+                        loaded[name].update({
+                            'status': 'LOADED' if complete else 'PARTIAL', 'rows_loaded': int(copied['rows_loaded']),
+                            'rows_expected': timings[name]['rows'], 'errors_seen': int(copied['errors_seen']),
+                            'first_error': copied['first_error'], 'chunks': len(chunks[name]),
+                            'raw_bytes': raw_bytes, 'compressed_bytes': gz_bytes, 'seconds': round(elapsed, 3),
+                            'loaded_at': datetime.now().isoformat(timespec='seconds')
+                        })
+                    save_manifest()
+                    results[name] = loaded[name]
+                    done_tables.add(name)
+                    if complete:
+                        log(f"  ✅ {name}: {loaded[name]['rows_loaded']:,} rows, {len(chunks[name])} chunk(s), "
+                            f"{raw_bytes / 1e6:,.1f} MB in {elapsed:.2f}s")
+                    else:
+                        log(f"  ⚠️  {name}: PARTIAL, {loaded[name]['rows_loaded']:,} of {timings[name]['rows']:,} rows "
+                            f"loaded, {copied['errors_seen']:,} error(s); first: {copied['first_error']}")
+                        if not TABLES[name]['split']:
+                            # Skipped rows shift every later id, so child tables now point at the wrong parents
+                            log(f"     {name} ids no longer follow the CSV; re-run setup_database.sql before reloading")
+
+            # Start COPY for tables whose chunks are staged and whose parents are loaded
+            for name, futures in put_futures.items():
+                if name in copy_futures or not all(f.done() for f in futures):
+                    continue
+                if all(parent in done_tables for parent in TABLES[name]['after']):
+                    copy_futures[name] = pool.submit(
+                        target.copy, name, TABLES[name]['columns'], [os.path.basename(c) for c in chunks[name]]
+                    )
+                    pending.add(copy_futures[name])
+
+    shutil.rmtree(chunk_root, ignore_errors=True)
+    elapsed = time.perf_counter() - start
+    new = [results[name] for name in todo]
+    raw_mb = sum(entry['raw_bytes'] for entry in new) / 1e6
+    gz_mb = sum(entry['compressed_bytes'] for entry in new) / 1e6
+    return results, {'seconds': elapsed, 'raw_mb': raw_mb, 'compressed_mb': gz_mb,
+                     'rows': sum(entry['rows_loaded'] for entry in new),
+                     'partial': [name for name in todo if results[name]['status'] != 'LOADED']}
+
+
+def main():
+    """Load data/*.csv into Snowflake (or the local stand-in) and report throughput"""
+    parser = argparse.ArgumentParser(description='Parallel, idempotent bulk load of the generated SIO CSVs')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--connection', default='myconnection', help='Snowflake connection name (connections.toml)')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', help='Load into a local DuckDB file instead of Snowflake')
+    parser.add_argument('--stage-dir', help='Local stage directory (default: <data-dir>/_stage)')
+    parser.add_argument('--tables', help='Comma-separated subset, e.g. WATER_USAGE,PAYMENTS')
+    parser.add_argument('--chunk-mb', type=int, default=DEFAULT_CHUNK_MB, help='Target compressed chunk size')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent splits, PUTs and COPYs')
+    parser.add_argument('--compress-level', type=int, default=6, choices=range(1, 10), metavar='1-9',
+                        help='gzip level (1 = fastest split, 9 = fewest bytes to upload)')
+    parser.add_argument('--force', action='store_true', help='Reload tables even if the manifest says they are loaded')
+    args = parser.parse_args()
+
+    tables = [name.strip().upper() for name in args.tables.split(',')] if args.tables else None
+    if tables and set(tables) - set(TABLES):
+        parser.error(f"unknown tables: {', '.join(sorted(set(tables) - set(TABLES)))}")
+
+    if args.local:
+        target = LocalTarget(args.local, args.stage_dir or os.path.join(args.data_dir, '_stage'))
+    else:
+        target = SnowflakeTarget(args.connection)
+
+    print(f"🚚 Bulk loading '{args.data_dir}/' → {target.name}")
+    try:
+        _, totals = bulk_load(target, args.data_dir, tables, args.chunk_mb, args.threads,
+                                    args.force, args.compress_level)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    finally:
+        target.close()
+
+    print(f"\n✅ Loaded {totals['rows']:,} rows in {totals['seconds']:.2f}s")
+    if totals['seconds'] > 0 and totals['raw_mb'] > 0:
+        print(f"  - {totals['raw_mb']:,.1f} MB CSV ({totals['compressed_mb']:,.1f} MB gzip): "
+              f"{totals['raw_mb'] / totals['seconds']:,.1f} MB/s raw, {totals['compressed_mb'] / totals['seconds']:,.1f} MB/s compressed")
+    print(f"  - Manifest: {os.path.join(args.data_dir, MANIFEST_FILE)}")
+    if totals['partial']:
+        print(f"⚠️ Rows were rejected in {', '.join(totals['partial'])}; fix the source and re-run to reload them")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Chunk SIO policy PDFs into overlapping, heading-aware passages
+Local mirror of the DOCUMENT_CHUNKS stage in cortex/setup_cortex_search.sql
+"""
+
+import argparse
+import glob
+import os
+import re
+import time
+from collections import Counter
+
+import pandas as pd
+from pypdf import PdfReader
+
+# Same sizes as SPLIT_TEXT_MARKDOWN_HEADER in setup_cortex_search.sql (characters)
+CHUNK_SIZE = 1500
+CHUNK_OVERLAP = 200
+
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
+
+def extract_blocks(pdf_path):
+    """Extract (font_size, is_bold, text) lines from a PDF in reading order"""
+    reader = PdfReader(pdf_path)
+    blocks = []
+
+    def visitor(text, cm, tm, font_dict, font_size):
+        if not text.strip():
+            return
+        font_name = (font_dict or {}).get('/BaseFont', '')
+        blocks.append((round(float(font_size), 1), 'Bold' in str(font_name), text.strip()))
+
+    for page in reader.pages:
+        page.extract_text(visitor_text=visitor)
+
+    return blocks, len(reader.pages)
+
+
+def extract_sections(pdf_path):
+    """Split a PDF into a title and (section heading, body text) pairs using font sizes"""
+    blocks, num_pages = extract_blocks(pdf_path)
+    if not blocks:
+        return '', [], num_pages
+
+    # Body text is the font size carrying the most characters
+    size_weight = Counter()
+    for size, _, text in blocks:
+        size_weight[size] += len(text)
+    body_size = size_weight.most_common(1)[0][0]
+    title_size = max(size for size, _, _ in blocks)
+
+    title = ' '.join(text for size, _, text in blocks if size == title_size)
+    sections = []
+    current_heading = title
+    current_text = []
+
+    for size, is_bold, text in blocks:
+        if size == title_size:
+            continue
+        if size > body_size and is_bold:
+            if current_text:
+                sections.append((current_heading, ' '.join(current_text)))
+            current_heading = text
+            current_text = []
+        else:
+            current_text.append(text)
+
+    if current_text:
+        sections.append((current_heading, ' '.join(current_text)))
+
+    return title, sections, num_pages
+
+
+def split_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Split text into sentence-aligned windows of at most chunk_size characters with overlap"""
+    text = re.sub(r'\s+', ' ', text).strip()
+    if len(text) <= chunk_size:
+        return [text] if text else []
+
+    # Sentences longer than a chunk are hard-wrapped on word boundaries
+    sentences = []
+    for sentence in SENTENCE_BREAK.split(text):
+        while len(sentence) > chunk_size:
+            cut = sentence.rfind(' ', 0, chunk_size)
+            cut = cut if cut > 0 else chunk_size
+            sentences.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            sentences.append(sentence)
+
+    chunks = []
+    window = []
+    window_len = 0
+    for sentence in sentences:
+        if window and window_len + len(sentence) + 1 > chunk_size:
+            chunks.append(' '.join(window))
+            # Carry trailing sentences forward as overlap
+            carry = []
+            carry_len = 0
+            for previous in reversed(window):
+                if carry_len + len(previous) + 1 > overlap:
+                    break
+                carry.insert(0, previous)
+                carry_len += len(previous) + 1
+            while carry and carry_len + len(sentence) + 1 > chunk_size:
+                carry_len -= len(carry.pop(0)) + 1
+            window = carry
+            window_len = carry_len
+        window.append(sentence)
+        window_len += len(sentence) + 1
+
+    if window:
+        chunks.append(' '.join(window))
+
+    return chunks
+
+
+def chunk_document(pdf_path, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Chunk one PDF into rows matching the DOCUMENT_CHUNKS table"""
+    document_id = os.path.splitext(os.path.basename(pdf_path))[0]
+    title, sections, num_pages = extract_sections(pdf_path)
+
+    rows = []
+    for section, body in sections:
+        # Chunks never cross a heading; each carries its heading as context
+        for piece in split_text(body, chunk_size, overlap):
+            rows.append({
+                'CHUNK_ID': f'{document_id}_{len(rows):03d}',
+                'DOCUMENT_ID': document_id,
+                'TITLE': title or document_id,
+                'SECTION': section,
+                'CHUNK_INDEX': len(rows),
+                'CHUNK': f'{section}\n\n{piece}',
+                'CHAR_COUNT': len(piece),
+                'RELATIVE_PATH': os.path.basename(pdf_path)
+            })
+
+    return rows, num_pages
+
+
+def chunk_documents(documents_dir='documents', chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Chunk every PDF in a directory and return (chunks DataFrame, page count)"""
+    rows = []
+    total_pages = 0
+    for pdf_path in sorted(glob.glob(os.path.join(documents_dir, '*.pdf'))):
+        doc_rows, num_pages = chunk_document(pdf_path, chunk_size, overlap)
+        rows.extend(doc_rows)
+        total_pages += num_pages
+
+    return pd.DataFrame(rows), total_pages
+
+
+def main():
+    """Chunk documents/ and save data/document_chunks.csv with quality and throughput stats"""
+    parser = argparse.ArgumentParser(description='Chunk SIO policy PDFs for the knowledge base')
+    parser.add_argument('--documents-dir', default='documents')
+    parser.add_argument('--output', default='data/document_chunks.csv')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--overlap', type=int, default=CHUNK_OVERLAP)
+    args = parser.parse_args()
+
+    print("📄 Chunking SIO knowledge base documents...")
+
+    start = time.perf_counter()
+    chunks_df, total_pages = chunk_documents(args.documents_dir, args.chunk_size, args.overlap)
+    elapsed = time.perf_counter() - start
+
+    if chunks_df.empty:
+        print(f"❌ No PDFs found in {args.documents_dir}/")
+        return
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    chunks_df.to_csv(args.output, index=False)
+
+    print(f"  ✅ {chunks_df['DOCUMENT_ID'].nunique()} documents, {total_pages} pages → {len(chunks_df)} chunks")
+    print(f"\n📏 Chunk quality:")
+    print(f"  - Sections: {chunks_df.groupby(['DOCUMENT_ID', 'SECTION']).ngroups}")
+    print(f"  - Chars per chunk: min {chunks_df['CHAR_COUNT'].min()}, "
+          f"avg {chunks_df['CHAR_COUNT'].mean():.0f}, max {chunks_df['CHAR_COUNT'].max()}")
+    print(f"  - Chunks over {args.chunk_size} chars: {(chunks_df['CHAR_COUNT'] > args.chunk_size).sum()}")
+    print(f"\n⚡ Throughput:")
+    print(f"  - {elapsed:.3f}s total, {total_pages / elapsed:,.1f} pages/s, {len(chunks_df) / elapsed:,.1f} chunks/s")
+    print(f"\nFile saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory column types for generated tables
+IDs are int32, low-cardinality labels categorical, dates Arrow date32 (datetime64 without pyarrow) and physical
+measures float32. Money and coordinates stay float64: cents and 7-decimal positions need more than float32's
+~7 significant digits. Tables are expanded back to int64/float64/string/datetime64 columns only at the
+serialization boundary (expand), where float32 measures are rounded to their stored decimals.
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # dates stay datetime64 without pyarrow
+    pa = None
+
+# Decimals each float32 measure is generated with; expand rounds back to these
+DECIMALS = {
+    'VOLUME_M3': 3,
+    'FLOW_RATE_M3_H': 3,
+    'PRESSURE_BAR': 2,
+    'TEMPERATURE_C': 2,
+    'FARM_SIZE_HECTARES': 2,
+    'EFFICIENCY_PERCENT': 2,
+    'TEMPERATURE_MAX_C': 2,
+    'TEMPERATURE_MIN_C': 2,
+    'TEMPERATURE_AVG_C': 2,
+    'RAINFALL_MM': 2,
+    'HUMIDITY_PERCENT': 2,
+    'WIND_SPEED_KMH': 2
+}
+
+
+def ids(values):
+    """int32 surrogate keys"""
+    return np.asarray(values, dtype=np.int32)
+
+
+def measure(values, decimals):
+    """float32 measure rounded to its stored decimals"""
+    return np.round(np.asarray(values, dtype=np.float64), decimals).astype(np.float32)
+
+
+def category(values, categories):
+    """Categorical codes over a fixed label set"""
+    return pd.Categorical(values, categories=categories)
+
+
+def dates(values):
+    """Arrow date32 column from datetime64 values or datetime.date objects"""
+    values = np.asarray(values)
+    days = values.astype('datetime64[D]') if values.dtype.kind == 'M' else np.array(list(values), dtype='datetime64[D]')
+    if pa is None:
+        return days.astype('datetime64[s]')
+    return pd.arrays.ArrowExtensionArray(pa.array(days))
+
+
+def date_values(column):
+    """datetime64[D] numpy array from a date32, datetime64 or date-string column"""
+    if isinstance(column.dtype, pd.ArrowDtype):
+        # pandas converts Arrow dates element by element; Arrow itself is vectorized
+        return pa.array(column).to_numpy(zero_copy_only=False).astype('datetime64[D]')
+    return pd.to_datetime(column).to_numpy().astype('datetime64[D]')
+
+
+def references(prefix, numbers, width):
+    """Fixed-width reference strings such as TXN-00000001 (Arrow strings when pyarrow is available)"""
+    if pa is None:
+        return (prefix + pd.Series(numbers).astype(str).str.zfill(width)).array
+    import pyarrow.compute as pc
+    digits = pc.utf8_lpad(pc.cast(pa.array(numbers), pa.string()), width, '0')
+    return pd.arrays.ArrowExtensionArray(pc.binary_join_element_wise(prefix, digits, ''))
+
+
+def measure_values(column, decimals=None):
+    """float64 values of a measure as they are serialized"""
+    decimals = DECIMALS[column.name] if decimals is None else decimals
+    return column.to_numpy(dtype=np.float64).round(decimals)
+
+
+def expand(df):
+    """Wide int64/float64/string/datetime64 copy of a compact table, as written to CSV and landing files"""
+    columns = {}
+    for name, column in df.items():
+        if column.dtype == np.float32:
+            columns[name] = measure_values(column)
+        elif column.dtype == np.int32:
+            columns[name] = column.to_numpy(dtype=np.int64)
+        elif isinstance(column.dtype, pd.CategoricalDtype):
+            columns[name] = column.astype(column.cat.categories.dtype)
+        elif isinstance(column.dtype, pd.ArrowDtype) and pa.types.is_date32(column.dtype.pyarrow_dtype):
+            columns[name] = date_values(column).astype('datetime64[s]')
+        else:
+            columns[name] = column
+    return pd.DataFrame(columns, index=df.index)
+
+
+def memory_bytes(df):
+    """In-memory size of a table, strings included"""
+    return int(df.memory_usage(deep=True).sum())
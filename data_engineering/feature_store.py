@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Rolling feature store for the SIO ML functions
+Maintains ML_ANALYTICS.REGION_DAY_FEATURES and ML_ANALYTICS.METER_DAY_FEATURES: daily usage with
+7/30/90-day rolling means and standard deviations, lags, forward-filled weather and seasonal indices.
+Each refresh only computes days after the last featurized day, so PREDICT_WATER_DEMAND and
+ANALYZE_WATER_USAGE_ANOMALIES read features with a key lookup instead of re-joining raw usage.
+
+Runs as the REFRESH_FEATURE_STORE procedure (see cortex/create_feature_store.sql) or locally:
+  python data_engineering/feature_store.py --local data/sio_local.duckdb
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+REGION_TABLE = 'SIO_DB.ML_ANALYTICS.REGION_DAY_FEATURES'
+METER_TABLE = 'SIO_DB.ML_ANALYTICS.METER_DAY_FEATURES'
+FEATURE_SQL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cortex', 'create_feature_store.sql')
+
+# Longest rolling window; new days are computed over this much already-featurized history
+CONTEXT_DAYS = 90
+EMPTY_WATERMARK = '1900-01-01'
+
+# Same summer-peak heuristic the ML functions use for future dates
+SEASONAL_FACTOR_SQL = """
+    CASE WHEN MONTH({column}) IN (6, 7, 8, 9) THEN 1.5
+         WHEN MONTH({column}) IN (3, 4, 5, 10) THEN 1.0
+         ELSE 0.7 END
+"""
+
+
+def rolling_sql(column, partition):
+    """7/30/90-day rolling mean and standard deviation plus 1 and 7 day lags of column
+
+    Frames are date ranges, not row counts: a meter or region with days missing averages only the days inside the
+    window, and a lag is NULL when the day it points at has no reading.
+    """
+    window = f'PARTITION BY {partition} ORDER BY FEATURE_DATE'
+    features = []
+    for days in (7, 30, 90):
+        frame = f"({window} RANGE BETWEEN INTERVAL '{days - 1} DAYS' PRECEDING AND CURRENT ROW)"
+        features.append(f'AVG({column}) OVER {frame} AS {column}_MEAN_{days}D')
+        features.append(f'STDDEV({column}) OVER {frame} AS {column}_STD_{days}D')
+    for days in (1, 7):
+        # One row per key and day, so a frame of exactly that day holds the lagged value or nothing
+        frame = f"({window} RANGE BETWEEN INTERVAL '{days} DAYS' PRECEDING AND INTERVAL '{days} DAYS' PRECEDING)"
+        features.append(f'MAX({column}) OVER {frame} AS {column}_LAG_{days}D')
+    return ',\n            '.join(features)
+
+
+# Region-day usage with weather forward-filled over days without a WEATHER_DATA row
+REGION_FEATURES_SQL = f"""
+    INSERT INTO {REGION_TABLE}
+    WITH daily AS (
+        SELECT
+            c.REGION_ID,
+            wu.READING_DATE AS FEATURE_DATE,
+            SUM(wu.VOLUME_M3) AS USAGE,
+            COUNT(DISTINCT wu.METER_ID) AS ACTIVE_METERS,
+            AVG(wu.TEMPERATURE_C) AS AVG_TEMP_C
+        FROM SIO_DB.DATA.WATER_USAGE wu
+        JOIN SIO_DB.DATA.WATER_METERS wm ON wu.METER_ID = wm.METER_ID
+        JOIN SIO_DB.DATA.CUSTOMERS c ON wm.CUSTOMER_ID = c.CUSTOMER_ID
+        WHERE wu.READING_DATE > DATEADD(day, -{CONTEXT_DAYS}, '{{since}}'::DATE)
+          AND wu.READING_DATE <= '{{through}}'::DATE
+        GROUP BY c.REGION_ID, wu.READING_DATE
+    ),
+    features AS (
+        SELECT
+            d.REGION_ID,
+            d.FEATURE_DATE,
+            d.USAGE,
+            d.ACTIVE_METERS,
+            d.AVG_TEMP_C,
+            {rolling_sql('USAGE', 'd.REGION_ID')},
+            LAST_VALUE(w.TEMPERATURE_AVG_C) IGNORE NULLS OVER (
+                PARTITION BY d.REGION_ID ORDER BY d.FEATURE_DATE ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+            ) AS TEMPERATURE_AVG_C,
+            LAST_VALUE(w.RAINFALL_MM) IGNORE NULLS OVER (
+                PARTITION BY d.REGION_ID ORDER BY d.FEATURE_DATE ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+            ) AS RAINFALL_MM,
+            LAST_VALUE(w.HUMIDITY_PERCENT) IGNORE NULLS OVER (
+                PARTITION BY d.REGION_ID ORDER BY d.FEATURE_DATE ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+            ) AS HUMIDITY_PERCENT
+        FROM daily d
+        LEFT JOIN SIO_DB.DATA.WEATHER_DATA w ON w.REGION_ID = d.REGION_ID AND w.WEATHER_DATE = d.FEATURE_DATE
+    )
+    SELECT
+        REGION_ID,
+        FEATURE_DATE,
+        USAGE AS TOTAL_USAGE_M3,
+        ACTIVE_METERS,
+        AVG_TEMP_C,
+        USAGE_MEAN_7D, USAGE_STD_7D, USAGE_MEAN_30D, USAGE_STD_30D, USAGE_MEAN_90D, USAGE_STD_90D,
+        USAGE_LAG_1D, USAGE_LAG_7D,
+        TEMPERATURE_AVG_C, RAINFALL_MM, HUMIDITY_PERCENT,
+        DAYOFYEAR(FEATURE_DATE) AS DAY_OF_YEAR,
+        MONTH(FEATURE_DATE) AS MONTH,
+        DAYOFWEEKISO(FEATURE_DATE) - 1 AS DAY_OF_WEEK,
+        {SEASONAL_FACTOR_SQL.format(column='FEATURE_DATE').strip()} AS SEASONAL_FACTOR,
+        CURRENT_TIMESTAMP() AS UPDATED_AT
+    FROM features
+    WHERE FEATURE_DATE > '{{since}}'::DATE
+"""
+
+# Meter-day readings; weather and calendar features come from the region-day rows refreshed first
+METER_FEATURES_SQL = f"""
+    INSERT INTO {METER_TABLE}
+    WITH daily AS (
+        SELECT
+            wu.METER_ID,
+            wm.CUSTOMER_ID,
+            c.REGION_ID,
+            wu.READING_DATE AS FEATURE_DATE,
+            SUM(wu.VOLUME_M3) AS VOLUME,
+            AVG(wu.TEMPERATURE_C) AS TEMPERATURE_C,
+            AVG(wu.FLOW_RATE_M3_H) AS FLOW_RATE_M3_H,
+            AVG(wu.PRESSURE_BAR) AS PRESSURE_BAR
+        FROM SIO_DB.DATA.WATER_USAGE wu
+        JOIN SIO_DB.DATA.WATER_METERS wm ON wu.METER_ID = wm.METER_ID
+        JOIN SIO_DB.DATA.CUSTOMERS c ON wm.CUSTOMER_ID = c.CUSTOMER_ID
+        WHERE wu.READING_DATE > DATEADD(day, -{CONTEXT_DAYS}, '{{since}}'::DATE)
+          AND wu.READING_DATE <= '{{through}}'::DATE
+        GROUP BY wu.METER_ID, wm.CUSTOMER_ID, c.REGION_ID, wu.READING_DATE
+    ),
+    features AS (
+        SELECT
+            d.*,
+            {rolling_sql('VOLUME', 'd.METER_ID')}
+        FROM daily d
+    )
+    SELECT
+        f.METER_ID,
+        f.CUSTOMER_ID,
+        f.REGION_ID,
+        f.FEATURE_DATE,
+        f.VOLUME AS VOLUME_M3,
+        f.TEMPERATURE_C,
+        f.FLOW_RATE_M3_H,
+        f.PRESSURE_BAR,
+        f.VOLUME_MEAN_7D, f.VOLUME_STD_7D, f.VOLUME_MEAN_30D, f.VOLUME_STD_30D, f.VOLUME_MEAN_90D, f.VOLUME_STD_90D,
+        f.VOLUME_LAG_1D, f.VOLUME_LAG_7D,
+        r.TEMPERATURE_AVG_C, r.RAINFALL_MM, r.HUMIDITY_PERCENT,
+        r.DAY_OF_YEAR, r.MONTH, r.DAY_OF_WEEK, r.SEASONAL_FACTOR,
+        CURRENT_TIMESTAMP() AS UPDATED_AT
+    FROM features f
+    LEFT JOIN {REGION_TABLE} r ON r.REGION_ID = f.REGION_ID AND r.FEATURE_DATE = f.FEATURE_DATE
+    WHERE f.FEATURE_DATE > '{{since}}'::DATE
+"""
+
+
+def scalar(result):
+    """First column of the first row of a collect() result, or None"""
+    return result[0][0] if result and result[0] else None
+
+
+def watermark(session, table, date_column='FEATURE_DATE'):
+    """Last featurized day in table (EMPTY_WATERMARK when empty)"""
+    last = scalar(session.sql(f'SELECT MAX({date_column}) FROM {table}').collect())
+    return pd.Timestamp(last).date().isoformat() if last is not None else EMPTY_WATERMARK
+
+
+def refresh_table(session, table, insert_sql, through, rebuild_from=None, date_column='FEATURE_DATE'):
+    """Compute features for the days after the table's watermark (or from rebuild_from) up to through"""
+    start = time.perf_counter()
+    since = watermark(session, table, date_column)
+    if rebuild_from is not None:
+        since = min(since, (pd.Timestamp(rebuild_from) - pd.Timedelta(days=1)).date().isoformat())
+    if since >= through:
+        return {'since': since, 'rows': 0, 'seconds': round(time.perf_counter() - start, 3)}
+
+    window = f"{date_column} > '{since}'::DATE AND {date_column} <= '{through}'::DATE"
+    session.sql(f'DELETE FROM {table} WHERE {window}').collect()
+    session.sql(insert_sql.format(since=since, through=through)).collect()
+    rows = scalar(session.sql(f'SELECT COUNT(*) FROM {table} WHERE {window}').collect())
+    return {'since': since, 'rows': int(rows or 0), 'seconds': round(time.perf_counter() - start, 3)}
+
+
+def refresh_features(session, through=None, rebuild_from=None):
+    """Refresh region-day then meter-day features through the given day (default: latest reading)"""
+    if through is None:
+        through = scalar(session.sql('SELECT MAX(READING_DATE) FROM SIO_DB.DATA.WATER_USAGE').collect())
+        if through is None:
+            return {'through': None, 'region_day': None, 'meter_day': None}
+    through = pd.Timestamp(through).date().isoformat()
+
+    return {
+        'through': through,
+        'region_day': refresh_table(session, REGION_TABLE, REGION_FEATURES_SQL, through, rebuild_from),
+        'meter_day': refresh_table(session, METER_TABLE, METER_FEATURES_SQL, through, rebuild_from)
+    }
+
+
+def run_procedure(session, through):
+    """Handler for SIO_DB.ML_ANALYTICS.REFRESH_FEATURE_STORE"""
+    return refresh_features(session, through)
+
+
+def setup_local(con):
+    """Create the feature tables in the local DuckDB stand-in"""
+    import local_backend
+
+    local_backend.run_script(con, FEATURE_SQL_FILE)
+
+
+def main():
+    """Refresh the feature store in the local DuckDB stand-in"""
+    parser = argparse.ArgumentParser(description='Incremental SIO feature store refresh (local DuckDB stand-in)')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default='data/sio_local.duckdb')
+    parser.add_argument('--through', help='Last day to featurize YYYY-MM-DD (default: latest reading)')
+    parser.add_argument('--rebuild-from', help='Recompute days from YYYY-MM-DD (e.g. after late readings)')
+    args = parser.parse_args()
+
+    import local_backend
+
+    through = datetime.strptime(args.through, '%Y-%m-%d').date() if args.through else None
+    rebuild_from = datetime.strptime(args.rebuild_from, '%Y-%m-%d').date() if args.rebuild_from else None
+    con = local_backend.connect(args.local)
+    setup_local(con)
+    stats = refresh_features(local_backend.LocalSession(con), through, rebuild_from)
+
+    if stats['through'] is None:
+        print("⚠️  No WATER_USAGE readings to featurize")
+        return
+    print(f"🧮 Feature store refreshed through {stats['through']}")
+    for grain in ('region_day', 'meter_day'):
+        print(f"  - {grain}: {stats[grain]['rows']:,} new rows after {stats[grain]['since']} "
+              f"({stats[grain]['seconds']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,42 @@
 #!/usr/bin/env python3
 """
 Generate synthetic irrigation data for SIO (Saudi Irrigation Organization)
-Simulates 1000 farmers across 8 Saudi provinces with 12 months of data
+Simulates 1000 farmers across 8 Saudi provinces with 12 months of data (scale factor 1)
+
+Benchmark datasets:
+  python data_engineering/generate_data.py --scale-factor 10 --output-dir data/sf10
+
+Tables are generated in compact dtypes (compact_dtypes.py) and expanded only when written to CSV; the run
+reports each table's in-memory footprint in both forms.
 """
 
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import argparse
+import json
+import platform
 import random
 import os
+import time
+
+import compact_dtypes
+from billing_engine import BASE_RATE_SAR, DUE_DAYS, SERVICE_FEE_SAR
+from inject_anomalies import inject_anomalies, parse_rates
+from weather_engine import generate_weather, history_window
+
+# Set random seed for reproducibility (overridden by --seed)
+SEED = 42
+np.random.seed(SEED)
+random.seed(SEED)
+
+# Reference "today" for all generated dates (overridden by --as-of)
+AS_OF = datetime.now()
 
-# Set random seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+# Scale factor 1 dataset shape
+SF1_CUSTOMERS = 1000
+DEFAULT_MONTHS = 12
+DEFAULT_METERS_PER_CUSTOMER = 1
 
 # Saudi provinces (regions)
 REGIONS = [
@@ -31,12 +55,57 @@ CUSTOMER_TYPES = ['FARM', 'AGRICULTURAL_BUSINESS', 'INDUSTRIAL']
 CROP_TYPES = ['Dates', 'Wheat', 'Vegetables', 'Alfalfa', 'Fruits', 'Barley', 'Mixed Crops']
 PAYMENT_METHODS = ['BANK_TRANSFER', 'ONLINE', 'CASH', 'CHECK']
 
+# Status labels (categorical codes in memory)
+ACCOUNT_STATUSES = ['ACTIVE', 'SUSPENDED']
+METER_STATUSES = ['ACTIVE', 'INACTIVE']
+SOURCE_STATUSES = ['ACTIVE', 'MAINTENANCE']
+BILL_STATUSES = ['PAID', 'PENDING', 'OVERDUE']
+PAYMENT_STATUSES = ['COMPLETED']
+
+# Payment behaviour by customer type (override with --payment-profiles): days from bill generation to
+# payment are lognormal with median lag_days (bills are due after DUE_DAYS); installment_rate of PAID bills
+# are settled in 2-MAX_INSTALLMENTS payments INSTALLMENT_DAYS apart; partial_rate of PENDING/OVERDUE
+# bills carry one partial payment of partial_share of the amount, which leaves them unpaid
+PAYMENT_PROFILES = {
+    'FARM': {
+        'lag_days': 40, 'lag_sigma': 0.35, 'installment_rate': 0.10, 'partial_rate': 0.30, 'partial_share': (0.2, 0.8),
+        'methods': {'BANK_TRANSFER': 0.25, 'ONLINE': 0.35, 'CASH': 0.30, 'CHECK': 0.10}
+    },
+    'AGRICULTURAL_BUSINESS': {
+        'lag_days': 32, 'lag_sigma': 0.25, 'installment_rate': 0.05, 'partial_rate': 0.40, 'partial_share': (0.3, 0.9),
+        'methods': {'BANK_TRANSFER': 0.60, 'ONLINE': 0.25, 'CASH': 0.05, 'CHECK': 0.10}
+    },
+    'INDUSTRIAL': {
+        'lag_days': 44, 'lag_sigma': 0.30, 'installment_rate': 0.15, 'partial_rate': 0.35, 'partial_share': (0.2, 0.9),
+        'methods': {'BANK_TRANSFER': 0.55, 'ONLINE': 0.20, 'CASH': 0.05, 'CHECK': 0.20}
+    }
+}
+# Multiplier on the payment lag per province (districts follow their province)
+REGION_LAG_FACTORS = {
+    'Riyadh': 0.90, 'Makkah': 1.00, 'Eastern Province': 0.95, 'Madinah': 1.05,
+    'Qassim': 1.10, 'Asir': 1.15, 'Tabuk': 1.20, 'Hail': 1.10
+}
+MAX_INSTALLMENTS = 3
+INSTALLMENT_DAYS = 14
+
 # Water source types
 SOURCE_TYPES = ['RESERVOIR', 'WELL', 'TREATMENT_PLANT', 'DESALINATION']
 
-def generate_regions():
-    """Generate regions data"""
-    return pd.DataFrame(REGIONS)
+def generate_regions(num_regions=len(REGIONS)):
+    """Generate regions data (beyond the 8 provinces, provinces are split into numbered districts)"""
+    regions = []
+    for i in range(num_regions):
+        province = REGIONS[i % len(REGIONS)]
+        district = i // len(REGIONS)
+        if district == 0:
+            regions.append(dict(province))
+        else:
+            regions.append({
+                **province,
+                'name': f"{province['name']} District {district + 1}",
+                'name_ar': f"{province['name_ar']} {district + 1}"
+            })
+    return pd.DataFrame(regions)
 
 def generate_water_sources(regions_df):
     """Generate water sources for each region"""
@@ -60,13 +129,20 @@ def generate_water_sources(regions_df):
                 'CURRENT_LEVEL_M3': round(current_level, 2),
                 'EFFICIENCY_PERCENT': round(random.uniform(75, 95), 2),
                 'STATUS': 'ACTIVE' if random.random() > 0.1 else 'MAINTENANCE',
-                'LAST_MAINTENANCE_DATE': (datetime.now() - timedelta(days=random.randint(1, 180))).date(),
+                'LAST_MAINTENANCE_DATE': (AS_OF - timedelta(days=random.randint(1, 180))).date(),
                 'LATITUDE': round(random.uniform(17.0, 32.0), 7),
                 'LONGITUDE': round(random.uniform(34.0, 56.0), 7)
             })
             source_id += 1
     
-    return pd.DataFrame(sources)
+    sources_df = pd.DataFrame(sources)
+    return sources_df.assign(
+        SOURCE_TYPE=compact_dtypes.category(sources_df['SOURCE_TYPE'], SOURCE_TYPES),
+        REGION_ID=compact_dtypes.ids(sources_df['REGION_ID']),
+        EFFICIENCY_PERCENT=compact_dtypes.measure(sources_df['EFFICIENCY_PERCENT'], 2),
+        STATUS=compact_dtypes.category(sources_df['STATUS'], SOURCE_STATUSES),
+        LAST_MAINTENANCE_DATE=compact_dtypes.dates(sources_df['LAST_MAINTENANCE_DATE'])
+    )
 
 def generate_customers(regions_df, num_customers=1000):
     """Generate farmer/agricultural business customers"""
@@ -94,250 +170,415 @@ def generate_customers(regions_df, num_customers=1000):
             'CROP_TYPE': random.choice(CROP_TYPES),
             'CONTACT_PHONE': f'+966{random.randint(500000000, 599999999)}',
             'CONTACT_EMAIL': f'farmer{i+1}@sio-ksa.gov.sa',
-            'REGISTRATION_DATE': (datetime.now() - timedelta(days=random.randint(365, 1825))).date(),
+            'REGISTRATION_DATE': (AS_OF - timedelta(days=random.randint(365, 1825))).date(),
             'ACCOUNT_STATUS': 'ACTIVE' if random.random() > 0.05 else 'SUSPENDED'
         })
     
-    return pd.DataFrame(customers)
+    customers_df = pd.DataFrame(customers)
+    return customers_df.assign(
+        CUSTOMER_TYPE=compact_dtypes.category(customers_df['CUSTOMER_TYPE'], CUSTOMER_TYPES),
+        REGION_ID=compact_dtypes.ids(customers_df['REGION_ID']),
+        FARM_SIZE_HECTARES=compact_dtypes.measure(customers_df['FARM_SIZE_HECTARES'], 2),
+        CROP_TYPE=compact_dtypes.category(customers_df['CROP_TYPE'], CROP_TYPES),
+        REGISTRATION_DATE=compact_dtypes.dates(customers_df['REGISTRATION_DATE']),
+        ACCOUNT_STATUS=compact_dtypes.category(customers_df['ACCOUNT_STATUS'], ACCOUNT_STATUSES)
+    )
 
-def generate_water_meters(customers_df):
+def generate_water_meters(customers_df, meters_per_customer=DEFAULT_METERS_PER_CUSTOMER):
     """Generate water meters for each customer"""
     meters = []
     
     for idx, customer in customers_df.iterrows():
         customer_id = idx + 1
         
-        meters.append({
-            'CUSTOMER_ID': customer_id,
-            'METER_NUMBER': f'WM-{customer_id:06d}',
-            'INSTALLATION_DATE': customer['REGISTRATION_DATE'] + timedelta(days=random.randint(1, 30)),
-            'LAST_CALIBRATION_DATE': (datetime.now() - timedelta(days=random.randint(1, 365))).date(),
-            'METER_STATUS': 'ACTIVE' if customer['ACCOUNT_STATUS'] == 'ACTIVE' else 'INACTIVE',
-            'LOCATION_LATITUDE': round(random.uniform(17.0, 32.0), 7),
-            'LOCATION_LONGITUDE': round(random.uniform(34.0, 56.0), 7)
-        })
-    
-    return pd.DataFrame(meters)
-
-def generate_water_usage(meters_df, customers_df, months=12):
-    """Generate daily water usage readings for the past N months"""
-    usage = []
-    start_date = datetime.now() - timedelta(days=30 * months)
-    
-    for idx, meter in meters_df.iterrows():
-        meter_id = idx + 1
-        customer_id = meter['CUSTOMER_ID']
-        customer_type = customers_df.loc[customer_id - 1, 'CUSTOMER_TYPE']
-        farm_size = customers_df.loc[customer_id - 1, 'FARM_SIZE_HECTARES']
-        
-        # Base usage depends on farm size and type
-        if customer_type == 'AGRICULTURAL_BUSINESS':
-            base_usage = farm_size * random.uniform(50, 80)
-        elif customer_type == 'INDUSTRIAL':
-            base_usage = farm_size * random.uniform(40, 70)
-        else:
-            base_usage = farm_size * random.uniform(30, 60)
-        
-        # Generate daily readings for past 12 months
-        current_date = start_date
-        while current_date <= datetime.now():
-            # Seasonal variation (summer higher)
-            month = current_date.month
-            seasonal_factor = 1.5 if month in [6, 7, 8, 9] else 1.0 if month in [3, 4, 5, 10] else 0.7
+        for meter_index in range(meters_per_customer):
+            # Keep the original WM-000001 numbering for single-meter customers
+            meter_number = f'WM-{customer_id:06d}' if meters_per_customer == 1 else f'WM-{customer_id:06d}-{meter_index + 1}'
             
-            # Daily variation
-            daily_usage = base_usage * seasonal_factor * random.uniform(0.8, 1.2)
-            
-            usage.append({
-                'METER_ID': meter_id,
-                'READING_DATE': current_date.date(),
-                'VOLUME_M3': round(daily_usage, 3),
-                'PRESSURE_BAR': round(random.uniform(2.0, 4.5), 2),
-                'FLOW_RATE_M3_H': round(daily_usage / 10, 3),
-                'TEMPERATURE_C': round(random.uniform(15, 45), 2)
+            meters.append({
+                'CUSTOMER_ID': customer_id,
+                'METER_NUMBER': meter_number,
+                'INSTALLATION_DATE': customer['REGISTRATION_DATE'] + timedelta(days=random.randint(1, 30)),
+                'LAST_CALIBRATION_DATE': (AS_OF - timedelta(days=random.randint(1, 365))).date(),
+                'METER_STATUS': 'ACTIVE' if customer['ACCOUNT_STATUS'] == 'ACTIVE' else 'INACTIVE',
+                'LOCATION_LATITUDE': round(random.uniform(17.0, 32.0), 7),
+                'LOCATION_LONGITUDE': round(random.uniform(34.0, 56.0), 7)
             })
-            
-            current_date += timedelta(days=1)
     
-    return pd.DataFrame(usage)
+    meters_df = pd.DataFrame(meters)
+    return meters_df.assign(
+        CUSTOMER_ID=compact_dtypes.ids(meters_df['CUSTOMER_ID']),
+        INSTALLATION_DATE=compact_dtypes.dates(meters_df['INSTALLATION_DATE']),
+        LAST_CALIBRATION_DATE=compact_dtypes.dates(meters_df['LAST_CALIBRATION_DATE']),
+        METER_STATUS=compact_dtypes.category(meters_df['METER_STATUS'], METER_STATUSES)
+    )
+
+def usage_dates(months=DEFAULT_MONTHS):
+    """Daily reading dates covering the past N months up to and including AS_OF"""
+    start_date = (AS_OF - timedelta(days=30 * months)).date()
+    return pd.date_range(start_date, periods=30 * months + 1, freq='D')
 
-def generate_billing(customers_df, usage_df):
-    """Generate monthly bills based on water usage"""
-    bills = []
+def meter_base_usage(meters_df, customers_df):
+    """Typical daily volume (m3) per meter from its customer's farm size and type"""
+    customer_index = meters_df['CUSTOMER_ID'].to_numpy() - 1
+    customer_type = customers_df['CUSTOMER_TYPE'].to_numpy()[customer_index]
+    farm_size = compact_dtypes.measure_values(customers_df['FARM_SIZE_HECTARES'])[customer_index]
+    meters_per_customer = meters_df.groupby('CUSTOMER_ID')['CUSTOMER_ID'].transform('size').to_numpy()
     
-    # Get unique months from usage data
-    usage_df['MONTH'] = pd.to_datetime(usage_df['READING_DATE']).dt.to_period('M')
+    # Base usage depends on farm size and type, split across the customer's meters
+    is_business = customer_type == 'AGRICULTURAL_BUSINESS'
+    is_industrial = customer_type == 'INDUSTRIAL'
+    rate_low = np.select([is_business, is_industrial], [50, 40], 30)
+    rate_high = np.select([is_business, is_industrial], [80, 70], 60)
+    return farm_size * np.random.uniform(rate_low, rate_high) / meters_per_customer
+
+def usage_readings(meter_ids, base_usage, dates):
+    """Daily readings for each meter on each date (meter-major), from the meters' base usage"""
+    dates = pd.DatetimeIndex(dates)
+    num_meters, num_days = len(meter_ids), len(dates)
     
-    for idx, customer in customers_df.iterrows():
-        customer_id = idx + 1
-        
-        # Get meter ID for this customer
-        meter_id = customer_id  # 1:1 relationship
-        
-        # Get usage for this customer by month
-        customer_usage = usage_df[usage_df['METER_ID'] == meter_id]
-        
-        for month in customer_usage['MONTH'].unique():
-            month_data = customer_usage[customer_usage['MONTH'] == month]
-            total_volume = month_data['VOLUME_M3'].sum()
-            
-            # Pricing tiers (SAR per m3)
-            base_rate = 0.50
-            usage_charge = total_volume * base_rate
-            service_fee = 50.00
-            total_amount = usage_charge + service_fee
-            
-            billing_month = month.to_timestamp().date()
-            due_date = billing_month + timedelta(days=45)
-            
-            # Bill status: 85% paid, 10% pending, 5% overdue
-            status_rand = random.random()
-            if status_rand < 0.85:
-                bill_status = 'PAID'
-            elif status_rand < 0.95:
-                bill_status = 'PENDING'
-            else:
-                bill_status = 'OVERDUE'
-            
-            bills.append({
-                'CUSTOMER_ID': customer_id,
-                'BILLING_MONTH': billing_month,
-                'USAGE_VOLUME_M3': round(total_volume, 3),
-                'BASE_RATE_SAR': base_rate,
-                'USAGE_CHARGE_SAR': round(usage_charge, 2),
-                'SERVICE_FEE_SAR': service_fee,
-                'TOTAL_AMOUNT_SAR': round(total_amount, 2),
-                'DUE_DATE': due_date,
-                'BILL_STATUS': bill_status,
-                'GENERATED_DATE': billing_month
-            })
+    # Seasonal variation (summer higher)
+    month = dates.month.to_numpy()
+    seasonal_factor = np.select([np.isin(month, [6, 7, 8, 9]), np.isin(month, [3, 4, 5, 10])], [1.5, 1.0], 0.7)
     
-    return pd.DataFrame(bills)
+    # Daily variation, shape (meters, days)
+    daily_usage = base_usage[:, None] * seasonal_factor[None, :] * np.random.uniform(0.8, 1.2, (num_meters, num_days))
+    daily_usage = daily_usage.ravel()
+    
+    return pd.DataFrame({
+        'METER_ID': compact_dtypes.ids(np.repeat(meter_ids, num_days)),
+        'READING_DATE': compact_dtypes.dates(np.tile(dates.to_numpy().astype('datetime64[D]'), num_meters)),
+        'VOLUME_M3': compact_dtypes.measure(daily_usage, 3),
+        'PRESSURE_BAR': compact_dtypes.measure(np.random.uniform(2.0, 4.5, daily_usage.size), 2),
+        'FLOW_RATE_M3_H': compact_dtypes.measure(daily_usage / 10, 3),
+        'TEMPERATURE_C': compact_dtypes.measure(np.random.uniform(15, 45, daily_usage.size), 2)
+    })
 
-def generate_payments(billing_df):
-    """Generate payment records for paid bills"""
-    payments = []
-    payment_id = 1
-    
-    paid_bills = billing_df[billing_df['BILL_STATUS'] == 'PAID'].copy()
-    paid_bills['BILL_ID'] = range(1, len(paid_bills) + 1)
-    
-    for idx, bill in paid_bills.iterrows():
-        # Payment date between due date and 30 days before
-        days_before_due = random.randint(0, 30)
-        payment_date = bill['DUE_DATE'] - timedelta(days=days_before_due)
-        
-        payments.append({
-            'BILL_ID': bill['BILL_ID'],
-            'PAYMENT_DATE': payment_date,
-            'AMOUNT_PAID_SAR': bill['TOTAL_AMOUNT_SAR'],
-            'PAYMENT_METHOD': random.choice(PAYMENT_METHODS),
-            'TRANSACTION_REFERENCE': f'TXN-{payment_id:08d}',
-            'PAYMENT_STATUS': 'COMPLETED'
-        })
-        payment_id += 1
+def generate_water_usage(meters_df, customers_df, months=DEFAULT_MONTHS):
+    """Generate daily water usage readings for the past N months (one row per meter per day)"""
+    base_usage = meter_base_usage(meters_df, customers_df)
+    return usage_readings(np.arange(1, len(meters_df) + 1), base_usage, usage_dates(months))
+
+def generate_billing(customers_df, usage_df, meters_df=None):
+    """Generate monthly bills based on water usage (one bill per customer per month)"""
+    # Map readings to customers through their meters (1:1 when no meters are given)
+    meter_ids = usage_df['METER_ID'].to_numpy()
+    if meters_df is None:
+        customer_ids = meter_ids
+    else:
+        customer_ids = meters_df['CUSTOMER_ID'].to_numpy()[meter_ids - 1]
     
-    return pd.DataFrame(payments)
+    monthly = pd.DataFrame({
+        'CUSTOMER_ID': customer_ids,
+        'BILLING_MONTH': compact_dtypes.date_values(usage_df['READING_DATE']).astype('datetime64[M]'),
+        'VOLUME_M3': compact_dtypes.measure_values(usage_df['VOLUME_M3'])
+    }).groupby(['CUSTOMER_ID', 'BILLING_MONTH'], sort=True)['VOLUME_M3'].sum().reset_index()
+    
+    # Pricing tiers (SAR per m3), shared with the incremental billing engine
+    base_rate = BASE_RATE_SAR
+    service_fee = SERVICE_FEE_SAR
+    usage_charge = monthly['VOLUME_M3'] * base_rate
+    billing_month = monthly['BILLING_MONTH'].to_numpy().astype('datetime64[D]')
+    
+    # Bill status: 85% paid, 10% pending, 5% overdue
+    status_rand = np.random.random(len(monthly))
+    bill_status = np.select([status_rand < 0.85, status_rand < 0.95], ['PAID', 'PENDING'], 'OVERDUE')
+    
+    # Volumes and SAR amounts stay float64: monthly totals run to millions, beyond float32's cents
+    return pd.DataFrame({
+        'CUSTOMER_ID': compact_dtypes.ids(monthly['CUSTOMER_ID']),
+        'BILLING_MONTH': compact_dtypes.dates(billing_month),
+        'USAGE_VOLUME_M3': monthly['VOLUME_M3'].round(3),
+        'BASE_RATE_SAR': base_rate,
+        'USAGE_CHARGE_SAR': usage_charge.round(2),
+        'SERVICE_FEE_SAR': service_fee,
+        'TOTAL_AMOUNT_SAR': (usage_charge + service_fee).round(2),
+        'DUE_DATE': compact_dtypes.dates(billing_month + np.timedelta64(DUE_DAYS, 'D')),
+        'BILL_STATUS': compact_dtypes.category(bill_status, BILL_STATUSES),
+        'GENERATED_DATE': compact_dtypes.dates(billing_month)
+    })
+
+def load_payment_profiles(path=None):
+    """(customer-type profiles, region lag factors), with overrides from a JSON file
+    {"customer_types": {"FARM": {"lag_days": 50}}, "regions": {"Tabuk": 1.4}}"""
+    profiles = {name: dict(profile) for name, profile in PAYMENT_PROFILES.items()}
+    region_lag_factors = dict(REGION_LAG_FACTORS)
+    if path:
+        with open(path) as f:
+            overrides = json.load(f)
+        unknown = (set(overrides.get('customer_types', {})) - set(CUSTOMER_TYPES)) | \
+                  (set(overrides.get('regions', {})) - set(REGION_LAG_FACTORS))
+        if unknown:
+            raise ValueError(f"Unknown customer types or provinces in {path}: {', '.join(sorted(unknown))}")
+        for name, profile in overrides.get('customer_types', {}).items():
+            profiles[name].update(profile)
+        region_lag_factors.update(overrides.get('regions', {}))
+    return profiles, region_lag_factors
+
+def generate_payments(billing_df, customers_df, profiles=PAYMENT_PROFILES, region_lag_factors=REGION_LAG_FACTORS, seed=SEED):
+    """Generate payments for the bills, keyed by the BILL_IDs BILLING assigns (AUTOINCREMENT in load order)"""
+    rng = np.random.default_rng([seed, len(billing_df)])
+    num_bills = len(billing_df)
+    
+    # Customer type and province of each bill select its payment profile and regional lag
+    customer_index = billing_df['CUSTOMER_ID'].to_numpy() - 1
+    type_codes = pd.Categorical(customers_df['CUSTOMER_TYPE'], categories=CUSTOMER_TYPES).codes[customer_index]
+    province = (customers_df['REGION_ID'].to_numpy()[customer_index] - 1) % len(REGIONS)
+    
+    def by_type(key):
+        return np.array([profiles[name][key] for name in CUSTOMER_TYPES])[type_codes]
+    
+    # Payments per bill: PAID bills are settled in full (some in installments), unpaid bills may carry one partial payment
+    paid = (billing_df['BILL_STATUS'] == 'PAID').to_numpy()
+    installments = np.where(rng.random(num_bills) < by_type('installment_rate'),
+                            rng.integers(2, MAX_INSTALLMENTS + 1, num_bills), 1)
+    partial = ~paid & (rng.random(num_bills) < by_type('partial_rate'))
+    counts = np.where(paid, installments, partial.astype(np.int64))
+    
+    # Expand bills to payment rows; installment is each payment's position within its bill
+    bill_rows = np.repeat(np.arange(num_bills), counts)
+    installment = np.arange(len(bill_rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    
+    # Amounts in halalas so PAID bills sum exactly to TOTAL_AMOUNT_SAR and partial payments stay below it
+    total = np.rint(billing_df['TOTAL_AMOUNT_SAR'].to_numpy(dtype=np.float64) * 100).astype(np.int64)
+    amount = total[bill_rows]
+    
+    # Installments split the total at random; the last one takes the rounding remainder
+    split = np.flatnonzero(counts[bill_rows] > 1)
+    split_bills = bill_rows[split]
+    weights = rng.uniform(0.5, 1.5, len(split))
+    amount[split] = np.floor(weights / np.bincount(split_bills, weights, minlength=num_bills)[split_bills] * amount[split])
+    remainder = total - np.bincount(split_bills, amount[split], minlength=num_bills).astype(np.int64)
+    last = installment[split] == counts[split_bills] - 1
+    amount[split[last]] += remainder[split_bills[last]]
+    
+    partial_rows = np.flatnonzero(partial[bill_rows])
+    share_range = np.array([profiles[name]['partial_share'] for name in CUSTOMER_TYPES])[type_codes[bill_rows[partial_rows]]]
+    amount[partial_rows] = np.floor(amount[partial_rows] * rng.uniform(share_range[:, 0], share_range[:, 1]))
+    
+    # Lognormal lag from bill generation, scaled by province; later installments follow every INSTALLMENT_DAYS
+    median_lag = by_type('lag_days') * np.array([region_lag_factors[region['name']] for region in REGIONS])[province]
+    lag = np.rint(median_lag * np.exp(by_type('lag_sigma') * rng.standard_normal(num_bills))).astype(np.int64)
+    payment_date = (compact_dtypes.date_values(billing_df['GENERATED_DATE'])[bill_rows]
+                    + (lag[bill_rows] + installment * INSTALLMENT_DAYS).astype('timedelta64[D]'))
+    payment_date = np.minimum(payment_date, np.datetime64(AS_OF.date(), 'D'))
+    
+    # Payment method drawn from the customer type's mix: one searchsorted over the types' CDFs laid end to end
+    method_mix = np.array([[profiles[name]['methods'].get(method, 0.0) for method in PAYMENT_METHODS] for name in CUSTOMER_TYPES])
+    method_cdf = np.cumsum(method_mix / method_mix.sum(axis=1, keepdims=True), axis=1)
+    method_cdf[:, -1] = 1.0
+    payment_types = type_codes[bill_rows]
+    draws = payment_types + rng.random(len(bill_rows))
+    method_codes = np.searchsorted((np.arange(len(CUSTOMER_TYPES))[:, None] + method_cdf).ravel(), draws, side='right')
+    method_codes = np.minimum(method_codes - payment_types * len(PAYMENT_METHODS), len(PAYMENT_METHODS) - 1)
+    
+    return pd.DataFrame({
+        'BILL_ID': compact_dtypes.ids(bill_rows + 1),
+        'PAYMENT_DATE': compact_dtypes.dates(payment_date),
+        'AMOUNT_PAID_SAR': amount / 100,
+        'PAYMENT_METHOD': pd.Categorical.from_codes(method_codes, PAYMENT_METHODS),
+        'TRANSACTION_REFERENCE': compact_dtypes.references('TXN-', np.arange(1, len(bill_rows) + 1), 8),
+        'PAYMENT_STATUS': pd.Categorical.from_codes(np.zeros(len(bill_rows), dtype=np.int8), PAYMENT_STATUSES)
+    })
 
-def generate_weather_data(regions_df, months=12):
+def generate_weather_data(regions_df, months=12, seed=SEED):
     """Generate weather data for ML predictions"""
-    weather = []
-    start_date = datetime.now() - timedelta(days=30 * months)
+    start_date, days = history_window(months, today=AS_OF.date())
+    weather_df = generate_weather(range(1, len(regions_df) + 1), start_date, days, seed=seed)
+    measures = weather_df.columns.drop(['REGION_ID', 'WEATHER_DATE'])
+    return weather_df.assign(
+        REGION_ID=compact_dtypes.ids(weather_df['REGION_ID']),
+        WEATHER_DATE=compact_dtypes.dates(weather_df['WEATHER_DATE']),
+        **{name: compact_dtypes.measure(weather_df[name], compact_dtypes.DECIMALS[name]) for name in measures}
+    )
+
+def expected_row_counts(num_customers, meters_per_customer, months, num_regions):
+    """Row counts fully determined by the dataset shape (sources and payments are seeded but random)"""
+    dates = usage_dates(months)
+    num_meters = num_customers * meters_per_customer
+    return {
+        'regions': num_regions,
+        'customers': num_customers,
+        'water_meters': num_meters,
+        'water_usage': num_meters * len(dates),
+        'billing': num_customers * dates.to_period('M').nunique(),
+        'weather_data': num_regions * len(dates)
+    }
+
+def write_manifest(output_dir, args, tables, timings, memory, total_seconds):
+    """Record dataset shape, seeds, row counts and timings so benchmark runs are comparable"""
+    expected = expected_row_counts(args.customers, args.meters_per_customer, args.months, args.regions)
+    manifest = {
+        'dataset': f'SF{args.scale_factor:g}',
+        'scale_factor': args.scale_factor,
+        'parameters': {
+            'customers': args.customers,
+            'meters_per_customer': args.meters_per_customer,
+            'months': args.months,
+            'regions': args.regions,
+            'anomaly_scale': args.anomaly_scale,
+            'anomaly_rates': args.anomaly_rates,
+            'payment_profiles': args.payment_profiles
+        },
+        'seeds': {'numpy': args.seed, 'random': args.seed, 'weather': args.seed, 'anomalies': args.seed,
+                  'payments': args.seed},
+        'as_of': AS_OF.date().isoformat(),
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'generation_seconds': round(total_seconds, 3),
+        'tables': {
+            name: {
+                'rows': len(df),
+                'expected_rows': expected.get(name),
+                'seconds': round(timings[name], 3),
+                'memory_bytes': memory[name]['compact'],
+                'expanded_memory_bytes': memory[name]['expanded'],
+                'file': f'{name}.csv',
+                'bytes': os.path.getsize(os.path.join(output_dir, f'{name}.csv'))
+            }
+            for name, df in tables.items()
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__
+        }
+    }
     
-    for _, region in regions_df.iterrows():
-        region_id = _ + 1
-        
-        current_date = start_date
-        while current_date <= datetime.now():
-            month = current_date.month
-            
-            # Temperature patterns (Saudi Arabia climate)
-            if month in [6, 7, 8]:  # Summer
-                temp_avg = random.uniform(38, 45)
-            elif month in [12, 1, 2]:  # Winter
-                temp_avg = random.uniform(15, 22)
-            else:  # Spring/Fall
-                temp_avg = random.uniform(25, 35)
-            
-            weather.append({
-                'REGION_ID': region_id,
-                'WEATHER_DATE': current_date.date(),
-                'TEMPERATURE_MAX_C': round(temp_avg + random.uniform(2, 5), 2),
-                'TEMPERATURE_MIN_C': round(temp_avg - random.uniform(5, 10), 2),
-                'TEMPERATURE_AVG_C': round(temp_avg, 2),
-                'RAINFALL_MM': round(random.uniform(0, 2) if month in [11, 12, 1, 2, 3] else 0, 2),
-                'HUMIDITY_PERCENT': round(random.uniform(20, 60), 2),
-                'WIND_SPEED_KMH': round(random.uniform(5, 25), 2)
-            })
-            
-            current_date += timedelta(days=1)
+    with open(os.path.join(output_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    return manifest
+
+def parse_args(argv=None):
+    """Dataset shape from --scale-factor, with explicit knobs taking precedence"""
+    parser = argparse.ArgumentParser(description='Generate synthetic SIO irrigation data')
+    parser.add_argument('--scale-factor', type=float, default=1.0,
+                        help='SF1 = 1,000 customers; customers scale linearly (SF10, SF100, ...)')
+    parser.add_argument('--customers', type=int, help='Number of customers (default: 1000 x scale factor)')
+    parser.add_argument('--meters-per-customer', type=int, default=DEFAULT_METERS_PER_CUSTOMER)
+    parser.add_argument('--months', type=int, default=DEFAULT_MONTHS, help='Months of daily history')
+    parser.add_argument('--regions', type=int, default=len(REGIONS), help='Number of regions')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--as-of', help='Reference date YYYY-MM-DD (default: today)')
+    parser.add_argument('--output-dir', default='data')
+    parser.add_argument('--anomaly-scale', type=float, default=1.0,
+                        help='Multiplier on the default anomaly rates in inject_anomalies.py (0 = clean data)')
+    parser.add_argument('--anomaly-rates', type=parse_rates, default={},
+                        help='Per-type events per meter-day, e.g. LEAK=0.002,THEFT_SPIKE=0')
+    parser.add_argument('--payment-profiles', metavar='JSON_PATH',
+                        help='Overrides for PAYMENT_PROFILES and REGION_LAG_FACTORS (payment lag, installments, partial payments)')
+    args = parser.parse_args(argv)
     
-    return pd.DataFrame(weather)
+    if args.customers is None:
+        args.customers = max(1, int(round(SF1_CUSTOMERS * args.scale_factor)))
+    if min(args.customers, args.meters_per_customer, args.months, args.regions) < 1:
+        parser.error('customers, meters per customer, months and regions must all be >= 1')
+    if args.anomaly_scale < 0 or min(args.anomaly_rates.values(), default=0) < 0:
+        parser.error('anomaly rates must be >= 0')
+    try:
+        args.payment_config = load_payment_profiles(args.payment_profiles)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    
+    return args
 
-def main():
+def main(argv=None):
     """Generate all data and save to CSV files"""
+    global AS_OF
+    
+    args = parse_args(argv)
+    np.random.seed(args.seed)
+    random.seed(args.seed)
+    if args.as_of:
+        AS_OF = datetime.strptime(args.as_of, '%Y-%m-%d')
     
-    print("🌊 Generating SIO irrigation data...")
+    output_dir = args.output_dir
+    print(f"🌊 Generating SIO irrigation data (SF{args.scale_factor:g}: {args.customers:,} customers, "
+          f"{args.meters_per_customer} meter(s) each, {args.months} months, {args.regions} regions)...")
     
     # Create data directory
-    os.makedirs('data', exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    tables = {}
+    timings = {}
+    memory = {}
+    run_start = time.perf_counter()
+    
+    def save(name, generate):
+        start = time.perf_counter()
+        df = generate()
+        # Serialization boundary: int64/float64/string/datetime64 columns, measures at their stored decimals
+        expanded = compact_dtypes.expand(df)
+        expanded.to_csv(os.path.join(output_dir, f'{name}.csv'), index=False)
+        timings[name] = time.perf_counter() - start
+        memory[name] = {'compact': compact_dtypes.memory_bytes(df), 'expanded': compact_dtypes.memory_bytes(expanded)}
+        tables[name] = df
+        return df
     
     # Generate data
     print("  📍 Generating regions...")
-    regions_df = generate_regions()
-    regions_df.to_csv('data/regions.csv', index=False)
+    regions_df = save('regions', lambda: generate_regions(args.regions))
     print(f"     ✅ {len(regions_df)} regions")
     
     print("  💧 Generating water sources...")
-    sources_df = generate_water_sources(regions_df)
-    sources_df.to_csv('data/water_sources.csv', index=False)
+    sources_df = save('water_sources', lambda: generate_water_sources(regions_df))
     print(f"     ✅ {len(sources_df)} water sources")
     
     print("  👨‍🌾 Generating customers...")
-    customers_df = generate_customers(regions_df, 1000)
-    customers_df.to_csv('data/customers.csv', index=False)
+    customers_df = save('customers', lambda: generate_customers(regions_df, args.customers))
     print(f"     ✅ {len(customers_df)} customers")
     
     print("  📟 Generating water meters...")
-    meters_df = generate_water_meters(customers_df)
-    meters_df.to_csv('data/water_meters.csv', index=False)
+    meters_df = save('water_meters', lambda: generate_water_meters(customers_df, args.meters_per_customer))
     print(f"     ✅ {len(meters_df)} meters")
     
-    print("  📊 Generating water usage (12 months)...")
-    usage_df = generate_water_usage(meters_df, customers_df, months=12)
-    usage_df.to_csv('data/water_usage.csv', index=False)
+    print(f"  📊 Generating water usage ({args.months} months)...")
+    anomaly_labels = []
+    
+    def usage_with_anomalies():
+        usage_df = generate_water_usage(meters_df, customers_df, months=args.months)
+        usage_df, labels_df = inject_anomalies(usage_df, args.anomaly_scale, args.anomaly_rates, args.seed)
+        anomaly_labels.append(labels_df)
+        return usage_df
+    
+    usage_df = save('water_usage', usage_with_anomalies)
     print(f"     ✅ {len(usage_df)} usage readings")
     
+    labels_df = save('usage_anomaly_labels', lambda: anomaly_labels[0])
+    print(f"     ✅ {len(labels_df)} labeled anomalies injected"
+          + (f" ({', '.join(f'{k}: {v}' for k, v in labels_df['ANOMALY_TYPE'].value_counts().items())})" if len(labels_df) else ''))
+    
     print("  💳 Generating billing...")
-    billing_df = generate_billing(customers_df, usage_df)
-    billing_df.to_csv('data/billing.csv', index=False)
+    billing_df = save('billing', lambda: generate_billing(customers_df, usage_df, meters_df))
     print(f"     ✅ {len(billing_df)} bills")
     
     print("  💰 Generating payments...")
-    payments_df = generate_payments(billing_df)
-    payments_df.to_csv('data/payments.csv', index=False)
+    payments_df = save('payments', lambda: generate_payments(billing_df, customers_df, *args.payment_config, seed=args.seed))
     print(f"     ✅ {len(payments_df)} payments")
     
     print("  🌡️ Generating weather data...")
-    weather_df = generate_weather_data(regions_df, months=12)
-    weather_df.to_csv('data/weather_data.csv', index=False)
+    weather_df = save('weather_data', lambda: generate_weather_data(regions_df, months=args.months, seed=args.seed))
     print(f"     ✅ {len(weather_df)} weather records")
     
+    manifest = write_manifest(output_dir, args, tables, timings, memory, time.perf_counter() - run_start)
+    
     print("\n✅ Data generation complete!")
-    print(f"\nGenerated files in 'data/' directory:")
-    print(f"  - regions.csv ({len(regions_df)} rows)")
-    print(f"  - water_sources.csv ({len(sources_df)} rows)")
-    print(f"  - customers.csv ({len(customers_df)} rows)")
-    print(f"  - water_meters.csv ({len(meters_df)} rows)")
-    print(f"  - water_usage.csv ({len(usage_df)} rows)")
-    print(f"  - billing.csv ({len(billing_df)} rows)")
-    print(f"  - payments.csv ({len(payments_df)} rows)")
-    print(f"  - weather_data.csv ({len(weather_df)} rows)")
+    print(f"\nGenerated files in '{output_dir}/' directory:")
+    for name, info in manifest['tables'].items():
+        check = '' if info['expected_rows'] in (None, info['rows']) else f" ⚠️ expected {info['expected_rows']}"
+        print(f"  - {info['file']} ({info['rows']} rows, {info['seconds']:.2f}s){check}")
+    print(f"  - manifest.json ({manifest['dataset']}, seed {args.seed}, {manifest['generation_seconds']:.1f}s total)")
+    print(f"\n💾 In-memory footprint (compact vs. float64/string columns):")
+    for name, info in manifest['tables'].items():
+        print(f"  - {name}: {info['memory_bytes'] / 1e6:,.1f} MB (was {info['expanded_memory_bytes'] / 1e6:,.1f} MB, "
+              f"{info['expanded_memory_bytes'] / max(info['memory_bytes'], 1):.1f}x)")
+    compact_total = sum(info['memory_bytes'] for info in manifest['tables'].values())
+    expanded_total = sum(info['expanded_memory_bytes'] for info in manifest['tables'].values())
+    print(f"  - total: {compact_total / 1e6:,.1f} MB (was {expanded_total / 1e6:,.1f} MB)")
     print(f"\n📈 Summary Statistics:")
-    print(f"  - Total water usage: {usage_df['VOLUME_M3'].sum():,.0f} m³")
+    print(f"  - Total water usage: {compact_dtypes.measure_values(usage_df['VOLUME_M3']).sum():,.0f} m³")
     print(f"  - Total billing: {billing_df['TOTAL_AMOUNT_SAR'].sum():,.0f} SAR")
     print(f"  - Overdue bills: {len(billing_df[billing_df['BILL_STATUS'] == 'OVERDUE'])} ({len(billing_df[billing_df['BILL_STATUS'] == 'OVERDUE'])/len(billing_df)*100:.1f}%)")
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Micro-batch ingestion of meter telemetry into WATER_USAGE
+Each batch keeps one reading per (METER_ID, READING_DATE) - the latest EMITTED_AT wins, both within the batch
+and against the stored reading - and MERGEs it into WATER_USAGE, so re-delivered or re-loaded files never
+duplicate usage or bills. Every batch is logged in USAGE_INGEST_BATCHES with its watermark. Late readings
+trigger recomputation only where they land: corrected meter-months are queued in BILLING_CHANGES, and
+featurized days are rebuilt from the earliest late day (rolling windows make later days depend on it).
+
+Runs as the INGEST_WATER_USAGE procedure on the Snowpipe landing stream (see ingest_usage.sql) or locally,
+reading files written by telemetry_simulator.py from a landing directory:
+  python data_engineering/ingest_usage.py --local data/sio_local.duckdb --landing-dir data/landing
+  python data_engineering/ingest_usage.py --local data/sio_local.duckdb --landing-dir data/landing --watch 2
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import pandas as pd
+
+from billing_engine import CHANGES_TABLE
+from feature_store import EMPTY_WATERMARK, METER_TABLE, refresh_features, scalar, watermark
+
+LANDING_STREAM = 'SIO_DB.DATA.WATER_USAGE_LANDING_STREAM'
+QUEUE_TABLE = 'SIO_DB.DATA.USAGE_INGEST_QUEUE'
+BATCHES_TABLE = 'SIO_DB.DATA.USAGE_INGEST_BATCHES'
+FILES_TABLE = 'SIO_DB.DATA.USAGE_INGESTED_FILES'
+BATCH_TABLE = 'USAGE_BATCH'
+INGEST_SQL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ingest_usage.sql')
+
+QUEUE_COLUMNS = ['METER_ID', 'READING_DATE', 'VOLUME_M3', 'PRESSURE_BAR', 'FLOW_RATE_M3_H', 'TEMPERATURE_C',
+                 'EMITTED_AT', 'FILE_NAME']
+LANDING_PATTERNS = ('*.ndjson', '*.parquet')
+
+CAPTURE_FROM_STREAM_SQL = f"""
+    INSERT INTO {QUEUE_TABLE} ({', '.join(QUEUE_COLUMNS)})
+    SELECT {', '.join(QUEUE_COLUMNS)}
+    FROM {LANDING_STREAM}
+    WHERE METADATA$ACTION = 'INSERT'
+"""
+
+# Latest reading per meter-day in the batch, classified against what WATER_USAGE already holds
+# (bulk-loaded rows have no EMITTED_AT, so any streamed reading replaces them)
+BATCH_SQL = f"""
+    CREATE OR REPLACE TEMPORARY TABLE {BATCH_TABLE} AS
+    WITH latest AS (
+        SELECT {', '.join(QUEUE_COLUMNS)}
+        FROM {QUEUE_TABLE}
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY METER_ID, READING_DATE ORDER BY EMITTED_AT DESC, FILE_NAME DESC
+        ) = 1
+    ),
+    stored AS (
+        SELECT l.METER_ID, l.READING_DATE, COUNT(wu.METER_ID) AS READINGS, MAX(wu.EMITTED_AT) AS EMITTED_AT
+        FROM latest l
+        LEFT JOIN SIO_DB.DATA.WATER_USAGE wu ON wu.METER_ID = l.METER_ID AND wu.READING_DATE = l.READING_DATE
+        GROUP BY l.METER_ID, l.READING_DATE
+    )
+    SELECT
+        l.*,
+        CASE WHEN s.READINGS = 0 THEN 'INSERT'
+             WHEN s.EMITTED_AT IS NULL OR l.EMITTED_AT > s.EMITTED_AT THEN 'UPDATE'
+             ELSE 'STALE' END AS CHANGE_TYPE
+    FROM latest l
+    JOIN stored s ON s.METER_ID = l.METER_ID AND s.READING_DATE = l.READING_DATE
+"""
+
+BATCH_STATS_SQL = f"""
+    SELECT
+        (SELECT COUNT(*) FROM {QUEUE_TABLE}) AS ROWS_RECEIVED,
+        COUNT(*) AS LATEST,
+        COUNT_IF(CHANGE_TYPE = 'INSERT') AS INSERTED,
+        COUNT_IF(CHANGE_TYPE = 'UPDATE') AS UPDATED,
+        COUNT_IF(CHANGE_TYPE = 'STALE') AS STALE,
+        COUNT_IF(CHANGE_TYPE <> 'STALE' AND READING_DATE <= '{{high_water}}'::DATE) AS LATE_ROWS,
+        MIN(IFF(CHANGE_TYPE <> 'STALE' AND READING_DATE <= '{{high_water}}'::DATE, READING_DATE, NULL)) AS LATE_FROM,
+        MAX(READING_DATE) AS MAX_READING_DATE,
+        MAX(EMITTED_AT) AS MAX_EMITTED_AT
+    FROM {BATCH_TABLE}
+"""
+
+# New readings reach billing through WATER_USAGE_BILLING_STREAM; corrections are MERGE updates, which the
+# append-only stream does not see, so their meter-months are queued here
+QUEUE_CORRECTED_MONTHS_SQL = f"""
+    INSERT INTO {CHANGES_TABLE} (METER_ID, BILLING_MONTH)
+    SELECT DISTINCT METER_ID, DATE_TRUNC('MONTH', READING_DATE)::DATE
+    FROM {BATCH_TABLE}
+    WHERE CHANGE_TYPE = 'UPDATE'
+"""
+
+MERGE_USAGE_SQL = f"""
+    MERGE INTO SIO_DB.DATA.WATER_USAGE wu
+    USING (SELECT * FROM {BATCH_TABLE} WHERE CHANGE_TYPE <> 'STALE') b
+    ON wu.METER_ID = b.METER_ID AND wu.READING_DATE = b.READING_DATE
+    WHEN MATCHED THEN UPDATE SET
+        VOLUME_M3 = b.VOLUME_M3,
+        PRESSURE_BAR = b.PRESSURE_BAR,
+        FLOW_RATE_M3_H = b.FLOW_RATE_M3_H,
+        TEMPERATURE_C = b.TEMPERATURE_C,
+        EMITTED_AT = b.EMITTED_AT
+    WHEN NOT MATCHED THEN INSERT (
+        METER_ID, READING_DATE, VOLUME_M3, PRESSURE_BAR, FLOW_RATE_M3_H, TEMPERATURE_C, EMITTED_AT
+    ) VALUES (
+        b.METER_ID, b.READING_DATE, b.VOLUME_M3, b.PRESSURE_BAR, b.FLOW_RATE_M3_H, b.TEMPERATURE_C, b.EMITTED_AT
+    )
+"""
+
+LOG_BATCH_SQL = f"""
+    INSERT INTO {BATCHES_TABLE} (
+        INGESTED_AT, FILES, ROWS_RECEIVED, DUPLICATES_DROPPED, INSERTED, UPDATED, STALE, LATE_ROWS, LATE_FROM,
+        HIGH_WATER_DATE, MAX_EMITTED_AT, SECONDS
+    )
+    SELECT CURRENT_TIMESTAMP(), {{files}}, {{rows_received}}, {{duplicates}}, {{inserted}}, {{updated}}, {{stale}},
+           {{late_rows}}, {{late_from}}, '{{high_water}}'::DATE, {{max_emitted_at}}, {{seconds}}
+"""
+
+
+def sql_literal(value, cast):
+    """NULL or a quoted literal cast to a Snowflake type"""
+    return 'NULL' if value is None or pd.isna(value) else f"'{pd.Timestamp(value).isoformat()}'::{cast}"
+
+
+def high_water_date(session):
+    """Ingestion watermark: last batch's HIGH_WATER_DATE, else the latest stored reading"""
+    last = scalar(session.sql(f'SELECT MAX(HIGH_WATER_DATE) FROM {BATCHES_TABLE}').collect())
+    if last is None:
+        last = scalar(session.sql('SELECT MAX(READING_DATE) FROM SIO_DB.DATA.WATER_USAGE').collect())
+    return pd.Timestamp(last).date().isoformat() if last is not None else EMPTY_WATERMARK
+
+
+def ingest_queue(session, files=0, rebuild_features=True):
+    """Dedup the queued readings, MERGE them into WATER_USAGE, log the batch and recompute what late rows touched"""
+    start = time.perf_counter()
+    timings = {}
+    high_water = high_water_date(session)
+
+    session.sql(BATCH_SQL).collect()
+    stats_row = session.sql(BATCH_STATS_SQL.format(high_water=high_water)).collect()[0]
+    (rows_received, latest, inserted, updated, stale, late_rows, late_from, max_reading_date,
+     max_emitted_at) = stats_row
+    stats = {
+        'files': files,
+        'rows_received': int(rows_received or 0),
+        'duplicates': int((rows_received or 0) - (latest or 0)),
+        'inserted': int(inserted or 0),
+        'updated': int(updated or 0),
+        'stale': int(stale or 0),
+        'late_rows': int(late_rows or 0),
+        'late_from': pd.Timestamp(late_from).date().isoformat() if late_from is not None else None,
+        'high_water': max(high_water, pd.Timestamp(max_reading_date).date().isoformat())
+                      if max_reading_date is not None else high_water,
+    }
+    timings['dedup'] = time.perf_counter() - start
+
+    step = time.perf_counter()
+    if stats['inserted'] or stats['updated']:
+        session.sql(QUEUE_CORRECTED_MONTHS_SQL).collect()
+        session.sql(MERGE_USAGE_SQL).collect()
+    timings['merge'] = time.perf_counter() - step
+
+    session.sql(LOG_BATCH_SQL.format(
+        files=files, rows_received=stats['rows_received'], duplicates=stats['duplicates'],
+        inserted=stats['inserted'], updated=stats['updated'], stale=stats['stale'], late_rows=stats['late_rows'],
+        late_from=sql_literal(late_from, 'DATE'), high_water=stats['high_water'],
+        max_emitted_at=sql_literal(max_emitted_at, 'TIMESTAMP_NTZ'),
+        seconds=round(time.perf_counter() - start, 3)
+    )).collect()
+    session.sql(f'DELETE FROM {QUEUE_TABLE}').collect()
+
+    # Day aggregates: rebuild featurized days from the earliest late reading, but do not featurize new days
+    # (the nightly feature store refresh does that once the day is complete)
+    step = time.perf_counter()
+    stats['features'] = None
+    if rebuild_features and stats['late_from'] is not None:
+        featurized = watermark(session, METER_TABLE)
+        if stats['late_from'] <= featurized:
+            stats['features'] = refresh_features(session, featurized, stats['late_from'])
+    timings['features'] = time.perf_counter() - step
+
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    stats['rows_per_sec'] = round(stats['rows_received'] / max(stats['seconds'], 1e-9), 1)
+    stats['timings'] = {name: round(seconds, 3) for name, seconds in timings.items()}
+    return stats
+
+
+def run_procedure(session):
+    """Handler for SIO_DB.DATA.INGEST_WATER_USAGE (Snowpipe landing stream)"""
+    session.sql(CAPTURE_FROM_STREAM_SQL).collect()
+    return ingest_queue(session)
+
+
+def pending_files(session, landing_dir, max_files=None):
+    """Complete landing files (oldest first) that no earlier batch ingested"""
+    paths = sorted(path for pattern in LANDING_PATTERNS for path in glob.glob(os.path.join(landing_dir, pattern)))
+    done = {row[0] for row in session.sql(f'SELECT FILE_NAME FROM {FILES_TABLE}').collect()}
+    paths = [path for path in paths if os.path.basename(path) not in done]
+    return paths[:max_files] if max_files else paths
+
+
+def read_landing_file(path):
+    """Readings from one NDJSON or Parquet landing file in queue column order"""
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_json(path, lines=True, convert_dates=False, dtype=False)
+    df['READING_DATE'] = pd.to_datetime(df['READING_DATE']).dt.date
+    df['EMITTED_AT'] = pd.to_datetime(df['EMITTED_AT'])
+    df['FILE_NAME'] = os.path.basename(path)
+    return df[QUEUE_COLUMNS]
+
+
+def run_local(session, landing_dir, max_files=None, rebuild_features=True):
+    """Local run: landing files are queued directly (Snowpipe stand-in); returns None when nothing is pending"""
+    paths = pending_files(session, landing_dir, max_files)
+    if not paths:
+        return None
+    start = time.perf_counter()
+    readings = pd.concat([read_landing_file(path) for path in paths], ignore_index=True)
+    session.write_pandas(readings, QUEUE_TABLE, auto_create_table=False)
+    read_seconds = time.perf_counter() - start
+
+    stats = ingest_queue(session, len(paths), rebuild_features)
+    files = pd.DataFrame({'FILE_NAME': [os.path.basename(path) for path in paths]})
+    session.write_pandas(files, FILES_TABLE, auto_create_table=False)
+    stats['timings'] = {'read': round(read_seconds, 3), **stats['timings']}
+    stats['seconds'] = round(stats['seconds'] + read_seconds, 3)
+    stats['rows_per_sec'] = round(stats['rows_received'] / max(stats['seconds'], 1e-9), 1)
+    return stats
+
+
+def setup_local(con):
+    """Create the queue and batch log (plus billing's queue); a local file registry stands in for Snowpipe's load history"""
+    import billing_engine
+    import local_backend
+
+    billing_engine.setup_local(con)
+    local_backend.run_script(con, INGEST_SQL_FILE)
+    con.execute(f'CREATE TABLE IF NOT EXISTS {FILES_TABLE} (FILE_NAME VARCHAR)')
+
+
+def print_batch(stats):
+    """One summary line per batch"""
+    late = f", {stats['late_rows']:,} late from {stats['late_from']}" if stats['late_rows'] else ''
+    rebuilt = (f", features rebuilt after {stats['features']['meter_day']['since']}"
+               if stats['features'] else '')
+    print(f"📥 {stats['files']} files, {stats['rows_received']:,} readings: {stats['inserted']:,} new, "
+          f"{stats['updated']:,} updated, {stats['duplicates']:,} duplicates, {stats['stale']:,} stale{late}{rebuilt} "
+          f"({stats['seconds']:.2f}s, {stats['rows_per_sec']:,.0f} readings/s)")
+
+
+def main():
+    """Ingest pending landing files into the local DuckDB stand-in, once or continuously"""
+    parser = argparse.ArgumentParser(description='Micro-batch WATER_USAGE ingestion (local DuckDB stand-in)')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default='data/sio_local.duckdb')
+    parser.add_argument('--landing-dir', default='data/landing')
+    parser.add_argument('--max-files', type=int, default=50, help='Files per batch')
+    parser.add_argument('--watch', type=float, metavar='SECONDS', help='Keep polling the landing directory')
+    parser.add_argument('--no-features', action='store_true', help='Skip rebuilding featurized days for late readings')
+    args = parser.parse_args()
+
+    import local_backend
+
+    con = local_backend.connect(args.local)
+    setup_local(con)
+    rebuild_features = not args.no_features and local_backend.table_exists(con, 'METER_DAY_FEATURES', 'ML_ANALYTICS')
+    session = local_backend.LocalSession(con)
+
+    batches = 0
+    try:
+        while True:
+            stats = run_local(session, args.landing_dir, args.max_files, rebuild_features)
+            if stats is not None:
+                batches += 1
+                print_batch(stats)
+            elif not args.watch:
+                break
+            if args.watch and stats is None:
+                time.sleep(args.watch)
+    except KeyboardInterrupt:
+        pass
+    if not batches:
+        print(f"⚠️  No new files in {args.landing_dir}")
+
+
+if __name__ == "__main__":
+    main()
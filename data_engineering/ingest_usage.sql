@@ -0,0 +1,167 @@
+-- ============================================================================
+-- SIO - Micro-batch Usage Ingestion
+-- ============================================================================
+-- Meter telemetry files land on LANDING_STAGE, Snowpipe copies them into
+-- WATER_USAGE_LANDING, and INGEST_WATER_USAGE MERGEs them into WATER_USAGE:
+-- one reading per (METER_ID, READING_DATE), latest EMITTED_AT wins.
+-- Run after: data_engineering/billing_engine.sql, cortex/create_feature_store.sql
+-- Execute with: snow sql -f data_engineering/ingest_usage.sql -c myconnection
+-- Ingestion logic: data_engineering/ingest_usage.py (same code runs locally)
+-- ============================================================================
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SIO_DB;
+USE WAREHOUSE SIO_MED_WH;
+USE SCHEMA DATA;
+
+-- ============================================================================
+-- 1. LANDING
+-- ============================================================================
+
+-- Streamed readings carry the meter's send time for last-write-wins
+ALTER TABLE WATER_USAGE ADD COLUMN IF NOT EXISTS EMITTED_AT TIMESTAMP_NTZ;
+
+CREATE STAGE IF NOT EXISTS LANDING_STAGE
+    COMMENT = 'Meter telemetry micro-batch files (NDJSON or Parquet)';
+
+CREATE TABLE IF NOT EXISTS WATER_USAGE_LANDING (
+    METER_ID NUMBER,
+    READING_DATE DATE,
+    VOLUME_M3 NUMBER(12,3),
+    PRESSURE_BAR NUMBER(5,2),
+    FLOW_RATE_M3_H NUMBER(8,3),
+    TEMPERATURE_C NUMBER(5,2),
+    EMITTED_AT TIMESTAMP_NTZ,
+    FILE_NAME VARCHAR,
+    LOADED_AT TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+);
+
+CREATE PIPE IF NOT EXISTS WATER_USAGE_NDJSON_PIPE AS
+COPY INTO WATER_USAGE_LANDING (METER_ID, READING_DATE, VOLUME_M3, PRESSURE_BAR, FLOW_RATE_M3_H, TEMPERATURE_C, EMITTED_AT, FILE_NAME)
+FROM (
+    SELECT $1:METER_ID, $1:READING_DATE, $1:VOLUME_M3, $1:PRESSURE_BAR, $1:FLOW_RATE_M3_H, $1:TEMPERATURE_C,
+           $1:EMITTED_AT, METADATA$FILENAME
+    FROM @LANDING_STAGE
+)
+PATTERN = '.*[.]ndjson'
+FILE_FORMAT = (TYPE = JSON);
+
+CREATE PIPE IF NOT EXISTS WATER_USAGE_PARQUET_PIPE AS
+COPY INTO WATER_USAGE_LANDING (METER_ID, READING_DATE, VOLUME_M3, PRESSURE_BAR, FLOW_RATE_M3_H, TEMPERATURE_C, EMITTED_AT, FILE_NAME)
+FROM (
+    SELECT $1:METER_ID, $1:READING_DATE, $1:VOLUME_M3, $1:PRESSURE_BAR, $1:FLOW_RATE_M3_H, $1:TEMPERATURE_C,
+           $1:EMITTED_AT, METADATA$FILENAME
+    FROM @LANDING_STAGE
+)
+PATTERN = '.*[.]parquet'
+FILE_FORMAT = (TYPE = PARQUET);
+
+-- ============================================================================
+-- 2. QUEUE & BATCH LOG
+-- ============================================================================
+
+CREATE STREAM IF NOT EXISTS WATER_USAGE_LANDING_STREAM
+    ON TABLE WATER_USAGE_LANDING
+    APPEND_ONLY = TRUE
+    COMMENT = 'Landed readings awaiting ingestion';
+
+-- Readings captured for the next batch; cleared only after the MERGE succeeds
+CREATE TABLE IF NOT EXISTS USAGE_INGEST_QUEUE (
+    METER_ID NUMBER,
+    READING_DATE DATE,
+    VOLUME_M3 NUMBER(12,3),
+    PRESSURE_BAR NUMBER(5,2),
+    FLOW_RATE_M3_H NUMBER(8,3),
+    TEMPERATURE_C NUMBER(5,2),
+    EMITTED_AT TIMESTAMP_NTZ,
+    FILE_NAME VARCHAR
+);
+
+-- One row per batch; HIGH_WATER_DATE is the ingestion watermark (readings at or below it are late)
+CREATE TABLE IF NOT EXISTS USAGE_INGEST_BATCHES (
+    BATCH_ID NUMBER AUTOINCREMENT,
+    INGESTED_AT TIMESTAMP_NTZ,
+    FILES NUMBER,
+    ROWS_RECEIVED NUMBER,
+    DUPLICATES_DROPPED NUMBER,               -- Same meter-day more than once in the batch
+    INSERTED NUMBER,
+    UPDATED NUMBER,                          -- Newer EMITTED_AT than the stored reading
+    STALE NUMBER,                            -- Older than the stored reading, ignored
+    LATE_ROWS NUMBER,
+    LATE_FROM DATE,                          -- Earliest late day changed; features rebuilt from here
+    HIGH_WATER_DATE DATE,
+    MAX_EMITTED_AT TIMESTAMP_NTZ,
+    SECONDS FLOAT
+);
+
+-- ============================================================================
+-- 3. INGEST PROCEDURE
+-- ============================================================================
+
+CREATE STAGE IF NOT EXISTS CODE_STAGE
+    COMMENT = 'Python modules imported by SIO procedures';
+
+!snow sql -q "PUT file://data_engineering/billing_engine.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+!snow sql -q "PUT file://data_engineering/feature_store.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+!snow sql -q "PUT file://data_engineering/ingest_usage.py @SIO_DB.DATA.CODE_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
+
+CREATE OR REPLACE PROCEDURE INGEST_WATER_USAGE()
+RETURNS VARIANT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas', 'snowflake-snowpark-python')
+IMPORTS = ('@SIO_DB.DATA.CODE_STAGE/billing_engine.py', '@SIO_DB.DATA.CODE_STAGE/feature_store.py',
+           '@SIO_DB.DATA.CODE_STAGE/ingest_usage.py')
+HANDLER = 'ingest_usage.run_procedure'
+COMMENT = 'Dedup landed readings, MERGE into WATER_USAGE, queue corrected months for billing, rebuild late feature days'
+EXECUTE AS OWNER;
+
+-- ============================================================================
+-- 4. SCHEDULE
+-- ============================================================================
+
+CREATE OR REPLACE TASK USAGE_INGEST_TASK
+    WAREHOUSE = SIO_MED_WH
+    SCHEDULE = '1 MINUTE'
+    COMMENT = 'Ingest landed meter readings every minute'
+WHEN
+    SYSTEM$STREAM_HAS_DATA('SIO_DB.DATA.WATER_USAGE_LANDING_STREAM')
+AS
+    CALL SIO_DB.DATA.INGEST_WATER_USAGE();
+
+ALTER TASK USAGE_INGEST_TASK RESUME;
+
+-- ============================================================================
+-- 5. ONE-TIME CLEANUP & TEST
+-- ============================================================================
+
+-- Earlier re-runs of a load may have duplicated readings: keep the latest row per meter-day.
+-- The billing stream only captures inserts, so queue the affected meter-months for re-billing first
+BEGIN TRANSACTION;
+
+INSERT INTO BILLING_CHANGES (METER_ID, BILLING_MONTH)
+SELECT DISTINCT METER_ID, DATE_TRUNC('MONTH', READING_DATE)::DATE
+FROM WATER_USAGE
+QUALIFY ROW_NUMBER() OVER (
+    PARTITION BY METER_ID, READING_DATE ORDER BY EMITTED_AT DESC NULLS LAST, READING_ID DESC
+) > 1;
+
+DELETE FROM WATER_USAGE
+WHERE READING_ID IN (
+    SELECT READING_ID
+    FROM WATER_USAGE
+    QUALIFY ROW_NUMBER() OVER (
+        PARTITION BY METER_ID, READING_DATE ORDER BY EMITTED_AT DESC NULLS LAST, READING_ID DESC
+    ) > 1
+);
+
+COMMIT;
+
+CALL SIO_DB.DATA.INGEST_WATER_USAGE();
+
+SELECT BATCH_ID, INGESTED_AT, ROWS_RECEIVED, DUPLICATES_DROPPED, INSERTED, UPDATED, STALE, LATE_ROWS, HIGH_WATER_DATE
+FROM USAGE_INGEST_BATCHES
+ORDER BY BATCH_ID DESC
+LIMIT 10;
+
+SELECT '✅ Usage ingestion pipeline created and tested!' AS STATUS;
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Inject labeled anomalies into synthetic water usage readings
+Ground truth for scoring ANALYZE_WATER_USAGE_ANOMALIES (see tests/score_anomaly_detector.py)
+"""
+
+import numpy as np
+import pandas as pd
+
+import compact_dtypes
+
+# Expected event starts per meter-day, and (min, max) duration in days
+ANOMALY_TYPES = {
+    'LEAK': {'rate': 0.0010, 'duration': (5, 30),
+             'description': 'Sustained night flow from a pipe leak'},
+    'METER_FAULT_ZERO': {'rate': 0.0005, 'duration': (2, 14),
+                         'description': 'Meter reports zero volume and flow'},
+    'METER_FAULT_STUCK': {'rate': 0.0005, 'duration': (3, 14),
+                          'description': 'Meter repeats the same reading'},
+    'PRESSURE_DROP': {'rate': 0.0010, 'duration': (1, 5),
+                      'description': 'Supply pressure collapses and delivered volume falls'},
+    'THEFT_SPIKE': {'rate': 0.0005, 'duration': (1, 3),
+                    'description': 'Unauthorised draw multiplies daily volume'},
+}
+
+LABEL_COLUMNS = ['EVENT_ID', 'METER_ID', 'ANOMALY_TYPE', 'START_DATE', 'END_DATE',
+                 'DURATION_DAYS', 'MAGNITUDE', 'DESCRIPTION']
+
+
+def parse_rates(spec):
+    """Parse 'LEAK=0.002,THEFT_SPIKE=0' into a rate override dict"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        name, _, value = item.partition('=')
+        name = name.strip().upper()
+        if name not in ANOMALY_TYPES:
+            raise ValueError(f"Unknown anomaly type '{name}' (expected one of {', '.join(ANOMALY_TYPES)})")
+        rates[name] = float(value)
+    return rates
+
+
+def meter_series(usage_df):
+    """Start row and length of each meter's contiguous block (usage sorted by meter, date)"""
+    meter_ids = usage_df['METER_ID'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, meter_ids[1:] != meter_ids[:-1]])
+    lengths = np.diff(np.r_[starts, len(meter_ids)])
+    return starts, lengths
+
+
+def inject_anomalies(usage_df, scale=1.0, rates=None, seed=42):
+    """Return (usage_df with anomalies applied, labels DataFrame); one label row per injected event"""
+    rng = np.random.default_rng([seed, len(usage_df)])
+    rates = {name: spec['rate'] * scale for name, spec in ANOMALY_TYPES.items()} | (rates or {})
+
+    usage_df = usage_df.sort_values(['METER_ID', 'READING_DATE'], kind='stable').reset_index(drop=True)
+    starts, lengths = meter_series(usage_df)
+    if len(starts) == 0:
+        return usage_df, pd.DataFrame(columns=LABEL_COLUMNS)
+
+    # Draw candidate events for every type in one batch
+    event_types, event_series, event_offsets, event_durations = [], [], [], []
+    for type_index, (name, spec) in enumerate(ANOMALY_TYPES.items()):
+        count = rng.poisson(rates.get(name, 0.0) * len(usage_df))
+        if count == 0:
+            continue
+        series = rng.choice(len(starts), size=count, p=lengths / lengths.sum())
+        offsets = (rng.random(count) * lengths[series]).astype(np.int64)
+        durations = rng.integers(spec['duration'][0], spec['duration'][1] + 1, size=count)
+        event_types.append(np.full(count, type_index))
+        event_series.append(series)
+        event_offsets.append(offsets)
+        # Events are truncated at the end of the meter's history
+        event_durations.append(np.minimum(durations, lengths[series] - offsets))
+
+    if not event_types:
+        return usage_df, pd.DataFrame(columns=LABEL_COLUMNS)
+
+    event_types = np.concatenate(event_types)
+    first_rows = starts[np.concatenate(event_series)] + np.concatenate(event_offsets)
+    durations = np.concatenate(event_durations)
+
+    # Expand events to row indices and drop any event that overlaps another
+    event_index = np.repeat(np.arange(len(first_rows)), durations)
+    rows = np.repeat(first_rows, durations) + (np.arange(durations.sum()) - np.repeat(np.cumsum(durations) - durations, durations))
+    coverage = np.bincount(rows, minlength=len(usage_df))
+    clean = np.bincount(event_index, weights=coverage[rows] > 1, minlength=len(first_rows)) == 0
+    keep_rows = clean[event_index]
+    rows, event_index = rows[keep_rows], event_index[keep_rows]
+
+    # Work in float64 on the stored decimals, write back in the incoming dtype (float32 from the generator)
+    volume = compact_dtypes.measure_values(usage_df['VOLUME_M3'], 3)
+    flow = compact_dtypes.measure_values(usage_df['FLOW_RATE_M3_H'], 3)
+    pressure = compact_dtypes.measure_values(usage_df['PRESSURE_BAR'], 2)
+
+    # Typical daily volume for each meter, used to size leaks
+    meter_mean = np.add.reduceat(volume, starts) / lengths
+    row_meter_mean = np.repeat(meter_mean, lengths)
+
+    type_names = list(ANOMALY_TYPES)
+    row_types = event_types[event_index]
+
+    def rows_of(name):
+        mask = row_types == type_names.index(name)
+        return rows[mask], event_index[mask]
+
+    # Magnitude per event: leak as a share of mean volume, pressure in bar, theft as a multiplier
+    magnitude = np.zeros(len(first_rows))
+    for name, low, high in (('LEAK', 0.15, 0.5), ('PRESSURE_DROP', 0.5, 1.5), ('THEFT_SPIKE', 2.0, 4.0)):
+        mask = event_types == type_names.index(name)
+        magnitude[mask] = rng.uniform(low, high, mask.sum())
+
+    # LEAK: constant extra flow around the clock, mostly visible at night
+    leak_rows, leak_events = rows_of('LEAK')
+    leak_extra = magnitude[leak_events] * row_meter_mean[leak_rows]
+    volume[leak_rows] += leak_extra
+    flow[leak_rows] += leak_extra / 24
+
+    # METER_FAULT_ZERO: no volume or flow registered
+    zero_rows, _ = rows_of('METER_FAULT_ZERO')
+    volume[zero_rows] = 0.0
+    flow[zero_rows] = 0.0
+
+    # METER_FAULT_STUCK: every reading repeats the first day of the event
+    stuck_rows, stuck_events = rows_of('METER_FAULT_STUCK')
+    volume[stuck_rows] = volume[first_rows[stuck_events]]
+    flow[stuck_rows] = flow[first_rows[stuck_events]]
+
+    # PRESSURE_DROP: pressure collapses, delivered volume falls
+    drop_rows, drop_events = rows_of('PRESSURE_DROP')
+    pressure[drop_rows] = magnitude[drop_events]
+    volume[drop_rows] *= 0.6 + 0.1 * magnitude[drop_events]
+    flow[drop_rows] *= 0.6 + 0.1 * magnitude[drop_events]
+
+    # THEFT_SPIKE: a bypass multiplies the day's volume
+    theft_rows, theft_events = rows_of('THEFT_SPIKE')
+    volume[theft_rows] *= magnitude[theft_events]
+    flow[theft_rows] *= magnitude[theft_events]
+
+    usage_df['VOLUME_M3'] = volume.round(3).astype(usage_df['VOLUME_M3'].dtype)
+    usage_df['FLOW_RATE_M3_H'] = flow.round(3).astype(usage_df['FLOW_RATE_M3_H'].dtype)
+    usage_df['PRESSURE_BAR'] = pressure.round(2).astype(usage_df['PRESSURE_BAR'].dtype)
+
+    kept = np.flatnonzero(clean)
+    reading_dates = compact_dtypes.date_values(usage_df['READING_DATE'])
+    names = np.array(type_names)[event_types[kept]]
+    labels = pd.DataFrame({
+        'EVENT_ID': np.arange(1, len(kept) + 1),
+        'METER_ID': usage_df['METER_ID'].to_numpy()[first_rows[kept]],
+        'ANOMALY_TYPE': names,
+        'START_DATE': reading_dates[first_rows[kept]],
+        'END_DATE': reading_dates[first_rows[kept] + durations[kept] - 1],
+        'DURATION_DAYS': durations[kept],
+        'MAGNITUDE': magnitude[kept].round(3),
+        'DESCRIPTION': [ANOMALY_TYPES[name]['description'] for name in names]
+    }).sort_values(['METER_ID', 'START_DATE'], kind='stable').reset_index(drop=True)
+    labels['EVENT_ID'] = np.arange(1, len(labels) + 1)
+
+    return usage_df, labels
+
+
+def label_rows(usage_df, labels_df):
+    """Per-reading ground truth: ANOMALY_TYPE for labeled rows, None elsewhere"""
+    durations = labels_df['DURATION_DAYS'].to_numpy(dtype=np.int64)
+    day_offsets = np.arange(durations.sum()) - np.repeat(np.cumsum(durations) - durations, durations)
+    labeled_days = pd.DataFrame({
+        'METER_ID': np.repeat(labels_df['METER_ID'].to_numpy(), durations),
+        'READING_DATE': np.repeat(compact_dtypes.date_values(labels_df['START_DATE']), durations)
+                        + day_offsets.astype('timedelta64[D]'),
+        'ANOMALY_TYPE': np.repeat(labels_df['ANOMALY_TYPE'].to_numpy(), durations)
+    })
+
+    keys = pd.DataFrame({'METER_ID': usage_df['METER_ID'].to_numpy(),
+                         'READING_DATE': compact_dtypes.date_values(usage_df['READING_DATE'])})
+    truth = keys.merge(labeled_days, on=['METER_ID', 'READING_DATE'], how='left')['ANOMALY_TYPE']
+    truth.index = usage_df.index
+    return truth
@@ -21,27 +21,22 @@ CREATE STAGE IF NOT EXISTS DATA_STAGE
 -- 2. UPLOAD CSV FILES
 -- ============================================================================
 
--- Upload all CSV files to stage
--- Note: Run these PUT commands from your local machine
+-- Recommended: parallel, idempotent loader (chunked gzip PUTs over one connection,
+-- concurrent COPY INTO in FK order, load manifest, MB/s report). It replaces sections 2-3:
+--   python data_engineering/bulk_load.py --connection myconnection
+--   python data_engineering/bulk_load.py --local data/sio_local.duckdb   (offline stand-in)
+
+-- Manual alternative: run these PUT commands from your local machine, then section 3
 -- PUT file://data/regions.csv @DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
 -- PUT file://data/water_sources.csv @DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
 -- PUT file://data/customers.csv @DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
 -- PUT file://data/water_meters.csv @DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
 -- PUT file://data/water_usage.csv @DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
+-- PUT file://data/usage_anomaly_labels.csv @DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
 -- PUT file://data/billing.csv @DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
 -- PUT file://data/payments.csv @DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
 -- PUT file://data/weather_data.csv @DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
 
--- Or use snow CLI to upload:
-!snow sql -q "PUT file://data/regions.csv @SIO_DB.DATA.DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
-!snow sql -q "PUT file://data/water_sources.csv @SIO_DB.DATA.DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
-!snow sql -q "PUT file://data/customers.csv @SIO_DB.DATA.DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
-!snow sql -q "PUT file://data/water_meters.csv @SIO_DB.DATA.DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
-!snow sql -q "PUT file://data/water_usage.csv @SIO_DB.DATA.DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
-!snow sql -q "PUT file://data/billing.csv @SIO_DB.DATA.DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
-!snow sql -q "PUT file://data/payments.csv @SIO_DB.DATA.DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
-!snow sql -q "PUT file://data/weather_data.csv @SIO_DB.DATA.DATA_STAGE AUTO_COMPRESS=FALSE OVERWRITE=TRUE;" -c myconnection
-
 -- ============================================================================
 -- 3. LOAD DATA FROM STAGE
 -- ============================================================================
@@ -141,6 +136,26 @@ ON_ERROR = CONTINUE;
 
 SELECT 'Loaded water usage records:', COUNT(*) FROM WATER_USAGE;
 
+-- Load Usage Anomaly Labels (ground truth for the anomaly detector)
+COPY INTO USAGE_ANOMALY_LABELS (EVENT_ID, METER_ID, ANOMALY_TYPE, START_DATE, END_DATE,
+                                DURATION_DAYS, MAGNITUDE, DESCRIPTION)
+FROM (
+    SELECT 
+        $1,  -- EVENT_ID
+        $2,  -- METER_ID
+        $3,  -- ANOMALY_TYPE
+        $4,  -- START_DATE
+        $5,  -- END_DATE
+        $6,  -- DURATION_DAYS
+        $7,  -- MAGNITUDE
+        $8   -- DESCRIPTION
+    FROM @DATA_STAGE/usage_anomaly_labels.csv
+)
+FILE_FORMAT = (TYPE = CSV SKIP_HEADER = 1 FIELD_OPTIONALLY_ENCLOSED_BY='"')
+ON_ERROR = CONTINUE;
+
+SELECT 'Loaded anomaly labels:', COUNT(*) FROM USAGE_ANOMALY_LABELS;
+
 -- Load Billing
 COPY INTO BILLING (CUSTOMER_ID, BILLING_MONTH, USAGE_VOLUME_M3, BASE_RATE_SAR, USAGE_CHARGE_SAR,
                    SERVICE_FEE_SAR, TOTAL_AMOUNT_SAR, DUE_DATE, BILL_STATUS, GENERATED_DATE)
@@ -218,6 +233,8 @@ SELECT 'Water Meters:', COUNT(*) FROM WATER_METERS
 UNION ALL
 SELECT 'Water Usage:', COUNT(*) FROM WATER_USAGE
 UNION ALL
+SELECT 'Anomaly Labels:', COUNT(*) FROM USAGE_ANOMALY_LABELS
+UNION ALL
 SELECT 'Billing:', COUNT(*) FROM BILLING
 UNION ALL
 SELECT 'Payments:', COUNT(*) FROM PAYMENTS
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Offline BM25 index over the SIO policy PDFs
+Local stand-in for SIO_KNOWLEDGE_SERVICE (Cortex Search) when no account is available
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from chunk_documents import chunk_documents
+
+INDEX_DIR = 'data/knowledge_index'
+
+# Standard BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from',
+    'how', 'i', 'if', 'in', 'is', 'it', 'my', 'of', 'on', 'or', 'our', 's', 'the', 'this',
+    'to', 'we', 'what', 'when', 'which', 'with', 'you', 'your'
+}
+
+
+def tokenize(text):
+    """Lowercase, drop stopwords and fold simple plurals"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(str(text).lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith('ies'):
+            token = token[:-3] + 'y'
+        elif len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def build_index(chunks_df, index_dir=INDEX_DIR):
+    """Build an inverted BM25 index from chunk rows and persist it to index_dir"""
+    os.makedirs(index_dir, exist_ok=True)
+
+    vocab = {}
+    postings = []  # per term: {doc_id: term_frequency}
+    doc_lengths = np.zeros(len(chunks_df), dtype=np.float32)
+
+    for doc_id, text in enumerate(chunks_df['CHUNK']):
+        tokens = tokenize(text)
+        doc_lengths[doc_id] = len(tokens)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            term_id = vocab.setdefault(token, len(vocab))
+            if term_id == len(postings):
+                postings.append({})
+            postings[term_id][doc_id] = tf
+
+    # Flatten postings into CSR-style arrays so they can be memory-mapped
+    offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in postings])
+    posting_docs = np.empty(offsets[-1], dtype=np.int32)
+    posting_tfs = np.empty(offsets[-1], dtype=np.float32)
+    for term_id, plist in enumerate(postings):
+        start, end = offsets[term_id], offsets[term_id + 1]
+        posting_docs[start:end] = list(plist.keys())
+        posting_tfs[start:end] = list(plist.values())
+
+    np.save(os.path.join(index_dir, 'offsets.npy'), offsets)
+    np.save(os.path.join(index_dir, 'posting_docs.npy'), posting_docs)
+    np.save(os.path.join(index_dir, 'posting_tfs.npy'), posting_tfs)
+    np.save(os.path.join(index_dir, 'doc_lengths.npy'), doc_lengths)
+    chunks_df.drop(columns=['CHUNK']).to_csv(os.path.join(index_dir, 'chunks.csv'), index=False)
+    chunks_df[['CHUNK']].to_json(os.path.join(index_dir, 'chunk_text.json'), orient='values')
+
+    with open(os.path.join(index_dir, 'vocab.json'), 'w') as f:
+        json.dump(vocab, f)
+
+    with open(os.path.join(index_dir, 'meta.json'), 'w') as f:
+        json.dump({
+            'num_chunks': int(len(chunks_df)),
+            'num_terms': int(len(vocab)),
+            'num_postings': int(offsets[-1]),
+            'avg_chunk_length': float(doc_lengths.mean()) if len(doc_lengths) else 0.0,
+            'k1': BM25_K1,
+            'b': BM25_B,
+            'built_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }, f, indent=2)
+
+    return KnowledgeIndex(index_dir)
+
+
+class KnowledgeIndex:
+    """Read-only BM25 index with memory-mapped postings"""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+
+        with open(os.path.join(index_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(index_dir, 'vocab.json')) as f:
+            self.vocab = json.load(f)
+
+        self.offsets = np.load(os.path.join(index_dir, 'offsets.npy'), mmap_mode='r')
+        self.posting_docs = np.load(os.path.join(index_dir, 'posting_docs.npy'), mmap_mode='r')
+        self.posting_tfs = np.load(os.path.join(index_dir, 'posting_tfs.npy'), mmap_mode='r')
+        self.doc_lengths = np.load(os.path.join(index_dir, 'doc_lengths.npy'), mmap_mode='r')
+
+        self.chunks = pd.read_csv(os.path.join(index_dir, 'chunks.csv'))
+        with open(os.path.join(index_dir, 'chunk_text.json')) as f:
+            self.chunks['CHUNK'] = [row[0] for row in json.load(f)]
+
+        self.num_chunks = self.meta['num_chunks']
+        avg_length = self.meta['avg_chunk_length'] or 1.0
+        # Per-document BM25 length normalisation, computed once per load
+        self.length_norm = BM25_K1 * (1 - BM25_B + BM25_B * np.asarray(self.doc_lengths) / avg_length)
+
+    def search(self, query, limit=5):
+        """Return the top-k chunks for a query as a list of dicts (highest score first)"""
+        scores = np.zeros(self.num_chunks, dtype=np.float32)
+
+        for token in set(tokenize(query)):
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.posting_docs[start:end]
+            tfs = self.posting_tfs[start:end]
+            df = end - start
+            idf = np.log(1 + (self.num_chunks - df + 0.5) / (df + 0.5))
+            # Each document appears once per posting list, so fancy-index add is safe
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + self.length_norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) == 0:
+            return []
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        matched = matched[np.argsort(-scores[matched], kind='stable')]
+
+        results = []
+        for doc_id in matched:
+            row = self.chunks.iloc[doc_id]
+            results.append({
+                'CHUNK_ID': row['CHUNK_ID'],
+                'DOCUMENT_ID': row['DOCUMENT_ID'],
+                'TITLE': row['TITLE'],
+                'SECTION': row['SECTION'],
+                'CHUNK': row['CHUNK'],
+                'SCORE': round(float(scores[doc_id]), 4)
+            })
+        return results
+
+
+def load_or_build(documents_dir='documents', index_dir=INDEX_DIR, rebuild=False):
+    """Open the persisted index, building it from documents_dir if missing"""
+    if rebuild or not os.path.exists(os.path.join(index_dir, 'meta.json')):
+        chunks_df, _ = chunk_documents(documents_dir)
+        return build_index(chunks_df, index_dir)
+    return KnowledgeIndex(index_dir)
+
+
+def main():
+    """Build the local knowledge index and optionally run a query against it"""
+    parser = argparse.ArgumentParser(description='Offline BM25 search over SIO policy documents')
+    parser.add_argument('query', nargs='?', help='Question to search for')
+    parser.add_argument('--documents-dir', default='documents')
+    parser.add_argument('--index-dir', default=INDEX_DIR)
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the index from the PDFs')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = load_or_build(args.documents_dir, args.index_dir, args.rebuild)
+    print(f"📚 Knowledge index ready in {time.perf_counter() - start:.3f}s "
+          f"({index.meta['num_chunks']} chunks, {index.meta['num_terms']} terms) → {args.index_dir}/")
+
+    if args.query:
+        start = time.perf_counter()
+        results = index.search(args.query, args.limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"\n🔍 {args.query}  ({elapsed_ms:.2f} ms)")
+        for rank, hit in enumerate(results, 1):
+            print(f"\n  {rank}. [{hit['SCORE']:.2f}] {hit['TITLE']} → {hit['SECTION']}")
+            print(f"     {hit['CHUNK'].split(chr(10) * 2, 1)[-1][:200]}")
+
+
+if __name__ == "__main__":
+    main()
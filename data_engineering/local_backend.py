@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Local DuckDB stand-in for SIO_DB so loaders, procedures and benchmarks run without an account
+Snowflake SQL from this repo is transpiled with sqlglot; Snowflake-only objects are skipped
+
+Requires: pip install duckdb sqlglot
+"""
+
+import logging
+import os
+import re
+
+DATABASE = 'SIO_DB'
+SCHEMAS = ('DATA', 'ML_ANALYTICS')
+SETUP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'setup_database.sql')
+
+# Statements with no local equivalent (warehouses, stages, grants, Python objects, tasks, streams, pipes, CLI escapes)
+SKIP_PATTERN = re.compile(
+    r'^(USE\s+(ROLE|WAREHOUSE)|CREATE\s+(OR\s+REPLACE\s+)?(WAREHOUSE|STAGE|DATABASE|FUNCTION|PROCEDURE|TASK|STREAM|PIPE|'
+    r'CORTEX|AGENT|STREAMLIT|GIT|API)|ALTER\s+(TASK|WAREHOUSE|STAGE|AGENT|PIPE)|GRANT|PUT|LIST|REMOVE|CALL|COPY|!)',
+    re.IGNORECASE
+)
+SNOWFLAKE_ONLY_PATTERN = re.compile(r'INFORMATION_SCHEMA\.WAREHOUSES|SNOWFLAKE\.CORTEX|SYSTEM\$', re.IGNORECASE)
+STATEMENT_PATTERN = re.compile(r"""\$\$.*?\$\$|'(?:[^']|'')*'|"(?:[^"]|"")*"|--[^\n]*|;""", re.DOTALL)
+AUTOINCREMENT_PATTERN = re.compile(r'(\w+)\s+NUMBER\s+AUTOINCREMENT', re.IGNORECASE)
+# Bare NUMBER is NUMBER(38,0); DuckDB's 128-bit DECIMAL(38,0) is ~10x slower to load than BIGINT
+INTEGER_PATTERN = re.compile(r'\bNUMBER\b(?!\s*\()', re.IGNORECASE)
+# Dynamic tables become plain tables locally, materialized once when the script runs
+DYNAMIC_TABLE_PATTERN = re.compile(r'CREATE\s+(OR\s+REPLACE\s+)?DYNAMIC\s+TABLE\s+([\w.]+)', re.IGNORECASE)
+TABLE_OPTION_PATTERN = re.compile(r"\s*\w+\s*=\s*('(?:[^']|'')*'|[\w$]+)")
+# Snowflake does not enforce key constraints; DuckDB would, so they are dropped locally
+CONSTRAINT_PATTERN = re.compile(
+    r',\s*FOREIGN KEY\s*\([^)]*\)\s*REFERENCES\s+\w+\s*\([^)]*\)|\s+PRIMARY KEY|\s+UNIQUE', re.IGNORECASE
+)
+
+logging.getLogger('sqlglot').setLevel(logging.ERROR)
+
+
+def split_statements(script):
+    """Split a SQL script on semicolons, keeping $$ bodies and string literals intact and dropping comments"""
+    statements, current, position = [], [], 0
+    for match in STATEMENT_PATTERN.finditer(script):
+        current.append(script[position:match.start()])
+        token = match.group(0)
+        if token == ';':
+            statements.append(''.join(current).strip())
+            current = []
+        elif not token.startswith('--'):
+            current.append(token)
+        position = match.end()
+    current.append(script[position:])
+    statements.append(''.join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+def translate(sql):
+    """Transpile one Snowflake statement to DuckDB"""
+    import sqlglot
+    return sqlglot.transpile(sql, read='snowflake', write='duckdb')[0]
+
+
+def connect(path=':memory:', read_only=False):
+    """Open a DuckDB database laid out as SIO_DB.DATA / SIO_DB.ML_ANALYTICS"""
+    import duckdb
+
+    con = duckdb.connect()
+    con.execute('SET enable_progress_bar = false')
+    con.execute(f"ATTACH '{path}' AS {DATABASE}" + (' (READ_ONLY)' if read_only else ''))
+    if not read_only:
+        for schema in SCHEMAS:
+            con.execute(f'CREATE SCHEMA IF NOT EXISTS {DATABASE}.{schema}')
+    con.execute(f'USE {DATABASE}.DATA')
+    return con
+
+
+def run_statement(con, statement, schema='DATA'):
+    """Execute one Snowflake statement locally; returns the new current schema, or None if skipped"""
+    use = re.match(r'USE\s+(DATABASE|SCHEMA)\s+([\w.]+)', statement, re.IGNORECASE)
+    if use:
+        if use.group(1).upper() == 'SCHEMA':
+            schema = use.group(2).split('.')[-1].upper()
+            con.execute(f'USE {DATABASE}.{schema}')
+        return schema
+    if SKIP_PATTERN.match(statement) or SNOWFLAKE_ONLY_PATTERN.search(statement):
+        return None
+
+    dynamic = DYNAMIC_TABLE_PATTERN.match(statement)
+    if dynamic:
+        position = dynamic.end()
+        while option := TABLE_OPTION_PATTERN.match(statement, position):
+            position = option.end()
+        query = re.match(r'\s*AS\s', statement[position:], re.IGNORECASE)
+        statement = f'CREATE OR REPLACE TABLE {dynamic.group(2)} AS {statement[position + query.end():]}'
+
+    table = re.match(r'CREATE\s+(OR\s+REPLACE\s+)?TABLE\s+(IF\s+NOT\s+EXISTS\s+)?([\w.]+)', statement, re.IGNORECASE)
+    if table:
+        name = table.group(3).split('.')[-1].upper()
+        statement = CONSTRAINT_PATTERN.sub('', statement)
+        columns = AUTOINCREMENT_PATTERN.findall(statement)
+        if columns and table.group(1):
+            con.execute(f'DROP TABLE IF EXISTS {DATABASE}.{schema}.{name}')
+        for column in columns:
+            sequence = f'{DATABASE}.{schema}.SEQ_{name}_{column.upper()}'
+            # CREATE OR REPLACE TABLE restarts AUTOINCREMENT in Snowflake, so the sequence restarts too
+            con.execute(f"CREATE {'OR REPLACE SEQUENCE' if table.group(1) else 'SEQUENCE IF NOT EXISTS'} {sequence}")
+            statement = AUTOINCREMENT_PATTERN.sub(f"\\1 NUMBER DEFAULT NEXTVAL('{sequence}')", statement, count=1)
+        statement = INTEGER_PATTERN.sub('BIGINT', statement)
+
+    con.execute(translate(statement))
+    return schema
+
+
+def run_script(con, script, schema='DATA'):
+    """Run a Snowflake SQL script (path or text) locally; returns the statements that were skipped"""
+    if os.path.exists(script):
+        with open(script, encoding='utf-8') as f:
+            script = f.read()
+
+    skipped = []
+    initial_schema = schema
+    for statement in split_statements(script):
+        result = run_statement(con, statement, schema)
+        if result is None:
+            skipped.append(statement.split('\n', 1)[0][:80])
+        else:
+            schema = result
+    con.execute(f'USE {DATABASE}.{initial_schema}')
+    return skipped
+
+
+def setup_database(con):
+    """Create the SIO tables and views from data_engineering/setup_database.sql"""
+    return run_script(con, SETUP_SCRIPT)
+
+
+def table_exists(con, table, schema='DATA'):
+    """True if SIO_DB.<schema>.<table> exists"""
+    return con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_catalog = ? AND table_schema = ? AND table_name = ?",
+        [DATABASE, schema, table]
+    ).fetchone()[0] > 0
+
+
+class LocalResult:
+    """Deferred result of LocalSession.sql(), mirroring the Snowpark DataFrame calls used in this repo"""
+
+    def __init__(self, con, query):
+        self.con = con
+        self.query = query
+
+    def to_pandas(self):
+        return self.con.execute(self.query).df()
+
+    def collect(self):
+        return self.con.execute(self.query).fetchall()
+
+    def to_arrow_batches(self, batch_rows=100_000):
+        """pyarrow RecordBatches of batch_rows rows, fetched as they are read (the connector's fetch_arrow_batches)"""
+        yield from self.con.execute(self.query).fetch_record_batch(batch_rows)
+
+
+class LocalSession:
+    """Snowpark-like session over a local SIO_DB: sql(...).collect()/to_pandas() and write_pandas()"""
+
+    def __init__(self, con):
+        self.con = con
+
+    def sql(self, query):
+        return LocalResult(self.con, translate(query))
+
+    def write_pandas(self, df, table_name, auto_create_table=True, overwrite=False, table_type=''):
+        """Write a DataFrame to a table; table_type='temporary' creates a session-scoped table"""
+        kind = 'TEMP TABLE' if table_type.lower() in ('temp', 'temporary') else 'TABLE'
+        self.con.register('_write_pandas_df', df)
+        try:
+            if overwrite:
+                self.con.execute(f'CREATE OR REPLACE {kind} {table_name} AS SELECT * FROM _write_pandas_df')
+            else:
+                if auto_create_table:
+                    self.con.execute(f'CREATE {kind} IF NOT EXISTS {table_name} AS SELECT * FROM _write_pandas_df LIMIT 0')
+                self.con.execute(f'INSERT INTO {table_name} SELECT * FROM _write_pandas_df')
+        finally:
+            self.con.unregister('_write_pandas_df')
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Per-meter demand forecasts for every active meter
+Each meter gets a weekly-seasonal exponential smoothing model (day-of-week index times a smoothed level) fitted
+on its last HISTORY_DAYS days in METER_DAY_FEATURES, with an interval from its one-step-ahead errors. The
+model is array code over a meters x days matrix, so one call forecasts one meter or a million at the same
+cost per series.
+
+In Snowflake it runs as the vectorized table function FORECAST_METER_DEMAND, called with
+OVER (PARTITION BY METER_ID) so the warehouse fans the meters out across its nodes; REFRESH_METER_FORECAST
+writes the results to ML_ANALYTICS.METER_FORECAST (see cortex/create_meter_forecast.sql). DuckDB has no
+partitioned Python table functions, so local runs forecast all meters in one batch with the same code:
+  python data_engineering/meter_forecast.py --local data/sio_local.duckdb --horizon 14
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from feature_store import EMPTY_WATERMARK, METER_TABLE, watermark
+
+try:
+    from _snowflake import vectorized
+except ImportError:  # Outside Snowflake end_partition is called directly
+    def vectorized(**_):
+        return lambda method: method
+
+FORECAST_TABLE = 'SIO_DB.ML_ANALYTICS.METER_FORECAST'
+FORECAST_FUNCTION = 'SIO_DB.ML_ANALYTICS.FORECAST_METER_DEMAND'
+FORECAST_BATCH = 'METER_FORECAST_BATCH'
+FORECAST_SQL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cortex', 'create_meter_forecast.sql')
+
+MODEL_VERSION = 'seasonal-ses-v1'
+HISTORY_DAYS = 56        # Eight weeks: enough for a day-of-week index, short enough to follow the season
+HORIZON_DAYS = 14
+ALPHA = 0.3              # Level smoothing; higher follows recent days faster
+Z_90 = 1.645             # 90% interval
+SEASON_CLIP = (0.25, 4.0)
+KEEP_RUNS = 7            # Run dates kept in METER_FORECAST
+
+# Table function output, in RETURNS TABLE order
+OUTPUT_COLUMNS = ['METER_ID', 'FORECAST_DATE', 'HORIZON_DAYS', 'PREDICTED_VOLUME_M3', 'LOWER_VOLUME_M3',
+                  'UPPER_VOLUME_M3']
+
+HISTORY_SQL = f"""
+    SELECT f.METER_ID, f.FEATURE_DATE AS READING_DATE, f.VOLUME_M3
+    FROM {METER_TABLE} f
+    JOIN SIO_DB.DATA.WATER_METERS m ON m.METER_ID = f.METER_ID AND m.METER_STATUS = 'ACTIVE'
+    WHERE f.FEATURE_DATE > '{{through}}'::DATE - {HISTORY_DAYS} AND f.FEATURE_DATE <= '{{through}}'::DATE
+"""
+
+# Snowflake: one table function partition per meter, spread over the warehouse
+PARTITIONED_INSERT_SQL = f"""
+    INSERT INTO {FORECAST_TABLE}
+        (RUN_DATE, METER_ID, FORECAST_DATE, HORIZON_DAYS, PREDICTED_VOLUME_M3, LOWER_VOLUME_M3, UPPER_VOLUME_M3,
+         MODEL_VERSION, CREATED_AT)
+    SELECT '{{through}}'::DATE, f.METER_ID, f.FORECAST_DATE, f.HORIZON_DAYS, f.PREDICTED_VOLUME_M3,
+           f.LOWER_VOLUME_M3, f.UPPER_VOLUME_M3, '{MODEL_VERSION}', CURRENT_TIMESTAMP()
+    FROM ({HISTORY_SQL}) h,
+         TABLE({FORECAST_FUNCTION}(h.METER_ID, h.READING_DATE, h.VOLUME_M3, '{{through}}'::DATE, {{horizon}})
+               OVER (PARTITION BY h.METER_ID)) f
+"""
+
+INSERT_FORECASTS_SQL = f"""
+    INSERT INTO {FORECAST_TABLE}
+        (RUN_DATE, METER_ID, FORECAST_DATE, HORIZON_DAYS, PREDICTED_VOLUME_M3, LOWER_VOLUME_M3, UPPER_VOLUME_M3,
+         MODEL_VERSION, CREATED_AT)
+    SELECT '{{through}}'::DATE, METER_ID, FORECAST_DATE::DATE, HORIZON_DAYS, PREDICTED_VOLUME_M3,
+           LOWER_VOLUME_M3, UPPER_VOLUME_M3, '{MODEL_VERSION}', CURRENT_TIMESTAMP()
+    FROM {FORECAST_BATCH}
+"""
+
+
+def forecast_matrix(volumes, days_of_week, future_days_of_week, alpha=ALPHA):
+    """Forecast every row of a meters x days volume matrix (NaN = no reading)
+
+    Returns (predicted, lower, upper), each meters x horizon; rows without a single reading are NaN.
+    """
+    valid = ~np.isnan(volumes)
+    filled = np.where(valid, volumes, 0.0)
+    weekday = np.eye(7)[days_of_week]                       # days x 7 one-hot
+    weekday_sum, weekday_count = filled @ weekday, valid @ weekday
+    counts = valid.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = filled.sum(axis=1) / counts
+        season = (weekday_sum / weekday_count) / mean[:, None]
+    season = np.clip(np.where(np.isfinite(season) & (season > 0), season, 1.0), *SEASON_CLIP)
+
+    # Smooth the deseasonalized series; the level starts at the window mean and each reading pulls it alpha
+    # of the way, so the first weeks only warm it up
+    deseasonalized = np.where(valid, filled / season[:, days_of_week], 0.0)
+    level = np.where(counts > 0, mean, np.nan)
+    sse = np.zeros(len(volumes))
+    for day in range(volumes.shape[1]):
+        error = np.where(valid[:, day], deseasonalized[:, day] - level, 0.0)
+        sse += error ** 2
+        level = level + alpha * error
+    sigma = np.sqrt(sse / np.maximum(counts - 1, 1))
+
+    steps = np.arange(len(future_days_of_week))
+    future_season = season[:, future_days_of_week]
+    predicted = np.maximum(level[:, None] * future_season, 0.0)
+    spread = Z_90 * sigma[:, None] * np.sqrt(1 + steps * alpha ** 2) * future_season
+    return predicted, np.maximum(predicted - spread, 0.0), predicted + spread
+
+
+def forecast_frame(history, through, horizon=HORIZON_DAYS):
+    """Forecasts for the horizon days after through from METER_ID / READING_DATE / VOLUME_M3 rows"""
+    through = pd.Timestamp(through).normalize()
+    first_day = through - pd.Timedelta(days=HISTORY_DAYS - 1)
+    offsets = (pd.to_datetime(history['READING_DATE']).to_numpy() - first_day.to_datetime64()) // np.timedelta64(1, 'D')
+    keep = (offsets >= 0) & (offsets < HISTORY_DAYS)
+    meter_ids, rows = np.unique(history['METER_ID'].to_numpy()[keep], return_inverse=True)
+    volumes = np.full((len(meter_ids), HISTORY_DAYS), np.nan)
+    volumes[rows, offsets[keep]] = history['VOLUME_M3'].to_numpy(dtype='float64', na_value=np.nan)[keep]
+
+    history_days = pd.date_range(first_day, periods=HISTORY_DAYS)
+    forecast_days = pd.date_range(through + pd.Timedelta(days=1), periods=horizon)
+    predicted, lower, upper = forecast_matrix(volumes, history_days.dayofweek.to_numpy(),
+                                              forecast_days.dayofweek.to_numpy())
+    forecasts = pd.DataFrame({
+        'METER_ID': np.repeat(meter_ids, horizon),
+        'FORECAST_DATE': np.tile(forecast_days.to_numpy(), len(meter_ids)),
+        'HORIZON_DAYS': np.tile(np.arange(1, horizon + 1), len(meter_ids)),
+        'PREDICTED_VOLUME_M3': predicted.ravel().round(3),
+        'LOWER_VOLUME_M3': lower.ravel().round(3),
+        'UPPER_VOLUME_M3': upper.ravel().round(3),
+    })
+    return forecasts[forecasts['PREDICTED_VOLUME_M3'].notna()].reset_index(drop=True)
+
+
+class MeterForecastUDTF:
+    """Handler of FORECAST_METER_DEMAND: end_partition gets one METER_ID partition's history at once"""
+
+    @vectorized(input=pd.DataFrame)
+    def end_partition(self, df):
+        df.columns = ['METER_ID', 'READING_DATE', 'VOLUME_M3', 'THROUGH', 'HORIZON']
+        if df.empty:
+            return pd.DataFrame(columns=OUTPUT_COLUMNS)
+        forecasts = forecast_frame(df, df['THROUGH'].iloc[0], int(df['HORIZON'].iloc[0]))
+        forecasts['FORECAST_DATE'] = forecasts['FORECAST_DATE'].dt.date
+        return forecasts[OUTPUT_COLUMNS]
+
+
+def refresh_forecasts(session, through=None, horizon=HORIZON_DAYS, partitioned=False):
+    """Replace the forecasts of run date through (default: latest featurized day) for every active meter
+
+    partitioned=True runs FORECAST_METER_DEMAND per METER_ID partition in the warehouse; otherwise the
+    history is read into pandas and forecast in one batch (local DuckDB stand-in).
+    """
+    start = time.perf_counter()
+    through = pd.Timestamp(through).date().isoformat() if through is not None else watermark(session, METER_TABLE)
+    if through == EMPTY_WATERMARK:
+        return {'through': None, 'series': 0, 'rows': 0}
+
+    session.sql(f"DELETE FROM {FORECAST_TABLE} WHERE RUN_DATE = '{through}'::DATE "
+                f"OR RUN_DATE <= '{through}'::DATE - {KEEP_RUNS}").collect()
+    stats = {'through': through, 'horizon': horizon, 'partitioned': partitioned}
+    if partitioned:
+        session.sql(PARTITIONED_INSERT_SQL.format(through=through, horizon=horizon)).collect()
+        stats['forecast_seconds'] = round(time.perf_counter() - start, 3)
+    else:
+        history = session.sql(HISTORY_SQL.format(through=through)).to_pandas()
+        step = time.perf_counter()
+        forecasts = forecast_frame(history, through, horizon)
+        stats['forecast_seconds'] = round(time.perf_counter() - step, 3)
+        if len(forecasts):
+            session.write_pandas(forecasts, FORECAST_BATCH, auto_create_table=True, overwrite=True,
+                                 table_type='temporary')
+            session.sql(INSERT_FORECASTS_SQL.format(through=through)).collect()
+
+    stats['series'], stats['rows'] = session.sql(
+        f"SELECT COUNT(DISTINCT METER_ID), COUNT(*) FROM {FORECAST_TABLE} WHERE RUN_DATE = '{through}'::DATE"
+    ).collect()[0]
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    stats['series_per_sec'] = round(stats['series'] / max(stats['seconds'], 1e-9), 1)
+    return stats
+
+
+def run_procedure(session, through, horizon):
+    """Handler for SIO_DB.ML_ANALYTICS.REFRESH_METER_FORECAST"""
+    return refresh_forecasts(session, through, int(horizon or HORIZON_DAYS), partitioned=True)
+
+
+def setup_local(con):
+    """Create the forecast table in the local DuckDB stand-in"""
+    import local_backend
+
+    local_backend.run_script(con, FORECAST_SQL_FILE)
+
+
+def main():
+    """Forecast every active meter in the local DuckDB stand-in"""
+    parser = argparse.ArgumentParser(description='Per-meter demand forecasts (local DuckDB stand-in)')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default='data/sio_local.duckdb')
+    parser.add_argument('--through', help='Last day of history YYYY-MM-DD (default: latest featurized day)')
+    parser.add_argument('--horizon', type=int, default=HORIZON_DAYS, help='Days to forecast')
+    args = parser.parse_args()
+
+    import local_backend
+
+    through = datetime.strptime(args.through, '%Y-%m-%d').date() if args.through else None
+    con = local_backend.connect(args.local)
+    setup_local(con)
+    stats = refresh_forecasts(local_backend.LocalSession(con), through, args.horizon)
+    if stats['through'] is None:
+        print("⚠️  No featurized days to forecast from - run data_engineering/feature_store.py first")
+        return
+    print(f"🔮 {stats['rows']:,} forecasts for {stats['series']:,} meters, {args.horizon} days after "
+          f"{stats['through']} ({stats['seconds']:.2f}s)")
+    print(f"  - {stats['series_per_sec']:,.0f} series/s end to end, "
+          f"{stats['series'] / max(stats['forecast_seconds'], 1e-9):,.0f} series/s in the model")
+
+
+if __name__ == "__main__":
+    main()
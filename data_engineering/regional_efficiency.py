@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Daily regional efficiency scores for ANALYZE_REGIONAL_EFFICIENCY and TAB 2
+Maintains ML_ANALYTICS.REGIONAL_EFFICIENCY_DAILY: one row per score date and segment, at three grains -
+REGION, WATER_SOURCE (region usage attributed by source capacity) and CROP_TYPE (region capacity attributed
+by farm area). Scores use trailing 30-day usage from METER_DAY_FEATURES, so a refresh only reads the new days
+plus 30 days of context and keeps earlier scores as history for trend charts.
+
+Runs as the REFRESH_REGIONAL_EFFICIENCY procedure (see cortex/create_regional_efficiency.sql) or locally:
+  python data_engineering/regional_efficiency.py --local data/sio_local.duckdb
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from feature_store import METER_TABLE, refresh_table, scalar
+
+SCORE_TABLE = 'SIO_DB.ML_ANALYTICS.REGIONAL_EFFICIENCY_DAILY'
+EFFICIENCY_SQL_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'cortex', 'create_regional_efficiency.sql'
+)
+
+GRAINS = ('REGION', 'WATER_SOURCE', 'CROP_TYPE')
+WINDOW_DAYS = 30
+
+# Per-customer usage for each new score date over its trailing window
+SCORE_SQL = f"""
+    INSERT INTO {SCORE_TABLE}
+    WITH score_dates AS (
+        SELECT DISTINCT FEATURE_DATE AS SCORE_DATE
+        FROM {METER_TABLE}
+        WHERE FEATURE_DATE > '{{since}}'::DATE AND FEATURE_DATE <= '{{through}}'::DATE
+    ),
+    customer_daily AS (
+        SELECT f.REGION_ID, f.CUSTOMER_ID, f.FEATURE_DATE, SUM(f.VOLUME_M3) AS USAGE_M3
+        FROM {METER_TABLE} f
+        WHERE f.FEATURE_DATE > DATEADD(day, -{WINDOW_DAYS}, '{{since}}'::DATE)
+          AND f.FEATURE_DATE <= '{{through}}'::DATE
+        GROUP BY f.REGION_ID, f.CUSTOMER_ID, f.FEATURE_DATE
+    ),
+    customer_usage AS (
+        SELECT d.SCORE_DATE, u.REGION_ID, u.CUSTOMER_ID, SUM(u.USAGE_M3) AS USAGE_M3
+        FROM score_dates d
+        JOIN customer_daily u
+          ON u.FEATURE_DATE > DATEADD(day, -{WINDOW_DAYS}, d.SCORE_DATE) AND u.FEATURE_DATE <= d.SCORE_DATE
+        GROUP BY d.SCORE_DATE, u.REGION_ID, u.CUSTOMER_ID
+    ),
+    region_usage AS (
+        SELECT SCORE_DATE, REGION_ID, SUM(USAGE_M3) AS TOTAL_USAGE_M3, COUNT(*) AS TOTAL_CUSTOMERS
+        FROM customer_usage
+        GROUP BY SCORE_DATE, REGION_ID
+    ),
+    region_sources AS (
+        SELECT REGION_ID, AVG(EFFICIENCY_PERCENT) AS AVG_SOURCE_EFFICIENCY, SUM(CAPACITY_M3) AS SOURCE_CAPACITY_M3
+        FROM SIO_DB.DATA.WATER_SOURCES
+        WHERE STATUS = 'ACTIVE'
+        GROUP BY REGION_ID
+    ),
+    crop_area AS (
+        SELECT
+            REGION_ID,
+            COALESCE(CROP_TYPE, 'UNKNOWN') AS CROP_TYPE,
+            SUM(FARM_SIZE_HECTARES) / NULLIF(SUM(SUM(FARM_SIZE_HECTARES)) OVER (PARTITION BY REGION_ID), 0) AS AREA_SHARE
+        FROM SIO_DB.DATA.CUSTOMERS
+        GROUP BY REGION_ID, COALESCE(CROP_TYPE, 'UNKNOWN')
+    ),
+    segments AS (
+        SELECT
+            u.SCORE_DATE, 'REGION' AS GRAIN, u.REGION_ID, 'ALL' AS SEGMENT,
+            u.TOTAL_USAGE_M3, u.TOTAL_CUSTOMERS, s.AVG_SOURCE_EFFICIENCY, r.WATER_CAPACITY_M3 AS CAPACITY_M3
+        FROM region_usage u
+        JOIN SIO_DB.DATA.REGIONS r ON u.REGION_ID = r.REGION_ID
+        LEFT JOIN region_sources s ON u.REGION_ID = s.REGION_ID
+
+        UNION ALL
+
+        SELECT
+            u.SCORE_DATE, 'WATER_SOURCE', u.REGION_ID, ws.SOURCE_NAME,
+            u.TOTAL_USAGE_M3 * ws.CAPACITY_M3 / s.SOURCE_CAPACITY_M3, u.TOTAL_CUSTOMERS,
+            ws.EFFICIENCY_PERCENT, ws.CAPACITY_M3
+        FROM region_usage u
+        JOIN SIO_DB.DATA.WATER_SOURCES ws ON u.REGION_ID = ws.REGION_ID AND ws.STATUS = 'ACTIVE'
+        JOIN region_sources s ON u.REGION_ID = s.REGION_ID
+
+        UNION ALL
+
+        SELECT
+            cu.SCORE_DATE, 'CROP_TYPE', cu.REGION_ID, COALESCE(c.CROP_TYPE, 'UNKNOWN'),
+            SUM(cu.USAGE_M3), COUNT(*), MAX(s.AVG_SOURCE_EFFICIENCY), MAX(r.WATER_CAPACITY_M3 * a.AREA_SHARE)
+        FROM customer_usage cu
+        JOIN SIO_DB.DATA.CUSTOMERS c ON cu.CUSTOMER_ID = c.CUSTOMER_ID
+        JOIN SIO_DB.DATA.REGIONS r ON cu.REGION_ID = r.REGION_ID
+        LEFT JOIN region_sources s ON cu.REGION_ID = s.REGION_ID
+        LEFT JOIN crop_area a ON cu.REGION_ID = a.REGION_ID AND COALESCE(c.CROP_TYPE, 'UNKNOWN') = a.CROP_TYPE
+        GROUP BY cu.SCORE_DATE, cu.REGION_ID, COALESCE(c.CROP_TYPE, 'UNKNOWN')
+    ),
+    metrics AS (
+        SELECT
+            g.*,
+            g.TOTAL_USAGE_M3 / NULLIF(g.TOTAL_CUSTOMERS, 0) AS USAGE_PER_CUSTOMER_M3,
+            g.TOTAL_USAGE_M3 / NULLIF(g.CAPACITY_M3, 0) * 100 AS CAPACITY_UTILIZATION_PERCENT
+        FROM segments g
+    ),
+    normalized AS (
+        -- Usage per customer is min-max scaled among segments of the same grain and day (0.5 when all equal)
+        SELECT
+            m.*,
+            COALESCE(
+                (m.USAGE_PER_CUSTOMER_M3 - MIN(m.USAGE_PER_CUSTOMER_M3) OVER (PARTITION BY m.SCORE_DATE, m.GRAIN))
+                / NULLIF(MAX(m.USAGE_PER_CUSTOMER_M3) OVER (PARTITION BY m.SCORE_DATE, m.GRAIN)
+                         - MIN(m.USAGE_PER_CUSTOMER_M3) OVER (PARTITION BY m.SCORE_DATE, m.GRAIN), 0),
+                0.5
+            ) AS USAGE_NORM,
+            MEDIAN(m.USAGE_PER_CUSTOMER_M3) OVER (PARTITION BY m.SCORE_DATE, m.GRAIN) AS MEDIAN_USAGE_PER_CUSTOMER_M3
+        FROM metrics m
+    ),
+    scored AS (
+        -- 50% source efficiency, 30% (inverse) usage per customer, 20% capacity utilization
+        SELECT
+            n.*,
+            ROUND(
+                COALESCE(n.AVG_SOURCE_EFFICIENCY, 0) / 100 * 50
+                + (1 - n.USAGE_NORM) * 30
+                + LEAST(GREATEST(COALESCE(n.CAPACITY_UTILIZATION_PERCENT, 0), 0), 100) / 100 * 20,
+                2
+            ) AS EFFICIENCY_SCORE
+        FROM normalized n
+    )
+    SELECT
+        s.SCORE_DATE,
+        s.GRAIN,
+        s.REGION_ID,
+        r.REGION_NAME,
+        s.SEGMENT,
+        ROUND(s.TOTAL_USAGE_M3, 3) AS TOTAL_USAGE_M3,
+        s.TOTAL_CUSTOMERS,
+        ROUND(s.USAGE_PER_CUSTOMER_M3, 3) AS USAGE_PER_CUSTOMER_M3,
+        ROUND(s.AVG_SOURCE_EFFICIENCY, 2) AS AVG_SOURCE_EFFICIENCY,
+        s.CAPACITY_M3,
+        ROUND(s.CAPACITY_UTILIZATION_PERCENT, 2) AS CAPACITY_UTILIZATION_PERCENT,
+        s.EFFICIENCY_SCORE,
+        CASE
+            WHEN s.EFFICIENCY_SCORE >= 80 THEN 'EXCELLENT'
+            WHEN s.EFFICIENCY_SCORE >= 65 THEN 'GOOD'
+            WHEN s.EFFICIENCY_SCORE >= 50 THEN 'FAIR'
+            ELSE 'NEEDS_IMPROVEMENT'
+        END AS EFFICIENCY_RATING,
+        COALESCE(NULLIF(TRIM(
+            CASE WHEN s.AVG_SOURCE_EFFICIENCY < 85 THEN 'Improve source efficiency; ' ELSE '' END ||
+            CASE WHEN s.CAPACITY_UTILIZATION_PERCENT > 85 THEN 'High utilization - consider capacity expansion; '
+                 WHEN s.CAPACITY_UTILIZATION_PERCENT < 40 THEN 'Low utilization - surplus capacity available; '
+                 ELSE '' END ||
+            CASE WHEN s.USAGE_PER_CUSTOMER_M3 > s.MEDIAN_USAGE_PER_CUSTOMER_M3 * 1.3
+                 THEN 'Above-average usage - education opportunity' ELSE '' END,
+            '; '
+        ), ''), 'Operating at optimal levels') AS OPPORTUNITIES,
+        CURRENT_TIMESTAMP() AS UPDATED_AT
+    FROM scored s
+    JOIN SIO_DB.DATA.REGIONS r ON s.REGION_ID = r.REGION_ID
+"""
+
+
+def refresh_scores(session, through=None, rebuild_from=None):
+    """Score every grain for the days after the last scored day through the given day (default: latest features)"""
+    if through is None:
+        through = scalar(session.sql(f'SELECT MAX(FEATURE_DATE) FROM {METER_TABLE}').collect())
+        if through is None:
+            return {'through': None, 'scores': None}
+    through = pd.Timestamp(through).date().isoformat()
+
+    return {
+        'through': through,
+        'scores': refresh_table(session, SCORE_TABLE, SCORE_SQL, through, rebuild_from, date_column='SCORE_DATE')
+    }
+
+
+def run_procedure(session, through):
+    """Handler for SIO_DB.ML_ANALYTICS.REFRESH_REGIONAL_EFFICIENCY"""
+    return refresh_scores(session, through)
+
+
+def setup_local(con):
+    """Create the score table in the local DuckDB stand-in"""
+    import local_backend
+
+    local_backend.run_script(con, EFFICIENCY_SQL_FILE)
+
+
+def main():
+    """Refresh the efficiency scores in the local DuckDB stand-in"""
+    parser = argparse.ArgumentParser(description='Incremental regional efficiency scores (local DuckDB stand-in)')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default='data/sio_local.duckdb')
+    parser.add_argument('--through', help='Last day to score YYYY-MM-DD (default: latest featurized day)')
+    parser.add_argument('--rebuild-from', help='Recompute scores from YYYY-MM-DD (e.g. after source changes)')
+    args = parser.parse_args()
+
+    import local_backend
+
+    through = datetime.strptime(args.through, '%Y-%m-%d').date() if args.through else None
+    rebuild_from = datetime.strptime(args.rebuild_from, '%Y-%m-%d').date() if args.rebuild_from else None
+    con = local_backend.connect(args.local)
+    setup_local(con)
+    stats = refresh_scores(local_backend.LocalSession(con), through, rebuild_from)
+
+    if stats['through'] is None:
+        print("⚠️  No featurized days to score - run data_engineering/feature_store.py first")
+        return
+    print(f"⚡ Efficiency scores refreshed through {stats['through']}: {stats['scores']['rows']:,} new rows "
+          f"after {stats['scores']['since']} ({stats['scores']['seconds']:.2f}s)")
+    latest = con.execute(
+        f"SELECT GRAIN, COUNT(*) FROM {SCORE_TABLE} WHERE SCORE_DATE = '{stats['through']}' GROUP BY GRAIN ORDER BY GRAIN"
+    ).fetchall()
+    for grain, rows in latest:
+        print(f"  - {grain}: {rows} segments")
+
+
+if __name__ == "__main__":
+    main()
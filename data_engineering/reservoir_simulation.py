@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo reservoir depletion by region
+Projects every water source's level forward day by day over thousands of stochastic paths and reports, per
+region, percentiles of the days until the region's stored water first falls below a threshold share of its
+capacity. Each day of a path:
+  demand   = the region's deseasonalized daily usage (last 90 days of REGION_DAY_FEATURES) x the feature
+             store's monthly seasonal factor x the path's weather scenario x autocorrelated noise,
+             drawn from the region's sources in proportion to their capacity
+  supply   = INFLOW_PCT % of the region's summer daily demand (production is sized for the peak season),
+             produced by its ACTIVE sources in proportion to capacity x efficiency; desalination and
+             treatment plants have random outages
+  rainfall = wet-season (Nov-Apr) rain days at the region's WEATHER_DATA frequency and intensity, adding
+             runoff to reservoirs
+Paths and sources are array dimensions, so the only Python loop is over days.
+
+Runs as the SIMULATE_RESERVOIR_DEPLETION table function (see cortex/create_reservoir_simulation.sql), which
+hands each region's sources to the SIMULATE_REGION_DEPLETION partition handler, or locally:
+  python data_engineering/reservoir_simulation.py --local data/sio_local.duckdb --paths 10000 --horizon 365
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_store import REGION_TABLE
+
+try:
+    from _snowflake import vectorized
+except ImportError:  # Outside Snowflake end_partition is called directly
+    def vectorized(**_):
+        return lambda method: method
+
+PATHS = 10000
+HORIZON_DAYS = 365
+THRESHOLD_PCT = 20.0     # Region storage below this share of capacity counts as depleted
+INFLOW_PCT = 100.0       # Supply as a share of the region's summer daily demand
+SEED = 42
+PATH_BLOCK = 2000
+
+# Weather scenario per path: demand and rainfall multipliers
+SCENARIOS = {
+    'NORMAL': {'probability': 0.60, 'demand': 1.00, 'rain': 1.0},
+    'HOT_DRY': {'probability': 0.25, 'demand': 1.12, 'rain': 0.3},
+    'WET': {'probability': 0.15, 'demand': 0.95, 'rain': 2.0},
+}
+DEMAND_NOISE = 0.08      # Daily demand noise (log scale)
+DEMAND_PERSISTENCE = 0.7  # AR(1) coefficient: hot spells last several days
+WET_MONTHS = (11, 12, 1, 2, 3, 4)
+RUNOFF_PCT_PER_MM = 0.5  # Reservoir inflow per mm of rain, in % of its capacity
+OUTAGE_TYPES = ('DESALINATION', 'TREATMENT_PLANT')
+OUTAGE_START = 0.005     # Daily probability that a running plant goes down
+OUTAGE_END = 1 / 7       # Daily probability that it comes back (7-day mean outage)
+
+# Same monthly factors as the feature store's SEASONAL_FACTOR
+SEASONAL_FACTORS = np.array([0.7, 0.7, 1.0, 1.0, 1.0, 1.5, 1.5, 1.5, 1.5, 1.0, 0.7, 0.7])
+
+# One row per source with its region's demand and rainfall (also the body of SIMULATE_RESERVOIR_DEPLETION)
+SOURCES_SQL = f"""
+    WITH latest AS (
+        SELECT MAX(FEATURE_DATE) AS AS_OF FROM {REGION_TABLE}
+    ),
+    demand AS (
+        SELECT f.REGION_ID, AVG(f.TOTAL_USAGE_M3 / f.SEASONAL_FACTOR) AS BASE_DEMAND_M3
+        FROM {REGION_TABLE} f, latest
+        WHERE f.FEATURE_DATE > DATEADD(day, -90, latest.AS_OF)
+        GROUP BY f.REGION_ID
+    ),
+    rain AS (
+        SELECT REGION_ID,
+               AVG(IFF(RAINFALL_MM > 0, 1, 0)) AS RAIN_DAY_PROBABILITY,
+               COALESCE(AVG(IFF(RAINFALL_MM > 0, RAINFALL_MM, NULL)), 0) AS RAIN_MM
+        FROM SIO_DB.DATA.WEATHER_DATA
+        WHERE MONTH(WEATHER_DATE) IN {WET_MONTHS}
+        GROUP BY REGION_ID
+    )
+    SELECT s.REGION_ID, r.REGION_NAME, s.SOURCE_TYPE, s.STATUS, s.CAPACITY_M3::FLOAT AS CAPACITY_M3,
+           COALESCE(s.CURRENT_LEVEL_M3, 0)::FLOAT AS CURRENT_LEVEL_M3,
+           COALESCE(s.EFFICIENCY_PERCENT, 100)::FLOAT AS EFFICIENCY_PERCENT,
+           COALESCE(d.BASE_DEMAND_M3, 0) AS BASE_DEMAND_M3,
+           COALESCE(w.RAIN_DAY_PROBABILITY, 0) AS RAIN_DAY_PROBABILITY, COALESCE(w.RAIN_MM, 0) AS RAIN_MM,
+           latest.AS_OF
+    FROM SIO_DB.DATA.WATER_SOURCES s
+    JOIN SIO_DB.DATA.REGIONS r ON r.REGION_ID = s.REGION_ID
+    CROSS JOIN latest
+    LEFT JOIN demand d ON d.REGION_ID = s.REGION_ID
+    LEFT JOIN rain w ON w.REGION_ID = s.REGION_ID
+    WHERE s.STATUS <> 'INACTIVE' AND s.CAPACITY_M3 > 0
+"""
+
+SOURCE_COLUMNS = ['REGION_ID', 'REGION_NAME', 'SOURCE_TYPE', 'STATUS', 'CAPACITY_M3', 'CURRENT_LEVEL_M3',
+                  'EFFICIENCY_PERCENT', 'BASE_DEMAND_M3', 'RAIN_DAY_PROBABILITY', 'RAIN_MM', 'AS_OF']
+
+# Table function output, in RETURNS TABLE order
+OUTPUT_COLUMNS = ['REGION_ID', 'REGION_NAME', 'SOURCES', 'CAPACITY_M3', 'CURRENT_LEVEL_PCT', 'THRESHOLD_PCT',
+                  'DAYS_P10', 'DAYS_P50', 'DAYS_P90', 'PROBABILITY_DEPLETED', 'END_LEVEL_P50_PCT', 'PATHS',
+                  'HORIZON_DAYS']
+
+
+def simulate(sources, paths=PATHS, horizon=HORIZON_DAYS, threshold_pct=THRESHOLD_PCT, inflow_pct=INFLOW_PCT,
+             start=None, seed=SEED):
+    """Simulate sources (SOURCES_SQL rows) over paths x horizon days
+
+    Returns (region_ids, days, end_levels): days is paths x regions, the first day each region's storage is
+    below threshold_pct of capacity (0 = already below, horizon + 1 = not within the horizon); end_levels is
+    each region's storage at the end of the horizon in % of capacity.
+    """
+    rng = np.random.default_rng(seed)
+    region_ids, region_of = np.unique(sources['REGION_ID'].to_numpy(), return_inverse=True)
+    regions = len(region_ids)
+    membership = np.zeros((len(sources), regions), dtype=np.float32)
+    membership[np.arange(len(sources)), region_of] = 1
+
+    capacity = sources['CAPACITY_M3'].to_numpy(dtype=np.float32)
+    region_capacity = capacity @ membership
+    demand_share = capacity / region_capacity[region_of]
+    base_demand = sources.groupby('REGION_ID', sort=True)['BASE_DEMAND_M3'].first().to_numpy(dtype=np.float32)
+    rain_probability = sources.groupby('REGION_ID', sort=True)['RAIN_DAY_PROBABILITY'].first().to_numpy(dtype=np.float32)
+    rain_mm = sources.groupby('REGION_ID', sort=True)['RAIN_MM'].first().to_numpy(dtype=np.float32)
+
+    # Supply: the region's summer demand times inflow_pct, split over ACTIVE sources by capacity x efficiency
+    producing = (sources['STATUS'] == 'ACTIVE').to_numpy()
+    weight = np.where(producing, capacity * sources['EFFICIENCY_PERCENT'].to_numpy(dtype=np.float32) / 100, 0)
+    region_weight = weight @ membership
+    supply = (base_demand * SEASONAL_FACTORS.max() * inflow_pct / 100)[region_of] * np.divide(
+        weight, region_weight[region_of], out=np.zeros_like(weight), where=region_weight[region_of] > 0)
+    supply = supply.astype(np.float32)
+    outage_sources = np.flatnonzero(sources['SOURCE_TYPE'].isin(OUTAGE_TYPES).to_numpy() & producing)
+    runoff = np.where(sources['SOURCE_TYPE'].to_numpy() == 'RESERVOIR', capacity * RUNOFF_PCT_PER_MM / 100, 0)
+    runoff = runoff.astype(np.float32)
+
+    start = pd.Timestamp(start if start is not None else pd.Timestamp.today()).normalize()
+    months = pd.date_range(start + pd.Timedelta(days=1), periods=horizon).month.to_numpy()
+    seasonal = SEASONAL_FACTORS[months - 1].astype(np.float32)
+    wet = np.isin(months, WET_MONTHS)
+    innovation = np.float32(np.sqrt(1 - DEMAND_PERSISTENCE ** 2))
+
+    names = list(SCENARIOS)
+    scenario = rng.choice(len(names), size=paths, p=[SCENARIOS[name]['probability'] for name in names])
+    demand_scale = np.array([SCENARIOS[name]['demand'] for name in names], dtype=np.float32)[scenario][:, None]
+    rain_scale = np.array([SCENARIOS[name]['rain'] for name in names], dtype=np.float32)[scenario][:, None]
+
+    initial = sources['CURRENT_LEVEL_M3'].to_numpy(dtype=np.float32)
+    threshold = region_capacity * threshold_pct / 100
+    days = np.full((paths, regions), horizon + 1, dtype=np.int32)
+    end_levels = np.empty((paths, regions), dtype=np.float32)
+    # Blocks of paths keep the day loop's working arrays in cache
+    for first in range(0, paths, PATH_BLOCK):
+        block = slice(first, min(first + PATH_BLOCK, paths))
+        size = block.stop - block.start
+        level = np.broadcast_to(initial, (size, len(sources))).copy()
+        block_days = np.where(level @ membership < threshold, 0, horizon + 1).astype(np.int32)
+        wet_probability = np.minimum(rain_probability * rain_scale[block], 1)
+        daily_demand = base_demand * demand_scale[block]
+        noise = rng.standard_normal((size, regions), dtype=np.float32)
+        outage = np.zeros((size, len(outage_sources)), dtype=bool)
+        for day in range(horizon):
+            noise *= DEMAND_PERSISTENCE
+            noise += innovation * rng.standard_normal((size, regions), dtype=np.float32)
+            demand = daily_demand * (seasonal[day] * np.exp(DEMAND_NOISE * noise - DEMAND_NOISE ** 2 / 2))
+            flow = supply - demand[:, region_of] * demand_share
+            if len(outage_sources):
+                draw = rng.random(outage.shape, dtype=np.float32)
+                outage = np.where(outage, draw >= OUTAGE_END, draw < OUTAGE_START)
+                flow[:, outage_sources] -= outage * supply[outage_sources]
+            if wet[day]:
+                rain = np.where(rng.random((size, regions), dtype=np.float32) < wet_probability,
+                                rng.standard_exponential((size, regions), dtype=np.float32) * rain_mm, 0)
+                flow += rain[:, region_of] * runoff
+            level += flow
+            np.maximum(level, 0, out=level)
+            np.minimum(level, capacity, out=level)
+            below = (level @ membership < threshold) & (block_days > horizon)
+            block_days[below] = day + 1
+        days[block] = block_days
+        end_levels[block] = level @ membership
+    return region_ids, days, 100 * end_levels / region_capacity
+
+
+def summarize(sources, region_ids, days, end_levels, horizon=HORIZON_DAYS, threshold_pct=THRESHOLD_PCT):
+    """Days-to-threshold percentiles per region (NA = the percentile path does not deplete within the horizon)"""
+    regions = sources.groupby('REGION_ID', sort=True).agg(
+        REGION_NAME=('REGION_NAME', 'first'), SOURCES=('CAPACITY_M3', 'size'), CAPACITY_M3=('CAPACITY_M3', 'sum'),
+        CURRENT_LEVEL_M3=('CURRENT_LEVEL_M3', 'sum')).loc[region_ids].reset_index()
+    percentiles = {f'DAYS_P{q}': pd.Series(np.percentile(days, q, axis=0, method='lower'), dtype='Int64')
+                   for q in (10, 50, 90)}
+    summary = regions.assign(
+        CURRENT_LEVEL_PCT=(100 * regions['CURRENT_LEVEL_M3'] / regions['CAPACITY_M3']).round(1),
+        THRESHOLD_PCT=threshold_pct,
+        **{name: values.mask(values > horizon) for name, values in percentiles.items()},
+        PROBABILITY_DEPLETED=(days <= horizon).mean(axis=0).round(4),
+        END_LEVEL_P50_PCT=np.median(end_levels, axis=0).astype('float64').round(1),
+        PATHS=len(days),
+        HORIZON_DAYS=horizon,
+    )
+    return summary[OUTPUT_COLUMNS]
+
+
+def simulate_regions(sources, paths=PATHS, horizon=HORIZON_DAYS, threshold_pct=THRESHOLD_PCT,
+                     inflow_pct=INFLOW_PCT, seed=SEED):
+    """Simulate and summarize every region in sources"""
+    if sources.empty:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+    region_ids, days, end_levels = simulate(sources, paths, horizon, threshold_pct, inflow_pct,
+                                            sources['AS_OF'].iloc[0], seed)
+    return summarize(sources, region_ids, days, end_levels, horizon, threshold_pct)
+
+
+class ReservoirDepletionUDTF:
+    """Handler of SIMULATE_REGION_DEPLETION: end_partition gets one region's sources (or any set of regions)"""
+
+    @vectorized(input=pd.DataFrame)
+    def end_partition(self, df):
+        df.columns = SOURCE_COLUMNS + ['PATHS', 'HORIZON', 'THRESHOLD_PCT', 'INFLOW_PCT']
+        if df.empty:
+            return pd.DataFrame(columns=OUTPUT_COLUMNS)
+        first = df.iloc[0]
+        # A fixed seed per region: the same inputs give the same percentiles on every call
+        return simulate_regions(df[SOURCE_COLUMNS], int(first['PATHS']), int(first['HORIZON']),
+                                float(first['THRESHOLD_PCT']), float(first['INFLOW_PCT']),
+                                SEED + int(first['REGION_ID']))
+
+
+def main():
+    """Simulate every region of the local DuckDB stand-in"""
+    parser = argparse.ArgumentParser(description='Monte Carlo reservoir depletion (local DuckDB stand-in)')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default='data/sio_local.duckdb')
+    parser.add_argument('--paths', type=int, default=PATHS)
+    parser.add_argument('--horizon', type=int, default=HORIZON_DAYS, help='Days to simulate')
+    parser.add_argument('--threshold-pct', type=float, default=THRESHOLD_PCT, help='Depleted below this %% of capacity')
+    parser.add_argument('--inflow-pct', type=float, default=INFLOW_PCT, help='Supply as %% of summer daily demand')
+    args = parser.parse_args()
+
+    import local_backend
+
+    session = local_backend.LocalSession(local_backend.connect(args.local, read_only=True))
+    sources = session.sql(SOURCES_SQL).to_pandas()
+    if sources.empty:
+        print("⚠️  No water sources - load data with data_engineering/bulk_load.py first")
+        return
+    start = time.perf_counter()
+    summary = simulate_regions(sources, args.paths, args.horizon, args.threshold_pct, args.inflow_pct)
+    seconds = time.perf_counter() - start
+    print(f"💧 {args.paths:,} paths x {args.horizon} days x {len(sources)} sources from {pd.Timestamp(sources['AS_OF'].iloc[0]).date()} "
+          f"in {seconds:.2f}s (below {args.threshold_pct:g}% of capacity, supply {args.inflow_pct:g}% of demand)")
+    for row in summary.itertuples():
+        days = ' / '.join('-' if pd.isna(value) else str(value) for value in (row.DAYS_P10, row.DAYS_P50, row.DAYS_P90))
+        print(f"  - {row.REGION_NAME}: {row.CURRENT_LEVEL_PCT:.0f}% full, days P10/P50/P90 {days}, "
+              f"{row.PROBABILITY_DEPLETED:.0%} of paths deplete")
+
+
+if __name__ == "__main__":
+    main()
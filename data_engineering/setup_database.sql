@@ -112,6 +112,7 @@ CREATE OR REPLACE TABLE WATER_USAGE (
     FLOW_RATE_M3_H NUMBER(8,3),
     TEMPERATURE_C NUMBER(5,2),
     CREATED_TIMESTAMP TIMESTAMP DEFAULT CURRENT_TIMESTAMP(),
+    EMITTED_AT TIMESTAMP_NTZ,                -- Meter send time of streamed readings (NULL for bulk loads)
     FOREIGN KEY (METER_ID) REFERENCES WATER_METERS(METER_ID)
 );
 
@@ -159,6 +160,19 @@ CREATE OR REPLACE TABLE WEATHER_DATA (
     FOREIGN KEY (REGION_ID) REFERENCES REGIONS(REGION_ID)
 );
 
+-- Usage Anomaly Labels (Ground truth for injected anomalies - synthetic data only)
+CREATE OR REPLACE TABLE USAGE_ANOMALY_LABELS (
+    EVENT_ID NUMBER PRIMARY KEY,
+    METER_ID NUMBER NOT NULL,
+    ANOMALY_TYPE VARCHAR(30) NOT NULL, -- LEAK, METER_FAULT_ZERO, METER_FAULT_STUCK, PRESSURE_DROP, THEFT_SPIKE
+    START_DATE DATE NOT NULL,
+    END_DATE DATE NOT NULL,
+    DURATION_DAYS NUMBER NOT NULL,
+    MAGNITUDE NUMBER(8,3), -- Leak share of mean volume, pressure in bar, or theft multiplier
+    DESCRIPTION VARCHAR(200),
+    FOREIGN KEY (METER_ID) REFERENCES WATER_METERS(METER_ID)
+);
+
 -- ============================================================================
 -- 5. CREATE VIEWS FOR ANALYTICS
 -- ============================================================================
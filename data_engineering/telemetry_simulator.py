@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Real-time meter telemetry simulator (local Snowpipe stand-in)
+Emits WATER_USAGE readings for N meters at a target rate into rolling NDJSON or Parquet micro-batch files in a
+landing directory. Readings come from the generate_data.py usage model (farm size, customer type, season),
+one per meter per simulated day starting the day after the generated dataset, so a 10k readings/s feed over
+1,000 meters advances ten simulated days per second.
+
+A share of readings arrives late (held back 1-N simulated days) and a share is re-sent as a duplicate with a
+later EMITTED_AT, half of them with a corrected volume, to exercise dedup and late-arrival handling downstream.
+Files are written under a temporary name and renamed when complete, so a reader never sees a partial batch.
+
+  python data_engineering/generate_data.py
+  python data_engineering/telemetry_simulator.py --data-dir data --landing-dir data/landing --rate 10000 --duration 30
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import compact_dtypes
+import generate_data
+
+RECORD_COLUMNS = ['METER_ID', 'READING_DATE', 'VOLUME_M3', 'PRESSURE_BAR', 'FLOW_RATE_M3_H', 'TEMPERATURE_C',
+                  'EMITTED_AT']
+FORMATS = ('ndjson', 'parquet')
+
+# Readings are handed to the writer in slices of rate x TICK_SECONDS
+TICK_SECONDS = 0.1
+
+
+def load_meters(data_dir, num_meters=None):
+    """(METER_IDs, base daily usage) for the dataset's meters, or for new synthetic meters without one"""
+    customers_path = os.path.join(data_dir, 'customers.csv')
+    meters_path = os.path.join(data_dir, 'water_meters.csv')
+    if os.path.exists(customers_path) and os.path.exists(meters_path):
+        customers_df = pd.read_csv(customers_path)
+        meters_df = pd.read_csv(meters_path)
+    else:
+        customers_df = generate_data.generate_customers(generate_data.generate_regions(), num_customers=num_meters or 1000)
+        meters_df = generate_data.generate_water_meters(customers_df)
+
+    # WATER_METERS ids are AUTOINCREMENT in load order
+    meter_ids = np.arange(1, len(meters_df) + 1)
+    base_usage = generate_data.meter_base_usage(meters_df, customers_df)
+    if num_meters:
+        if num_meters > len(meter_ids):
+            raise ValueError(f'{data_dir} has {len(meter_ids):,} meters; generate a larger dataset '
+                             f'(e.g. --scale-factor {num_meters / len(meter_ids):g}) for {num_meters:,}')
+        meter_ids, base_usage = meter_ids[:num_meters], base_usage[:num_meters]
+    return meter_ids, base_usage
+
+
+def start_date(data_dir):
+    """Day after the generated dataset's AS_OF (manifest.json), or today"""
+    manifest_path = os.path.join(data_dir, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            return (datetime.strptime(json.load(f)['as_of'], '%Y-%m-%d') + timedelta(days=1)).date()
+    return datetime.now().date()
+
+
+def daily_feed(meter_ids, base_usage, first_day, rng, late_fraction=0.02, max_late_days=3, duplicate_fraction=0.01,
+               correction_fraction=0.5):
+    """Yield (day, readings in emit order) per simulated day; KIND marks on_time, late and duplicates rows"""
+    pending = {}  # release day -> held-back readings
+    day = pd.Timestamp(first_day)
+    while True:
+        readings = generate_data.usage_readings(meter_ids, base_usage, [day])
+        readings = readings.iloc[rng.permutation(len(readings))].reset_index(drop=True)
+
+        late = rng.random(len(readings)) < late_fraction
+        delays = rng.integers(1, max_late_days + 1, size=late.sum())
+        for delay in np.unique(delays):
+            release = day + pd.Timedelta(days=int(delay))
+            pending.setdefault(release, []).append(readings[late].iloc[delays == delay])
+        on_time = readings[~late].assign(KIND='on_time')
+        released = pd.concat(pending.pop(day, []) or [readings.iloc[:0]], ignore_index=True).assign(KIND='late')
+        emitted = pd.concat([on_time, released], ignore_index=True)
+
+        # Re-sends of readings already emitted today; some carry a corrected volume
+        duplicates = emitted.iloc[np.flatnonzero(rng.random(len(emitted)) < duplicate_fraction)].copy()
+        corrected = rng.random(len(duplicates)) < correction_fraction
+        duplicates.loc[corrected, 'VOLUME_M3'] = compact_dtypes.measure(
+            compact_dtypes.measure_values(duplicates.loc[corrected, 'VOLUME_M3']) * rng.uniform(0.95, 1.05, corrected.sum()), 3
+        )
+        duplicates['KIND'] = 'duplicates'
+
+        yield day, pd.concat([emitted, duplicates], ignore_index=True)
+        day += pd.Timedelta(days=1)
+
+
+class LandingWriter:
+    """Rolls readings into micro-batch files of at most file_rows rows or file_seconds of feed"""
+
+    def __init__(self, landing_dir, file_format='ndjson', file_rows=10000, file_seconds=1.0):
+        self.landing_dir = landing_dir
+        self.file_format = file_format
+        self.file_rows = file_rows
+        self.file_seconds = file_seconds
+        self.run_id = datetime.now().strftime('%Y%m%dT%H%M%S')
+        self.buffer = []
+        self.buffered_rows = 0
+        self.opened_at = None
+        self.files = 0
+        self.bytes = 0
+        os.makedirs(landing_dir, exist_ok=True)
+
+    def add(self, records):
+        """Buffer a slice of records; writes a file when the size or age limit is reached"""
+        if self.opened_at is None:
+            self.opened_at = time.perf_counter()
+        self.buffer.append(records)
+        self.buffered_rows += len(records)
+        if self.buffered_rows >= self.file_rows or time.perf_counter() - self.opened_at >= self.file_seconds:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered records as one landing file"""
+        if not self.buffered_rows:
+            return
+        batch = pd.concat(self.buffer, ignore_index=True)
+        name = f'readings_{self.run_id}_{self.files:06d}.{self.file_format}'
+        path = os.path.join(self.landing_dir, name)
+        if self.file_format == 'parquet':
+            batch.to_parquet(path + '.tmp', index=False)
+        else:
+            batch.to_json(path + '.tmp', orient='records', lines=True)
+        os.replace(path + '.tmp', path)
+        self.files += 1
+        self.bytes += os.path.getsize(path)
+        self.buffer, self.buffered_rows, self.opened_at = [], 0, None
+
+
+def simulate(meter_ids, base_usage, first_day, writer, rate=10000, duration=None, days=None, seed=42,
+             late_fraction=0.02, max_late_days=3, duplicate_fraction=0.01):
+    """Emit readings at rate per second (0 = as fast as possible) until duration seconds or days simulated days"""
+    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
+    feed = daily_feed(meter_ids, base_usage, first_day, rng, late_fraction, max_late_days, duplicate_fraction)
+    stats = {'readings': 0, 'on_time': 0, 'late': 0, 'duplicates': 0, 'days': 0, 'max_lag_seconds': 0.0}
+    slice_rows = max(int(rate * TICK_SECONDS), 1) if rate else None
+    last_emitted = pd.Timestamp.min
+
+    start = time.perf_counter()
+    try:
+        for day, readings in feed:
+            if days is not None and stats['days'] >= days:
+                break
+            if duration is not None and time.perf_counter() - start >= duration:
+                break
+            for begin in range(0, len(readings), slice_rows or len(readings)):
+                if duration is not None and time.perf_counter() - start >= duration:
+                    break
+                records = compact_dtypes.expand(readings.iloc[begin:begin + (slice_rows or len(readings))])
+                # Pace to the target rate; lag is how far the feed runs behind schedule
+                if rate:
+                    due = start + stats['readings'] / rate
+                    lag = time.perf_counter() - due
+                    if lag < 0:
+                        time.sleep(-lag)
+                    stats['max_lag_seconds'] = max(stats['max_lag_seconds'], lag)
+                # Strictly increasing EMITTED_AT so downstream last-write-wins has no ties
+                emitted = max(pd.Timestamp.now(), last_emitted + pd.Timedelta(microseconds=1))
+                records['EMITTED_AT'] = emitted + pd.to_timedelta(np.arange(len(records)), unit='us')
+                last_emitted = records['EMITTED_AT'].iloc[-1]
+                records['READING_DATE'] = records['READING_DATE'].dt.strftime('%Y-%m-%d')
+                records['EMITTED_AT'] = records['EMITTED_AT'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+                writer.add(records[RECORD_COLUMNS])
+                stats['readings'] += len(records)
+                for kind, count in records['KIND'].value_counts().items():
+                    stats[kind] += int(count)
+            stats['days'] += 1
+            stats['last_day'] = day.date().isoformat()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.flush()
+
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    stats['readings_per_sec'] = round(stats['readings'] / max(stats['seconds'], 1e-9), 1)
+    stats['files'] = writer.files
+    stats['bytes'] = writer.bytes
+    return stats
+
+
+def main():
+    """Run the simulator and report achieved throughput"""
+    parser = argparse.ArgumentParser(description='Meter telemetry simulator writing micro-batch landing files')
+    parser.add_argument('--data-dir', default='data', help='Generated dataset whose meters to simulate')
+    parser.add_argument('--landing-dir', default='data/landing')
+    parser.add_argument('--meters', type=int, help='Simulate the first N meters (default: all)')
+    parser.add_argument('--rate', type=float, default=10000, help='Target readings/s (0 = as fast as possible)')
+    parser.add_argument('--duration', type=float, help='Stop after this many seconds')
+    parser.add_argument('--days', type=int, help='Stop after this many simulated days')
+    parser.add_argument('--start-date', help='First simulated day YYYY-MM-DD (default: day after the dataset)')
+    parser.add_argument('--format', choices=FORMATS, default='ndjson')
+    parser.add_argument('--file-rows', type=int, default=10000, help='Roll files at this many readings')
+    parser.add_argument('--file-seconds', type=float, default=1.0, help='Roll files at this age')
+    parser.add_argument('--late-fraction', type=float, default=0.02, help='Share of readings held back')
+    parser.add_argument('--max-late-days', type=int, default=3)
+    parser.add_argument('--duplicate-fraction', type=float, default=0.01, help='Share of readings re-sent')
+    parser.add_argument('--seed', type=int, default=generate_data.SEED)
+    args = parser.parse_args()
+    if args.duration is None and args.days is None:
+        parser.error('pass --duration and/or --days')
+    if args.format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error('--format parquet needs pyarrow (pip install pyarrow)')
+
+    meter_ids, base_usage = load_meters(args.data_dir, args.meters)
+    first_day = datetime.strptime(args.start_date, '%Y-%m-%d').date() if args.start_date else start_date(args.data_dir)
+    writer = LandingWriter(args.landing_dir, args.format, args.file_rows, args.file_seconds)
+
+    print("\n" + "="*80)
+    print("SIO METER TELEMETRY SIMULATOR")
+    print("="*80)
+    print(f"\n📡 {len(meter_ids):,} meters from {first_day}, target {args.rate:,.0f} readings/s "
+          f"-> {args.landing_dir}/*.{args.format}")
+
+    stats = simulate(meter_ids, base_usage, first_day, writer, args.rate, args.duration, args.days, args.seed,
+                     args.late_fraction, args.max_late_days, args.duplicate_fraction)
+
+    print(f"\n✅ {stats['readings']:,} readings in {stats['seconds']:.2f}s: {stats['readings_per_sec']:,.0f} readings/s "
+          f"(target {args.rate:,.0f}, max lag {stats['max_lag_seconds'] * 1000:.0f} ms)")
+    print(f"  - {stats['days']} simulated days through {stats.get('last_day', '-')}")
+    print(f"  - {stats['on_time']:,} on time, {stats['late']:,} late, {stats['duplicates']:,} duplicates")
+    print(f"  - {stats['files']:,} files, {stats['bytes'] / 1e6:,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Vectorized synthetic weather for SIO regions
+Shared by generate_data.py (history) and add_weather_forecast.py (forecast)
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Saudi climate shape: hottest mid-July, wet season centred mid-January
+TEMP_ANNUAL_MEAN_C = 30.0
+TEMP_SEASONAL_AMPLITUDE_C = 11.5
+TEMP_PEAK_DAY = 200
+TEMP_NOISE_STD_C = 1.5
+TEMP_NOISE_PERSISTENCE = 0.8  # AR(1) coefficient day to day
+
+RAIN_PEAK_DAY = 15
+RAIN_MAX_PROBABILITY = 0.3
+RAIN_MEAN_MM = 2.0
+
+HUMIDITY_BASE_PERCENT = 55.0
+HUMIDITY_PER_DEGREE = 0.9
+WIND_MEAN_KMH = 15.0
+
+DAYS_PER_YEAR = 365.25
+
+
+def history_window(months, today=None):
+    """(start_date, days) covering the past N months up to and including today"""
+    today = today or datetime.now().date()
+    return today - timedelta(days=30 * months), 30 * months + 1
+
+
+def forecast_window(days_ahead, today=None):
+    """(start_date, days) covering the next N days starting tomorrow"""
+    today = today or datetime.now().date()
+    return today + timedelta(days=1), days_ahead
+
+
+def region_climate(region_ids, seed=42):
+    """Stable per-region temperature offset and wind scale, independent of date range"""
+    offsets = np.empty(len(region_ids))
+    wind_scale = np.empty(len(region_ids))
+    for i, region_id in enumerate(region_ids):
+        region_rng = np.random.default_rng([seed, int(region_id)])
+        offsets[i] = region_rng.uniform(-2.5, 2.5)
+        wind_scale[i] = region_rng.uniform(0.8, 1.2)
+    return offsets, wind_scale
+
+
+def ar1_noise(rng, days, columns, persistence, std):
+    """AR(1) noise for many series at once via FFT convolution with a truncated kernel"""
+    innovations = rng.normal(0.0, std * np.sqrt(1 - persistence ** 2), size=(days, columns))
+    if persistence <= 0 or days <= 1:
+        return innovations
+
+    # phi**k falls below 1e-6 quickly, so the truncated kernel is exact to float precision
+    kernel_length = min(days, int(np.ceil(np.log(1e-6) / np.log(persistence))) + 1)
+    kernel = persistence ** np.arange(kernel_length)
+    n = days + kernel_length - 1
+    spectrum = np.fft.rfft(innovations, n=n, axis=0) * np.fft.rfft(kernel, n=n)[:, None]
+    return np.fft.irfft(spectrum, n=n, axis=0)[:days]
+
+
+def generate_weather(region_ids, start_date, days, seed=42):
+    """Generate daily weather for every region over [start_date, start_date + days); empty when days <= 0"""
+    region_ids = np.asarray(list(region_ids), dtype=np.int64)
+    days = max(int(days), 0)
+    num_regions = len(region_ids)
+    rng = np.random.default_rng([seed, pd.Timestamp(start_date).toordinal(), days])
+
+    dates = np.datetime64(pd.Timestamp(start_date).date(), 'D') + np.arange(days)
+    day_of_year = (dates - dates.astype('datetime64[Y]')).astype(np.int64) + 1
+    phase = 2 * np.pi / DAYS_PER_YEAR
+
+    # Arrays are (days, regions)
+    offsets, wind_scale = region_climate(region_ids, seed)
+    seasonal = TEMP_ANNUAL_MEAN_C + TEMP_SEASONAL_AMPLITUDE_C * np.cos(phase * (day_of_year - TEMP_PEAK_DAY))
+    temp_avg = seasonal[:, None] + offsets[None, :] + ar1_noise(
+        rng, days, num_regions, TEMP_NOISE_PERSISTENCE, TEMP_NOISE_STD_C
+    )
+    temp_max = temp_avg + rng.uniform(2, 5, size=temp_avg.shape)
+    temp_min = temp_avg - rng.uniform(5, 10, size=temp_avg.shape)
+
+    rain_probability = RAIN_MAX_PROBABILITY * np.clip(np.cos(phase * (day_of_year - RAIN_PEAK_DAY)), 0, None)
+    rain_days = rng.random(temp_avg.shape) < rain_probability[:, None]
+    rainfall = np.where(rain_days, rng.exponential(RAIN_MEAN_MM, size=temp_avg.shape), 0.0)
+
+    humidity = HUMIDITY_BASE_PERCENT - HUMIDITY_PER_DEGREE * (temp_avg - 20) + 15 * rain_days
+    humidity = np.clip(humidity + ar1_noise(rng, days, num_regions, 0.6, 5.0), 10, 95)
+
+    wind = WIND_MEAN_KMH * wind_scale[None, :] + ar1_noise(rng, days, num_regions, 0.5, 4.0)
+    wind = np.clip(wind, 2, 45)
+
+    # Region-major row order to match the original generators
+    return pd.DataFrame({
+        'REGION_ID': np.repeat(region_ids, days),
+        'WEATHER_DATE': np.tile(dates, num_regions),
+        'TEMPERATURE_MAX_C': temp_max.T.ravel().round(2),
+        'TEMPERATURE_MIN_C': temp_min.T.ravel().round(2),
+        'TEMPERATURE_AVG_C': temp_avg.T.ravel().round(2),
+        'RAINFALL_MM': rainfall.T.ravel().round(2),
+        'HUMIDITY_PERCENT': humidity.T.ravel().round(2),
+        'WIND_SPEED_KMH': wind.T.ravel().round(2)
+    })
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Exercise app/agent_client.py against tests/mock_agent_server.py
+Starts the mock agent in-process with simulated orchestration latency, then measures:
+- repeat traffic: the test_agent.py questions asked several times with case/punctuation variants
+- a burst of concurrent identical questions (should make one upstream call), and waiters whose leader fails or
+  outlives their timeout
+- uncacheable answers (send_email tool) and freshness-token invalidation
+- streamed answers (time to first delta, cached replay) and history trimming
+  python tests/benchmark_agent_cache.py --delay-ms 300 --rounds 5 --burst 16
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import agent_client  # noqa: E402
+from mock_agent_server import AGENT_PATH, start_server  # noqa: E402
+
+QUESTIONS = [
+    "Which customers have unpaid bills?",
+    "What is the water resource status across all regions?",
+    "Predict water demand for Riyadh for the next 7 days",
+    "Show me regional efficiency analysis",
+    "What are the water usage trends in the Eastern Province?",
+    "Which regions need water resource optimization?",
+]
+
+
+def variants(question):
+    """The same question as users actually type it"""
+    return [question, question.upper(), f"  {question.rstrip('?')}  ", question.replace(' ', '  ') + '!!']
+
+
+def check(condition, label, failures):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+def main():
+    """Run the cache scenarios and print hit rate, coalescing and latency"""
+    parser = argparse.ArgumentParser(description='Agent client cache benchmark against the mock agent')
+    parser.add_argument('--delay-ms', type=float, default=300, help='Simulated agent orchestration latency')
+    parser.add_argument('--rounds', type=int, default=5, help='Passes over the question variants')
+    parser.add_argument('--burst', type=int, default=16, help='Concurrent identical requests')
+    parser.add_argument('--delta-ms', type=float, default=10, help='Gap between streamed text deltas')
+    parser.add_argument('--index-dir', default=None)
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO AGENT CLIENT - CACHE BENCHMARK")
+    print("="*80)
+
+    server = start_server(0, args.index_dir, args.delay_ms, args.delta_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}{AGENT_PATH}"
+    failures = []
+
+    # 1. Repeat traffic
+    client = agent_client.AgentClient(url)
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for question in QUESTIONS:
+            for variant in variants(question):
+                client.ask(variant)
+    elapsed = time.perf_counter() - start
+    metrics = client.metrics()
+    uncached_estimate = metrics['requests'] * args.delay_ms / 1000
+    print(f"\n🔁 Repeat traffic: {metrics['requests']} requests in {elapsed:.2f}s "
+          f"(~{uncached_estimate:.0f}s without the cache)")
+    print(f"   hit rate {metrics['hit_rate']:.1%}, {metrics['misses']} upstream calls")
+    print(f"   hit p50/p95 {metrics['hit_p50_ms']:.3f}/{metrics['hit_p95_ms']:.3f} ms, "
+          f"miss p50/p95 {metrics['miss_p50_ms']:.1f}/{metrics['miss_p95_ms']:.1f} ms")
+    check(metrics['misses'] == len(QUESTIONS), 'one upstream call per distinct question', failures)
+
+    # 2. Concurrent identical requests
+    client = agent_client.AgentClient(url)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.burst) as pool:
+        results = list(pool.map(lambda _: client.ask(QUESTIONS[0])[0], range(args.burst)))
+    elapsed = time.perf_counter() - start
+    metrics = client.metrics()
+    print(f"\n⚡ Burst: {args.burst} concurrent requests in {elapsed * 1000:.0f} ms, "
+          f"{metrics['misses']} upstream, {metrics['coalesced']} coalesced")
+    check(metrics['misses'] == 1, 'burst coalesced into one upstream call', failures)
+    check(all(result == results[0] for result in results), 'every waiter got the same answer', failures)
+
+    # A waiter whose leader outlives the timeout calls upstream itself; a failed leader is not a hit
+    client = agent_client.AgentClient(url, timeout=max(args.delay_ms, 100) / 1000 * 3)
+    post, leading, hold = client._post, threading.Event(), [client.timeout * 2]
+
+    def slow_leader(messages):
+        if not leading.is_set():
+            leading.set()
+            time.sleep(hold[0])
+            raise agent_client.AgentError(504, 'leader timed out')
+        return post(messages)
+
+    client._post = slow_leader
+    with ThreadPoolExecutor(1) as pool:
+        leader = pool.submit(client.ask, QUESTIONS[2])
+        leading.wait()
+        waiter, waiter_cached = client.ask(QUESTIONS[2])
+        try:
+            leader.result()
+        except agent_client.AgentError:
+            pass
+    metrics = client.metrics()
+    check(agent_client.message_text(waiter) and not waiter_cached and metrics['coalesced'] == 0,
+          'waiter past its timeout gets its own answer, not a coalesced hit', failures)
+
+    client = agent_client.AgentClient(url)
+    client._post, hold[0] = slow_leader, 0.3
+    leading.clear()
+    with ThreadPoolExecutor(1) as pool:
+        leader = pool.submit(client.ask, QUESTIONS[3])
+        leading.wait()
+        time.sleep(0.05)
+        try:
+            client.ask(QUESTIONS[3])
+            waiter_error = None
+        except agent_client.AgentError as e:
+            waiter_error = e
+    metrics = client.metrics()
+    check(waiter_error is not None and (metrics['coalesced'], metrics['hits'], metrics['errors']) == (0, 0, 1),
+          "leader's error reaches the waiter without counting as a hit", failures)
+
+    # 3. Uncacheable tools and data freshness
+    check(agent_client.ttl_for({'knowledge_base', 'send_email'}) == 0, 'send_email answers are never cached', failures)
+    check(agent_client.ttl_for({'knowledge_base', 'irrigation_data'}) == agent_client.TOOL_TTL_SECONDS['irrigation_data'],
+          'shortest tool TTL wins', failures)
+
+    clock = [0.0]
+    version = ['load-1']
+    client = agent_client.AgentClient(url, freshness=lambda: version[0], freshness_interval=0, clock=lambda: clock[0])
+    client.ask(QUESTIONS[1])
+    client.ask(QUESTIONS[1])
+    version[0] = 'load-2'
+    client.ask(QUESTIONS[1])
+    clock[0] += agent_client.TOOL_TTL_SECONDS['knowledge_base'] + 1
+    client.ask(QUESTIONS[1])
+    metrics = client.metrics()
+    check((metrics['hits'], metrics['misses']) == (1, 3), 'new data version and expired TTL both miss', failures)
+
+    # 4. Streaming
+    client = agent_client.AgentClient(url)
+    for attempt in ('agent', 'cache'):
+        start = time.perf_counter()
+        first_delta, events = None, []
+        for event in client.stream([{'role': 'user', 'content': [{'type': 'text', 'text': QUESTIONS[0]}]}]):
+            if event['type'] == 'text' and first_delta is None:
+                first_delta = (time.perf_counter() - start) * 1000
+            events.append(event)
+        total = (time.perf_counter() - start) * 1000
+        deltas = [event for event in events if event['type'] == 'text']
+        print(f"\n📡 Stream ({attempt}): first delta {first_delta:.0f} ms, {len(deltas)} deltas, done {total:.0f} ms, "
+              f"tools {[event['name'] for event in events if event['type'] == 'tool_use']}")
+    expected, _ = agent_client.AgentClient(url).ask(QUESTIONS[0])
+    check(''.join(event['text'] for event in deltas) == agent_client.message_text(expected),
+          'streamed text matches the non-streaming answer', failures)
+    check(events[-1]['type'] == 'done' and events[-1]['cached'], 'second stream replayed from the cache', failures)
+
+    history = []
+    for i in range(40):
+        history.append({'role': 'user' if i % 2 == 0 else 'assistant', 'content': [{'type': 'text', 'text': 'x' * 400}]})
+    trimmed = agent_client.trim_history(history, 1000)
+    check(sum(map(agent_client.estimate_tokens, trimmed)) <= 1000 and trimmed[0]['role'] == 'user'
+          and trimmed[-1] is history[-1], 'history trimmed to the token budget from a user turn', failures)
+
+    server.shutdown()
+    print(f"\n{'🎉 All checks passed' if not failures else f'⚠️ {len(failures)} check(s) failed'}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
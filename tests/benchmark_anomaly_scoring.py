@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Throughput and accuracy of the persisted anomaly detectors (data_engineering/anomaly_scoring.py)
+Works on a copy of a local DuckDB stand-in with the feature store built. Trains the segment detectors through
+--days before the last featurized day, replays that many nightly SCORE_NEW_READINGS runs, and compares with
+the per-customer retrain-and-score done by ANALYZE_WATER_USAGE_ANOMALIES. Precision/recall use the injected
+USAGE_ANOMALY_LABELS.
+  python data_engineering/feature_store.py --local data/sio_local.duckdb
+  python tests/benchmark_anomaly_scoring.py --local data/sio_local.duckdb --days 30
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import anomaly_scoring  # noqa: E402
+import local_backend  # noqa: E402
+from inject_anomalies import ANOMALY_TYPES  # noqa: E402
+from score_anomaly_detector import precision_recall  # noqa: E402
+from sql_handlers import load_handler  # noqa: E402
+
+PROCEDURE_FILE = 'cortex/create_ml_anomaly_procedure.sql'
+
+LABELED_SCORES_SQL = f"""
+    SELECT s.METER_ID, s.READING_DATE, s.IS_ANOMALY, s.RISK_SCORE, l.ANOMALY_TYPE
+    FROM {anomaly_scoring.SCORE_TABLE} s
+    LEFT JOIN SIO_DB.DATA.USAGE_ANOMALY_LABELS l
+      ON l.METER_ID = s.METER_ID AND s.READING_DATE BETWEEN l.START_DATE AND l.END_DATE
+    WHERE s.READING_DATE > '{{since}}'::DATE
+"""
+
+
+def main():
+    """Train, replay nightly scoring runs and report readings/s, precision and recall"""
+    parser = argparse.ArgumentParser(description='Online anomaly scoring benchmark (local DuckDB stand-in)')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default=os.path.join(REPO_ROOT, 'data', 'sio_local.duckdb'))
+    parser.add_argument('--days', type=int, default=30, help='Nightly scoring runs to replay')
+    parser.add_argument('--baseline-customers', type=int, default=100, help='Customers for the per-customer retrain baseline')
+    parser.add_argument('--months-back', type=int, default=6, help='Baseline look-back, like the procedure')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO ONLINE ANOMALY SCORING - BENCHMARK")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='sio_anomaly_')
+    try:
+        path = os.path.join(workdir, 'sio_local.duckdb')
+        shutil.copy(args.local, path)
+        con = local_backend.connect(path)
+        anomaly_scoring.setup_local(con)
+        con.execute(f'DELETE FROM {anomaly_scoring.DETECTOR_TABLE}')
+        con.execute(f'DELETE FROM {anomaly_scoring.SCORE_TABLE}')
+        session = local_backend.LocalSession(con)
+
+        last_day = anomaly_scoring.latest_feature_date(session)
+        if last_day is None:
+            print("⚠️  No featurized days - run data_engineering/feature_store.py first")
+            sys.exit(1)
+        cutoff = (pd.Timestamp(last_day) - pd.Timedelta(days=args.days)).date()
+
+        # 1. Weekly retrain
+        trained = anomaly_scoring.train_detectors(session, cutoff)
+        print(f"\n🌲 Trained {len(trained['segments'])} segment detectors through {cutoff} in {trained['seconds']:.2f}s "
+              f"({sum(trained['segments'].values()):,} training rows)")
+
+        # 2. Nightly runs: each scores only the day that arrived since the last run
+        backfill = anomaly_scoring.score_new_readings(session, cutoff)
+        print(f"   Initial build: {backfill['rows']:,} meter-days in {backfill['seconds']:.2f}s "
+              f"({backfill['readings_per_sec']:,.0f} readings/s)")
+        runs = [anomaly_scoring.score_new_readings(session, cutoff + pd.Timedelta(days=day).to_pytimedelta())
+                for day in range(1, args.days + 1)]
+        rows = sum(run['rows'] for run in runs)
+        seconds = sum(run['seconds'] for run in runs)
+        score_seconds = sum(run['score_seconds'] for run in runs)
+        print(f"\n🌙 {len(runs)} nightly runs scored {rows:,} meter-days: "
+              f"median run {np.median([run['seconds'] for run in runs]) * 1000:.0f} ms")
+        print(f"   {rows / seconds:,.0f} readings/s end to end, {rows / max(score_seconds, 1e-9):,.0f} readings/s in the detectors")
+        rerun = anomaly_scoring.score_new_readings(session, last_day)
+        print(f"   Re-run with nothing new: {rerun['rows']} rows in {rerun['seconds'] * 1000:.0f} ms")
+
+        # 3. Accuracy on the replayed days
+        scored = session.sql(LABELED_SCORES_SQL.format(since=cutoff)).to_pandas()
+        truth = scored['ANOMALY_TYPE'].notna().to_numpy()
+        flagged = scored['IS_ANOMALY'].astype(bool).to_numpy()
+        precision, recall, f1 = precision_recall(flagged, truth)
+        print(f"\n🎯 Precision {precision:.3f}, recall {recall:.3f}, F1 {f1:.3f} "
+              f"({flagged.sum():,} flagged, {truth.sum():,} labeled anomalous days)")
+        for anomaly_type in ANOMALY_TYPES:
+            days = (scored['ANOMALY_TYPE'] == anomaly_type).to_numpy()
+            if days.any():
+                print(f"   {anomaly_type:<20} day recall {flagged[days].mean():.3f} ({days.sum():,} days)")
+
+        # 4. Baseline: retrain per customer on every analysis
+        handler = load_handler(PROCEDURE_FILE, 'ANALYZE_WATER_USAGE_ANOMALIES')
+        since = (pd.Timestamp(last_day) - pd.DateOffset(months=args.months_back)).date()
+        usage = con.execute(
+            f"SELECT CUSTOMER_ID, FEATURE_DATE, VOLUME_M3, TEMPERATURE_C, FLOW_RATE_M3_H, PRESSURE_BAR "
+            f"FROM {anomaly_scoring.METER_TABLE} WHERE FEATURE_DATE > '{since}' "
+            f"AND CUSTOMER_ID IN (SELECT CUSTOMER_ID FROM SIO_DB.DATA.CUSTOMERS ORDER BY CUSTOMER_ID LIMIT {args.baseline_customers})"
+        ).df()
+        start = time.perf_counter()
+        for _, customer_rows in usage.groupby('CUSTOMER_ID'):
+            handler['detect_anomalies'](customer_rows)
+        baseline = time.perf_counter() - start
+        print(f"\n🐢 Per-customer retrain (ANALYZE_WATER_USAGE_ANOMALIES): {len(usage) / baseline:,.0f} readings/s "
+              f"over {usage['CUSTOMER_ID'].nunique()} customers, {args.months_back} months each")
+        con.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Benchmark the incremental AR aging refresh (data_engineering/ar_aging.py) on the local DuckDB stand-in
+Builds --bills bills over --customers customers with their payments, then:
+1. builds AR_AGING from scratch
+2. posts a day of payments and new bills, re-prices open bills in place (some down to what is already paid, so
+   billing closes them without a new payment), applies billing's status updates and refreshes incrementally
+3. advances the calendar with no new activity, so only bills crossing a bucket boundary are re-aged
+After every refresh AR_AGING must equal a full recompute from BILLING and PAYMENTS, which is also timed; from
+--min-compare-bills bills the incremental refresh after activity must beat that recompute.
+  python tests/benchmark_ar_aging.py --bills 10000000 --customers 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+
+import ar_aging  # noqa: E402
+import billing_engine  # noqa: E402
+import local_backend  # noqa: E402
+
+COMPARED_COLUMNS = ['CUSTOMER_ID', 'OPEN_BILLS', 'BALANCE_SAR', 'PAST_DUE_SAR', 'DAYS_0_30_SAR', 'DAYS_31_60_SAR',
+                    'DAYS_61_90_SAR', 'DAYS_90_PLUS_SAR', 'OLDEST_DUE_DATE']
+
+# What TAB 4 would otherwise compute on every rerun: every bill against every payment
+FULL_RECOMPUTE_SQL = """
+    WITH paid AS (
+        SELECT BILL_ID, SUM(AMOUNT_PAID_SAR) AS PAID_SAR
+        FROM SIO_DB.DATA.PAYMENTS
+        WHERE PAYMENT_STATUS = 'COMPLETED'
+        GROUP BY BILL_ID
+    ),
+    open_bills AS (
+        SELECT b.CUSTOMER_ID, b.DUE_DATE, DATEDIFF(day, b.DUE_DATE, '{as_of}'::DATE) AS DAYS_PAST_DUE,
+               GREATEST(b.TOTAL_AMOUNT_SAR - COALESCE(p.PAID_SAR, 0), 0) AS BALANCE_SAR
+        FROM SIO_DB.DATA.BILLING b
+        LEFT JOIN paid p ON p.BILL_ID = b.BILL_ID
+        WHERE b.BILL_STATUS <> 'PAID'
+    )
+    SELECT CUSTOMER_ID, COUNT(*) AS OPEN_BILLS, SUM(BALANCE_SAR) AS BALANCE_SAR,
+           SUM(IFF(DAYS_PAST_DUE > 0, BALANCE_SAR, 0)) AS PAST_DUE_SAR,
+           SUM(IFF(DAYS_PAST_DUE <= 30, BALANCE_SAR, 0)) AS DAYS_0_30_SAR,
+           SUM(IFF(DAYS_PAST_DUE BETWEEN 31 AND 60, BALANCE_SAR, 0)) AS DAYS_31_60_SAR,
+           SUM(IFF(DAYS_PAST_DUE BETWEEN 61 AND 90, BALANCE_SAR, 0)) AS DAYS_61_90_SAR,
+           SUM(IFF(DAYS_PAST_DUE > 90, BALANCE_SAR, 0)) AS DAYS_90_PLUS_SAR,
+           MIN(DUE_DATE) AS OLDEST_DUE_DATE
+    FROM open_bills
+    WHERE BALANCE_SAR > 0
+    GROUP BY CUSTOMER_ID
+"""
+
+
+def check(condition, label, failures):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+def build_database(customers, bills, as_of):
+    """In-memory SIO_DB with monthly bills up to as_of: older months mostly paid, some partially"""
+    con = local_backend.connect()
+    local_backend.setup_database(con)
+    months = max(bills // customers, 1)
+
+    con.execute(f"INSERT INTO CUSTOMERS (CUSTOMER_ID, CUSTOMER_NAME, CUSTOMER_TYPE, REGION_ID) "
+                f"SELECT i + 1, 'Farm ' || i, 'AGRICULTURAL', 1 + i % 8 FROM range({customers}) t(i)")
+    # Month m of customer c; the newest month is billed on as_of, the oldest months - 1 months before
+    con.execute(f"""
+        INSERT INTO BILLING (BILL_ID, CUSTOMER_ID, BILLING_MONTH, USAGE_VOLUME_M3, USAGE_CHARGE_SAR,
+                             TOTAL_AMOUNT_SAR, DUE_DATE, BILL_STATUS)
+        WITH bills AS (
+            SELECT m.i * {customers} + c.i + 1 AS BILL_ID, c.i + 1 AS CUSTOMER_ID,
+                   DATE_TRUNC('month', DATE '{as_of}') - INTERVAL ({months - 1} - m.i) MONTH AS BILLING_MONTH,
+                   {months - 1} - m.i AS AGE_MONTHS,
+                   50 + hash(c.i * 31 + m.i) % 5000 / 10.0 AS TOTAL_AMOUNT_SAR
+            FROM range({months}) m(i), range({customers}) c(i)
+        )
+        SELECT BILL_ID, CUSTOMER_ID, BILLING_MONTH, TOTAL_AMOUNT_SAR, TOTAL_AMOUNT_SAR - 50, TOTAL_AMOUNT_SAR,
+               BILLING_MONTH + INTERVAL {billing_engine.DUE_DAYS} DAY,
+               CASE WHEN hash(BILL_ID) % 100 < LEAST(40 + 20 * AGE_MONTHS, 95) THEN 'PAID'
+                    WHEN BILLING_MONTH + INTERVAL {billing_engine.DUE_DAYS} DAY < DATE '{as_of}' THEN 'OVERDUE'
+                    ELSE 'PENDING' END
+        FROM bills
+    """)
+    # Paid bills in full; one in ten open bills partially
+    con.execute("""
+        INSERT INTO PAYMENTS (PAYMENT_ID, BILL_ID, PAYMENT_DATE, AMOUNT_PAID_SAR, PAYMENT_METHOD, PAYMENT_STATUS)
+        SELECT ROW_NUMBER() OVER (), BILL_ID, DUE_DATE - INTERVAL 10 DAY,
+               CASE WHEN BILL_STATUS = 'PAID' THEN TOTAL_AMOUNT_SAR ELSE ROUND(TOTAL_AMOUNT_SAR * 0.4, 2) END,
+               'ONLINE', 'COMPLETED'
+        FROM BILLING
+        WHERE BILL_STATUS = 'PAID' OR hash(BILL_ID * 7) % 10 = 0
+    """)
+    ar_aging.setup_local(con)
+    return con, local_backend.LocalSession(con)
+
+
+def post_activity(con, changes, as_of):
+    """A day of activity: payments on open bills (half in full), new bills, late-reading re-pricing, then billing's
+    status updates"""
+    con.execute(f"""
+        INSERT INTO PAYMENTS (PAYMENT_ID, BILL_ID, PAYMENT_DATE, AMOUNT_PAID_SAR, PAYMENT_METHOD, PAYMENT_STATUS)
+        SELECT (SELECT MAX(PAYMENT_ID) FROM PAYMENTS) + ROW_NUMBER() OVER (), BILL_ID, DATE '{as_of}',
+               CASE WHEN ROW_NUMBER() OVER () % 2 = 0 THEN TOTAL_AMOUNT_SAR
+                    ELSE ROUND(TOTAL_AMOUNT_SAR * 0.25, 2) END,
+               'BANK_TRANSFER', 'COMPLETED'
+        FROM (SELECT BILL_ID, TOTAL_AMOUNT_SAR FROM BILLING WHERE BILL_STATUS <> 'PAID'
+              ORDER BY hash(BILL_ID + {changes}) LIMIT {changes})
+    """)
+    con.execute(f"""
+        INSERT INTO BILLING (BILL_ID, CUSTOMER_ID, BILLING_MONTH, USAGE_VOLUME_M3, USAGE_CHARGE_SAR,
+                             TOTAL_AMOUNT_SAR, DUE_DATE, BILL_STATUS)
+        SELECT (SELECT MAX(BILL_ID) FROM BILLING) + i + 1, 1 + hash(i) % (SELECT MAX(CUSTOMER_ID) FROM CUSTOMERS),
+               DATE_TRUNC('month', DATE '{as_of}'), 300, 250, 300, DATE '{as_of}' + INTERVAL 45 DAY, 'PENDING'
+        FROM range({max(changes // 10, 1)}) t(i)
+    """)
+    # Late readings re-price open bills in place; partly paid ones re-priced down to what was paid get closed
+    con.execute(f"""
+        UPDATE BILLING
+        SET TOTAL_AMOUNT_SAR = CASE WHEN hash(BILL_ID * 5) % 2 = 0 THEN TOTAL_AMOUNT_SAR + 12.5
+                                    ELSE ROUND(TOTAL_AMOUNT_SAR * 0.4, 2) END
+        WHERE BILL_STATUS <> 'PAID'
+          AND BILL_ID IN (SELECT BILL_ID FROM BILLING WHERE BILL_STATUS <> 'PAID'
+                          ORDER BY hash(BILL_ID * 3) LIMIT {max(changes // 10, 1)})
+    """)
+    session = local_backend.LocalSession(con)
+    session.sql(billing_engine.APPLY_PAYMENTS_SQL).collect()
+    session.sql(billing_engine.AGE_BILLS_SQL.format(as_of=as_of)).collect()
+
+
+def compare(session, as_of):
+    """Seconds for a full recompute, and whether AR_AGING matches it"""
+    start = time.perf_counter()
+    expected = session.sql(FULL_RECOMPUTE_SQL.format(as_of=as_of)).to_pandas()
+    seconds = time.perf_counter() - start
+    actual = session.sql(f'SELECT * FROM {ar_aging.AGING_TABLE}').to_pandas()[COMPARED_COLUMNS]
+
+    def normalized(df):
+        df = df.sort_values('CUSTOMER_ID', ignore_index=True)
+        df['OLDEST_DUE_DATE'] = pd.to_datetime(df['OLDEST_DUE_DATE'])
+        amounts = [column for column in COMPARED_COLUMNS if column.endswith('_SAR')]
+        df[amounts] = df[amounts].astype(float).round(2)
+        return df.astype({'CUSTOMER_ID': 'int64', 'OPEN_BILLS': 'int64'})
+
+    return seconds, normalized(actual).equals(normalized(expected[COMPARED_COLUMNS]))
+
+
+def main():
+    """Full build, incremental refresh after activity and after the calendar moves, each checked"""
+    parser = argparse.ArgumentParser(description='Incremental AR aging on the local stand-in')
+    parser.add_argument('--bills', type=int, default=10_000_000)
+    parser.add_argument('--customers', type=int, default=1_000_000)
+    parser.add_argument('--changes', type=int, default=20_000, help='Payments posted before the incremental run')
+    parser.add_argument('--as-of', default='2026-10-01')
+    parser.add_argument('--max-seconds', type=float, default=10.0, help='Fail if an incremental refresh is slower')
+    parser.add_argument('--min-compare-bills', type=int, default=1_000_000,
+                        help='From this many bills, the refresh after activity must beat a full recompute')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO ACCOUNTS RECEIVABLE AGING - BENCHMARK")
+    print("="*80)
+
+    failures = []
+    start = time.perf_counter()
+    con, session = build_database(args.customers, args.bills, args.as_of)
+    bills = billing_engine.affected_rows(session.sql('SELECT COUNT(*) FROM BILLING').collect())
+    payments = billing_engine.affected_rows(session.sql('SELECT COUNT(*) FROM PAYMENTS').collect())
+    print(f"\n📊 Built {bills:,} bills and {payments:,} payments for {args.customers:,} customers "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    def report(label, stats, as_of):
+        recompute_seconds, matches = compare(session, as_of)
+        aged = session.sql(f'SELECT COUNT(*) AS CUSTOMERS FROM {ar_aging.AGING_TABLE}').to_pandas()['CUSTOMERS'][0]
+        print(f"\n📒 {label} as of {stats['as_of']}: {stats['bills']:,} bills → {stats['customers']:,} customers "
+              f"re-aggregated in {stats['seconds']:.2f}s ({aged:,} customers with an open balance; "
+              f"full recompute {recompute_seconds:.2f}s)")
+        print("  - Timings: " + ', '.join(f'{name} {seconds:.3f}s' for name, seconds in stats['timings'].items()))
+        check(matches, f'{label}: AR_AGING equals a full recompute from BILLING and PAYMENTS', failures)
+        return recompute_seconds
+
+    # 1. First run: every bill
+    stats = ar_aging.run_local(session, args.as_of)
+    report('Initial build', stats, args.as_of)
+    check(stats['bills'] == bills, 'initial build derives every bill', failures)
+
+    # 2. A day of payments and bills
+    next_day = (pd.Timestamp(args.as_of) + pd.Timedelta(days=1)).date().isoformat()
+    post_activity(con, args.changes, next_day)
+    stats = ar_aging.run_local(session, next_day)
+    recompute_seconds = report('After activity', stats, next_day)
+    check(stats['seconds'] < args.max_seconds, f'incremental refresh under {args.max_seconds:g}s', failures)
+    # Locally, capture still diffs the open bills; the Snowflake streams read only the changes
+    print(f"  - Incremental {stats['seconds']:.2f}s ({stats['timings']['capture']:.2f}s capture) "
+          f"vs {recompute_seconds:.2f}s for a full recompute")
+    if bills >= args.min_compare_bills:
+        check(stats['seconds'] < recompute_seconds, 'incremental refresh beats a full recompute', failures)
+    check(stats['customers'] < args.customers / 2, 'only a fraction of customers re-aggregated', failures)
+
+    # 3. A month later with no activity: only bills crossing 1/31/61/91 days past due move
+    later = (pd.Timestamp(next_day) + pd.Timedelta(days=30)).date().isoformat()
+    stats = ar_aging.run_local(session, later)
+    report('Calendar only', stats, later)
+    check(stats['bills'] == 0, 'no changed bills without activity', failures)
+    rerun = ar_aging.run_local(session, later)
+    check(rerun['customers'] == 0, 'a rerun on the same day re-ages nobody', failures)
+
+    con.close()
+    print(f"\n{'🎉 All checks passed' if not failures else f'⚠️ {len(failures)} check(s) failed'}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
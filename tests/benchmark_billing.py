@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark the incremental billing engine (data_engineering/billing_engine.py) on the local DuckDB stand-in
+Builds N customers with one metered month already billed, appends new readings, and times one run
+"""
+
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+
+import billing_engine  # noqa: E402
+import local_backend  # noqa: E402
+
+
+def build_database(customers, history_days, new_days, start='2026-08-01'):
+    """In-memory SIO_DB with billed history and a batch of unbilled readings"""
+    con = local_backend.connect()
+    local_backend.setup_database(con)
+
+    con.execute(f"INSERT INTO CUSTOMERS (CUSTOMER_NAME, REGION_ID) SELECT 'Farm ' || i, 1 + i % 8 FROM range({customers}) t(i)")
+    con.execute(f"INSERT INTO WATER_METERS (CUSTOMER_ID, METER_NUMBER, INSTALLATION_DATE) "
+                f"SELECT i + 1, 'WM-' || (i + 1), DATE '2020-01-01' FROM range({customers}) t(i)")
+    insert_usage = """
+        INSERT INTO WATER_USAGE (METER_ID, READING_DATE, VOLUME_M3, PRESSURE_BAR, FLOW_RATE_M3_H, TEMPERATURE_C)
+        SELECT m.i + 1, DATE '{start}' + INTERVAL (d.i) DAY, 100 + (m.i * 7 + d.i * 13) % 50, 3.5, 10, 30
+        FROM range({customers}) m(i), range({first}, {last}) d(i)
+    """
+    con.execute(insert_usage.format(start=start, customers=customers, first=0, last=history_days))
+
+    # Bill the history as PENDING and start the watermark after it, as a freshly created stream would
+    billing_engine.setup_local(con)
+    session = local_backend.LocalSession(con)
+    con.execute(f'DELETE FROM {billing_engine.WATERMARK_TABLE}')
+    con.execute(f'INSERT INTO {billing_engine.WATERMARK_TABLE} VALUES (0)')
+    billing_engine.run_local(session, start)
+
+    con.execute(insert_usage.format(start=start, customers=customers, first=history_days, last=history_days + new_days))
+    return con, session
+
+
+def main():
+    """Time one incremental billing pass and report customer-months per second"""
+    parser = argparse.ArgumentParser(description='Incremental billing throughput on the local stand-in')
+    parser.add_argument('--customers', type=int, default=100_000)
+    parser.add_argument('--history-days', type=int, default=45, help='Days already billed before the run')
+    parser.add_argument('--new-days', type=int, default=3, help='Days of new readings the run must bill')
+    parser.add_argument('--as-of', default='2026-09-20')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO INCREMENTAL BILLING - BENCHMARK")
+    print("="*80)
+
+    start = time.perf_counter()
+    con, session = build_database(args.customers, args.history_days, args.new_days)
+    print(f"\n📊 Built {args.customers:,} customers, "
+          f"{con.execute('SELECT COUNT(*) FROM WATER_USAGE').fetchone()[0]:,} readings in {time.perf_counter() - start:.1f}s")
+
+    stats = billing_engine.run_local(session, args.as_of)
+    print(f"\n💳 Run as of {stats['as_of']}: {stats['meter_months']:,} meter-months → "
+          f"{stats['customer_months']:,} customer-months "
+          f"({stats['inserted']:,} inserted, {stats['updated']:,} updated, {stats['aged_overdue']:,} aged)")
+    print(f"  - Timings: " + ', '.join(f'{name} {seconds:.3f}s' for name, seconds in stats['timings'].items()))
+    print(f"  - Total: {stats['seconds']:.2f}s → {stats['customer_months'] / max(stats['seconds'], 1e-9):,.0f} customer-months/s")
+
+    # A second run with nothing new should only touch statuses
+    idle = billing_engine.run_local(session, args.as_of)
+    print(f"  - Idle run (no new readings): {idle['seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
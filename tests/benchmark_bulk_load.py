@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Re-run behaviour of the bulk loader (data_engineering/bulk_load.py) on the local DuckDB stand-in
+Generates a small dataset, then:
+1. loads it and loads it again: the second run must skip every table
+2. a COPY that rejects a row of PAYMENTS (a leaf table split into chunks) is recorded as PARTIAL; the next run
+   reloads it in full
+3. a COPY that rejects a row of CUSTOMERS (a parent table whose ids WATER_METERS and BILLING reference) is recorded
+   as PARTIAL; the next run must refuse to reload it until setup_database.sql is re-run, and then load ids 1..N
+  python tests/benchmark_bulk_load.py --customers 300
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+
+import bulk_load  # noqa: E402
+import generate_data  # noqa: E402
+import local_backend  # noqa: E402
+
+TABLES = ['REGIONS', 'CUSTOMERS', 'BILLING', 'PAYMENTS']
+
+
+class RejectingTarget(bulk_load.LocalTarget):
+    """LocalTarget whose COPY drops the last row of the tables in reject, as ON_ERROR = CONTINUE would"""
+
+    def __init__(self, database_path, stage_dir):
+        super().__init__(database_path, stage_dir)
+        self.reject = set()
+
+    def copy(self, table, columns, chunk_names):
+        copied = super().copy(table, columns, chunk_names)
+        if table not in self.reject:
+            return copied
+        self.cursor().execute(f'DELETE FROM {table} WHERE rowid = (SELECT MAX(rowid) FROM {table})')
+        return {'rows_loaded': copied['rows_loaded'] - 1, 'errors_seen': 1,
+                'first_error': 'Numeric value is not recognized'}
+
+
+def check(condition, label, failures):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+def load(target, data_dir, tables=TABLES, force=False):
+    """bulk_load tables quietly; returns (results, totals)"""
+    return bulk_load.bulk_load(target, data_dir, tables=tables, threads=1, force=force, log=lambda *args: None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk loader re-runs after clean and partial loads')
+    parser.add_argument('--customers', type=int, default=300)
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO BULK LOAD RE-RUNS - BENCHMARK")
+    print("="*80)
+
+    failures = []
+    workdir = tempfile.mkdtemp(prefix='sio_bulk_load_')
+    try:
+        data_dir = os.path.join(workdir, 'data')
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_data.main(['--customers', str(args.customers), '--output-dir', data_dir])
+        target = RejectingTarget(os.path.join(workdir, 'sio_local.duckdb'), os.path.join(workdir, 'stage'))
+
+        # 1. Clean load, then a re-run
+        results, totals = load(target, data_dir)
+        rows = {name: target.row_count(name) for name in TABLES}
+        print(f"\n📦 Loaded {', '.join(f'{name} {count:,}' for name, count in rows.items())}")
+        check(all(results[name]['status'] == 'LOADED' for name in TABLES) and not totals['partial'],
+              'clean load records every table LOADED', failures)
+        results, _ = load(target, data_dir)
+        check(all(results[name].get('skipped') for name in TABLES), 're-run skips every loaded table', failures)
+
+        # 2. PARTIAL leaf table
+        target.reject = {'PAYMENTS'}
+        results, totals = load(target, data_dir, ['PAYMENTS'], force=True)
+        check(totals['partial'] == ['PAYMENTS'] and results['PAYMENTS']['rows_loaded'] == rows['PAYMENTS'] - 1,
+              'rejected PAYMENTS row is recorded as PARTIAL', failures)
+        target.reject = set()
+        results, totals = load(target, data_dir)
+        check(not results['PAYMENTS'].get('skipped') and results['PAYMENTS']['status'] == 'LOADED'
+              and target.row_count('PAYMENTS') == rows['PAYMENTS'] and not totals['partial'],
+              're-run reloads the PARTIAL leaf table in full', failures)
+
+        # 3. PARTIAL parent table
+        local_backend.setup_database(target.con)
+        target.reject = {'CUSTOMERS'}
+        _, totals = load(target, data_dir)
+        check(totals['partial'] == ['CUSTOMERS'], 'rejected CUSTOMERS row is recorded as PARTIAL', failures)
+        target.reject = set()
+        try:
+            load(target, data_dir)
+            refused = ''
+        except RuntimeError as e:
+            refused = str(e)
+        print(f"   re-run: {refused or 'no error'}")
+        check('CUSTOMERS' in refused and 'PARTIAL' in refused and 'setup_database.sql' in refused,
+              're-run refuses to reload the PARTIAL parent table without setup_database.sql', failures)
+        local_backend.setup_database(target.con)
+        _, totals = load(target, data_dir)
+        ids = target.con.execute('SELECT MIN(CUSTOMER_ID), MAX(CUSTOMER_ID), COUNT(*) FROM SIO_DB.DATA.CUSTOMERS').fetchone()
+        check(not totals['partial'] and ids == (1, rows['CUSTOMERS'], rows['CUSTOMERS']),
+              'after setup_database.sql the parent table reloads with ids 1..N', failures)
+        target.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'🎉 All checks passed' if not failures else f'⚠️ {len(failures)} check(s) failed'}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+End-to-end check of micro-batch ingestion (data_engineering/ingest_usage.py) on the local DuckDB stand-in
+Works on a copy of a local database with the feature store built:
+1. telemetry_simulator.py writes --days of new readings (late and duplicate readings included) to a temp landing
+   directory, ingested --max-files at a time; WATER_USAGE must hold exactly the last-written reading per meter-day
+2. the same files are delivered again: nothing may change
+3. the nightly feature refresh runs, then a second feed re-sends readings for already featurized days: their
+   meter-months are queued for billing and the rebuilt features must equal a full recompute
+  python tests/benchmark_ingestion.py --local data/sio_local.duckdb --days 30
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+
+import feature_store  # noqa: E402
+import ingest_usage  # noqa: E402
+import local_backend  # noqa: E402
+import telemetry_simulator  # noqa: E402
+from billing_engine import CHANGES_TABLE  # noqa: E402
+
+USAGE_COLUMNS = ['METER_ID', 'READING_DATE', 'VOLUME_M3', 'PRESSURE_BAR', 'FLOW_RATE_M3_H', 'TEMPERATURE_C']
+
+
+def check(condition, label, failures):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+def feed(session, landing_dir, first_day, days, seed, late_fraction=0.02, duplicate_fraction=0.01):
+    """Write a simulated feed for every meter in WATER_METERS into landing_dir"""
+    num_meters = int(session.sql('SELECT COUNT(*) FROM SIO_DB.DATA.WATER_METERS').collect()[0][0])
+    meter_ids, base_usage = telemetry_simulator.load_meters(os.path.join(landing_dir, 'no-dataset'), num_meters)
+    writer = telemetry_simulator.LandingWriter(landing_dir, file_rows=5000)
+    writer.run_id = f'{first_day:%Y%m%d}s{seed}'
+    return telemetry_simulator.simulate(meter_ids, base_usage, first_day, writer, rate=0, days=days, seed=seed,
+                                        late_fraction=late_fraction, duplicate_fraction=duplicate_fraction)
+
+
+def ingest_all(session, landing_dir, max_files):
+    """Ingest every pending file in batches; returns the per-batch stats"""
+    batches = []
+    while (stats := ingest_usage.run_local(session, landing_dir, max_files)) is not None:
+        batches.append(stats)
+    return batches
+
+
+def expected_usage(landing_dir):
+    """Last-written reading per meter-day across every landing file"""
+    readings = pd.concat(map(ingest_usage.read_landing_file, sorted(glob.glob(os.path.join(landing_dir, '*.ndjson')))))
+    readings = readings.sort_values(['EMITTED_AT', 'FILE_NAME'], kind='stable')
+    return readings.drop_duplicates(['METER_ID', 'READING_DATE'], keep='last')
+
+
+def stored_usage(con, since):
+    """WATER_USAGE rows after since, keyed like expected_usage"""
+    return con.execute(f"SELECT {', '.join(USAGE_COLUMNS)} FROM SIO_DB.DATA.WATER_USAGE WHERE READING_DATE > '{since}'").df()
+
+
+def same_rows(expected, actual):
+    """Both frames hold the same meter-days with the same volumes"""
+    merged = expected.assign(READING_DATE=pd.to_datetime(expected['READING_DATE'])).merge(
+        actual.assign(READING_DATE=pd.to_datetime(actual['READING_DATE'])),
+        on=['METER_ID', 'READING_DATE'], how='outer', suffixes=('_EXPECTED', '_STORED'), indicator=True
+    )
+    return (merged['_merge'] == 'both').all() and np.allclose(merged['VOLUME_M3_EXPECTED'], merged['VOLUME_M3_STORED'], atol=5e-4)
+
+
+def same_features(left, right):
+    """Equal feature tables up to floating-point summation order"""
+    try:
+        pd.testing.assert_frame_equal(left, right, check_exact=False, rtol=1e-9)
+        return True
+    except AssertionError:
+        return False
+
+
+def main():
+    """Run the three ingestion scenarios and report readings/s"""
+    parser = argparse.ArgumentParser(description='Micro-batch ingestion correctness and throughput (local DuckDB stand-in)')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default=os.path.join(REPO_ROOT, 'data', 'sio_local.duckdb'))
+    parser.add_argument('--days', type=int, default=30, help='Simulated days of new readings')
+    parser.add_argument('--max-files', type=int, default=2, help='Landing files per batch')
+    parser.add_argument('--correction-days', type=int, default=5, help='Featurized days re-sent by the second feed')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO MICRO-BATCH INGESTION - BENCHMARK")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='sio_ingest_')
+    failures = []
+    try:
+        path = os.path.join(workdir, 'sio_local.duckdb')
+        shutil.copy(args.local, path)
+        con = local_backend.connect(path)
+        ingest_usage.setup_local(con)
+        session = local_backend.LocalSession(con)
+        last_day = pd.Timestamp(feature_store.watermark(session, 'SIO_DB.DATA.WATER_USAGE', 'READING_DATE'))
+        if not local_backend.table_exists(con, 'METER_DAY_FEATURES', 'ML_ANALYTICS'):
+            print("⚠️  No feature store - run data_engineering/feature_store.py first")
+            sys.exit(1)
+
+        # 1. New readings with late and duplicate deliveries
+        landing = os.path.join(workdir, 'landing')
+        simulated = feed(session, landing, (last_day + pd.Timedelta(days=1)).date(), args.days, seed=1)
+        batches = ingest_all(session, landing, args.max_files)
+        rows = sum(batch['rows_received'] for batch in batches)
+        seconds = sum(batch['seconds'] for batch in batches)
+        print(f"\n📥 {simulated['readings']:,} readings ({simulated['late']:,} late, {simulated['duplicates']:,} duplicates) "
+              f"in {len(batches)} batches: {rows / seconds:,.0f} readings/s, median batch "
+              f"{np.median([batch['seconds'] for batch in batches]) * 1000:.0f} ms")
+        print(f"   {sum(b['inserted'] for b in batches):,} inserted, {sum(b['updated'] for b in batches):,} updated, "
+              f"{sum(b['duplicates'] for b in batches):,} duplicates dropped, {sum(b['late_rows'] for b in batches):,} late")
+        duplicates = con.execute('SELECT COUNT(*) FROM (SELECT METER_ID, READING_DATE FROM SIO_DB.DATA.WATER_USAGE '
+                                 'GROUP BY ALL HAVING COUNT(*) > 1)').fetchone()[0]
+        check(duplicates == 0, 'one reading per meter-day in WATER_USAGE', failures)
+        check(same_rows(expected_usage(landing), stored_usage(con, last_day.date())), 'stored readings are the last written', failures)
+
+        # 2. Re-delivery of the same files
+        totals = con.execute('SELECT COUNT(*), SUM(VOLUME_M3) FROM SIO_DB.DATA.WATER_USAGE').fetchone()
+        con.execute(f'DELETE FROM {ingest_usage.FILES_TABLE}')
+        replay = ingest_all(session, landing, args.max_files)
+        check(sum(b['inserted'] + b['updated'] for b in replay) == 0
+              and con.execute('SELECT COUNT(*), SUM(VOLUME_M3) FROM SIO_DB.DATA.WATER_USAGE').fetchone() == totals,
+              f'replaying {sum(b["files"] for b in replay)} files changes nothing', failures)
+
+        # 3. Corrections for featurized days
+        feature_store.refresh_features(session)
+        featurized = pd.Timestamp(feature_store.watermark(session, feature_store.METER_TABLE))
+        con.execute(f'DELETE FROM {CHANGES_TABLE}')
+        corrections = os.path.join(workdir, 'corrections')
+        correction_start = (featurized - pd.Timedelta(days=args.correction_days - 1)).date()
+        feed(session, corrections, correction_start, args.correction_days, seed=2, late_fraction=0, duplicate_fraction=0)
+        corrected = ingest_all(session, corrections, args.max_files)
+        rebuilt = [batch for batch in corrected if batch['features']]
+        print(f"\n🩹 {sum(b['updated'] for b in corrected):,} corrections for {correction_start} - {featurized.date()}: "
+              f"features rebuilt in {len(rebuilt)} batch(es), "
+              f"{sum(b['timings']['features'] for b in corrected):.2f}s")
+        queued = con.execute(f'SELECT COUNT(DISTINCT (METER_ID, BILLING_MONTH)) FROM {CHANGES_TABLE}').fetchone()[0]
+        expected_months = con.execute(
+            f"SELECT COUNT(DISTINCT (METER_ID, DATE_TRUNC('MONTH', READING_DATE))) FROM SIO_DB.DATA.WATER_USAGE "
+            f"WHERE READING_DATE >= '{correction_start}' AND READING_DATE <= '{featurized.date()}'"
+        ).fetchone()[0]
+        check(queued == expected_months, f'{queued:,} corrected meter-months queued for billing', failures)
+        check(all(batch['features']['through'] == featurized.date().isoformat() for batch in rebuilt)
+              and feature_store.watermark(session, feature_store.METER_TABLE) == featurized.date().isoformat(),
+              'late rebuilds did not featurize new days', failures)
+
+        snapshot = con.execute(f'SELECT * EXCLUDE (UPDATED_AT) FROM {feature_store.METER_TABLE} ORDER BY METER_ID, FEATURE_DATE').df()
+        feature_store.refresh_features(session, featurized.date(), (last_day - pd.Timedelta(days=30)).date())
+        recomputed = con.execute(f'SELECT * EXCLUDE (UPDATED_AT) FROM {feature_store.METER_TABLE} ORDER BY METER_ID, FEATURE_DATE').df()
+        check(same_features(snapshot, recomputed), 'rebuilt features equal a full recompute', failures)
+        con.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'🎉 All checks passed' if not failures else f'⚠️ {len(failures)} check(s) failed'}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
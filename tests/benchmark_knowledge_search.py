@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark the offline knowledge index (data_engineering/knowledge_index.py)
+Measures build time, query latency and recall on the policy questions in AGENT_TEST_SCENARIOS.md
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+
+from chunk_documents import chunk_documents  # noqa: E402
+from knowledge_index import build_index  # noqa: E402
+
+SCENARIOS_FILE = os.path.join(REPO_ROOT, 'AGENT_TEST_SCENARIOS.md')
+
+# Documents that should surface for each knowledge_base step in AGENT_TEST_SCENARIOS.md
+RELEVANT_DOCUMENTS = {
+    'Scenario 1': {'billing_payment_policy', 'faq_quick_reference'},
+    'Scenario 3': {'water_conservation_guidelines', 'subsidy_programs_guide'},
+    'Scenario 5': {'subsidy_programs_guide', 'faq_quick_reference'},
+    'Scenario 8': {'billing_payment_policy', 'faq_quick_reference'},
+    'Scenario 9': {'water_conservation_guidelines'},
+    'Scenario 10': {'emergency_water_protocols', 'water_allocation_policy'},
+    'Question 3': {'subsidy_programs_guide', 'faq_quick_reference'},
+    'Demo 2': {'billing_payment_policy', 'faq_quick_reference'},
+    'Demo 3': {'water_conservation_guidelines', 'subsidy_programs_guide'},
+}
+
+
+def load_policy_questions(path=SCENARIOS_FILE):
+    """Pull the questions with a knowledge_base step out of the scenarios document"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+
+    questions = {}
+    for number, question in re.findall(r'### \*\*Scenario (\d+):.*?\*\*Question:\*\* "(.+?)"', text, re.DOTALL):
+        questions[f'Scenario {number}'] = question
+    for number, question in re.findall(r'### \*\*Question (\d+):.*?\*\*User:\*\* "(.+?)"', text, re.DOTALL):
+        questions[f'Question {number}'] = question
+    for number, question in re.findall(r'^(\d+)\. \*\*[^*]+\*\* \([^)]*\): "(.+?)"', text, re.MULTILINE):
+        questions[f'Demo {number}'] = question
+
+    return [(label, questions[label], relevant) for label, relevant in RELEVANT_DOCUMENTS.items() if label in questions]
+
+
+def replicate_chunks(chunks_df, copies):
+    """Grow the corpus by repeating it so latency can be measured at larger index sizes"""
+    if copies <= 1:
+        return chunks_df
+    frames = []
+    for copy in range(copies):
+        frame = chunks_df.copy()
+        frame['CHUNK_ID'] = frame['CHUNK_ID'] + f'_r{copy}'
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    """Run the retrieval benchmark and print latency percentiles and recall@k"""
+    parser = argparse.ArgumentParser(description='Latency and recall benchmark for the offline knowledge index')
+    parser.add_argument('--documents-dir', default=os.path.join(REPO_ROOT, 'documents'))
+    parser.add_argument('--limit', type=int, default=5, help='k for recall@k')
+    parser.add_argument('--repeat', type=int, default=200, help='Timed runs per question')
+    parser.add_argument('--replicate', type=int, default=1, help='Repeat the corpus N times (latency only - duplicates crowd recall)')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO KNOWLEDGE SEARCH - RETRIEVAL BENCHMARK")
+    print("="*80)
+
+    questions = load_policy_questions()
+    chunks_df, _ = chunk_documents(args.documents_dir)
+    chunks_df = replicate_chunks(chunks_df, args.replicate)
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        start = time.perf_counter()
+        index = build_index(chunks_df, index_dir)
+        build_seconds = time.perf_counter() - start
+        print(f"\n📚 Index: {index.meta['num_chunks']:,} chunks, {index.meta['num_terms']:,} terms, "
+              f"{index.meta['num_postings']:,} postings, built in {build_seconds:.3f}s")
+
+        latencies = []
+        hits = 0
+        reciprocal_ranks = []
+
+        print(f"\n{'Question':<14}{'Hit@' + str(args.limit):<8}{'Rank':<6}Top result")
+        for label, question, relevant in questions:
+            results = index.search(question, args.limit)
+            ranks = [rank for rank, hit in enumerate(results, 1) if hit['DOCUMENT_ID'] in relevant]
+            first_rank = ranks[0] if ranks else None
+            hits += bool(ranks)
+            reciprocal_ranks.append(1 / first_rank if first_rank else 0.0)
+
+            top = f"{results[0]['DOCUMENT_ID']} → {results[0]['SECTION']}" if results else '-'
+            print(f"{label:<14}{'✅' if ranks else '❌':<8}{first_rank or '-':<6}{top[:60]}")
+
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                index.search(question, args.limit)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        latencies = np.array(latencies)
+        print("\n" + "="*80)
+        print("RESULTS")
+        print("="*80)
+        print(f"Recall@{args.limit}: {hits}/{len(questions)} ({hits / len(questions) * 100:.0f}%)")
+        print(f"MRR: {np.mean(reciprocal_ranks):.3f}")
+        print(f"Latency (ms): p50 {np.percentile(latencies, 50):.3f}, "
+              f"p95 {np.percentile(latencies, 95):.3f}, p99 {np.percentile(latencies, 99):.3f}")
+        print(f"Throughput: {1000 / latencies.mean():,.0f} queries/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Throughput and accuracy of the per-meter forecasts (data_engineering/meter_forecast.py)
+Works on a copy of a local DuckDB stand-in with the feature store built:
+1. refreshes METER_FORECAST for every active meter (the batched local path) and checks one full horizon per meter
+2. replays the Snowflake execution - one MeterForecastUDTF.end_partition call per METER_ID partition - and
+   checks it matches the batch
+3. backtests the last --horizon featurized days against a seasonal-naive forecast (same weekday last week)
+4. forecasts --meters synthetic series to report series/s at scale
+  python data_engineering/feature_store.py --local data/sio_local.duckdb
+  python tests/benchmark_meter_forecast.py --local data/sio_local.duckdb --meters 1000000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+
+import local_backend  # noqa: E402
+import meter_forecast  # noqa: E402
+from feature_store import METER_TABLE, watermark  # noqa: E402
+
+ACTUALS_SQL = f"""
+    SELECT METER_ID, FEATURE_DATE AS FORECAST_DATE, VOLUME_M3
+    FROM {METER_TABLE}
+    WHERE FEATURE_DATE > '{{since}}'::DATE AND FEATURE_DATE <= '{{through}}'::DATE
+"""
+
+
+def check(condition, label, failures):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+def run_partitions(history, through, horizon):
+    """Forecasts the way Snowflake runs them: one end_partition call per METER_ID"""
+    udtf = meter_forecast.MeterForecastUDTF()
+    history = history.assign(THROUGH=pd.Timestamp(through).date(), HORIZON=horizon)
+    outputs = [udtf.end_partition(partition.set_axis(range(5), axis=1))
+               for _, partition in history.groupby('METER_ID', sort=True)]
+    return pd.concat(outputs, ignore_index=True)
+
+
+def wape(actual, predicted):
+    return float(np.abs(actual - predicted).sum() / max(np.abs(actual).sum(), 1e-9))
+
+
+def synthetic_history(meters, seed=7):
+    """meters x HISTORY_DAYS volumes: a level per meter, a weekday pattern, noise and 5% missing readings"""
+    rng = np.random.default_rng(seed)
+    level = rng.lognormal(6, 1.2, meters)
+    weekday = 1 + 0.3 * np.sin(2 * np.pi * (np.arange(7) + rng.integers(0, 7, meters)[:, None]) / 7)
+    days_of_week = np.arange(meter_forecast.HISTORY_DAYS) % 7
+    volumes = level[:, None] * weekday[:, days_of_week] * rng.normal(1, 0.1, (meters, len(days_of_week)))
+    volumes[rng.random(volumes.shape) < 0.05] = np.nan
+    return volumes, days_of_week, level, weekday
+
+
+def main():
+    """Forecast every meter of a local database copy, then a large synthetic fleet"""
+    parser = argparse.ArgumentParser(description='Per-meter forecasts: partitioned vs batched, accuracy, series/s')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default='data/sio_local.duckdb',
+                        help='Local DuckDB with the feature store built (copied, never modified)')
+    parser.add_argument('--horizon', type=int, default=meter_forecast.HORIZON_DAYS)
+    parser.add_argument('--meters', type=int, default=200_000, help='Synthetic series in the throughput run')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO PER-METER FORECASTS - BENCHMARK")
+    print("="*80)
+
+    failures = []
+    workdir = tempfile.mkdtemp(prefix='sio_meter_forecast_')
+    try:
+        path = os.path.join(workdir, 'sio_local.duckdb')
+        shutil.copy(args.local, path)
+        con = local_backend.connect(path)
+        meter_forecast.setup_local(con)
+        session = local_backend.LocalSession(con)
+        through = watermark(session, METER_TABLE)
+
+        # 1. Batched refresh of every active meter
+        stats = meter_forecast.refresh_forecasts(session, through, args.horizon)
+        print(f"\n🔮 Batched: {stats['series']:,} meters x {args.horizon} days in {stats['seconds']:.2f}s - "
+              f"{stats['series_per_sec']:,.0f} series/s end to end, "
+              f"{stats['series'] / max(stats['forecast_seconds'], 1e-9):,.0f} series/s in the model")
+        history = session.sql(meter_forecast.HISTORY_SQL.format(through=through)).to_pandas()
+        forecasts = session.sql(f"SELECT * FROM {meter_forecast.FORECAST_TABLE} WHERE RUN_DATE = '{through}'::DATE "
+                                "ORDER BY METER_ID, HORIZON_DAYS").to_pandas()
+        check(stats['series'] == history['METER_ID'].nunique() and stats['rows'] == stats['series'] * args.horizon,
+              'one full horizon per active meter with history', failures)
+        values = forecasts[['PREDICTED_VOLUME_M3', 'LOWER_VOLUME_M3', 'UPPER_VOLUME_M3']]
+        check(values.notna().all().all() and (forecasts['LOWER_VOLUME_M3'] <= forecasts['PREDICTED_VOLUME_M3']).all()
+              and (forecasts['PREDICTED_VOLUME_M3'] <= forecasts['UPPER_VOLUME_M3']).all(),
+              'forecasts are defined and inside their intervals', failures)
+        rerun = meter_forecast.refresh_forecasts(session, through, args.horizon)
+        check(rerun['rows'] == stats['rows'], 'rerunning a run date replaces its forecasts', failures)
+
+        # 2. One end_partition call per meter, as FORECAST_METER_DEMAND runs in Snowflake
+        start = time.perf_counter()
+        partitioned = run_partitions(history, through, args.horizon)
+        seconds = time.perf_counter() - start
+        print(f"\n🧩 Partitioned: {partitioned['METER_ID'].nunique():,} end_partition calls in {seconds:.2f}s - "
+              f"{partitioned['METER_ID'].nunique() / seconds:,.0f} series/s on one process "
+              "(a warehouse runs partitions in parallel)")
+        partitioned = partitioned.sort_values(['METER_ID', 'HORIZON_DAYS'], ignore_index=True)
+        check(len(partitioned) == len(forecasts)
+              and (partitioned['METER_ID'].to_numpy() == forecasts['METER_ID'].to_numpy()).all()
+              and np.allclose(partitioned['PREDICTED_VOLUME_M3'].astype(float), forecasts['PREDICTED_VOLUME_M3']),
+              'partitioned table function output matches the batch', failures)
+
+        # 3. Backtest: forecast from horizon days ago, score against what was read since
+        cutoff = (pd.Timestamp(through) - pd.Timedelta(days=args.horizon)).date().isoformat()
+        past = session.sql(meter_forecast.HISTORY_SQL.format(through=cutoff)).to_pandas()
+        backtest = meter_forecast.forecast_frame(past, cutoff, args.horizon)
+        actuals = session.sql(ACTUALS_SQL.format(since=cutoff, through=through)).to_pandas()
+        actuals['FORECAST_DATE'] = pd.to_datetime(actuals['FORECAST_DATE'])
+        scored = backtest.merge(actuals, on=['METER_ID', 'FORECAST_DATE'])
+        past['READING_DATE'] = pd.to_datetime(past['READING_DATE'])
+        last_week = past[past['READING_DATE'] > pd.Timestamp(cutoff) - pd.Timedelta(days=7)]
+        naive = scored.assign(WEEKDAY=scored['FORECAST_DATE'].dt.dayofweek).merge(
+            last_week.assign(WEEKDAY=last_week['READING_DATE'].dt.dayofweek)[['METER_ID', 'WEEKDAY', 'VOLUME_M3']],
+            on=['METER_ID', 'WEEKDAY'], suffixes=('', '_NAIVE'))
+        model_wape = wape(naive['VOLUME_M3'], naive['PREDICTED_VOLUME_M3'])
+        naive_wape = wape(naive['VOLUME_M3'], naive['VOLUME_M3_NAIVE'])
+        inside = ((scored['VOLUME_M3'] >= scored['LOWER_VOLUME_M3'])
+                  & (scored['VOLUME_M3'] <= scored['UPPER_VOLUME_M3'])).mean()
+        print(f"\n🎯 Backtest from {cutoff}: WAPE {model_wape:.1%} (seasonal naive {naive_wape:.1%}), "
+              f"{inside:.0%} of actuals inside the 90% interval")
+        check(model_wape < naive_wape, 'beats the seasonal-naive forecast', failures)
+        check(inside >= 0.75, 'interval covers at least 75% of actuals', failures)
+        con.close()
+
+        # 4. Throughput on a large synthetic fleet
+        volumes, days_of_week, level, weekday = synthetic_history(args.meters)
+        future_days_of_week = (np.arange(args.horizon) + meter_forecast.HISTORY_DAYS) % 7
+        start = time.perf_counter()
+        predicted, lower, upper = meter_forecast.forecast_matrix(volumes, days_of_week, future_days_of_week)
+        seconds = time.perf_counter() - start
+        print(f"\n⚡ Synthetic: {args.meters:,} meters x {args.horizon} days in {seconds:.2f}s - "
+              f"{args.meters / seconds:,.0f} series/s")
+        truth = level[:, None] * weekday[:, future_days_of_week]
+        check(np.isfinite(predicted).all() and wape(truth, predicted) < 0.1,
+              f'synthetic WAPE {wape(truth, predicted):.1%} against the noise-free series', failures)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'🎉 All checks passed' if not failures else f'⚠️ {len(failures)} check(s) failed'}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
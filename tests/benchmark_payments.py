@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Correctness and throughput of the vectorized payments stage (generate_data.generate_payments)
+1. generates a small dataset and bulk-loads it into the local DuckDB stand-in: every payment must reference
+   the BILLING row it was generated for, PAID bills must be settled in full and PENDING/OVERDUE bills not at all
+   (so the billing engine's payment step changes nothing), and payment dates fall between bill and as-of date
+2. times generate_payments on --customers x --months synthetic bills and checks the configured lag ordering
+  python tests/benchmark_payments.py --customers 1000000 --months 12
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+
+import billing_engine  # noqa: E402
+import bulk_load  # noqa: E402
+import compact_dtypes  # noqa: E402
+import generate_data  # noqa: E402
+
+AS_OF = '2026-10-01'
+
+SETTLEMENT_SQL = """
+    SELECT
+        COUNT(*) FILTER (WHERE b.BILL_ID IS NULL) AS ORPHANS,
+        COUNT(*) FILTER (WHERE b.BILL_STATUS = 'PAID' AND p.PAID <> b.TOTAL_AMOUNT_SAR) AS PAID_MISMATCH,
+        COUNT(*) FILTER (WHERE b.BILL_STATUS <> 'PAID' AND p.PAID >= b.TOTAL_AMOUNT_SAR) AS UNPAID_SETTLED,
+        COUNT(*) FILTER (WHERE b.BILL_STATUS <> 'PAID') AS PARTIAL
+    FROM (
+        SELECT BILL_ID, SUM(AMOUNT_PAID_SAR) AS PAID FROM SIO_DB.DATA.PAYMENTS GROUP BY BILL_ID
+    ) p
+    LEFT JOIN SIO_DB.DATA.BILLING b ON b.BILL_ID = p.BILL_ID
+"""
+
+UNPAID_PAID_BILLS_SQL = """
+    SELECT COUNT(*)
+    FROM SIO_DB.DATA.BILLING b
+    WHERE b.BILL_STATUS = 'PAID'
+      AND b.BILL_ID NOT IN (SELECT BILL_ID FROM SIO_DB.DATA.PAYMENTS)
+"""
+
+DATE_RANGE_SQL = f"""
+    SELECT COUNT(*)
+    FROM SIO_DB.DATA.PAYMENTS p
+    JOIN SIO_DB.DATA.BILLING b ON b.BILL_ID = p.BILL_ID
+    WHERE p.PAYMENT_DATE < b.GENERATED_DATE OR p.PAYMENT_DATE > DATE '{AS_OF}'
+"""
+
+
+def check(condition, label, failures):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+def synthetic_bills(customers, months, seed=1):
+    """Customers and one bill per customer-month in generate_billing's shape (status mix 85/10/5)"""
+    rng = np.random.default_rng(seed)
+    customers_df = pd.DataFrame({
+        'CUSTOMER_TYPE': pd.Categorical.from_codes(rng.integers(0, 3, customers), generate_data.CUSTOMER_TYPES),
+        'REGION_ID': compact_dtypes.ids(rng.integers(1, len(generate_data.REGIONS) + 1, customers))
+    })
+    bills = customers * months
+    billing_months = (np.datetime64(AS_OF, 'M') - months + np.arange(months)).astype('datetime64[D]')
+    billing_df = pd.DataFrame({
+        'CUSTOMER_ID': compact_dtypes.ids(np.repeat(np.arange(1, customers + 1), months)),
+        'TOTAL_AMOUNT_SAR': rng.uniform(50, 50000, bills).round(2),
+        'BILL_STATUS': pd.Categorical.from_codes(np.searchsorted([0.85, 0.95], rng.random(bills)),
+                                                 generate_data.BILL_STATUSES),
+        'GENERATED_DATE': compact_dtypes.dates(np.tile(billing_months, customers))
+    })
+    return customers_df, billing_df
+
+
+def median_lags(payments_df, billing_df, customers_df):
+    """Median days from bill generation to first payment, by customer type and by province"""
+    first = payments_df.drop_duplicates('BILL_ID')
+    bill_index = first['BILL_ID'].to_numpy() - 1
+    lag = (compact_dtypes.date_values(first['PAYMENT_DATE'])
+           - compact_dtypes.date_values(billing_df['GENERATED_DATE'])[bill_index]).astype(np.int64)
+    customer_index = billing_df['CUSTOMER_ID'].to_numpy()[bill_index] - 1
+    provinces = [region['name'] for region in generate_data.REGIONS]
+    lags = pd.DataFrame({
+        'CUSTOMER_TYPE': customers_df['CUSTOMER_TYPE'].to_numpy()[customer_index],
+        'PROVINCE': np.array(provinces)[(customers_df['REGION_ID'].to_numpy()[customer_index] - 1) % len(provinces)],
+        'LAG_DAYS': lag
+    })
+    return lags.groupby('CUSTOMER_TYPE', observed=True)['LAG_DAYS'].median(), lags.groupby('PROVINCE')['LAG_DAYS'].median()
+
+
+def main():
+    """Check payments against the loaded BILLING keys, then time a large run"""
+    parser = argparse.ArgumentParser(description='Vectorized payments: bill keys, settlement and throughput')
+    parser.add_argument('--small-customers', type=int, default=300, help='Customers in the bulk-loaded dataset')
+    parser.add_argument('--customers', type=int, default=1_000_000, help='Customers in the throughput run')
+    parser.add_argument('--months', type=int, default=12, help='Bills per customer in the throughput run')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO PAYMENTS GENERATION - BENCHMARK")
+    print("="*80)
+
+    failures = []
+    workdir = tempfile.mkdtemp(prefix='sio_payments_')
+    try:
+        # 1. Generated payments against the BILL_IDs the database assigns
+        data_dir = os.path.join(workdir, 'data')
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_data.main(['--customers', str(args.small_customers), '--as-of', AS_OF, '--output-dir', data_dir])
+            target = bulk_load.LocalTarget(os.path.join(workdir, 'sio_local.duckdb'), os.path.join(workdir, 'stage'))
+            bulk_load.bulk_load(target, data_dir, tables=['REGIONS', 'CUSTOMERS', 'BILLING', 'PAYMENTS'], threads=1)
+        con = target.con
+        orphans, paid_mismatch, unpaid_settled, partial = con.execute(SETTLEMENT_SQL).fetchone()
+        payments = con.execute('SELECT COUNT(*) FROM SIO_DB.DATA.PAYMENTS').fetchone()[0]
+        print(f"\n📦 {payments:,} payments loaded for "
+              f"{con.execute('SELECT COUNT(*) FROM SIO_DB.DATA.BILLING').fetchone()[0]:,} bills "
+              f"({partial:,} partial payments on unpaid bills)")
+        check(orphans == 0, 'every payment references a loaded bill', failures)
+        check(paid_mismatch == 0 and con.execute(UNPAID_PAID_BILLS_SQL).fetchone()[0] == 0,
+              'PAID bills are settled to the halala', failures)
+        check(unpaid_settled == 0 and partial > 0, 'PENDING/OVERDUE bills carry only partial payments', failures)
+        billing_engine.setup_local(con)
+        marked = billing_engine.affected_rows(con.execute(billing_engine.APPLY_PAYMENTS_SQL).fetchall())
+        check(marked == 0, f'billing engine payment step marks {marked} bills PAID', failures)
+        check(con.execute(DATE_RANGE_SQL).fetchone()[0] == 0, f'payment dates between bill generation and {AS_OF}', failures)
+        target.close()
+
+        # 2. Throughput at scale
+        customers_df, billing_df = synthetic_bills(args.customers, args.months)
+        generate_data.AS_OF = datetime.strptime(AS_OF, '%Y-%m-%d')
+        start = time.perf_counter()
+        payments_df = generate_data.generate_payments(billing_df, customers_df)
+        seconds = time.perf_counter() - start
+        print(f"\n⚡ {len(payments_df):,} payments for {len(billing_df):,} bills in {seconds:.2f}s: "
+              f"{len(payments_df) / seconds:,.0f} payments/s, {compact_dtypes.memory_bytes(payments_df) / 1e6:,.0f} MB")
+
+        paid = np.bincount(payments_df['BILL_ID'].to_numpy() - 1,
+                           np.rint(payments_df['AMOUNT_PAID_SAR'].to_numpy() * 100), minlength=len(billing_df))
+        total = np.rint(billing_df['TOTAL_AMOUNT_SAR'].to_numpy() * 100)
+        is_paid = (billing_df['BILL_STATUS'] == 'PAID').to_numpy()
+        check((paid[is_paid] == total[is_paid]).all() and (paid[~is_paid] < total[~is_paid]).all(),
+              'paid bills settle exactly, unpaid bills stay below their total', failures)
+
+        by_type, by_province = median_lags(payments_df, billing_df, customers_df)
+        print("   median lag (days): " + ', '.join(f'{name} {days:.0f}' for name, days in by_type.items())
+              + f"; Riyadh {by_province['Riyadh']:.0f}, Tabuk {by_province['Tabuk']:.0f}")
+        check(by_type['AGRICULTURAL_BUSINESS'] < by_type['FARM'] < by_type['INDUSTRIAL']
+              and by_province['Riyadh'] < by_province['Tabuk'], 'lags follow the configured profiles', failures)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'🎉 All checks passed' if not failures else f'⚠️ {len(failures)} check(s) failed'}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
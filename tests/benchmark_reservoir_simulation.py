@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Speed and sanity of the Monte Carlo reservoir depletion simulator (data_engineering/reservoir_simulation.py)
+Reads the sources of a local DuckDB stand-in with the feature store built (read-only), then:
+1. simulates --paths x --horizon days x every source and fails past --max-seconds
+2. replays the Snowflake execution - one ReservoirDepletionUDTF.end_partition call per REGION_ID partition
+3. checks the percentiles are ordered, a seed reproduces its run, and less supply depletes sooner
+  python data_engineering/feature_store.py --local data/sio_local.duckdb
+  python tests/benchmark_reservoir_simulation.py --local data/sio_local.duckdb --paths 10000 --horizon 365
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+
+import local_backend  # noqa: E402
+import reservoir_simulation  # noqa: E402
+
+
+def check(condition, label, failures):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+def run_partitions(sources, paths, horizon, threshold_pct, inflow_pct):
+    """Summaries the way Snowflake runs them: one end_partition call per REGION_ID"""
+    udtf = reservoir_simulation.ReservoirDepletionUDTF()
+    rows = sources.assign(PATHS=paths, HORIZON=horizon, THRESHOLD_PCT=threshold_pct, INFLOW_PCT=inflow_pct)
+    return pd.concat([udtf.end_partition(partition.set_axis(range(rows.shape[1]), axis=1))
+                      for _, partition in rows.groupby('REGION_ID', sort=True)], ignore_index=True)
+
+
+def main():
+    """Time the full simulation, then check the partitioned run and the simulator's behaviour"""
+    parser = argparse.ArgumentParser(description='Monte Carlo reservoir depletion: speed and sanity')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default='data/sio_local.duckdb')
+    parser.add_argument('--paths', type=int, default=reservoir_simulation.PATHS)
+    parser.add_argument('--horizon', type=int, default=reservoir_simulation.HORIZON_DAYS)
+    parser.add_argument('--threshold-pct', type=float, default=reservoir_simulation.THRESHOLD_PCT)
+    parser.add_argument('--max-seconds', type=float, default=5.0, help='Fail if the full simulation takes longer')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO RESERVOIR DEPLETION SIMULATOR - BENCHMARK")
+    print("="*80)
+
+    failures = []
+    con = local_backend.connect(args.local, read_only=True)
+    sources = local_backend.LocalSession(con).sql(reservoir_simulation.SOURCES_SQL).to_pandas()
+    con.close()
+    if sources.empty:
+        print("⚠️  No water sources - load data with data_engineering/bulk_load.py first")
+        sys.exit(1)
+    start = sources['AS_OF'].iloc[0]
+
+    # 1. Every source, every path, in one process
+    began = time.perf_counter()
+    region_ids, days, end_levels = reservoir_simulation.simulate(sources, args.paths, args.horizon,
+                                                                 args.threshold_pct, start=start)
+    seconds = time.perf_counter() - began
+    steps = args.paths * args.horizon * len(sources)
+    print(f"\n⚡ {args.paths:,} paths x {args.horizon} days x {len(sources)} sources ({len(region_ids)} regions) "
+          f"in {seconds:.2f}s: {steps / seconds / 1e6:,.0f}M source-days/s")
+    check(seconds < args.max_seconds, f'full simulation under {args.max_seconds:g}s', failures)
+
+    summary = reservoir_simulation.summarize(sources, region_ids, days, end_levels, args.horizon, args.threshold_pct)
+    print(summary[['REGION_NAME', 'CURRENT_LEVEL_PCT', 'DAYS_P10', 'DAYS_P50', 'DAYS_P90', 'PROBABILITY_DEPLETED',
+                   'END_LEVEL_P50_PCT']].to_string(index=False))
+    filled = summary[['DAYS_P10', 'DAYS_P50', 'DAYS_P90']].astype('float64').fillna(args.horizon + 1)
+    check((filled['DAYS_P10'] <= filled['DAYS_P50']).all() and (filled['DAYS_P50'] <= filled['DAYS_P90']).all(),
+          'P10 <= P50 <= P90 in every region', failures)
+    check(summary['PROBABILITY_DEPLETED'].between(0, 1).all() and summary['END_LEVEL_P50_PCT'].between(0, 100).all(),
+          'probabilities and end levels in range', failures)
+
+    # 2. One end_partition call per region, as SIMULATE_RESERVOIR_DEPLETION runs in Snowflake
+    began = time.perf_counter()
+    partitioned = run_partitions(sources, args.paths, args.horizon, args.threshold_pct,
+                                 reservoir_simulation.INFLOW_PCT)
+    seconds = time.perf_counter() - began
+    print(f"\n🧩 {len(partitioned)} region partitions in {seconds:.2f}s on one process "
+          "(a warehouse runs partitions in parallel)")
+    check(list(partitioned['REGION_ID']) == list(region_ids)
+          and list(partitioned.columns) == reservoir_simulation.OUTPUT_COLUMNS,
+          'one summary row per region in RETURNS TABLE order', failures)
+
+    # 3. Behaviour
+    _, repeat, _ = reservoir_simulation.simulate(sources, 1000, args.horizon, args.threshold_pct, start=start)
+    _, again, _ = reservoir_simulation.simulate(sources, 1000, args.horizon, args.threshold_pct, start=start)
+    check(np.array_equal(repeat, again), 'the same seed reproduces the same paths', failures)
+    risk = {}
+    for inflow_pct in (80, 100, 120):
+        _, inflow_days, _ = reservoir_simulation.simulate(sources, 1000, args.horizon, args.threshold_pct,
+                                                          inflow_pct, start=start)
+        risk[inflow_pct] = (inflow_days <= args.horizon).mean()
+    print("\n📉 Share of region-paths depleted by supply: "
+          + ', '.join(f'{inflow_pct}% {share:.0%}' for inflow_pct, share in risk.items()))
+    check(risk[80] >= risk[100] >= risk[120] and risk[80] > risk[120], 'less supply depletes more paths', failures)
+
+    print(f"\n{'🎉 All checks passed' if not failures else f'⚠️ {len(failures)} check(s) failed'}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
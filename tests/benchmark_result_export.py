@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark the dashboard's result exports and keyset pagination (app/result_export.py) on the local DuckDB stand-in
+Builds --rows synthetic meter readings, then:
+1. exports them to Parquet and CSV in Arrow batches; both files must read back as the full result, and the Arrow
+   memory pool must stay far below the size of the result
+2. pages through an ordered query with keyset pages; the pages together must equal the full ordered result; the last
+   page is timed against the first
+  python tests/benchmark_result_export.py --rows 5000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'app'))
+
+import local_backend  # noqa: E402
+import result_export  # noqa: E402
+
+EXPORT_QUERY = """
+    SELECT READING_DATE, METER_ID, CUSTOMER_ID, REGION_NAME, VOLUME_M3, PRESSURE_BAR
+    FROM SIO_DB.DATA.EXPORT_READINGS
+    ORDER BY READING_DATE, METER_ID
+"""
+
+# Ties on RISK_SCORE and READING_DATE, so pages must carry the whole key across their boundaries
+PAGE_QUERY = "SELECT READING_DATE, METER_ID, RISK_SCORE FROM SIO_DB.DATA.EXPORT_READINGS WHERE METER_ID % 50 = 0"
+PAGE_ORDER = [('RISK_SCORE', 'DESC'), ('READING_DATE', 'DESC'), ('METER_ID', 'ASC')]
+
+
+def check(condition, label, failures):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+def build_database(rows):
+    """In-memory SIO_DB with rows readings: one per meter per day over 365 days"""
+    con = local_backend.connect()
+    meters = max(rows // 365, 1)
+    con.execute(f"""
+        CREATE TABLE SIO_DB.DATA.EXPORT_READINGS AS
+        SELECT DATE '2026-01-01' + CAST(i // {meters} AS INTEGER) AS READING_DATE,
+               i % {meters} + 1 AS METER_ID,
+               (i % {meters}) // 3 + 1 AS CUSTOMER_ID,
+               ['Riyadh', 'Makkah', 'Eastern Province', 'Qassim', 'Asir', 'Hail', 'Jazan', 'Madinah'][i % 8 + 1]
+                   AS REGION_NAME,
+               CAST(hash(i) % 100000 / 100.0 AS DECIMAL(12, 3)) AS VOLUME_M3,
+               CAST(1 + hash(i * 7) % 500 / 100.0 AS DECIMAL(5, 2)) AS PRESSURE_BAR,
+               CAST(hash(i * 13) % 1000 / 10.0 AS DECIMAL(5, 1)) AS RISK_SCORE
+        FROM range({rows}) t(i)
+    """)
+    return con, local_backend.LocalSession(con)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Arrow-batch exports and keyset pagination')
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--batch-rows', type=int, default=result_export.BATCH_ROWS)
+    parser.add_argument('--page-rows', type=int, default=500)
+    args = parser.parse_args()
+
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    print("=" * 80)
+    print(f"📦 RESULT EXPORT BENCHMARK ({args.rows:,} rows, {args.batch_rows:,} per batch)")
+    print("=" * 80)
+    failures = []
+    con, session = build_database(args.rows)
+    directory = tempfile.mkdtemp(prefix='sio_export_bench_')
+
+    # 1. Exports
+    pool = pa.default_memory_pool()
+    exports = {}
+    for format_label in result_export.FORMATS:
+        exports[format_label] = result_export.export_query(session, EXPORT_QUERY, directory, 'readings', format_label,
+                                                           args.batch_rows)
+        export = exports[format_label]
+        print(f"\n{format_label}: {export['rows']:,} rows, {export['bytes'] / 1e6:.1f} MB in {export['seconds']:.2f}s "
+              f"({export['rows'] / max(export['seconds'], 1e-9):,.0f} rows/s)")
+        check(export['rows'] == args.rows, f'{format_label} export writes every row', failures)
+    peak = pool.max_memory()
+
+    # Read back only after the exports, so the pool's peak above is the exports' alone
+    expected = pa.Table.from_batches(list(session.sql(EXPORT_QUERY).to_arrow_batches()))
+    print(f"\n  - Arrow pool peak during exports: {peak / 1e6:.1f} MB (full result: {expected.nbytes / 1e6:.1f} MB)")
+    if args.rows >= 4 * args.batch_rows:
+        check(peak < expected.nbytes / 2, 'exports never hold the full result in memory', failures)
+
+    parquet = pq.read_table(exports['Parquet']['path'])
+    check(parquet.equals(expected), 'Parquet file reads back as the full ordered result', failures)
+    csv = pa_csv.read_csv(exports['CSV']['path'])
+    check(csv.num_rows == args.rows and csv['METER_ID'].to_pylist() == expected['METER_ID'].to_pylist(),
+          'CSV file reads back as the full ordered result', failures)
+
+    # 2. Keyset pages
+    order = ', '.join(f'{column} {direction}' for column, direction in PAGE_ORDER)
+    expected = session.sql(f'{PAGE_QUERY} ORDER BY {order}').to_pandas()
+    pages, after, timings = [], None, []
+    while True:
+        start = time.perf_counter()
+        page = session.sql(result_export.keyset_query(PAGE_QUERY, PAGE_ORDER, after, args.page_rows)).to_pandas()
+        timings.append(time.perf_counter() - start)
+        if page.empty:
+            break
+        pages.append(page)
+        after = result_export.page_key(page, PAGE_ORDER)
+    paged = pd.concat(pages, ignore_index=True)
+    print(f"\nKeyset pages: {len(pages):,} pages of {args.page_rows:,} over {len(expected):,} rows")
+    print(f"  - First page {timings[0] * 1000:.1f}ms, last page {timings[-2] * 1000:.1f}ms")
+    check(paged.astype(str).equals(expected.astype(str)), 'keyset pages cover the ordered result exactly once',
+          failures)
+
+    for export in exports.values():
+        os.remove(export['path'])
+    os.rmdir(directory)
+    con.close()
+    print(f"\n{'🎉 All checks passed' if not failures else f'⚠️ {len(failures)} check(s) failed'}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Run every verified query in cortex/semantic_model.yaml against the local DuckDB stand-in and record its latency
+Logical table names (__usage_monthly_by_region) are resolved to their base tables; AR_AGING and the aggregate
+tables from cortex/create_semantic_aggregates.sql are rebuilt first. Compare against a saved run to catch regressions:
+  python tests/benchmark_semantic_queries.py --output latency.json
+  python tests/benchmark_semantic_queries.py --baseline latency.json --max-regression 1.5
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import yaml
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+
+import ar_aging  # noqa: E402
+import local_backend  # noqa: E402
+
+MODEL_FILE = os.path.join(REPO_ROOT, 'cortex', 'semantic_model.yaml')
+AGGREGATES_FILE = os.path.join(REPO_ROOT, 'cortex', 'create_semantic_aggregates.sql')
+
+
+def load_verified_queries(path=MODEL_FILE):
+    """Verified queries with their SQL resolved from logical to physical table names"""
+    with open(path, encoding='utf-8') as f:
+        model = yaml.safe_load(f)
+
+    tables = {
+        table['name']: '{database}.{schema}.{table}'.format(**table['base_table'])
+        for table in model['tables']
+    }
+
+    def physical(match):
+        if match.group(1) not in tables:
+            raise ValueError(f'Unknown logical table __{match.group(1)}')
+        return tables[match.group(1)]
+
+    return [
+        {
+            'name': query['name'],
+            'question': query['question'],
+            'sql': re.sub(r'\b__(\w+)', physical, query['sql'])
+        }
+        for query in model.get('verified_queries', [])
+    ]
+
+
+def time_query(con, sql, repeat):
+    """Transpile and run sql once to warm up, then repeat times; returns (row count, latencies in ms)"""
+    sql = local_backend.translate(sql)
+    rows = len(con.execute(sql).df())
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        con.execute(sql).df()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return rows, latencies
+
+
+def main():
+    """Time each verified query and compare with an optional baseline"""
+    parser = argparse.ArgumentParser(description='Verified query latency suite for the semantic model')
+    parser.add_argument('--local', metavar='DUCKDB_PATH', default='data/sio_local.duckdb')
+    parser.add_argument('--repeat', type=int, default=10, help='Timed runs per query')
+    parser.add_argument('--skip-aggregates', action='store_true', help='Do not refresh AR_AGING and rebuild the aggregate tables first')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Previous --output file to compare against')
+    parser.add_argument('--max-regression', type=float, default=1.5, help='Fail if median latency grows by this factor')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help='...and by at least this many milliseconds')
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO SEMANTIC MODEL - VERIFIED QUERY LATENCY")
+    print("="*80)
+
+    con = local_backend.connect(args.local)
+    if not args.skip_aggregates:
+        start = time.perf_counter()
+        ar_aging.setup_local(con)
+        ar_aging.run_local(local_backend.LocalSession(con), date.today())
+        local_backend.run_script(con, AGGREGATES_FILE)
+        print(f"\n🧱 Rebuilt aggregate tables in {time.perf_counter() - start:.2f}s")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = {result['name']: result for result in json.load(f)['queries']}
+
+    results, failures, regressions = [], [], []
+    print(f"\n{'Query':<32} {'Rows':>6} {'Median ms':>10} {'p95 ms':>8} {'Baseline':>9}")
+    print("-" * 70)
+    for query in load_verified_queries():
+        try:
+            rows, latencies = time_query(con, query['sql'], args.repeat)
+        except Exception as e:
+            failures.append(query['name'])
+            print(f"❌ {query['name']:<30} {str(e).splitlines()[0][:60]}")
+            continue
+
+        result = {
+            'name': query['name'],
+            'question': query['question'],
+            'rows': rows,
+            'median_ms': round(float(np.median(latencies)), 3),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 3)
+        }
+        results.append(result)
+
+        previous = baseline.get(query['name'])
+        marker, compared = '  ', ''
+        if previous:
+            ratio = result['median_ms'] / max(previous['median_ms'], 1e-9)
+            compared = f"{ratio:.2f}x"
+            if ratio > args.max_regression and result['median_ms'] - previous['median_ms'] > args.min_delta_ms:
+                regressions.append(query['name'])
+                marker = '⚠️'
+        print(f"{marker}{query['name']:<30} {rows:>6,} {result['median_ms']:>10.2f} {result['p95_ms']:>8.2f} {compared:>9}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'database': args.local, 'repeat': args.repeat, 'queries': results}, f, indent=2)
+        print(f"\n💾 Saved {len(results)} results to {args.output}")
+
+    print(f"\n✅ {len(results)} queries ran, ❌ {len(failures)} failed, ⚠️  {len(regressions)} regressed "
+          f"(> {args.max_regression}x and +{args.min_delta_ms}ms over baseline)")
+    if failures or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
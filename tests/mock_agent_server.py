@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Mock SIO Cortex Agent endpoint for offline testing
+Serves the agent :run API locally with the offline BM25 index as the knowledge_base tool
+Requests with "stream": true get server-sent events (status, tool use/result, text deltas, final response)
+
+Usage:
+  python tests/mock_agent_server.py --port 8765
+  SIO_AGENT_URL=http://localhost:8765/api/v2/databases/SNOWFLAKE_INTELLIGENCE/schemas/AGENTS/agents/SIO_IRRIGATION_AGENT:run \\
+      SNOWFLAKE_PAT=local python tests/test_agent.py
+  SIO_AGENT_URL=... streamlit run app/streamlit_app.py          # "Ask SIO" tab
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+
+from knowledge_index import load_or_build  # noqa: E402
+
+AGENT_PATH = '/api/v2/databases/SNOWFLAKE_INTELLIGENCE/schemas/AGENTS/agents/SIO_IRRIGATION_AGENT:run'
+
+
+def last_user_text(payload):
+    """Return the text of the most recent user message in a :run payload"""
+    for message in reversed(payload.get('messages', [])):
+        if message.get('role') == 'user':
+            return ' '.join(item.get('text', '') for item in message.get('content', []) if item.get('type') == 'text')
+    return ''
+
+
+def answer_from_knowledge_base(index, question, limit=3):
+    """Build an agent-style message from the top knowledge_base passages"""
+    start = time.perf_counter()
+    results = index.search(question, limit)
+    search_ms = (time.perf_counter() - start) * 1000
+
+    if results:
+        lines = ['Here is what the SIO knowledge base says:']
+        for hit in results:
+            body = hit['CHUNK'].split('\n\n', 1)[-1]
+            lines.append(f"- **{hit['TITLE']} → {hit['SECTION']}**: {body}")
+        text = '\n'.join(lines)
+    else:
+        text = 'I could not find this in the SIO knowledge base. Please contact SIO customer service at +966-11-4567890.'
+
+    search_results = [
+        {'doc_id': hit['CHUNK_ID'], 'doc_title': hit['TITLE'], 'section': hit['SECTION'],
+         'text': hit['CHUNK'], 'score': hit['SCORE']}
+        for hit in results
+    ]
+
+    return {
+        'role': 'assistant',
+        'content': [
+            {'type': 'tool_use', 'tool_use': {'name': 'knowledge_base', 'input': {'query': question}}},
+            {'type': 'tool_results', 'tool_results': {
+                'name': 'knowledge_base',
+                'content': [{'type': 'json', 'json': {'searchResults': search_results}}]
+            }},
+            {'type': 'text', 'text': text}
+        ]
+    }, search_ms
+
+
+def text_deltas(text, words=3):
+    """Split an answer into small chunks the way the agent streams it"""
+    tokens = text.split(' ')
+    return [' '.join(tokens[i:i + words]) + (' ' if i + words < len(tokens) else '') for i in range(0, len(tokens), words)]
+
+
+def make_handler(index, delay_ms=0, delta_ms=0):
+    """Create a request handler bound to a loaded knowledge index
+    delay_ms simulates orchestration time, delta_ms the gap between streamed text deltas"""
+
+    class MockAgentHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Chunked transfer so streamed events are delivered as they are written
+
+        def do_POST(self):
+            if not self.path.endswith(':run'):
+                self.send_error(404, 'Unknown endpoint')
+                return
+
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b'{}')
+            except json.JSONDecodeError:
+                self.send_error(400, 'Invalid JSON body')
+                return
+
+            if payload.get('stream'):
+                self.stream_answer(last_user_text(payload))
+                return
+
+            if delay_ms:
+                time.sleep(delay_ms / 1000)
+            message, search_ms = answer_from_knowledge_base(index, last_user_text(payload))
+            body = json.dumps({'message': message}).encode('utf-8')
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('X-Search-Latency-Ms', f'{search_ms:.3f}')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_event(self, event, data):
+            chunk = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(chunk):x}\r\n".encode('ascii') + chunk + b"\r\n")
+            self.wfile.flush()
+
+        def stream_answer(self, question):
+            """Server-sent events in the order the agent emits them"""
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            self.close_connection = True
+
+            self.send_event('response.status', {'status': 'planning', 'message': 'Planning the next steps'})
+            if delay_ms:
+                time.sleep(delay_ms / 1000)
+            message, _ = answer_from_knowledge_base(index, question)
+            for item in message['content']:
+                if item['type'] == 'tool_use':
+                    self.send_event('response.tool_use', {'tool_use_id': 'toolu_1', **item['tool_use']})
+                elif item['type'] == 'tool_results':
+                    self.send_event('response.tool_result',
+                                    {'tool_use_id': 'toolu_1', 'status': 'success', **item['tool_results']})
+                elif item['type'] == 'text':
+                    self.send_event('response.status', {'status': 'streaming_analyst_results',
+                                                        'message': 'Writing the answer'})
+                    for delta in text_deltas(item['text']):
+                        if delta_ms:
+                            time.sleep(delta_ms / 1000)
+                        self.send_event('response.text.delta', {'content_index': 0, 'text': delta})
+            self.send_event('response', message)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, format, *args):
+            pass  # Keep benchmark output clean
+
+    return MockAgentHandler
+
+
+def start_server(port=8765, index_dir=None, delay_ms=0, delta_ms=0):
+    """Start the mock agent on localhost and return the server (call serve_forever or shutdown)"""
+    # Default index is a cache outside the source tree, built on first start
+    index = load_or_build(
+        os.path.join(REPO_ROOT, 'documents'),
+        index_dir or os.path.join(tempfile.gettempdir(), 'sio_knowledge_index')
+    )
+    return ThreadingHTTPServer(('127.0.0.1', port), make_handler(index, delay_ms, delta_ms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock SIO agent :run endpoint backed by the offline knowledge index')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--index-dir', default=None)
+    parser.add_argument('--delay-ms', type=float, default=0, help='Simulated orchestration latency per request')
+    parser.add_argument('--delta-ms', type=float, default=0, help='Gap between streamed text deltas')
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.index_dir, args.delay_ms, args.delta_ms)
+    print(f"🤖 Mock SIO agent listening on http://127.0.0.1:{args.port}{AGENT_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+pytest-benchmark suite: generators, ML handlers and dashboard queries across scale factors
+  python -m pytest tests/perf --scale-factors 0.1,1 --perf-output perf.json
+  python -m pytest tests/perf --perf-baseline perf.json --max-regression 1.5
+A test fails when its median grows past --max-regression x the baseline median and by at least --min-delta-ms.
+With --perf-baseline, a timed test missing from the baseline fails, and baseline entries that match no collected test
+fail the run, so a renamed test or query cannot silently drop out of the comparison.
+pytest-benchmark's own --benchmark-json/--benchmark-save/--benchmark-compare work as usual.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+
+import pytest
+
+from perf_data import REPO_ROOT, DatasetCache
+
+# pytest only reads pytest_addoption from this file when tests/perf is on the command line
+DEFAULTS = {'scale_factors': '0.1,1', 'perf_rounds': 3, 'perf_output': None, 'perf_baseline': None,
+            'max_regression': 1.5, 'min_delta_ms': 5.0}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('perf', 'SIO performance suite')
+    group.addoption('--scale-factors', default=DEFAULTS['scale_factors'], help='Comma-separated dataset scale factors (default: 0.1,1)')
+    group.addoption('--perf-rounds', type=int, default=DEFAULTS['perf_rounds'], help='Timed rounds per benchmark, after one warm-up')
+    group.addoption('--perf-output', help='Write median timings to this JSON file')
+    group.addoption('--perf-baseline', help='Previous --perf-output file to compare against')
+    group.addoption('--max-regression', type=float, default=DEFAULTS['max_regression'], help='Fail if a median grows by this factor')
+    group.addoption('--min-delta-ms', type=float, default=DEFAULTS['min_delta_ms'], help='...and by at least this many milliseconds')
+
+
+def option(config, name):
+    return config.getoption(name, default=DEFAULTS[name])
+
+
+def pytest_configure(config):
+    config.perf_scale_factors = [float(value) for value in option(config, 'scale_factors').split(',') if value.strip()]
+    config.perf_workdir = tempfile.mkdtemp(prefix='sio_perf_')
+    config.perf_datasets = DatasetCache(config.perf_workdir)
+    config.perf_results = {}
+    config.perf_collected = set()
+    config.perf_baseline = None
+    if option(config, 'perf_baseline'):
+        with open(option(config, 'perf_baseline'), encoding='utf-8') as f:
+            config.perf_baseline = {result['name']: result for result in json.load(f)['benchmarks']}
+
+
+def pytest_unconfigure(config):
+    if hasattr(config, 'perf_datasets'):
+        config.perf_datasets.close()
+        shutil.rmtree(config.perf_workdir, ignore_errors=True)
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize over --scale-factors; dashboard tests also over the queries captured at each scale"""
+    config = metafunc.config
+    if 'dashboard_query' in metafunc.fixturenames:
+        cases = [(scale_factor, query) for scale_factor in config.perf_scale_factors
+                 for query in config.perf_datasets.get(scale_factor).dashboard_queries()]
+        metafunc.parametrize(('scale_factor', 'dashboard_query'), cases,
+                             ids=[f'sf{scale_factor:g}-{name}' for scale_factor, (name, _) in cases])
+    elif 'scale_factor' in metafunc.fixturenames:
+        metafunc.parametrize('scale_factor', config.perf_scale_factors,
+                             ids=[f'sf{scale_factor:g}' for scale_factor in config.perf_scale_factors])
+
+
+def perf_name(node):
+    """Name of a test in --perf-output files, stable whatever the rootdir"""
+    return f'{os.path.relpath(node.path, REPO_ROOT)}::{node.name}'
+
+
+def pytest_itemcollected(item):
+    # Before -k/-m deselection: a deselected test still matches its baseline entry
+    item.config.perf_collected.add(perf_name(item))
+
+
+def stale_baseline(config):
+    """Baseline entries at this run's scale factors that no collected test produces"""
+    stale = []
+    for name in config.perf_baseline:
+        scale = re.search(r'\[sf([0-9.]+)', name)
+        if scale and float(scale.group(1)) not in config.perf_scale_factors:
+            continue
+        if name not in config.perf_collected:
+            stale.append(name)
+    return stale
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    stale = stale_baseline(config) if config.perf_baseline is not None else []
+    if stale:
+        terminalreporter.section('perf baseline entries without a test')
+        for name in stale:
+            terminalreporter.write_line(name)
+        terminalreporter.write_line('Re-record the baseline with --perf-output if these tests were renamed or removed.')
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if config.perf_baseline is not None and stale_baseline(config) and session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+    output = option(config, 'perf_output')
+    if output and config.perf_results:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'scale_factors': config.perf_scale_factors,
+                'benchmarks': [{'name': name, 'median_ms': round(median_ms, 3)}
+                               for name, median_ms in config.perf_results.items()]
+            }, f, indent=2)
+
+
+@pytest.fixture
+def dataset(request, scale_factor):
+    """Loaded local SIO_DB for this scale factor"""
+    return request.config.perf_datasets.get(scale_factor)
+
+
+@pytest.fixture
+def timed(benchmark, request):
+    """timed(function, *args): benchmark one call per round, record the median and check it against the baseline"""
+    config = request.config
+    name = perf_name(request.node)
+
+    def run(function, *args):
+        result = benchmark.pedantic(function, args=args, rounds=option(config, 'perf_rounds'),
+                                    warmup_rounds=1, iterations=1)
+        if benchmark.stats is None:  # --benchmark-disable: the call ran once, untimed
+            return result
+        median_ms = benchmark.stats.stats.median * 1000
+        config.perf_results[name] = median_ms
+        if config.perf_baseline is None:
+            return result
+        previous = config.perf_baseline.get(name)
+        if previous is None:
+            pytest.fail(f'no baseline entry for {name}; re-record the baseline with --perf-output')
+        ratio = median_ms / max(previous['median_ms'], 1e-9)
+        if ratio > option(config, 'max_regression') and median_ms - previous['median_ms'] > option(config, 'min_delta_ms'):
+            pytest.fail(f"median {median_ms:.1f} ms is {ratio:.2f}x the baseline {previous['median_ms']:.1f} ms")
+        return result
+
+    return run
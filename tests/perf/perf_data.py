@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Generated datasets behind the performance suite
+Each scale factor is generated once per run (as of today, so the handlers' CURRENT_DATE windows cover it),
+bulk-loaded into a local DuckDB SIO_DB with the feature store and efficiency scores refreshed, and exposed
+through local_backend.LocalSession - the session.sql(...).to_pandas() stand-in the Snowflake handlers and the
+dashboard run against. Dashboard queries are captured by running app/streamlit_app.py headless once.
+"""
+
+import contextlib
+import hashlib
+import importlib.machinery
+import io
+import os
+import re
+import sys
+import types
+from datetime import date
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'data_engineering'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'tests'))
+
+import anomaly_scoring  # noqa: E402
+import ar_aging  # noqa: E402
+import bulk_load  # noqa: E402
+import feature_store  # noqa: E402
+import generate_data  # noqa: E402
+import local_backend  # noqa: E402
+import regional_efficiency  # noqa: E402
+
+APP_FILE = os.path.join(REPO_ROOT, 'app', 'streamlit_app.py')
+AS_OF = date.today().isoformat()
+
+
+class Dataset:
+    """One scale factor: generated CSVs, a loaded local SIO_DB and its LocalSession"""
+
+    def __init__(self, scale_factor, root):
+        self.scale_factor = scale_factor
+        self.dir = os.path.join(root, f'sf{scale_factor:g}')
+        data_dir = os.path.join(self.dir, 'data')
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_data.main(['--scale-factor', str(scale_factor), '--as-of', AS_OF, '--output-dir', data_dir])
+            target = bulk_load.LocalTarget(os.path.join(self.dir, 'sio_local.duckdb'), os.path.join(self.dir, 'stage'))
+            bulk_load.bulk_load(target, data_dir, threads=1, log=lambda *args: None)
+        self.con = target.con
+        self.session = local_backend.LocalSession(self.con)
+        feature_store.setup_local(self.con)
+        feature_store.refresh_features(self.session)
+        regional_efficiency.setup_local(self.con)
+        regional_efficiency.refresh_scores(self.session)
+        anomaly_scoring.setup_local(self.con)  # Empty score table: the scored anomalies panel's queries still run
+        ar_aging.setup_local(self.con)
+        ar_aging.run_local(self.session, AS_OF)
+        self._dashboard_queries = None
+        self._frames = None
+
+    def frames(self):
+        """Generator inputs at this scale, built in memory by the generators themselves"""
+        if self._frames is None:
+            args = generate_data.parse_args(['--scale-factor', str(self.scale_factor), '--as-of', AS_OF])
+            regions = generate_data.generate_regions(args.regions)
+            customers = generate_data.generate_customers(regions, args.customers)
+            meters = generate_data.generate_water_meters(customers, args.meters_per_customer)
+            usage = generate_data.generate_water_usage(meters, customers, args.months)
+            billing = generate_data.generate_billing(customers, usage, meters)
+            self._frames = {'args': args, 'regions': regions, 'customers': customers, 'meters': meters,
+                            'usage': usage, 'billing': billing}
+        return self._frames
+
+    def dashboard_queries(self):
+        """(name, sql) for every query the dashboard issues on its default render, named by call site"""
+        if self._dashboard_queries is None:
+            self._dashboard_queries = capture_dashboard_queries(self.session)
+        return self._dashboard_queries
+
+    def close(self):
+        self.con.close()
+
+
+class DatasetCache:
+    """Datasets built on first use and kept for the whole run"""
+
+    def __init__(self, root):
+        self.root = root
+        self.datasets = {}
+
+    def get(self, scale_factor):
+        if scale_factor not in self.datasets:
+            self.datasets[scale_factor] = Dataset(scale_factor, self.root)
+        return self.datasets[scale_factor]
+
+    def close(self):
+        for dataset in self.datasets.values():
+            dataset.close()
+
+
+class RecordingSession:
+    """Snowpark-session stand-in handed to the dashboard: forwards to a LocalSession and records each query"""
+
+    def __init__(self, session):
+        self.session = session
+        self.queries = []
+
+    def sql(self, query):
+        self.queries.append((query_name(query), query))
+        return self.session.sql(query)
+
+
+def query_name(query):
+    """Name of a dashboard query that survives edits elsewhere in the app: its first table and a hash of its text"""
+    text = ' '.join(query.split())
+    table = re.search(r'\bFROM\s+(?:\w+\.)*(\w+)', text, re.IGNORECASE)
+    return f"{table.group(1).lower() if table else 'query'}-{hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]}"
+
+
+@contextlib.contextmanager
+def snowpark_context(session):
+    """Make `from snowflake.snowpark.context import get_active_session` return session"""
+    names = ['snowflake', 'snowflake.snowpark', 'snowflake.snowpark.context']
+    saved = {name: sys.modules.get(name) for name in names}
+    modules = {}
+    for name in names:
+        module = types.ModuleType(name)
+        module.__spec__ = importlib.machinery.ModuleSpec(name, None)  # find_spec() must see a real module
+        module.__path__ = []
+        modules[name] = module
+    modules['snowflake'].snowpark = modules['snowflake.snowpark']
+    modules['snowflake.snowpark'].context = modules['snowflake.snowpark.context']
+    modules['snowflake.snowpark.context'].get_active_session = lambda: session
+    sys.modules.update(modules)
+    try:
+        yield
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def capture_dashboard_queries(session, timeout=120):
+    """Run the dashboard once headless against session and return its distinct queries in issue order"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    recorder = RecordingSession(session)
+    st.cache_resource.clear()  # init_connection() must hand out this run's session
+    st.cache_data.clear()
+    cwd = os.getcwd()
+    os.chdir(REPO_ROOT)  # styles.css resolves like `streamlit run app/streamlit_app.py`
+    try:
+        with snowpark_context(recorder):
+            app = AppTest.from_file(APP_FILE, default_timeout=timeout)
+            app.run()
+    finally:
+        os.chdir(cwd)
+        st.cache_resource.clear()
+        st.cache_data.clear()
+    if app.exception:
+        raise RuntimeError(f'Dashboard raised: {app.exception[0].value}')
+
+    queries, seen = [], set()
+    for name, query in recorder.queries:
+        if query in seen:
+            continue
+        seen.add(query)
+        repeats = sum(existing == name or existing.startswith(f'{name}-') for existing, _ in queries)
+        queries.append((f'{name}-{repeats + 1}' if repeats else name, query))
+    return queries
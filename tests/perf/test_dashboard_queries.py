@@ -0,0 +1,13 @@
+"""Every query app/streamlit_app.py issues on its default render, named by its first table and a hash of its SQL"""
+
+import pytest
+
+UDTF_CALL = 'TABLE(SIO_DB.ML_ANALYTICS.'
+
+
+def test_dashboard_query(timed, dataset, dashboard_query):
+    name, query = dashboard_query
+    if UDTF_CALL in query.upper().replace(' ', ''):
+        pytest.skip('calls a Snowflake UDTF; its handler is timed in test_ml_handlers.py')
+    rows = timed(lambda: dataset.session.sql(query).to_pandas())
+    assert rows is not None
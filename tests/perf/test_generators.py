@@ -0,0 +1,24 @@
+"""Each generate_data.py generator at every scale factor, on inputs from the upstream generators"""
+
+import pytest
+
+import generate_data
+
+GENERATORS = {
+    'regions': lambda frames: generate_data.generate_regions(frames['args'].regions),
+    'water_sources': lambda frames: generate_data.generate_water_sources(frames['regions']),
+    'customers': lambda frames: generate_data.generate_customers(frames['regions'], frames['args'].customers),
+    'water_meters': lambda frames: generate_data.generate_water_meters(frames['customers'], frames['args'].meters_per_customer),
+    'water_usage': lambda frames: generate_data.generate_water_usage(frames['meters'], frames['customers'], frames['args'].months),
+    'billing': lambda frames: generate_data.generate_billing(frames['customers'], frames['usage'], frames['meters']),
+    'payments': lambda frames: generate_data.generate_payments(frames['billing'], frames['customers'],
+                                                               *frames['args'].payment_config, seed=frames['args'].seed),
+    'weather_data': lambda frames: generate_data.generate_weather_data(frames['regions'], months=frames['args'].months,
+                                                                       seed=frames['args'].seed)
+}
+
+
+@pytest.mark.parametrize('table', GENERATORS)
+def test_generator(timed, dataset, table):
+    df = timed(GENERATORS[table], dataset.frames())
+    assert len(df) > 0
@@ -0,0 +1,67 @@
+"""
+The Python handlers from cortex/*.sql, run against the local session exactly as Snowflake imports them
+ANALYZE_REGIONAL_EFFICIENCY has no Python handler: it is a SQL function over REGIONAL_EFFICIENCY_DAILY, so its
+body is timed per grain, along with the incremental score refresh (data_engineering/regional_efficiency.py)
+that fills that table. SIMULATE_RESERVOIR_DEPLETION is timed through its module, on the rows its SQL body reads.
+"""
+
+import re
+
+import pandas as pd
+import pytest
+
+import feature_store
+import regional_efficiency
+import reservoir_simulation
+from sql_handlers import handler_source, load_handler
+
+FUNCTIONS_FILE = 'cortex/create_ml_functions.sql'
+PROCEDURE_FILE = 'cortex/create_ml_anomaly_procedure.sql'
+REFRESH_DAYS = 30
+
+
+@pytest.fixture(scope='module')
+def predict_demand():
+    return load_handler(FUNCTIONS_FILE, 'PREDICT_WATER_DEMAND')['predict_demand']
+
+
+@pytest.fixture(scope='module')
+def analyze_anomalies():
+    return load_handler(PROCEDURE_FILE, 'ANALYZE_WATER_USAGE_ANOMALIES')['analyze_anomalies']
+
+
+def efficiency_query(grain, as_of='NULL'):
+    """Body of the ANALYZE_REGIONAL_EFFICIENCY SQL function with its arguments bound"""
+    body = handler_source(FUNCTIONS_FILE, 'ANALYZE_REGIONAL_EFFICIENCY')
+    return re.sub(r'\bAS_OF\b', as_of, re.sub(r'\bGRAIN_INPUT\b', f"'{grain}'", body))
+
+
+def test_predict_demand(timed, dataset, predict_demand):
+    forecast = timed(predict_demand, dataset.session, 1, 30)
+    assert (forecast['CONFIDENCE_LEVEL'] != 'ERROR').all(), forecast['RECOMMENDATION'].iloc[0]
+
+
+def test_analyze_anomalies(timed, dataset, analyze_anomalies):
+    # SNOWFLAKE.CORTEX.COMPLETE fails locally and the handler falls back to its technical explanation
+    summary = timed(analyze_anomalies, dataset.session, 1, 6)
+    assert summary.startswith('ML Water Usage Anomaly Analysis Complete'), summary
+
+
+@pytest.mark.parametrize('grain', regional_efficiency.GRAINS)
+def test_analyze_efficiency(timed, dataset, grain):
+    query = efficiency_query(grain)
+    scores = timed(lambda: dataset.session.sql(query).to_pandas())
+    assert len(scores) > 0 and (scores['GRAIN'] == grain).all()
+
+
+def test_refresh_efficiency_scores(timed, dataset):
+    through = pd.Timestamp(feature_store.watermark(dataset.session, feature_store.METER_TABLE))
+    rebuild_from = (through - pd.Timedelta(days=REFRESH_DAYS - 1)).date()
+    stats = timed(regional_efficiency.refresh_scores, dataset.session, through.date(), rebuild_from)
+    assert stats['scores']['rows'] > 0
+
+
+def test_simulate_reservoirs(timed, dataset):
+    sources = dataset.session.sql(reservoir_simulation.SOURCES_SQL).to_pandas()
+    summary = timed(reservoir_simulation.simulate_regions, sources)
+    assert len(summary) == sources['REGION_ID'].nunique()
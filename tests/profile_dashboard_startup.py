@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Startup profile for app/streamlit_app.py
+Runs the dashboard script headless (streamlit.testing AppTest) once cold and --runs times warm in this process,
+and reports the STARTUP_PROFILE it records: import time, time to first paint (header rendered), region
+dimension load and the full script. Without a Snowflake connection the queries fail fast, so first paint
+and imports are the numbers to watch offline.
+  python tests/profile_dashboard_startup.py --runs 5 --max-first-paint-ms 1000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_FILE = os.path.join(REPO_ROOT, 'app', 'streamlit_app.py')
+
+
+def profile_run(app):
+    """Run the script once; returns its STARTUP_PROFILE plus wall time in ms"""
+    start = time.perf_counter()
+    app.run()
+    profile = dict(app.session_state['startup_profile'])
+    profile['wall_ms'] = (time.perf_counter() - start) * 1000
+    return profile
+
+
+def main():
+    """Profile one cold and several warm runs and check warm first paint"""
+    parser = argparse.ArgumentParser(description='Dashboard cold-start profile')
+    parser.add_argument('--runs', type=int, default=5, help='Warm runs after the cold one')
+    parser.add_argument('--max-first-paint-ms', type=float, default=1000, help='Fail if warm median first paint exceeds this')
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("SIO DASHBOARD - STARTUP PROFILE")
+    print("="*80)
+
+    os.chdir(REPO_ROOT)  # styles.css and relative paths resolve like `streamlit run app/streamlit_app.py`
+    app = AppTest.from_file(APP_FILE, default_timeout=args.timeout)
+
+    cold = profile_run(app)
+    warm = [profile_run(app) for _ in range(args.runs)]
+    if app.exception:
+        print(f"❌ Script raised: {app.exception[0].value}")
+        sys.exit(1)
+
+    stages = [name for name in cold if name.endswith('_ms')]
+    print(f"\n{'Stage':<16} {'Cold ms':>10} {'Warm median ms':>16}")
+    print("-" * 44)
+    for name in stages:
+        print(f"{name[:-3]:<16} {cold[name]:>10.1f} {np.median([run[name] for run in warm]):>16.1f}")
+
+    first_paint = float(np.median([run['first_paint_ms'] for run in warm]))
+    passed = first_paint <= args.max_first_paint_ms
+    print(f"\n{'✅' if passed else '❌'} Warm first paint {first_paint:.1f} ms (target <= {args.max_first_paint_ms:.0f} ms)")
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
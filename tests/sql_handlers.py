@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Load the Python handlers embedded in the cortex/*.sql files so they can run locally
+The code between the $$ markers is executed exactly as Snowflake would import it
+"""
+
+import os
+import re
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+OBJECT_PATTERN = r'CREATE OR REPLACE (?:FUNCTION|PROCEDURE) (?:[\w.]+\.)?{name}\s*\(.*?\$\$(.*?)\$\$'
+
+
+def handler_source(sql_file, name):
+    """Return the Python source of the FUNCTION/PROCEDURE called name in sql_file"""
+    with open(os.path.join(REPO_ROOT, sql_file), encoding='utf-8') as f:
+        text = f.read()
+    match = re.search(OBJECT_PATTERN.format(name=re.escape(name)), text, re.DOTALL | re.IGNORECASE)
+    if not match:
+        raise ValueError(f'No Python handler for {name} in {sql_file}')
+    return match.group(1)
+
+
+def load_handler(sql_file, name):
+    """Execute the handler source and return its module namespace as a dict"""
+    namespace = {'__name__': name.lower()}
+    exec(compile(handler_source(sql_file, name), f'{sql_file}:{name}', 'exec'), namespace)
+    return namespace
+
+
+class FrameSession:
+    """Minimal stand-in for a Snowpark session: session.sql(query).to_pandas() calls resolve(query)"""
+
+    def __init__(self, resolve):
+        self.resolve = resolve
+        self.queries = []
+
+    def sql(self, query):
+        self.queries.append(query)
+        session = self
+
+        class Result:
+            def to_pandas(self):
+                return session.resolve(query)
+
+            def collect(self):
+                return list(session.resolve(query).itertuples(index=False))
+
+        return Result()
@@ -4,10 +4,15 @@ Test SIO Cortex Agent
 Tests the agent's ability to handle different types of queries
 """
 
-import requests
 import os
+import sys
+import time
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from agent_client import AgentClient, AgentError  # noqa: E402
+
 # Load environment variables
 load_dotenv()
 
@@ -15,14 +20,14 @@ load_dotenv()
 SNOWFLAKE_HOST = os.getenv('SNOWFLAKE_HOST', 'your-account.snowflakecomputing.com')
 SNOWFLAKE_PAT = os.getenv('SNOWFLAKE_PAT')
 
-# Agent endpoint
-url = f"https://{SNOWFLAKE_HOST}/api/v2/databases/SNOWFLAKE_INTELLIGENCE/schemas/AGENTS/agents/SIO_IRRIGATION_AGENT:run"
+# Agent endpoint (set SIO_AGENT_URL to target tests/mock_agent_server.py instead)
+url = os.getenv(
+    'SIO_AGENT_URL',
+    f"https://{SNOWFLAKE_HOST}/api/v2/databases/SNOWFLAKE_INTELLIGENCE/schemas/AGENTS/agents/SIO_IRRIGATION_AGENT:run"
+)
 
-headers = {
-    "Authorization": f"Bearer {SNOWFLAKE_PAT}",
-    "Content-Type": "application/json",
-    "X-Snowflake-Authorization-Token-Type": "PROGRAMMATIC_ACCESS_TOKEN"
-}
+# Repeated questions are answered from the client cache (see app/agent_client.py)
+client = AgentClient(url, token=SNOWFLAKE_PAT, timeout=120)
 
 def test_query(query, description=""):
     """Send a query to the agent and display the response"""
@@ -31,34 +36,25 @@ def test_query(query, description=""):
     print(f"Query: {query}")
     print(f"{'='*80}")
     
-    payload = {
-        "messages": [
-            {
-                "role": "user",
-                "content": [{"type": "text", "text": query}]
-            }
-        ]
-    }
-    
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=120)
-        
-        if response.status_code == 200:
-            result = response.json()
-            message = result.get('message', {})
-            content = message.get('content', [])
-            
-            # Extract text response
-            for item in content:
-                if item.get('type') == 'text':
-                    print(f"\n✅ Response:\n{item.get('text', '')}")
-            
-            return True
-        else:
-            print(f"\n❌ Error {response.status_code}:")
-            print(response.text)
-            return False
-    
+        start = time.perf_counter()
+        message, cached = client.ask(query)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        content = message.get('content', [])
+
+        # Extract text response
+        for item in content:
+            if item.get('type') == 'text':
+                print(f"\n✅ Response:\n{item.get('text', '')}")
+        print(f"\n⏱️  {elapsed_ms:.0f} ms ({'cache hit' if cached else 'agent'})")
+
+        return True
+
+    except AgentError as e:
+        print(f"\n❌ Error {e.status_code}:")
+        print(e.text)
+        return False
+
     except Exception as e:
         print(f"\n❌ Exception: {str(e)}")
         return False
@@ -104,6 +100,10 @@ def main():
     
     print(f"\nTotal: {passed}/{total} tests passed")
     
+    metrics = client.metrics()
+    print(f"\nCache: {metrics['hits'] + metrics['coalesced']}/{metrics['requests']} hits "
+          f"({metrics['hit_rate']:.0%}), {metrics['entries']} cached answers")
+
     if passed == total:
         print("\n🎉 All tests passed!")
     else:
@@ -98,6 +98,18 @@ END AS RESULT
 FROM WATER_USAGE
 WHERE VOLUME_M3 < 0;
 
+-- Check for duplicate readings (one reading per meter per day; see data_engineering/ingest_usage.sql)
+SELECT CASE 
+    WHEN COUNT(*) = 0 THEN '✅ PASS: No duplicate meter-day readings'
+    ELSE CONCAT('❌ FAIL: ', COUNT(*), ' meter-days with duplicate readings found')
+END AS RESULT
+FROM (
+    SELECT METER_ID, READING_DATE
+    FROM WATER_USAGE
+    GROUP BY METER_ID, READING_DATE
+    HAVING COUNT(*) > 1
+);
+
 -- ============================================================================
 -- TEST 4: VIEWS
 -- ============================================================================